@@ -0,0 +1,95 @@
+"""Cost of building the action group schema and the invoke payload.
+
+Compares the first read of ``ActionGroups.actionGroups`` (signature
+inspection and docstring parsing for every tool) and of
+``InlineAgent.get_invoke_params()`` with the cached reads that every later
+invocation and return-of-control round trip pays.
+
+    python benchmarks/bench_action_groups.py --tools 10 50 200
+"""
+
+import argparse
+import timeit
+
+from InlineAgent.action_group import ActionGroup, ActionGroups
+from InlineAgent.agent import InlineAgent
+
+
+def make_tool(index: int):
+    def tool(city: str, days: int, metric: bool = True) -> str:
+        return f"{city} {days} {metric}"
+
+    tool.__name__ = f"lookup_{index}"
+    tool.__doc__ = f"""Look up record {index} for a city.
+
+    Args:
+        city: The city, e.g., San Francisco
+        days: Number of days to look back
+        metric: Whether to use metric units
+    """
+    return tool
+
+
+def make_action_groups(tools: int) -> ActionGroups:
+    return ActionGroups(
+        action_groups=[
+            ActionGroup(
+                name="BenchmarkActionGroup",
+                tools=[make_tool(index) for index in range(tools)],
+                argument_key="Args:",
+                test=True,
+            )
+        ]
+    )
+
+
+def make_agent(tools: int) -> InlineAgent:
+    collaborator = InlineAgent(
+        foundation_model="BENCHMARK",
+        instruction="You are a benchmark collaborator.",
+        agent_name="BenchmarkCollaborator",
+        action_groups=make_action_groups(tools),
+    )
+    return InlineAgent(
+        foundation_model="BENCHMARK",
+        instruction="You are a benchmark supervisor.",
+        agent_name="BenchmarkAgent",
+        action_groups=make_action_groups(tools),
+        agent_collaboration="SUPERVISOR",
+        collaborators=[collaborator],
+    )
+
+
+def per_call_us(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tools", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--number", type=int, default=1000)
+    args = parser.parse_args()
+
+    print(
+        f"{'tools':>6} {'schema build (us)':>18} {'schema cached (us)':>19}"
+        f" {'payload build (us)':>19} {'payload cached (us)':>20}"
+    )
+    for tools in args.tools:
+        schema_build = per_call_us(
+            lambda: make_action_groups(tools).actionGroups, number=10
+        )
+        action_groups = make_action_groups(tools)
+        schema_cached = per_call_us(lambda: action_groups.actionGroups, args.number)
+
+        agent = make_agent(tools)
+        payload_build = per_call_us(agent._build_invoke_params, args.number)
+        payload_cached = per_call_us(agent.get_invoke_params, args.number)
+
+        print(
+            f"{tools:>6} {schema_build:>18.1f} {schema_cached:>19.2f}"
+            f" {payload_build:>19.2f} {payload_cached:>20.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Concurrency scaling of InlineAgent.invoke on a single event loop.
+
+Every simulated Bedrock call blocks its thread for ``--latency`` seconds
+before the response and before each streamed event, the way boto3 blocks
+on the network. With a non-blocking transport the wall time of N
+concurrent invocations should stay close to the time of one.
+
+    python benchmarks/bench_concurrency.py --concurrency 1 10 100 300
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+from InlineAgent.agent import InlineAgent
+from InlineAgent.agent.transport import AsyncTransport
+from InlineAgent.testing import FakeRuntimeClient, chunk
+
+
+async def run(concurrency: int, latency: float, chunks: int, workers: int) -> float:
+    transport = AsyncTransport(max_workers=workers)
+    agent = InlineAgent(
+        foundation_model="BENCHMARK",
+        instruction="You are a benchmark agent.",
+        agent_name="BenchmarkAgent",
+        runtime_client=FakeRuntimeClient(
+            script=[[chunk("token ")] * chunks],
+            latency=latency,
+            event_latency=latency,
+            repeat=True,
+        ),
+        transport=transport,
+    )
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(
+            *[agent.invoke(input_text="Hi") for _ in range(concurrency)]
+        )
+    elapsed = time.perf_counter() - start
+    transport.shutdown()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 100, 300])
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--chunks", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=512)
+    args = parser.parse_args()
+
+    serial = (args.chunks + 1) * args.latency
+    print(f"{'concurrency':>12} {'wall (s)':>10} {'speedup':>10}")
+    for concurrency in args.concurrency:
+        elapsed = asyncio.run(
+            run(concurrency, args.latency, args.chunks, args.workers)
+        )
+        speedup = concurrency * serial / elapsed
+        print(f"{concurrency:>12} {elapsed:>10.3f} {speedup:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
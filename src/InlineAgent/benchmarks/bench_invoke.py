@@ -0,0 +1,127 @@
+"""Client-side CPU time and memory of one InlineAgent.invoke.
+
+Runs ``--invocations`` sequential invocations against the offline
+FakeRuntimeClient with no simulated latency, so everything measured is SDK
+work: building the request, walking the EventStream, parsing traces,
+running return of control and formatting output. Each scenario runs with
+the console sink (stdout redirected to /dev/null) and with ``NullSink``,
+and reports CPU time per invoke, the peak traced allocation of one invoke
+and the memory still held after all of them (a steadily growing number
+points at a leak).
+
+    python benchmarks/bench_invoke.py --invocations 500
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import os
+import time
+import tracemalloc
+
+from InlineAgent.action_group import ActionGroup
+from InlineAgent.agent import InlineAgent
+from InlineAgent.output import CONSOLE_SINK, NULL_SINK
+from InlineAgent.testing import FakeRuntimeClient, answer_turn, tool_turn
+
+ANSWER = "Seattle is sunny with a high of 70 degrees. " * 10
+
+
+def get_forecast(city: str, days: int) -> str:
+    """Get the weather forecast for a city.
+
+    Args:
+        city: The city, e.g., Seattle
+        days: Number of days to forecast
+    """
+    return f"{city} is sunny for {days} days."
+
+
+SINKS = {"console": CONSOLE_SINK, "null": NULL_SINK}
+
+SCENARIOS = {
+    # name: (turns, enable_trace)
+    "answer": ([answer_turn(ANSWER, chunks=20)], False),
+    "answer + trace": ([answer_turn(ANSWER, chunks=20)], True),
+    "return of control": (
+        [
+            tool_turn(
+                *[
+                    ("WeatherActionGroup", "get_forecast", {"city": "Rome", "days": n})
+                    for n in range(4)
+                ]
+            ),
+            answer_turn(ANSWER, chunks=20),
+        ],
+        True,
+    ),
+}
+
+
+def create_agent(turns, sink) -> InlineAgent:
+    return InlineAgent(
+        foundation_model="BENCHMARK",
+        instruction="You are a benchmark agent.",
+        agent_name="BenchmarkAgent",
+        action_groups=[
+            ActionGroup(
+                name="WeatherActionGroup", tools=[get_forecast], argument_key="Args:"
+            )
+        ],
+        runtime_client=FakeRuntimeClient(script=turns, repeat=True, history=0),
+        sink=sink,
+    )
+
+
+async def run(turns, enable_trace: bool, invocations: int, sink):
+    agent = create_agent(turns, sink)
+    # Warm up caches and imports before measuring.
+    await agent.invoke(input_text="Hi", enable_trace=enable_trace)
+
+    gc.collect()
+    start = time.process_time()
+    for _ in range(invocations):
+        await agent.invoke(input_text="Hi", enable_trace=enable_trace)
+    cpu = (time.process_time() - start) / invocations
+
+    gc.collect()
+    tracemalloc.start()
+    await agent.invoke(input_text="Hi", enable_trace=enable_trace)
+    _, peak = tracemalloc.get_traced_memory()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for _ in range(invocations):
+        await agent.invoke(input_text="Hi", enable_trace=enable_trace)
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu, peak, retained - baseline
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invocations", type=int, default=200)
+    args = parser.parse_args()
+
+    print(
+        f"{'scenario':>18} {'sink':>8} {'cpu/invoke (ms)':>16} {'peak (KiB)':>11} "
+        f"{'retained (KiB)':>15}"
+    )
+    for name, (turns, enable_trace) in SCENARIOS.items():
+        for sink_name, sink in SINKS.items():
+            # The console sink prints the answer and traces; keep the table
+            # readable.
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(
+                devnull
+            ):
+                cpu, peak, retained = asyncio.run(
+                    run(turns, enable_trace, args.invocations, sink)
+                )
+            print(
+                f"{name:>18} {sink_name:>8} {cpu * 1000:>16.3f} "
+                f"{peak / 1024:>11.1f} {retained / 1024:>15.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
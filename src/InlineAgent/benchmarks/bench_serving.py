@@ -0,0 +1,105 @@
+"""Load test for the AgentServer HTTP layer.
+
+Fires ``--requests`` POST /invoke calls with ``--concurrency`` clients in
+flight and reports latency percentiles, throughput and how many requests
+admission control turned away (503 queue full, 429 tenant cap). By default
+the server runs in-process on a simulated runtime that blocks for
+``--latency`` seconds per call; pass ``--url`` to load a running server.
+
+    python benchmarks/bench_serving.py --concurrency 10 100 500 --max-queue 128
+"""
+
+import argparse
+import asyncio
+import collections
+import contextlib
+import io
+import logging
+import statistics
+import time
+
+import httpx
+
+from InlineAgent.agent import InlineAgent
+from InlineAgent.serving import AgentServer
+from InlineAgent.testing import FakeRuntimeClient, chunk
+
+
+def create_app(args) -> AgentServer:
+    agent = InlineAgent(
+        foundation_model="BENCHMARK",
+        instruction="You are a benchmark agent.",
+        agent_name="BenchmarkAgent",
+        runtime_client=FakeRuntimeClient(
+            script=[[chunk("token")]], latency=args.latency, repeat=True, history=0
+        ),
+    )
+    return AgentServer(
+        agent=agent,
+        max_in_flight=args.max_in_flight,
+        max_queue=args.max_queue,
+        max_per_tenant=args.max_per_tenant,
+        enable_trace=False,
+    )
+
+
+async def run(concurrency: int, args) -> str:
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=None)
+    else:
+        transport = httpx.ASGITransport(app=create_app(args))
+        client = httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        )
+
+    latencies = list()
+    statuses = collections.Counter()
+    pending = iter(range(args.requests))
+
+    async def worker(n: int):
+        headers = {"x-tenant-id": f"tenant-{n % args.tenants}"}
+        for _ in pending:
+            start = time.perf_counter()
+            response = await client.post("/invoke", content=b"Hi", headers=headers)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+
+    start = time.perf_counter()
+    async with client:
+        await asyncio.gather(*[worker(n) for n in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return (
+        f"{concurrency:>12} {args.requests / elapsed:>10.1f} "
+        f"{quantiles[49] * 1000:>9.1f} {quantiles[98] * 1000:>9.1f} "
+        f"{statuses[200]:>6} {statuses[503]:>6} {statuses[429]:>6}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    parser.add_argument("--max-queue", type=int, default=256)
+    parser.add_argument("--max-per-tenant", type=int, default=None)
+    parser.add_argument("--tenants", type=int, default=4)
+    parser.add_argument("--url", default=None)
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    print(
+        f"{'concurrency':>12} {'req/s':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+        f"{'200':>6} {'503':>6} {'429':>6}"
+    )
+    for concurrency in args.concurrency:
+        # The agent prints each session id; keep the table readable.
+        with contextlib.redirect_stdout(io.StringIO()):
+            row = asyncio.run(run(concurrency, args))
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
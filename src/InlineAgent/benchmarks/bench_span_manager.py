@@ -0,0 +1,118 @@
+"""Per-event overhead of the SpanManager span registry.
+
+Drives ``SpanManager`` through the span operations of one agent turn, one
+per trace event: agent span, then for each model call an L2/L3 pair, a tool
+L3 span opened and closed, and finally ``end_all_spans``. The same span
+starts and ends are also timed on the bare tracer, so the difference is
+what the registry itself costs per event.
+
+    python benchmarks/bench_span_manager.py --turns 2000 --steps 4
+"""
+
+import argparse
+import time
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.trace import StatusCode
+
+from InlineAgent.observability.span_manager import SpanManager
+
+CALLER_CHAIN = [
+    {"agentAliasArn": "arn:aws:bedrock:us-east-1:123456789012:agent-alias/AGENT/ALIAS"}
+]
+FAMILY = "00000000-0000-0000-0000-000000000000"
+
+
+def registry_turn(session_id: str, steps: int) -> int:
+    span_manager = SpanManager()
+    span_manager.create_agent_span_return(
+        agent_session_id=session_id,
+        caller_chain=CALLER_CHAIN,
+        attributes={"input.value": "Hi"},
+        name="Agent AGENT:ALIAS",
+    )
+    for step in range(steps):
+        trace_id = f"{FAMILY}-{step}"
+        span_manager.assign_new_l2_return(
+            agent_session_id=session_id,
+            caller_chain=CALLER_CHAIN,
+            trace_id=trace_id,
+            l2_attributes={},
+            l3_attributes={"input.value": "prompt"},
+            l2_name="Orchestration",
+            l3_name="LLM",
+        )
+        span_manager.delete_l3_span(
+            agent_session_id=session_id,
+            collab_agent_trace_id="AGENT:ALIAS",
+            trace_id=trace_id,
+        )
+        span_manager.assign_new_l3_return(
+            agent_session_id=session_id,
+            collab_agent_trace_id="AGENT:ALIAS",
+            trace_id=trace_id,
+            attributes={"tool.name": "get_forecast"},
+            name="Tool",
+        )
+        span_manager.delete_l3_span(
+            agent_session_id=session_id,
+            collab_agent_trace_id="AGENT:ALIAS",
+            trace_id=trace_id,
+        )
+    span_manager.end_all_spans(status_code=StatusCode.OK)
+    return 2 + 4 * steps
+
+
+def bare_turn(session_id: str, steps: int) -> int:
+    tracer = trace.get_tracer("bench")
+    agent = tracer.start_span("Agent AGENT:ALIAS", attributes={"input.value": "Hi"})
+    for _ in range(steps):
+        l2 = tracer.start_span(
+            "Orchestration", context=trace.set_span_in_context(agent)
+        )
+        l3 = tracer.start_span(
+            "LLM",
+            attributes={"input.value": "prompt"},
+            context=trace.set_span_in_context(l2),
+        )
+        l3.end()
+        tool = tracer.start_span(
+            "Tool",
+            attributes={"tool.name": "get_forecast"},
+            context=trace.set_span_in_context(l2),
+        )
+        tool.end()
+        l2.end()
+    agent.end()
+    return 2 + 4 * steps
+
+
+def measure(turn, turns: int, steps: int) -> float:
+    events = 0
+    start = time.process_time()
+    for n in range(turns):
+        events += turn(f"S{n}", steps)
+    return (time.process_time() - start) / events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--steps", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'tracer':>8} {'registry (us)':>14} {'bare (us)':>10} {'overhead':>10}")
+    for name in ("no-op", "sdk"):
+        if name == "sdk":
+            trace.set_tracer_provider(TracerProvider())
+        registry = measure(registry_turn, args.turns, args.steps)
+        bare = measure(bare_turn, args.turns, args.steps)
+        print(
+            f"{name:>8} {registry * 1e6:>14.2f} {bare * 1e6:>10.2f} "
+            f"{(registry - bare) * 1e6:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
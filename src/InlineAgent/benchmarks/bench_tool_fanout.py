@@ -0,0 +1,89 @@
+"""Return of control fan-out: wall time of one turn asking for N tool calls.
+
+The offline FakeRuntimeClient returns control for ``N`` calls of a tool
+that blocks for ``--tool-latency`` seconds (sync) or awaits it (async),
+then answers. With the calls running concurrently the turn should take
+about one tool latency regardless of N, up to ``max_tool_concurrency``.
+
+    python benchmarks/bench_tool_fanout.py --fanout 1 4 16 64 --max-concurrency 8
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import time
+
+from InlineAgent.action_group import ActionGroup
+from InlineAgent.agent import InlineAgent
+from InlineAgent.testing import FakeRuntimeClient, answer_turn, tool_turn
+
+TOOL_LATENCY = 0.05
+
+
+def get_forecast(city: str, days: int) -> str:
+    """Get the weather forecast for a city.
+
+    Args:
+        city: The city, e.g., Seattle
+        days: Number of days to forecast
+    """
+    time.sleep(TOOL_LATENCY)
+    return f"{city} is sunny for {days} days."
+
+
+async def get_forecast_async(city: str, days: int) -> str:
+    """Get the weather forecast for a city.
+
+    Args:
+        city: The city, e.g., Seattle
+        days: Number of days to forecast
+    """
+    await asyncio.sleep(TOOL_LATENCY)
+    return f"{city} is sunny for {days} days."
+
+
+async def run(fanout: int, tool, max_concurrency) -> float:
+    calls = [
+        ("WeatherActionGroup", tool.__name__, {"city": "Seattle", "days": n})
+        for n in range(fanout)
+    ]
+    agent = InlineAgent(
+        foundation_model="BENCHMARK",
+        instruction="You are a benchmark agent.",
+        agent_name="BenchmarkAgent",
+        action_groups=[
+            ActionGroup(name="WeatherActionGroup", tools=[tool], argument_key="Args:")
+        ],
+        runtime_client=FakeRuntimeClient(
+            script=[tool_turn(*calls), answer_turn("Sunny.")], repeat=True
+        ),
+        max_tool_concurrency=max_concurrency,
+    )
+
+    start = time.perf_counter()
+    await agent.invoke(input_text="Hi")
+    return time.perf_counter() - start
+
+
+def main():
+    global TOOL_LATENCY
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fanout", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--tool-latency", type=float, default=TOOL_LATENCY)
+    parser.add_argument("--max-concurrency", type=int, default=None)
+    args = parser.parse_args()
+    TOOL_LATENCY = args.tool_latency
+
+    print(f"{'fanout':>8} {'tool':>6} {'wall (s)':>10} {'speedup':>10}")
+    for fanout in args.fanout:
+        for name, tool in (("sync", get_forecast), ("async", get_forecast_async)):
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                elapsed = asyncio.run(run(fanout, tool, args.max_concurrency))
+            speedup = fanout * TOOL_LATENCY / elapsed
+            print(f"{fanout:>8} {name:>6} {elapsed:>10.3f} {speedup:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Cost of processing one trace event on each trace path.
+
+Replays a turn shaped like a real one (four model calls each running an
+action group, then the final answer) from the offline FakeRuntimeClient
+and reports CPU time per trace event for:
+
+- ``usage``: token accounting only, what ``InlineAgent.stream`` does;
+- ``console``: ``Trace.parse_trace``, what ``InlineAgent.invoke`` prints;
+- ``observe``: the ``observe`` decorator with OpenTelemetry spans off;
+- ``observe + otel``: the same with spans on, exported in batches to an
+  in-memory exporter.
+
+Pass ``--recording`` to replay real payloads recorded with
+``INLINE_AGENT_RECORD`` instead.
+
+    python benchmarks/bench_traces.py --invocations 500
+"""
+
+import argparse
+import contextlib
+import os
+import time
+from typing import Dict, List
+
+from opentelemetry import trace as otel_trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from InlineAgent.observability import Trace, agent_instrument, observe, process
+from InlineAgent.recording import SessionRecorder
+from InlineAgent.testing import (
+    FakeRuntimeClient,
+    action_group_invocation,
+    answer_turn,
+    model_invocation,
+)
+
+# Four model calls each running one Lambda action group, then the answer.
+TURN = [
+    event
+    for n in range(4)
+    for event in [
+        *model_invocation(
+            f"FAKETRACE-{n}", "You are a weather agent.", "Calling a tool.", 100, 20
+        ),
+        *action_group_invocation(
+            f"FAKETRACE-{n}",
+            "WeatherActionGroup",
+            "get_forecast",
+            {"city": "Seattle", "days": n},
+            output="Sunny.",
+        ),
+    ]
+] + answer_turn("Seattle is sunny. " * 20, chunks=10, trace_id="FAKETRACE-4")
+
+
+def usage(client: FakeRuntimeClient, session_id: str):
+    for event in client.invoke_agent(sessionId=session_id)["completion"]:
+        if "trace" in event:
+            Trace.parse_usage(trace=event["trace"]["trace"])
+
+
+def console(client: FakeRuntimeClient, session_id: str):
+    for event in client.invoke_agent(sessionId=session_id)["completion"]:
+        if "trace" in event:
+            Trace.parse_trace(trace=event["trace"]["trace"])
+
+
+def observed(client: FakeRuntimeClient, session_id: str):
+    @observe(show_traces=False)
+    def invoke_agent(inputText: str, sessionId: str, **kwargs):
+        return client.invoke_agent(inputText=inputText, sessionId=sessionId, **kwargs)
+
+    invoke_agent(
+        inputText="Hi",
+        sessionId=session_id,
+        agentId="FAKEAGENT",
+        agentAliasId="FAKEALIAS",
+    )
+
+
+def set_otel(enabled: bool):
+    agent_instrument.config.PRODUCE_BEDROCK_OTEL_TRACES = enabled
+    process.config.PRODUCE_BEDROCK_OTEL_TRACES = enabled
+
+
+def count_traces(script: List[List[Dict]], invocations: int) -> int:
+    per_turn = [sum(1 for event in turn if "trace" in event) for turn in script]
+    return sum(per_turn[n % len(script)] for n in range(invocations))
+
+
+def measure(path, script: List[List[Dict]], invocations: int) -> float:
+    client = FakeRuntimeClient(script=script, repeat=True, history=0)
+    start = time.process_time()
+    for n in range(invocations):
+        path(client, f"S{n}")
+    return (time.process_time() - start) / count_traces(script, invocations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invocations", type=int, default=200)
+    parser.add_argument(
+        "--recording", help="replay calls saved with INLINE_AGENT_RECORD instead"
+    )
+    args = parser.parse_args()
+
+    script = [TURN]
+    if args.recording:
+        script = [
+            [event for _, event in record["events"]]
+            for record in SessionRecorder.read(args.recording)
+        ]
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    otel_trace.set_tracer_provider(provider)
+
+    print(f"{'path':>16} {'cpu/event (us)':>15}")
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        set_otel(False)
+        results = {
+            "usage": measure(usage, script, args.invocations),
+            "console": measure(console, script, args.invocations),
+            "observe": measure(observed, script, args.invocations),
+        }
+        set_otel(True)
+        results["observe + otel"] = measure(observed, script, args.invocations)
+        flush = time.process_time()
+        provider.force_flush()
+        results["observe + otel"] += (
+            time.process_time() - flush
+        ) / count_traces(script, args.invocations)
+
+    for name, seconds in results.items():
+        print(f"{name:>16} {seconds * 1e6:>15.1f}")
+    traces = count_traces(script, args.invocations)
+    spans = len(exporter.get_finished_spans())
+    print(f"{traces} trace events and {spans} spans per path")
+
+
+if __name__ == "__main__":
+    main()
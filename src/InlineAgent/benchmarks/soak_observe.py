@@ -0,0 +1,84 @@
+"""Memory of a long-running process whose ``observe`` invocations fail.
+
+Runs thousands of invocations through ``observe`` with OpenTelemetry spans
+on, each broken off mid-stream: half by an exception from the event stream,
+half by cancellation, the way an abandoned client request ends. Every
+``--report`` invocations it prints the traced Python memory and the spans
+still open, which should both stay flat.
+
+    python benchmarks/soak_observe.py --invocations 5000
+"""
+
+import argparse
+import asyncio
+import tracemalloc
+
+from opentelemetry import trace as otel_trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+
+from InlineAgent.observability import agent_instrument, observe, process
+from InlineAgent.observability.span_manager import SpanModel
+from InlineAgent.testing import (
+    FakeRuntimeClient,
+    action_group_invocation,
+    model_invocation,
+)
+
+TURN = [
+    *model_invocation("T-0", "prompt", "Calling a tool.", 100, 20),
+    *action_group_invocation("T-0", "Weather", "get_forecast", {"city": "Rome"}),
+    *model_invocation("T-1", "prompt", "Thinking.", 100, 20)[:1],
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--invocations", type=int, default=5000)
+    parser.add_argument("--report", type=int, default=500)
+    args = parser.parse_args()
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(BatchSpanProcessor(exporter))
+    otel_trace.set_tracer_provider(provider)
+    agent_instrument.config.PRODUCE_BEDROCK_OTEL_TRACES = True
+    process.config.PRODUCE_BEDROCK_OTEL_TRACES = True
+
+    client = FakeRuntimeClient(
+        script=[
+            TURN + [RuntimeError("stream broke")],
+            TURN + [asyncio.CancelledError()],
+        ],
+        repeat=True,
+        history=1,
+    )
+
+    @observe(show_traces=False)
+    def invoke_agent(inputText: str, sessionId: str, **kwargs):
+        return client.invoke_agent(inputText=inputText, sessionId=sessionId, **kwargs)
+
+    tracemalloc.start()
+    print(f"{'invocations':>12} {'memory (KiB)':>13} {'open spans':>11}")
+    for n in range(1, args.invocations + 1):
+        try:
+            invoke_agent(
+                inputText="Hi",
+                sessionId=f"session-{n}",
+                agentId="AGENT",
+                agentAliasId="ALIAS",
+            )
+        except (Exception, asyncio.CancelledError):
+            pass
+        if n % args.report == 0:
+            provider.force_flush()
+            exporter.clear()
+            current, _ = tracemalloc.get_traced_memory()
+            print(f"{n:>12} {current / 1024:>13.0f} {SpanModel.live():>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
 from InlineAgent.agent import InlineAgent
-from flask import Flask, request, jsonify
-import asyncio
+from InlineAgent.serving import AgentServer, serve
 
 instruction = """
 You are a friendly assistant that is responsible manipulating a JSON data structure.
@@ -322,55 +321,9 @@ agent = InlineAgent(
     profile="hackathon",
 )
 
-# Initialize Flask app
-app = Flask(__name__)
+# Serve the agent over HTTP. POST /invoke keeps accepting raw text and
+# answering with the agent's text; POST /stream answers with Server-Sent Events.
+app = AgentServer(agent=agent)
 
-@app.route('/invoke', methods=['POST'])
-def invoke_agent():
-    """
-    Invoke the Icehouse agent with user input text and return the result.
-    Expects raw text in the request body.
-    """
-    try:
-        # Get input text from request body as raw string
-        input_text = request.get_data(as_text=True)
-        if not input_text or input_text.strip() == '':
-            return jsonify({'error': 'Missing input text in request body'}), 400
-        
-        # Invoke the agent with the provided input text
-        result = asyncio.run(agent.invoke(input_text=input_text))
-
-        return result
-    except Exception as e:
-        return jsonify({
-            'error': f'Agent invocation failed: {str(e)}',
-            'status': 'error'
-        }), 500
-
-@app.route('/health', methods=['GET'])
-def health_check():
-    """
-    Health check endpoint.
-    """
-    return jsonify({
-        'status': 'healthy',
-        'agent': 'Icehouse Data Structure Agent'
-    })
-
-@app.route('/', methods=['GET'])
-def root():
-    """
-    Root endpoint with API information.
-    """
-    return jsonify({
-        'message': 'Icehouse Data Structure Agent API',
-        'endpoints': {
-            'POST /invoke': 'Invoke the agent with input text (raw text in request body)',
-            'GET /health': 'Health check',
-            'GET /': 'API information'
-        }
-    })
-
-if __name__ == '__main__':
-    # Run the Flask development server
-    app.run(host='0.0.0.0', port=8000, debug=True)
+if __name__ == "__main__":
+    serve(app, host="0.0.0.0", port=8000)
@@ -6,7 +6,7 @@ allowing users to create, manage, and interact with AI agents powered by
 Amazon Bedrock.
 """
 
-from .action_group import ActionGroup, ActionGroups
+from .action_group import ActionGroup, ActionGroups, cache_result
 from .agent import InlineAgent, CollaboratorAgent, require_confirmation
 from .knowledge_base import knowledgebase_plugin
 from .constants import USER_INPUT_ACTION_GROUP_NAME, TraceColor, Level
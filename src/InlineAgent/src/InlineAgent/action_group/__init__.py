@@ -1,3 +1,17 @@
 from .action_group import ActionGroup, ActionGroups, ActionGroupBuilder
+from .decoders import FunctionDecoder, ParameterDecodeError
+from .tool_cache import ToolCache, cache_result
+from .tool_execution import ToolExecution, ToolPools, execute_in
 
-__all__ = ["ActionGroup", "ActionGroups", "ActionGroupBuilder"]
+__all__ = [
+    "ActionGroup",
+    "ActionGroups",
+    "ActionGroupBuilder",
+    "FunctionDecoder",
+    "ParameterDecodeError",
+    "ToolCache",
+    "cache_result",
+    "ToolExecution",
+    "ToolPools",
+    "execute_in",
+]
@@ -17,6 +17,9 @@ from inspect import Parameter, signature
 import boto3
 from pydantic import BaseModel, computed_field, model_validator, validate_call, Field
 
+from InlineAgent.action_group.decoders import FunctionDecoder
+from InlineAgent.action_group.tool_cache import ToolCache
+from InlineAgent.action_group.tool_execution import ToolExecution
 from InlineAgent.tools import MCPServer
 from InlineAgent.types import APISchema, Executor, FunctionDefination
 
@@ -36,6 +39,8 @@ class ActionGroup(BaseModel):
     ] = Field(default_factory=dict)
     argument_key: str = "Parameters:"
     return_key: str = "Returns:"
+    cache: Optional[ToolCache] = None
+    execution: Optional[ToolExecution] = None
     test: bool = False
 
     class Config:
@@ -102,6 +107,14 @@ class ActionGroup(BaseModel):
             raise ValueError(
                 "Either tools or mcp_clients or lambda_name & (function_schema or api_schema) or builtin_tools must be present..."
             )
+        if self.cache is not None and not self.tools and not self.mcp_clients:
+            raise ValueError(
+                "cache is only supported when tools or mcp_clients is present..."
+            )
+        if self.execution is not None and not self.tools and not self.mcp_clients:
+            raise ValueError(
+                "execution is only supported when tools or mcp_clients is present..."
+            )
         if self.tools:
             if self.lambda_name:
                 raise ValueError(
@@ -241,8 +254,17 @@ class ActionGroup(BaseModel):
 class ActionGroups(BaseModel):
     action_groups: List[ActionGroup]
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name == "action_groups":
+            self.__dict__.pop("tool_map", None)
+            self.__dict__.pop("decoders", None)
+            self.__dict__.pop("tool_caches", None)
+            self.__dict__.pop("tool_executions", None)
+            self.__dict__.pop("actionGroups", None)
+
     @computed_field
-    @property
+    @cached_property
     def tool_map(self) -> Dict[str, Callable]:
         tool_map = dict()
 
@@ -260,8 +282,72 @@ class ActionGroups(BaseModel):
 
         return tool_map
 
+    @cached_property
+    def decoders(self) -> Dict[str, FunctionDecoder]:
+        """Parameter decoders of the ``tool_map`` tools, by function name."""
+        decoders = dict()
+
+        for action_group in self.action_groups:
+            if action_group.executor == Executor.RETURN_CONTROL:
+
+                for tool in action_group.tools:
+                    decoders[tool.__name__] = FunctionDecoder.from_callable(tool)
+
+                for current_client in action_group.mcp_clients or []:
+                    for function in current_client.function_schema.get(
+                        "functions", []
+                    ):
+                        decoders[function["name"]] = FunctionDecoder.from_schema(
+                            function
+                        )
+
+        return decoders
+
+    @cached_property
+    def tool_caches(self) -> Dict[str, ToolCache]:
+        """Result caches of the ``tool_map`` tools, by function name: the
+        tool's own ``cache_result`` cache, else its action group's ``cache``."""
+        tool_caches = dict()
+
+        for action_group in self.action_groups:
+            if action_group.executor == Executor.RETURN_CONTROL:
+                tools = {tool.__name__: tool for tool in action_group.tools}
+                for current_client in action_group.mcp_clients or []:
+                    tools.update(current_client.callable_tools)
+
+                for name, tool in tools.items():
+                    cache = getattr(tool, "__tool_cache__", action_group.cache)
+                    if cache is not None:
+                        tool_caches[name] = cache
+
+        return tool_caches
+
+    @cached_property
+    def tool_executions(self) -> Dict[str, ToolExecution]:
+        """Execution declarations of the ``tool_map`` tools, by function
+        name: the tool's own ``execute_in`` declaration, else its action
+        group's ``execution``. Raises ``ValueError`` for a tool that cannot
+        run in its declared mode."""
+        tool_executions = dict()
+
+        for action_group in self.action_groups:
+            if action_group.executor == Executor.RETURN_CONTROL:
+                tools = {tool.__name__: tool for tool in action_group.tools}
+                for current_client in action_group.mcp_clients or []:
+                    tools.update(current_client.callable_tools)
+
+                for name, tool in tools.items():
+                    execution = getattr(
+                        tool, "__tool_execution__", action_group.execution
+                    )
+                    if execution is not None:
+                        execution.check(tool)
+                        tool_executions[name] = execution
+
+        return tool_executions
+
     @computed_field
-    @property
+    @cached_property
     def actionGroups(self) -> List:
         actionGroups = list()
 
@@ -0,0 +1,181 @@
+import json
+import typing
+from inspect import Parameter, signature
+from types import NoneType, UnionType
+from typing import Any, Callable, Dict, List, Optional, Self
+
+Decoder = Callable[[Any], Any]
+
+
+class ParameterDecodeError(ValueError):
+    """A return-of-control parameter value does not match its declared type."""
+
+
+def decode_string(value: Any) -> str:
+    return value if isinstance(value, str) else str(value)
+
+
+def decode_integer(value: Any) -> int:
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        pass
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"expected an integer, got {value!r}") from None
+    if not number.is_integer():
+        raise ValueError(f"expected an integer, got {value!r}")
+    return int(number)
+
+
+def decode_float(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"expected a number, got {value!r}") from None
+
+
+def decode_number(value: Any) -> typing.Union[int, float]:
+    """JSON number: ``"3"`` decodes to ``3`` and ``"3.5"`` to ``3.5``."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return decode_float(value)
+
+
+BOOLEANS = {"true": True, "false": False, "1": True, "0": False}
+
+
+def decode_boolean(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    try:
+        return BOOLEANS[str(value).strip().lower()]
+    except KeyError:
+        raise ValueError(f"expected true or false, got {value!r}") from None
+
+
+def decode_array(value: Any) -> List:
+    if isinstance(value, list):
+        return value
+    try:
+        result = json.loads(value)
+    except (TypeError, ValueError):
+        # Bedrock renders arrays of objects as ``[{key=value, key=value}]``.
+        json_str = (
+            str(value)
+            .replace("=", ":")
+            .replace("[{", '[{"')
+            .replace("}]", '"}]')
+            .replace(", ", '", "')
+            .replace(":", '":"')
+        )
+        try:
+            result = json.loads(json_str)
+        except ValueError:
+            raise ValueError(f"expected a JSON array, got {value!r}") from None
+    if not isinstance(result, list):
+        raise ValueError(f"expected a JSON array, got {value!r}")
+    return result
+
+
+def decode_object(value: Any) -> Dict:
+    if isinstance(value, dict):
+        return value
+    try:
+        result = json.loads(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"expected a JSON object, got {value!r}") from None
+    if not isinstance(result, dict):
+        raise ValueError(f"expected a JSON object, got {value!r}")
+    return result
+
+
+SCHEMA_DECODERS: Dict[str, Decoder] = {
+    "string": decode_string,
+    "integer": decode_integer,
+    "number": decode_number,
+    "boolean": decode_boolean,
+    "array": decode_array,
+    "object": decode_object,
+}
+
+PYTHON_DECODERS: Dict[type, Decoder] = {
+    str: decode_string,
+    int: decode_integer,
+    float: decode_float,
+    bool: decode_boolean,
+    list: decode_array,
+    tuple: decode_array,
+    set: decode_array,
+    dict: decode_object,
+}
+
+
+class FunctionDecoder:
+    """Turns the ``parameters`` of a ``functionInvocationInput`` into the
+    keyword arguments of one tool.
+
+    Built once per tool, from its signature or its function schema, with a
+    decoder per parameter. Parameters it has no decoder for are decoded by
+    the type reported in the event, and unknown types are kept as strings.
+    """
+
+    __slots__ = ("name", "decoders")
+
+    def __init__(self, name: str, decoders: Optional[Dict[str, Decoder]] = None):
+        self.name = name
+        self.decoders = decoders or dict()
+
+    @classmethod
+    def from_callable(cls, func: Callable, name: Optional[str] = None) -> Self:
+        try:
+            parameters = signature(func, eval_str=True).parameters
+        except (NameError, TypeError, ValueError):
+            parameters = signature(func).parameters
+        decoders = dict()
+        for param_name, param in parameters.items():
+            decoder = cls.python_decoder(param.annotation)
+            if decoder:
+                decoders[param_name] = decoder
+        return cls(name=name or func.__name__, decoders=decoders)
+
+    @classmethod
+    def from_schema(cls, function: Dict) -> Self:
+        decoders = dict()
+        for param_name, param in function.get("parameters", {}).items():
+            decoder = SCHEMA_DECODERS.get(param.get("type"))
+            if decoder:
+                decoders[param_name] = decoder
+        return cls(name=function["name"], decoders=decoders)
+
+    @staticmethod
+    def python_decoder(annotation: Any) -> Optional[Decoder]:
+        if annotation is Parameter.empty:
+            return None
+        if typing.get_origin(annotation) in (typing.Union, UnionType):
+            args = [arg for arg in typing.get_args(annotation) if arg is not NoneType]
+            if len(args) != 1:
+                return None
+            annotation = args[0]
+        return PYTHON_DECODERS.get(typing.get_origin(annotation) or annotation)
+
+    def __call__(self, parameters: List[Dict]) -> Dict[str, Any]:
+        arguments = dict()
+        for parameter in parameters:
+            name = parameter["name"]
+            decoder = self.decoders.get(name) or SCHEMA_DECODERS.get(
+                parameter.get("type"), decode_string
+            )
+            try:
+                arguments[name] = decoder(parameter["value"])
+            except ValueError as e:
+                raise ParameterDecodeError(
+                    f"Invalid value for parameter {name!r} of {self.name}: {e}"
+                ) from None
+        return arguments
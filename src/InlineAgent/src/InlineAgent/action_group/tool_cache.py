@@ -0,0 +1,144 @@
+import asyncio
+import functools
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Literal, Optional, Tuple
+
+from InlineAgent.observability.metrics import AgentMetrics
+
+CacheScope = Literal["session", "global"]
+
+
+class ToolCache:
+    """Remembers the results of read-only return-of-control tools.
+
+    Results are keyed by function name and canonical JSON of the decoded
+    parameters, and with ``scope="session"`` also by session id, so one
+    session never sees another's results. Entries expire ``ttl`` seconds
+    after they are stored (never when None) and the least recently used
+    entry is evicted past ``maxsize``. Identical calls made while the first
+    one is still running wait for it instead of running the tool again, and
+    count as hits. Only successful results are stored.
+
+    ``hits`` and ``misses`` count lookups; they are also added to the
+    ``bedrock.agent.tool.cache`` counter labeled by ``tool`` and ``result``.
+    """
+
+    def __init__(
+        self,
+        ttl: Optional[float] = None,
+        maxsize: int = 256,
+        scope: CacheScope = "session",
+    ):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        if scope not in ("session", "global"):
+            raise ValueError("scope must be 'session' or 'global'")
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.scope = scope
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> (expiry time or None, result)
+        self._entries: "OrderedDict[Tuple, Tuple[Optional[float], Any]]" = (
+            OrderedDict()
+        )
+        self._pending: Dict[Tuple, asyncio.Task] = dict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def key(
+        self, function: str, parameters: Dict, session_id: Optional[str]
+    ) -> Tuple:
+        canonical = json.dumps(
+            parameters, sort_keys=True, separators=(",", ":"), default=str
+        )
+        return (session_id if self.scope == "session" else None, function, canonical)
+
+    @staticmethod
+    def expired(entry: Tuple[Optional[float], Any]) -> bool:
+        return entry[0] is not None and entry[0] <= time.monotonic()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    async def call(
+        self,
+        function: str,
+        parameters: Dict,
+        session_id: Optional[str],
+        tool_call: Callable[[], Awaitable[Any]],
+        labels: Optional[Dict] = None,
+    ) -> Tuple[Any, bool]:
+        """Return the cached result, or await ``tool_call`` and store its
+        result. The second item tells whether the result came from the
+        cache or from a call already running. ``labels`` are added to the
+        ``bedrock.agent.tool.cache`` metric."""
+        key = self.key(function=function, parameters=parameters, session_id=session_id)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.expired(entry):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+            pending = self._pending.get(key)
+            if pending is not None and pending.get_loop() is not loop:
+                pending = None
+            hit = entry is not None or pending is not None
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+                pending = loop.create_task(tool_call())
+                self._pending[key] = pending
+                pending.add_done_callback(functools.partial(self._store, key))
+
+        AgentMetrics.default().tool_cache.add(
+            1, {**(labels or {}), "tool": function, "result": "hit" if hit else "miss"}
+        )
+        if entry is not None:
+            return entry[1], True
+        # A cancelled caller must not cancel the call others are waiting on.
+        return await asyncio.shield(pending), hit
+
+    def _store(self, key: Tuple, task: asyncio.Task) -> None:
+        with self._lock:
+            if self._pending.get(key) is task:
+                del self._pending[key]
+            if task.cancelled() or task.exception() is not None:
+                return
+            expires = None if self.ttl is None else time.monotonic() + self.ttl
+            self._entries[key] = (expires, task.result())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+def cache_result(
+    func: Callable = None,
+    *,
+    ttl: Optional[float] = None,
+    maxsize: int = 256,
+    scope: CacheScope = "session",
+):
+    """Cache the results of a read-only tool, see ``ToolCache``.
+
+    Use as ``@cache_result`` or ``@cache_result(ttl=60, scope="global")``.
+    The tool itself is returned unchanged; the cache is kept on it as
+    ``__tool_cache__``.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        func.__tool_cache__ = ToolCache(ttl=ttl, maxsize=maxsize, scope=scope)
+        return func
+
+    if func is not None:
+        return decorator(func)
+    return decorator
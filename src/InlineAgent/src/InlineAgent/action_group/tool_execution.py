@@ -0,0 +1,183 @@
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import os
+import pickle
+import threading
+import weakref
+from typing import Any, Callable, Dict, Literal, Optional
+
+ExecutionMode = Literal["inline", "thread", "process"]
+
+
+class ToolPools:
+    """Worker pools shared by every tool declared with ``ToolExecution``.
+
+    The pools start on first use; ``warm()`` starts their workers ahead of
+    the first tool call, so it does not pay for process start-up and imports.
+    """
+
+    _default: Optional["ToolPools"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_thread_workers: Optional[int] = None,
+        max_process_workers: Optional[int] = None,
+    ):
+        self.max_thread_workers = max_thread_workers or min(
+            32, (os.cpu_count() or 1) + 4
+        )
+        self.max_process_workers = max_process_workers or os.cpu_count() or 1
+        self._lock = threading.Lock()
+        self._thread_pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._process_pool: Optional[concurrent.futures.ProcessPoolExecutor] = None
+
+    @classmethod
+    def default(cls) -> "ToolPools":
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls()
+        return cls._default
+
+    @property
+    def thread_pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self._lock:
+            if self._thread_pool is None:
+                self._thread_pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_thread_workers,
+                    thread_name_prefix="inline-agent-tool",
+                )
+            return self._thread_pool
+
+    @property
+    def process_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self._lock:
+            if self._process_pool is None:
+                self._process_pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.max_process_workers
+                )
+            return self._process_pool
+
+    def executor(self, mode: ExecutionMode) -> concurrent.futures.Executor:
+        return self.process_pool if mode == "process" else self.thread_pool
+
+    def warm(self, process: bool = True, thread: bool = False) -> None:
+        """Start the workers of the process pool and, if asked, the thread
+        pool, and wait until they are all up."""
+        waits = []
+        if process:
+            pool = self.process_pool
+            waits += [pool.submit(os.getpid) for _ in range(self.max_process_workers)]
+        if thread:
+            pool = self.thread_pool
+            waits += [pool.submit(os.getpid) for _ in range(self.max_thread_workers)]
+        concurrent.futures.wait(waits)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pools = [self._thread_pool, self._process_pool]
+            self._thread_pool = self._process_pool = None
+        for pool in pools:
+            if pool is not None:
+                pool.shutdown(wait=wait)
+
+
+class ToolExecution:
+    """Where and how many at a time a return-of-control tool runs.
+
+    ``mode`` is ``"inline"`` to call a sync tool on the event loop thread
+    (only for tools that return at once), ``"thread"`` to run it on the
+    shared thread pool, or ``"process"`` to run it on the shared process
+    pool, for CPU-bound tools that would otherwise hold the GIL. Coroutine
+    tools always run on the event loop. A process tool must be a module-level
+    function and its arguments and result must pickle.
+
+    ``max_concurrency`` caps how many calls run at once, across all the
+    sessions of the event loop, of the tools that share this declaration.
+    """
+
+    def __init__(
+        self,
+        mode: ExecutionMode = "thread",
+        max_concurrency: Optional[int] = None,
+        pools: Optional[ToolPools] = None,
+    ):
+        if mode not in ("inline", "thread", "process"):
+            raise ValueError("mode must be 'inline', 'thread' or 'process'")
+        if max_concurrency is not None and max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        self.mode = mode
+        self.max_concurrency = max_concurrency
+        self.pools = pools
+        self._semaphores: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def check(self, func: Callable) -> None:
+        """Raise ``ValueError`` if ``func`` cannot run in this mode."""
+        if self.mode == "inline":
+            return
+        if inspect.iscoroutinefunction(func):
+            raise ValueError(
+                f"{func.__name__} is a coroutine function and runs on the event "
+                f"loop; it cannot run in {self.mode} mode"
+            )
+        if self.mode == "process":
+            try:
+                pickle.dumps(func)
+            except Exception as e:
+                raise ValueError(
+                    f"{func.__name__} cannot run in process mode, it does not "
+                    f"pickle: {e}"
+                ) from None
+
+    def semaphore(self) -> Optional[asyncio.Semaphore]:
+        if self.max_concurrency is None:
+            return None
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(
+                self.max_concurrency
+            )
+        return semaphore
+
+    async def run(self, func: Callable, parameters: Dict) -> Any:
+        semaphore = self.semaphore()
+        if semaphore is None:
+            return await self.call(func, parameters)
+        async with semaphore:
+            return await self.call(func, parameters)
+
+    async def call(self, func: Callable, parameters: Dict) -> Any:
+        if inspect.iscoroutinefunction(func):
+            return await func(**parameters)
+        if self.mode == "inline":
+            return func(**parameters)
+        pools = self.pools or ToolPools.default()
+        return await asyncio.get_running_loop().run_in_executor(
+            pools.executor(self.mode), functools.partial(func, **parameters)
+        )
+
+
+def execute_in(
+    mode: ExecutionMode = "thread",
+    max_concurrency: Optional[int] = None,
+    pools: Optional[ToolPools] = None,
+):
+    """Declare where a tool runs, see ``ToolExecution``.
+
+    Use as ``@execute_in("process", max_concurrency=2)``. The tool itself is
+    returned unchanged; the declaration is kept on it as
+    ``__tool_execution__``.
+    """
+    execution = ToolExecution(mode=mode, max_concurrency=max_concurrency, pools=pools)
+
+    def decorator(func: Callable) -> Callable:
+        func.__tool_execution__ = execution
+        return func
+
+    return decorator
@@ -13,6 +13,7 @@ from .inline_agent import (
 )
 from .confirmation import require_confirmation
 from .process_roc import ProcessROC
+from .batch import BatchResult
 from .collaborator_agent_instance import (
     CollaboratorAgent,
 )
@@ -21,5 +22,6 @@ __all__ = [
     "InlineAgent",
     "require_confirmation",
     "ProcessROC",
+    "BatchResult",
     "CollaboratorAgent",
 ]
@@ -0,0 +1,321 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Union,
+)
+
+from InlineAgent.types import TextChunkEvent, UsageEvent
+
+if TYPE_CHECKING:
+    from InlineAgent.agent.inline_agent import InlineAgent
+
+BatchInput = Union[str, Dict]
+
+
+@dataclass
+class BatchItem:
+    """One prompt of a batch. ``id`` names it in results and checkpoints."""
+
+    id: str
+    input_text: str
+    session_id: Optional[str] = None
+    session_state: Optional[Dict] = None
+
+    @staticmethod
+    def from_inputs(inputs: Iterable[BatchInput]) -> Iterator["BatchItem"]:
+        """Prompts are strings, numbered from 0, or dicts with ``input_text``
+        and optionally ``id``, ``session_id`` and ``session_state``. Raises
+        ``ValueError`` on any other prompt."""
+        for index, value in enumerate(inputs):
+            if isinstance(value, str):
+                yield BatchItem(id=str(index), input_text=value)
+            elif not isinstance(value, dict) or not isinstance(
+                value.get("input_text"), str
+            ):
+                raise ValueError(
+                    f"prompt {index} must be a string or a dict with an "
+                    f"input_text string, got {value!r}"
+                )
+            else:
+                yield BatchItem(
+                    id=str(value.get("id", index)),
+                    input_text=value["input_text"],
+                    session_id=value.get("session_id"),
+                    session_state=value.get("session_state"),
+                )
+
+
+@dataclass
+class BatchResult:
+    """Outcome of one prompt. ``error`` is set, and ``output`` None, when
+    the invocation failed; ``latency`` is in seconds."""
+
+    id: str
+    input_text: str
+    session_id: str
+    output: Optional[str] = None
+    error: Optional[str] = None
+    latency: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    llm_calls: int = 0
+
+
+class JsonlResultWriter:
+    """Writes results to a JSON lines file, flushed after each result.
+
+    The file is also the checkpoint: ``completed()`` returns the ids that
+    already have a result without error, and new results are then appended
+    to the file instead of replacing it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mode = "w"
+        self._file = None
+
+    def completed(self) -> Set[str]:
+        self._mode = "a"
+        if not os.path.exists(self.path):
+            return set()
+        completed = set()
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                # The last line is cut short if the previous run was killed.
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue
+                if result.get("error") is None:
+                    completed.add(result["id"])
+        return completed
+
+    def write(self, result: BatchResult) -> None:
+        if self._file is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, self._mode, encoding="utf-8")
+        self._file.write(json.dumps(asdict(result)) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ParquetResultWriter:
+    """Writes results to a Parquet file, one row group per ``row_group_size``
+    results. Needs ``pyarrow``.
+
+    A Parquet file is only readable once closed, so when resuming, the rows
+    of the previous run are read and written again first. Prefer JSON lines
+    for runs that may be killed.
+    """
+
+    def __init__(self, path: str, row_group_size: int = 100):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError(
+                "pyarrow is required to write Parquet results: pip install pyarrow"
+            ) from e
+
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.path = path
+        self.row_group_size = row_group_size
+        self.schema = pyarrow.schema(
+            [
+                ("id", pyarrow.string()),
+                ("input_text", pyarrow.string()),
+                ("session_id", pyarrow.string()),
+                ("output", pyarrow.string()),
+                ("error", pyarrow.string()),
+                ("latency", pyarrow.float64()),
+                ("input_tokens", pyarrow.int64()),
+                ("output_tokens", pyarrow.int64()),
+                ("llm_calls", pyarrow.int64()),
+            ]
+        )
+        self._previous = None
+        self._rows: List[Dict] = list()
+        self._writer = None
+
+    def completed(self) -> Set[str]:
+        if not os.path.exists(self.path):
+            return set()
+        self._previous = self.pq.read_table(self.path, schema=self.schema)
+        return {
+            row["id"]
+            for row in self._previous.to_pylist()
+            if row["error"] is None
+        }
+
+    def write(self, result: BatchResult) -> None:
+        self._rows.append(asdict(result))
+        if len(self._rows) >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._writer is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            # Opening the writer truncates the file; completed() kept its rows.
+            self._writer = self.pq.ParquetWriter(self.path, self.schema)
+            if self._previous is not None:
+                self._writer.write_table(self._previous)
+                self._previous = None
+        if self._rows:
+            self._writer.write_table(
+                self.pa.Table.from_pylist(self._rows, schema=self.schema)
+            )
+            self._rows = list()
+
+    def close(self) -> None:
+        self.flush()
+        self._writer.close()
+        self._writer = None
+
+
+def result_writer(path: str) -> Union[JsonlResultWriter, ParquetResultWriter]:
+    """Parquet for a ``.parquet`` path, JSON lines otherwise."""
+    if path.endswith(".parquet"):
+        return ParquetResultWriter(path)
+    return JsonlResultWriter(path)
+
+
+class RatePacer:
+    """Spaces out starts to at most ``rate`` per second."""
+
+    def __init__(self, rate: Optional[float] = None):
+        if rate is not None and rate <= 0:
+            raise ValueError("rate must be positive")
+        self.interval = 1 / rate if rate else 0.0
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        start = max(now, self._next)
+        self._next = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+class BatchRunner:
+    """Runs many prompts through one agent, see ``InlineAgent.invoke_many``."""
+
+    def __init__(
+        self,
+        agent: "InlineAgent",
+        max_concurrency: int = 8,
+        rate: Optional[float] = None,
+        output: Optional[str] = None,
+        resume: bool = False,
+        enable_trace: bool = True,
+        end_session: bool = False,
+    ):
+        if max_concurrency <= 0:
+            raise ValueError("max_concurrency must be positive")
+        self.agent = agent
+        self.max_concurrency = max_concurrency
+        self.pacer = RatePacer(rate)
+        self.writer = result_writer(output) if output else None
+        self.resume = resume
+        self.enable_trace = enable_trace
+        self.end_session = end_session
+
+    async def run(self, inputs: Iterable[BatchInput]) -> AsyncIterator[BatchResult]:
+        if isinstance(inputs, (str, bytes)):
+            # Iterating would send one prompt per character.
+            raise ValueError(
+                "inputs must be a collection of prompts, not a single "
+                f"{type(inputs).__name__}"
+            )
+
+        completed = set()
+        if self.resume and self.writer is not None:
+            completed = self.writer.completed()
+
+        items = BatchItem.from_inputs(inputs)
+        if isinstance(inputs, Sequence):
+            # Check every prompt before the first one is sent.
+            items = list(items)
+        pending = (item for item in items if item.id not in completed)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def worker():
+            # Workers share one iterator, so inputs are read lazily.
+            for item in pending:
+                await self.pacer.wait()
+                await results.put(await self.invoke(item))
+
+        async def run_workers():
+            # A failing worker cancels the others, so none is left running
+            # once the writer is closed.
+            try:
+                async with asyncio.TaskGroup() as group:
+                    for _ in range(self.max_concurrency):
+                        group.create_task(worker())
+            except ExceptionGroup as e:
+                raise e.exceptions[0] from None
+            finally:
+                results.put_nowait(None)
+
+        runner = asyncio.create_task(run_workers())
+        try:
+            while (result := await results.get()) is not None:
+                if self.writer is not None:
+                    self.writer.write(result)
+                yield result
+            await runner
+        finally:
+            # Wait for the workers to stop before closing the writer.
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+            if self.writer is not None:
+                self.writer.close()
+
+    async def invoke(self, item: BatchItem) -> BatchResult:
+        result = BatchResult(
+            id=item.id,
+            input_text=item.input_text,
+            session_id=item.session_id or str(uuid.uuid4()),
+        )
+        chunks: List[str] = list()
+        start = time.perf_counter()
+        try:
+            async for event in self.agent.stream(
+                input_text=item.input_text,
+                session_id=result.session_id,
+                session_state=item.session_state,
+                enable_trace=self.enable_trace,
+                end_session=self.end_session,
+            ):
+                if isinstance(event, TextChunkEvent):
+                    chunks.append(event.text)
+                elif isinstance(event, UsageEvent):
+                    result.input_tokens = event.input_tokens
+                    result.output_tokens = event.output_tokens
+                    result.llm_calls = event.llm_calls
+            result.output = "".join(chunks)
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        result.latency = time.perf_counter() - start
+        return result
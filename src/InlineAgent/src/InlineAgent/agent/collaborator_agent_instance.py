@@ -12,6 +12,8 @@ from rich.console import Console
 from rich.markdown import Markdown
 
 
+from InlineAgent.client_pool import ClientPool
+from InlineAgent.name_resolver import NameResolver
 from InlineAgent.constants import (
     TraceColor,
 )
@@ -29,14 +31,12 @@ class CollaboratorAgent:
 
     @property
     def session(self) -> boto3.Session:
-        """Lazy loading of AWS session"""
-        return boto3.Session(profile_name=self.profile)
+        """Lazy loading of AWS session, shared through ``ClientPool``"""
+        return ClientPool.get_session(profile=self.profile)
 
     @property
     def account_id(self) -> str:
-        sts_client = self.session.client("sts")
-        identity = sts_client.get_caller_identity()
-        return identity["Account"]
+        return ClientPool.get_account_id(session=self.session)
 
     @property
     def region(self) -> str:
@@ -76,18 +76,10 @@ class CollaboratorAgent:
 
     @staticmethod
     def get_agent_id_by_name(agent_name: str, session: boto3.Session):
-        # Create Bedrock Agent client
-        bedrock_agent = session.client("bedrock-agent")
-
-        # List all agents and find the one matching the name
-        paginator = bedrock_agent.get_paginator("list_agents")
-
-        for page in paginator.paginate():
-            for agent in page["agentSummaries"]:
-                if agent["agentName"] == agent_name:
-                    return agent["agentId"]
-
-        raise ValueError(f"Agent {agent_name} not found")
+        agent_id = NameResolver.resolve(kind="agent", name=agent_name, session=session)
+        if agent_id is None:
+            raise ValueError(f"Agent {agent_name} not found")
+        return agent_id
 
     @staticmethod
     def get_agent_arn_by_name(
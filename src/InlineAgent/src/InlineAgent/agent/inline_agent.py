@@ -3,30 +3,71 @@ from datetime import datetime, UTC
 
 import json
 import uuid
+from types import MappingProxyType
 import copy
 import os
 import boto3
-from typing import Callable, Dict, List, Literal, Optional, Tuple, Union
+import concurrent.futures
+from contextlib import aclosing
+from botocore.exceptions import ProfileNotFound
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
 from pydantic import Field
-from termcolor import colored
-from rich.console import Console
-from rich.markdown import Markdown
 
 
-from InlineAgent.action_group import ActionGroups
+from InlineAgent.action_group import (
+    ActionGroups,
+    FunctionDecoder,
+    ToolCache,
+    ToolExecution,
+)
+from InlineAgent.client_pool import (
+    ClientPool,
+    DEFAULT_MAX_POOL_CONNECTIONS,
+    DEFAULT_READ_TIMEOUT,
+)
 from InlineAgent.action_group.action_group import ActionGroup
 from InlineAgent.agent.collaborator_agent_instance import CollaboratorAgent
 from InlineAgent.constants import (
     USER_INPUT_ACTION_GROUP_NAME,
     TraceColor,
 )
+from InlineAgent.agent.batch import BatchInput, BatchResult, BatchRunner
 from InlineAgent.agent.process_roc import ProcessROC
+from InlineAgent.agent.transport import AsyncTransport
 from InlineAgent.observability import Trace
+from InlineAgent.observability.metrics import AgentMetrics, metrics_dispatcher
+from InlineAgent.output import CONSOLE_SINK, NULL_SINK, OutputSink
+from InlineAgent.rate_limit import (
+    BOTOCORE_RETRIES,
+    AdaptiveRateLimiter,
+    RateLimiters,
+    call_with_retry_async,
+    is_throttling,
+)
+from InlineAgent.recording import RECORD_ENV, RecordingRuntimeClient
 from InlineAgent.knowledge_base import KnowledgeBasePlugin
 from InlineAgent.tools.mcp import MCPServer
 from InlineAgent.types import (
+    CitationEvent,
+    FilesEvent,
     InlineCollaboratorAgentConfig,
     InlineCollaboratorConfigurations,
+    ReturnControlEvent,
+    StreamEvent,
+    TextChunkEvent,
+    TraceEvent,
+    UsageEvent,
 )
 
 import requests
@@ -51,21 +92,93 @@ class InlineAgent:
     profile: str = field(default="default")
     user_input: bool = False
     tool_map: Dict[str, Callable] = None
+    tool_decoders: Dict[str, FunctionDecoder] = field(default=None, repr=False)
+    tool_caches: Dict[str, ToolCache] = field(default=None, repr=False)
+    tool_executions: Dict[str, ToolExecution] = field(default=None, repr=False)
+
+    max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS
+    # Throttles are retried by the rate limiter, see call_with_retry_async.
+    retries: Dict = field(default_factory=lambda: dict(BOTOCORE_RETRIES))
+    read_timeout: int = DEFAULT_READ_TIMEOUT
+
+    max_tool_concurrency: Optional[int] = None
+    tool_timeout: Optional[float] = None
+    tool_executor: Optional[concurrent.futures.Executor] = field(
+        default=None, repr=False
+    )
+
+    runtime_client: Optional[Any] = field(default=None, repr=False)
+    record_path: Optional[str] = field(
+        default_factory=lambda: os.environ.get(RECORD_ENV), repr=False
+    )
+    transport: Optional[AsyncTransport] = field(default=None, repr=False)
+    sink: Optional[OutputSink] = field(default=None, repr=False)
+    rate_limiter: Optional[AdaptiveRateLimiter] = field(default=None, repr=False)
+
+    _session: Optional[boto3.Session] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _definition_version: int = field(
+        default=0, init=False, repr=False, compare=False
+    )
+    _invoke_params_cache: Optional[Tuple[Tuple, MappingProxyType]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if not name.startswith("_"):
+            super().__setattr__(
+                "_definition_version", self.__dict__.get("_definition_version", 0) + 1
+            )
 
     @property
     def session(self) -> boto3.Session:
-        """Lazy loading of AWS session"""
-        try:
-            return boto3.Session(profile_name=self.profile)
-        except:
-            region = self._get_region_from_ec2_metadata()
-            return boto3.Session(region_name=region)
+        """Lazy loading of AWS session, shared through ``ClientPool``"""
+        if self._session is None:
+            try:
+                self._session = ClientPool.get_session(profile=self.profile)
+            except ProfileNotFound:
+                region = self._get_region_from_ec2_metadata()
+                self._session = ClientPool.get_session(region=region)
+        return self._session
 
     @property
     def account_id(self) -> str:
-        sts_client = self.session.client("sts")
-        identity = sts_client.get_caller_identity()
-        return identity["Account"]
+        return ClientPool.get_account_id(session=self.session)
+
+    @property
+    def bedrock_agent_runtime(self):
+        """Shared ``bedrock-agent-runtime`` client with warm connections
+
+        With ``record_path`` set (or ``INLINE_AGENT_RECORD`` exported) every
+        invocation is also recorded there; see ``RecordingRuntimeClient``.
+        """
+        client = self.runtime_client
+        if client is None:
+            client = self._pooled_runtime_client()
+        if self.record_path:
+            return RecordingRuntimeClient(client, path=self.record_path)
+        return client
+
+    def _pooled_runtime_client(self):
+        return ClientPool.get_client(
+            "bedrock-agent-runtime",
+            session=self.session,
+            config_key=ClientPool.config_key(
+                max_pool_connections=self.max_pool_connections,
+                retries=self.retries,
+                read_timeout=self.read_timeout,
+            ),
+        )
+
+    @property
+    def limiter(self) -> AdaptiveRateLimiter:
+        """``rate_limiter``, else the process-wide limiter of the foundation
+        model, shared with every other agent calling that model."""
+        if self.rate_limiter is not None:
+            return self.rate_limiter
+        return RateLimiters.get(self.foundation_model)
 
     @property
     def region(self) -> str:
@@ -127,6 +240,9 @@ class InlineAgent:
                 self.action_groups = ActionGroups(action_groups=self.action_groups)
 
             self.tool_map = self.action_groups.tool_map
+            self.tool_decoders = self.action_groups.decoders
+            self.tool_caches = self.action_groups.tool_caches
+            self.tool_executions = self.action_groups.tool_executions
 
             self.action_groups = self.action_groups.actionGroups
 
@@ -179,7 +295,38 @@ class InlineAgent:
         if not self.collaborator_configuration.instruction:
             self.collaborator_configuration.instruction = self.instruction
 
-    def get_invoke_params(self) -> Dict:
+    def _definition_key(self) -> Tuple:
+        """Changes whenever this agent or an inline collaborator is reassigned"""
+        return (
+            self._definition_version,
+            tuple(
+                collaborator._definition_key()
+                for collaborator in self.collaborators or []
+                if isinstance(collaborator, InlineAgent)
+            ),
+        )
+
+    def invalidate_invoke_params(self) -> None:
+        """Drop the cached payload after mutating a field in place,
+        e.g. ``agent.action_groups.append(...)``."""
+        self._invoke_params_cache = None
+
+    def get_invoke_params(self) -> MappingProxyType:
+        """Agent definition part of ``invoke_inline_agent`` request.
+
+        Built once and reused across invocations until a field of this agent
+        or of an inline collaborator is reassigned. The mapping is read-only;
+        the nested values are shared, so do not mutate them.
+        """
+        key = self._definition_key()
+        if self._invoke_params_cache is None or self._invoke_params_cache[0] != key:
+            self._invoke_params_cache = (
+                key,
+                MappingProxyType(self._build_invoke_params()),
+            )
+        return self._invoke_params_cache[1]
+
+    def _build_invoke_params(self) -> Dict:
         invokeParams = dict()
         match self.agent_collaboration:
             case "DISABLED":
@@ -243,31 +390,66 @@ class InlineAgent:
         }
         return {k: v for k, v in agentParams.items() if v}
 
-    async def invoke(
+    async def _invoke_runtime(
+        self,
+        transport: AsyncTransport,
+        input_text: str,
+        session_id: str,
+        enable_trace: bool,
+        end_session: bool,
+        inlineSessionState: Dict,
+        streaming_configurations: Dict,
+        bedrock_model_configurations: Dict,
+    ) -> Dict:
+        request_params = dict(
+            sessionId=session_id,
+            inputText=input_text,
+            enableTrace=enable_trace,
+            endSession=end_session,
+            streamingConfigurations=streaming_configurations,
+            bedrockModelConfigurations=bedrock_model_configurations,
+        )
+        if inlineSessionState:
+            request_params["inlineSessionState"] = inlineSessionState
+
+        # Throttled and failed calls wait for the model's rate limit and are
+        # retried here; the pooled client does not retry them itself.
+        return await call_with_retry_async(
+            self.limiter,
+            lambda: transport.call(
+                self.bedrock_agent_runtime.invoke_inline_agent,
+                **request_params,
+                **self.get_invoke_params(),
+            ),
+        )
+
+    async def stream(
         self,
         input_text: str,
         enable_trace: bool = True,
-        session_id: str = str(uuid.uuid4()),
+        session_id: Optional[str] = None,
         end_session: bool = False,
         session_state: Dict = None,
-        add_citation: bool = False,
-        process_response: bool = True,
-        truncate_response: int = None,
         streaming_configurations: Dict = {"streamFinalResponse": False},
         bedrock_model_configurations: Dict = {
             "performanceConfig": {"latency": "standard"}
         },
-    ):
+        sink: OutputSink = NULL_SINK,
+    ) -> AsyncIterator[StreamEvent]:
+        """Invoke the agent and yield typed events as they arrive.
+
+        Return of control is handled in place: a ``ReturnControlEvent`` is
+        yielded, the requested tools are run and the agent is re-invoked with
+        their results. A final ``UsageEvent`` carries the totals for the turn.
+        Tool outputs are written to ``sink``; by default nothing is printed.
+        """
         if session_state is None:
             session_state = {}
 
-        print(f"SessionId: {session_id}")
+        if session_id is None:
+            session_id = str(uuid.uuid4())
 
-        agent_answer = ""
-        
-        bedrock_agent_runtime = self.session.client(
-            "bedrock-agent-runtime"
-        )
+        transport = self.transport or AsyncTransport.default()
 
         inlineSessionState = copy.deepcopy(session_state)
 
@@ -276,163 +458,261 @@ class InlineAgent:
         total_llm_calls = 0
 
         time_before_call = datetime.now(UTC)
-        cite = None
-        orch_step = 0
-        sub_step = 0
-
-        stream_final_response = streaming_configurations["streamFinalResponse"]
-        # print(self.get_invoke_params())
-        while not agent_answer:
-            if inlineSessionState:
-                response = bedrock_agent_runtime.invoke_inline_agent(
-                    sessionId=session_id,
-                    inputText=input_text,
-                    enableTrace=enable_trace,
-                    endSession=end_session,
-                    inlineSessionState=inlineSessionState,
-                    streamingConfigurations=streaming_configurations,
-                    bedrockModelConfigurations=bedrock_model_configurations,
-                    **self.get_invoke_params(),
-                )
-            else:
-                response = bedrock_agent_runtime.invoke_inline_agent(
-                    sessionId=session_id,
-                    inputText=input_text,
-                    enableTrace=enable_trace,
-                    endSession=end_session,
-                    streamingConfigurations=streaming_configurations,
-                    bedrockModelConfigurations=bedrock_model_configurations,
-                    **self.get_invoke_params(),
-                )
-
-            if not process_response:
-                return response
+        answer_received = False
+        agent_metrics = AgentMetrics.default()
+        labels = {"agent": self.agent_name, "model": self.foundation_model}
+
+        while not answer_received:
+            response = await self._invoke_runtime(
+                transport=transport,
+                input_text=input_text,
+                session_id=session_id,
+                enable_trace=enable_trace,
+                end_session=end_session,
+                inlineSessionState=inlineSessionState,
+                streaming_configurations=streaming_configurations,
+                bedrock_model_configurations=bedrock_model_configurations,
+            )
 
             inlineSessionState = copy.deepcopy(session_state)
 
-            event_stream = response["completion"]
-
             try:
-                for event in event_stream:
-                    # print(json.dumps(event, indent=2, default=str))
+                async for event in transport.iterate(response["completion"]):
                     if "files" in event:
-                        files_event = event["files"]
-
-                        console = Console()
-                        print("\n\n")
-                        console.print(Markdown("**Files saved in output directory**"))
-
-                        files_list = files_event["files"]
-                        for idx, this_file in enumerate(files_list):
-                            file_bytes = this_file["bytes"]
-
-                            # save bytes to file, given the name of file and the bytes
-                            directory_path = os.path.join(os.getcwd(), "output")
-                            if not os.path.exists(directory_path):
-                                try:
-                                    os.makedirs(directory_path, exist_ok=True)
-                                except OSError as e:
-                                    print(f"Error creating directory output: {e}")
-                                    raise
-
-                            if not os.path.exists(
-                                os.path.join(directory_path, str(session_id))
-                            ):
-                                try:
-                                    os.makedirs(
-                                        os.path.join(directory_path, str(session_id)),
-                                        exist_ok=True,
-                                    )
-                                except OSError as e:
-                                    print(f"Error creating directory output: {e}")
-                                    raise
-
-                            file_name = os.path.join(
-                                directory_path, str(session_id), this_file["name"]
-                            )
-                            with open(file_name, "wb") as f:
-                                f.write(file_bytes)
+                        yield FilesEvent(files=event["files"]["files"])
 
                     if "returnControl" in event:
+                        yield ReturnControlEvent(payload=event["returnControl"])
                         inlineSessionState = await ProcessROC.process_roc(
                             inlineSessionState=inlineSessionState,
                             roc_event=event["returnControl"],
                             tool_map=self.tool_map,
+                            max_concurrency=self.max_tool_concurrency,
+                            tool_timeout=self.tool_timeout,
+                            executor=self.tool_executor,
+                            sink=sink,
+                            decoders=self.tool_decoders,
+                            caches=self.tool_caches,
+                            executions=self.tool_executions,
+                            session_id=session_id,
+                            labels=labels,
                         )
 
-                    # Process trace
                     if "trace" in event and "trace" in event["trace"] and enable_trace:
-
-                        # print(json.dumps(event["trace"], indent=2))
-                        input_tokens, output_tokens, llm_calls = Trace.parse_trace(
-                            trace=event["trace"]["trace"],
-                            truncateResponse=truncate_response,
-                            agentName=self.agent_name,
+                        input_tokens, output_tokens, llm_calls = (
+                            metrics_dispatcher.dispatch(event["trace"], labels=labels)
+                        )
+                        total_input_tokens += input_tokens
+                        total_output_tokens += output_tokens
+                        total_llm_calls += llm_calls
+                        yield TraceEvent(
+                            trace=event["trace"],
+                            input_tokens=input_tokens,
+                            output_tokens=output_tokens,
+                            llm_calls=llm_calls,
                         )
-                        total_input_tokens += int(input_tokens)
-                        total_output_tokens += int(output_tokens)
-                        total_llm_calls += int(llm_calls)
 
-                    # Get Final Answer
                     if "chunk" in event:
-                        if add_citation:
-                            if "attribution" in event["chunk"]:
-                                agent_answer, cite = Trace.add_citation(
-                                    citations=event["chunk"]["attribution"][
-                                        "citations"
-                                    ],
-                                    cite=1 if not cite else cite,
-                                )
-                            else:
-                                data = event["chunk"]["bytes"]
-                                agent_answer += data.decode("utf8")
-                                print(
-                                    colored(
-                                        data.decode("utf8"), TraceColor.final_output
-                                    ),
-                                    end="",
-                                )
-                        elif not add_citation:
-                            data = event["chunk"]["bytes"]
-                            if stream_final_response:
-                                agent_answer += data.decode("utf8")
-                                print(
-                                    colored(
-                                        data.decode("utf8"), TraceColor.final_output
-                                    ),
-                                    end="",
-                                )
-                            else:
-                                agent_answer += data.decode("utf8")
-                                print(
-                                    colored(agent_answer, TraceColor.final_output),
-                                    end="",
+                        if "attribution" in event["chunk"]:
+                            yield CitationEvent(
+                                citations=event["chunk"]["attribution"]["citations"]
+                            )
+                        if "bytes" in event["chunk"]:
+                            text = event["chunk"]["bytes"].decode("utf8")
+                            if text and not answer_received:
+                                answer_received = True
+                                first_chunk = datetime.now(UTC) - time_before_call
+                                agent_metrics.time_to_first_chunk.record(
+                                    first_chunk.total_seconds(), labels
                                 )
-
+                            yield TextChunkEvent(text=text)
             except Exception as e:
-                print(
-                    colored("Caught exception while invoking Agent", TraceColor.error)
+                # Output may already be out, so a throttled stream is not
+                # retried, but the limiter slows down.
+                if is_throttling(e):
+                    self.limiter.on_throttle()
+                e.add_note(
+                    f"request ID: {response['ResponseMetadata']['RequestId']}, "
+                    + f"retries: {response['ResponseMetadata']['RetryAttempts']}"
                 )
-                print(colored(f"input text: {input_text}", TraceColor.error))
-                print(
-                    colored(
-                        f"request ID: {response['ResponseMetadata']['RequestId']}, retries: {response['ResponseMetadata']['RetryAttempts']}\n",
-                        TraceColor.error,
-                    )
-                )
-                print(colored(f"Error: {e}", TraceColor.error))
-                raise Exception("Unexpected exception: ", e)
+                raise
 
         duration = datetime.now(UTC) - time_before_call
+        agent_metrics.turn_duration.record(duration.total_seconds(), labels)
+        agent_metrics.record_usage(
+            input_tokens=total_input_tokens,
+            output_tokens=total_output_tokens,
+            llm_calls=total_llm_calls,
+            labels=labels,
+        )
 
-        print(
-            colored(
-                f"\nAgent made a total of {total_llm_calls} LLM calls, "
-                + f"using {total_input_tokens+total_output_tokens} tokens "
-                + f"(in: {total_input_tokens}, out: {total_output_tokens})"
-                + f", and took {duration.total_seconds():,.1f} total seconds",
-                TraceColor.stats,
-            )
+        yield UsageEvent(
+            session_id=session_id,
+            input_tokens=total_input_tokens,
+            output_tokens=total_output_tokens,
+            llm_calls=total_llm_calls,
+            duration=duration.total_seconds(),
+        )
+
+    async def invoke_many(
+        self,
+        inputs: Iterable[BatchInput],
+        max_concurrency: int = 8,
+        rate: Optional[float] = None,
+        output: Optional[str] = None,
+        resume: bool = False,
+        enable_trace: bool = True,
+        end_session: bool = False,
+    ) -> AsyncIterator[BatchResult]:
+        """Invoke the agent once per prompt and yield results as they complete.
+
+        ``inputs`` are strings or dicts with ``input_text`` and optionally
+        ``id``, ``session_id`` and ``session_state`` (see ``BatchItem``); each
+        prompt runs in its own session unless given one. Up to
+        ``max_concurrency`` invocations run at once over the agent's shared
+        client, so keep it within ``max_pool_connections``, and ``rate``
+        caps how many start per second. A failed invocation does not stop the
+        batch: its result carries the ``error``.
+
+        With ``output`` every result is written as it completes, to a Parquet
+        file for a ``.parquet`` path (needs ``pyarrow``) and to JSON lines
+        otherwise. With ``resume`` the prompts whose id already has a result
+        without error in ``output`` are skipped and the file is extended;
+        without it, the file is replaced.
+        """
+        runner = BatchRunner(
+            agent=self,
+            max_concurrency=max_concurrency,
+            rate=rate,
+            output=output,
+            resume=resume,
+            enable_trace=enable_trace,
+            end_session=end_session,
         )
+        # Closing this generator early also stops the runner's workers.
+        async with aclosing(runner.run(inputs)) as results:
+            async for result in results:
+                yield result
+
+    @staticmethod
+    def save_files(files: List[Dict], session_id: str):
+        """Write files returned by the agent to ``output/<session_id>/``."""
+        directory_path = os.path.join(os.getcwd(), "output", str(session_id))
+        try:
+            os.makedirs(directory_path, exist_ok=True)
+        except OSError as e:
+            print(f"Error creating directory output: {e}")
+            raise
+
+        for this_file in files:
+            file_name = os.path.join(directory_path, this_file["name"])
+            with open(file_name, "wb") as f:
+                f.write(this_file["bytes"])
+
+    async def invoke(
+        self,
+        input_text: str,
+        enable_trace: bool = True,
+        session_id: Optional[str] = None,
+        end_session: bool = False,
+        session_state: Dict = None,
+        add_citation: bool = False,
+        process_response: bool = True,
+        truncate_response: int = None,
+        streaming_configurations: Dict = {"streamFinalResponse": False},
+        bedrock_model_configurations: Dict = {
+            "performanceConfig": {"latency": "standard"}
+        },
+        sink: Optional[OutputSink] = None,
+    ):
+        """Invoke the agent and return its answer.
+
+        The session id, traces, tool outputs and answer are written to
+        ``sink``, falling back to the agent's ``sink`` and then the console.
+        With a ``NullSink`` nothing is formatted at all.
+        """
+        if sink is None:
+            sink = self.sink if self.sink is not None else CONSOLE_SINK
+
+        if session_state is None:
+            session_state = {}
+
+        if session_id is None:
+            session_id = str(uuid.uuid4())
+
+        sink.write(f"SessionId: {session_id}")
+
+        if not process_response:
+            return await self._invoke_runtime(
+                transport=self.transport or AsyncTransport.default(),
+                input_text=input_text,
+                session_id=session_id,
+                enable_trace=enable_trace,
+                end_session=end_session,
+                inlineSessionState=copy.deepcopy(session_state),
+                streaming_configurations=streaming_configurations,
+                bedrock_model_configurations=bedrock_model_configurations,
+            )
+
+        chunks: List[str] = list()
+        cite = None
+        cited_chunk = False
+
+        try:
+            async for event in self.stream(
+                input_text=input_text,
+                enable_trace=enable_trace,
+                session_id=session_id,
+                end_session=end_session,
+                session_state=session_state,
+                streaming_configurations=streaming_configurations,
+                bedrock_model_configurations=bedrock_model_configurations,
+                sink=sink,
+            ):
+                if isinstance(event, FilesEvent):
+                    sink.write("\n\n")
+                    sink.markdown("**Files saved in output directory**")
+                    InlineAgent.save_files(files=event.files, session_id=session_id)
+
+                elif isinstance(event, TraceEvent):
+                    if sink.enabled:
+                        Trace.parse_trace(
+                            trace=event.trace["trace"],
+                            truncateResponse=truncate_response,
+                            sink=sink,
+                        )
+
+                elif isinstance(event, CitationEvent):
+                    if add_citation:
+                        _, cite = Trace.add_citation(
+                            citations=event.citations,
+                            cite=1 if not cite else cite,
+                            sink=sink,
+                        )
+                        cited_chunk = True
+
+                elif isinstance(event, TextChunkEvent):
+                    chunks.append(event.text)
+                    if cited_chunk:
+                        cited_chunk = False
+                    else:
+                        sink.write(event.text, TraceColor.final_output, end="")
+
+                elif isinstance(event, UsageEvent) and sink.enabled:
+                    sink.write(
+                        f"\nAgent made a total of {event.llm_calls} LLM calls, "
+                        + f"using {event.input_tokens+event.output_tokens} tokens "
+                        + f"(in: {event.input_tokens}, out: {event.output_tokens})"
+                        + f", and took {event.duration:,.1f} total seconds",
+                        TraceColor.stats,
+                    )
+
+        except Exception as e:
+            sink.write("Caught exception while invoking Agent", TraceColor.error)
+            sink.write(f"input text: {input_text}", TraceColor.error)
+            for note in getattr(e, "__notes__", []):
+                sink.write(f"{note}\n", TraceColor.error)
+            sink.write(f"Error: {e}", TraceColor.error)
+            raise Exception("Unexpected exception: ", e)
 
-        return agent_answer
+        return "".join(chunks)
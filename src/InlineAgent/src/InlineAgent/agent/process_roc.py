@@ -1,17 +1,47 @@
+import asyncio
+import concurrent.futures
 import copy
+import functools
 import inspect
 import json
-from typing import Any, Callable, Dict, Union
-from termcolor import colored
-
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+from InlineAgent.action_group.decoders import FunctionDecoder, ParameterDecodeError
+from InlineAgent.action_group.tool_cache import ToolCache
+from InlineAgent.action_group.tool_execution import ToolExecution
 from InlineAgent.constants import TraceColor
+from InlineAgent.observability.metrics import AgentMetrics
+from InlineAgent.output import CONSOLE_SINK, OutputSink
 
 
 class ProcessROC:
     @staticmethod
     async def process_roc(
-        inlineSessionState: Dict, roc_event: Dict, tool_map: Dict[str, Callable]
+        inlineSessionState: Dict,
+        roc_event: Dict,
+        tool_map: Dict[str, Callable],
+        max_concurrency: Optional[int] = None,
+        tool_timeout: Optional[float] = None,
+        executor: Optional[concurrent.futures.Executor] = None,
+        sink: OutputSink = CONSOLE_SINK,
+        decoders: Optional[Dict[str, FunctionDecoder]] = None,
+        caches: Optional[Dict[str, ToolCache]] = None,
+        executions: Optional[Dict[str, ToolExecution]] = None,
+        session_id: Optional[str] = None,
+        labels: Optional[Dict] = None,
     ):
+        """Run every tool requested in one return-of-control event.
+
+        User confirmations are asked first, one at a time and in order. The
+        tools then run concurrently: coroutine tools on the event loop, sync
+        tools on ``executor`` (the loop's default thread pool when None), or
+        as declared by their ``ToolExecution`` in ``executions`` (see
+        ``ActionGroups.tool_executions``) or from ``execute_in``.
+        ``max_concurrency`` caps how many tools run at once and
+        ``tool_timeout`` turns a slow tool into a FAILURE result. Results keep
+        the order of ``invocationInputs``. Tool outputs are written to
+        ``sink``; tool metrics carry ``labels`` as well as the tool name.
+        """
         # TODO: Tool to invoke is str and callable
         if "returnControlInvocationResults" in inlineSessionState:
             raise ValueError(
@@ -25,6 +55,7 @@ class ProcessROC:
         inlineSessionState = {"returnControlInvocationResults": []}
         inlineSessionState["invocationId"] = roc_event["invocationId"]
 
+        function_calls: List[Callable[[], Awaitable[Dict]]] = []
         for invocationInput in roc_event["invocationInputs"]:
 
             # This is a Tagged Union structure. Only one of the following top level keys will be set: apiInvocationInput, functionInvocationInput.
@@ -41,31 +72,20 @@ class ProcessROC:
             functionInvocationInput = invocationInput["functionInvocationInput"]
             actionGroup = functionInvocationInput["actionGroup"]
 
-            parameters = dict()
-            for param in functionInvocationInput["parameters"]:
-                if param["type"] == "array":
-                    result = None
-                    try:
-                        result = json.loads(param["value"])
-                    except Exception:
-                        json_str = (
-                            param["value"]
-                            .replace("=", ":")
-                            .replace("[{", '[{"')
-                            .replace("}]", '"}]')
-                        )
-                        json_str = json_str.replace(", ", '", "').replace(":", '":"')
-                        result = json.loads(json_str)
-                    finally:
-                        parameters[param["name"]] = result
-                elif param["type"] == "string":
-                    parameters[param["name"]] = param["value"]
-                elif param["type"] == "number":
-                    parameters[param["name"]] = int(param["value"])
-                elif param["type"] == "boolean":
-                    parameters[param["name"]] = bool(param["value"])
-                elif param["type"] == "integer":
-                    parameters[param["name"]] = int(param["value"])
+            function = functionInvocationInput["function"]
+            decoder = (decoders or {}).get(function) or FunctionDecoder(function)
+            try:
+                parameters = decoder(functionInvocationInput["parameters"])
+            except ParameterDecodeError as e:
+                function_calls.append(
+                    functools.partial(
+                        ProcessROC.reject_parameters,
+                        functionInvocationInput=functionInvocationInput,
+                        error=e,
+                    )
+                )
+                continue
+
             if (
                 actionInvocationType == "RESULT"
                 or actionInvocationType == "USER_CONFIRMATION_AND_RESULT"
@@ -78,139 +98,236 @@ class ProcessROC:
                     raise ValueError(
                         f"Function {functionInvocationInput['function']} not found in tools or tools class"
                     )
+                cache = (caches or {}).get(function)
+                if cache is None:
+                    cache = getattr(tool_to_invoke, "__tool_cache__", None)
+                execution = (executions or {}).get(function)
+                if execution is None:
+                    execution = getattr(tool_to_invoke, "__tool_execution__", None)
 
                 if actionInvocationType == "USER_CONFIRMATION_AND_RESULT":
-                    await ProcessROC.process_user_confirmation(
-                        sessionState=inlineSessionState,
-                        tool_to_invoke=tool_to_invoke,
-                        functionInvocationInput=functionInvocationInput,
-                        include_result=True,
-                        parameters=parameters,
+                    function_calls.append(
+                        functools.partial(
+                            ProcessROC.process_user_confirmation,
+                            functionInvocationInput=functionInvocationInput,
+                            tool_to_invoke=tool_to_invoke,
+                            include_result=True,
+                            parameters=parameters,
+                            confirmed=ProcessROC.ask_user_confirmation(
+                                tool_to_invoke=tool_to_invoke, parameters=parameters
+                            ),
+                            tool_timeout=tool_timeout,
+                            executor=executor,
+                            sink=sink,
+                            cache=cache,
+                            execution=execution,
+                            session_id=session_id,
+                            labels=labels,
+                        )
                     )
 
                 else:
-                    inlineSessionState["returnControlInvocationResults"].append(
-                        {
-                            "functionResult": await ProcessROC.invoke_roc_function(
-                                functionInvocationInput=functionInvocationInput,
-                                tool_to_invoke=tool_to_invoke,
-                                parameters=parameters,
-                                confirm=None,
-                            )
-                        }
+                    function_calls.append(
+                        functools.partial(
+                            ProcessROC.invoke_roc_function,
+                            functionInvocationInput=functionInvocationInput,
+                            tool_to_invoke=tool_to_invoke,
+                            parameters=parameters,
+                            confirm=None,
+                            tool_timeout=tool_timeout,
+                            executor=executor,
+                            sink=sink,
+                            cache=cache,
+                            execution=execution,
+                            session_id=session_id,
+                            labels=labels,
+                        )
                     )
 
             elif actionInvocationType == "USER_CONFIRMATION":
                 tool_to_invoke = functionInvocationInput["function"]
-                await ProcessROC.process_user_confirmation(
-                    sessionState=inlineSessionState,
-                    tool_to_invoke=tool_to_invoke,
-                    functionInvocationInput=functionInvocationInput,
-                    include_result=False,
-                    parameters=parameters,
+                function_calls.append(
+                    functools.partial(
+                        ProcessROC.process_user_confirmation,
+                        functionInvocationInput=functionInvocationInput,
+                        tool_to_invoke=tool_to_invoke,
+                        include_result=False,
+                        parameters=parameters,
+                        confirmed=ProcessROC.ask_user_confirmation(
+                            tool_to_invoke=tool_to_invoke, parameters=parameters
+                        ),
+                    )
                 )
 
+        functionResults = await ProcessROC.gather_function_calls(
+            function_calls=function_calls, max_concurrency=max_concurrency
+        )
+        inlineSessionState["returnControlInvocationResults"].extend(
+            {"functionResult": functionResult} for functionResult in functionResults
+        )
+
         inlineSessionState.update(inlineSessionState)
 
         return inlineSessionState
 
     @staticmethod
-    async def process_user_confirmation(
-        sessionState: Dict,
-        functionInvocationInput: Dict,
-        include_result: bool,
-        parameters: Dict,
-        tool_to_invoke: Union[str, Callable] = None,
-    ):
+    async def gather_function_calls(
+        function_calls: List[Callable[[], Awaitable[Dict]]],
+        max_concurrency: Optional[int] = None,
+    ) -> List[Dict]:
+        if not max_concurrency:
+            return list(
+                await asyncio.gather(
+                    *[function_call() for function_call in function_calls]
+                )
+            )
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def bounded(function_call: Callable[[], Awaitable[Dict]]) -> Dict:
+            async with semaphore:
+                return await function_call()
+
+        return list(
+            await asyncio.gather(
+                *[bounded(function_call) for function_call in function_calls]
+            )
+        )
+
+    @staticmethod
+    async def reject_parameters(
+        functionInvocationInput: Dict, error: ParameterDecodeError
+    ) -> Dict:
+        return {
+            "actionGroup": functionInvocationInput["actionGroup"],
+            "agentId": functionInvocationInput["agentId"],
+            "function": functionInvocationInput["function"],
+            "responseBody": {"TEXT": {"body": str(error)}},
+            "responseState": "FAILURE",
+        }
+
+    @staticmethod
+    def ask_user_confirmation(
+        parameters: Dict, tool_to_invoke: Union[str, Callable] = None
+    ) -> bool:
+        if isinstance(tool_to_invoke, Callable):
+            tool_name = tool_to_invoke.__name__
+        else:
+            tool_name = tool_to_invoke
+        confirmation_message = f"Do you want to proceed with {tool_name} with parameters : {json.dumps(parameters)}?"
         while True:
-            if isinstance(tool_to_invoke, Callable):
-                tool_name = tool_to_invoke.__name__
-            else:
-                tool_name = tool_to_invoke
-            confirmation_message = f"Do you want to proceed with {tool_name} with parameters : {json.dumps(parameters)}?"
             response = input(f"{confirmation_message} (y/n): ").lower()
             if response in ["y", "yes"]:
-                if include_result:
-                    sessionState["returnControlInvocationResults"].append(
-                        {
-                            "functionResult": await ProcessROC.invoke_roc_function(
-                                functionInvocationInput=functionInvocationInput,
-                                tool_to_invoke=tool_to_invoke,
-                                confirm="CONFIRM",
-                                parameters=parameters,
-                            )
-                        }
-                    )
-                else:
-                    sessionState["returnControlInvocationResults"].append(
-                        {
-                            "functionResult": {
-                                "actionGroup": functionInvocationInput["actionGroup"],
-                                "agentId": functionInvocationInput["agentId"],
-                                "function": functionInvocationInput["function"],
-                                "confirmationState": "CONFIRM",
-                            }
-                        }
-                    )
-                break
+                return True
             elif response in ["n", "no"]:
-                if include_result:
-                    sessionState["returnControlInvocationResults"].append(
-                        {
-                            "functionResult": {
-                                "actionGroup": functionInvocationInput["actionGroup"],
-                                "agentId": functionInvocationInput["agentId"],
-                                "function": functionInvocationInput["function"],
-                                "responseBody": {
-                                    "TEXT": {
-                                        "body": "Access Denied to this function. Do not try again."
-                                    }
-                                },
-                                "confirmationState": "DENY",
-                                # "responseState": "FAILURE"
-                            }
-                        }
-                    )
-                else:
-                    sessionState["returnControlInvocationResults"].append(
-                        {
-                            "functionResult": {
-                                "actionGroup": functionInvocationInput["actionGroup"],
-                                "agentId": functionInvocationInput["agentId"],
-                                "function": functionInvocationInput["function"],
-                                "confirmationState": "DENY",
-                                # "responseState": "FAILURE"
-                            }
-                        }
-                    )
-                break
+                return False
             else:
                 print("Please enter 'y' for yes or 'n' for no.")
 
+    @staticmethod
+    async def process_user_confirmation(
+        functionInvocationInput: Dict,
+        include_result: bool,
+        parameters: Dict,
+        confirmed: bool,
+        tool_to_invoke: Union[str, Callable] = None,
+        tool_timeout: Optional[float] = None,
+        executor: Optional[concurrent.futures.Executor] = None,
+        sink: OutputSink = CONSOLE_SINK,
+        cache: Optional[ToolCache] = None,
+        execution: Optional[ToolExecution] = None,
+        session_id: Optional[str] = None,
+        labels: Optional[Dict] = None,
+    ) -> Dict:
+        if confirmed:
+            if include_result:
+                return await ProcessROC.invoke_roc_function(
+                    functionInvocationInput=functionInvocationInput,
+                    tool_to_invoke=tool_to_invoke,
+                    confirm="CONFIRM",
+                    parameters=parameters,
+                    tool_timeout=tool_timeout,
+                    executor=executor,
+                    sink=sink,
+                    cache=cache,
+                    execution=execution,
+                    session_id=session_id,
+                    labels=labels,
+                )
+            return {
+                "actionGroup": functionInvocationInput["actionGroup"],
+                "agentId": functionInvocationInput["agentId"],
+                "function": functionInvocationInput["function"],
+                "confirmationState": "CONFIRM",
+            }
+
+        if include_result:
+            return {
+                "actionGroup": functionInvocationInput["actionGroup"],
+                "agentId": functionInvocationInput["agentId"],
+                "function": functionInvocationInput["function"],
+                "responseBody": {
+                    "TEXT": {"body": "Access Denied to this function. Do not try again."}
+                },
+                "confirmationState": "DENY",
+                # "responseState": "FAILURE"
+            }
+        return {
+            "actionGroup": functionInvocationInput["actionGroup"],
+            "agentId": functionInvocationInput["agentId"],
+            "function": functionInvocationInput["function"],
+            "confirmationState": "DENY",
+            # "responseState": "FAILURE"
+        }
+
     @staticmethod
     async def invoke_roc_function(
         functionInvocationInput: Dict,
         parameters: Dict = dict(),
         confirm: str = None,
         tool_to_invoke: Callable = None,
+        tool_timeout: Optional[float] = None,
+        executor: Optional[concurrent.futures.Executor] = None,
+        sink: OutputSink = CONSOLE_SINK,
+        cache: Optional[ToolCache] = None,
+        execution: Optional[ToolExecution] = None,
+        session_id: Optional[str] = None,
+        labels: Optional[Dict] = None,
     ) -> Dict:
 
         functionResult = dict
+        outcome = "success"
+        start = time.perf_counter()
+
+        async def tool_call() -> Any:
+            if execution is not None:
+                call = execution.run(tool_to_invoke, parameters)
+            elif inspect.iscoroutinefunction(tool_to_invoke):
+                call = tool_to_invoke(**parameters)
+            else:
+                call = asyncio.get_running_loop().run_in_executor(
+                    executor, functools.partial(tool_to_invoke, **parameters)
+                )
+            # A sync tool that times out keeps its worker until it returns.
+            return await asyncio.wait_for(call, timeout=tool_timeout)
 
         # TODO: responseState
         try:
-
-            if inspect.iscoroutinefunction(tool_to_invoke):
-                result = await tool_to_invoke(**parameters)
+            if cache is None:
+                result = await tool_call()
             else:
-                result = tool_to_invoke(**parameters)
-
-            print(
-                colored(
-                    f"Tool output: {result}",
-                    TraceColor.invocation_input,
+                result, cached = await cache.call(
+                    function=functionInvocationInput["function"],
+                    parameters=parameters,
+                    session_id=session_id,
+                    tool_call=tool_call,
+                    labels=labels,
                 )
-            )
+                if cached:
+                    outcome = "cached"
+
+            if sink.enabled:
+                sink.write(f"Tool output: {result}", TraceColor.invocation_input)
 
             functionResult = {
                 "actionGroup": functionInvocationInput["actionGroup"],
@@ -218,7 +335,19 @@ class ProcessROC:
                 "function": functionInvocationInput["function"],
                 "responseBody": {"TEXT": {"body": result}},
             }
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            functionResult = {
+                "actionGroup": functionInvocationInput["actionGroup"],
+                "agentId": functionInvocationInput["agentId"],
+                "function": functionInvocationInput["function"],
+                "responseBody": {
+                    "TEXT": {"body": f"Tool timed out after {tool_timeout} seconds."}
+                },
+                "responseState": "FAILURE",
+            }
         except Exception as e:
+            outcome = "failure"
             functionResult = {
                 "actionGroup": functionInvocationInput["actionGroup"],
                 "agentId": functionInvocationInput["agentId"],
@@ -227,6 +356,13 @@ class ProcessROC:
                 "responseState": "FAILURE",
             }
 
+        AgentMetrics.default().record_tool(
+            seconds=time.perf_counter() - start,
+            tool=functionInvocationInput["function"],
+            outcome=outcome,
+            labels=labels,
+        )
+
         if confirm:
             if confirm == "CONFIRM":
                 functionResult["confirmationState"] = confirm
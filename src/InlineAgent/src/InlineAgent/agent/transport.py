@@ -0,0 +1,70 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+
+
+DEFAULT_IO_WORKERS = 256
+
+_END_OF_STREAM = object()
+
+
+class AsyncTransport:
+    """Runs blocking boto3 calls on a dedicated I/O thread pool.
+
+    ``invoke_inline_agent`` and iteration over its ``completion`` EventStream
+    block on the network. Running each blocking step in the pool keeps the
+    event loop free, so many ``InlineAgent.invoke`` coroutines can share one
+    loop. Threads are only held while a read is pending, not for the whole
+    agent turn.
+    """
+
+    _default: Optional["AsyncTransport"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, max_workers: int = DEFAULT_IO_WORKERS):
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="InlineAgent-io"
+        )
+
+    @classmethod
+    def default(cls) -> "AsyncTransport":
+        """Return the process-wide transport, creating it on first use."""
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls()
+        return cls._default
+
+    async def call(self, func: Callable, /, *args, **kwargs) -> Any:
+        """Await ``func(*args, **kwargs)`` executed on the I/O pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(func, *args, **kwargs)
+        )
+
+    async def iterate(self, event_stream: Iterable[Dict]) -> AsyncIterator[Dict]:
+        """Yield events from a blocking EventStream without blocking the loop.
+
+        The stream is closed if the consumer stops early so the underlying
+        HTTP connection goes back to the pool.
+        """
+        loop = asyncio.get_running_loop()
+        iterator = iter(event_stream)
+        try:
+            while True:
+                event = await loop.run_in_executor(
+                    self.executor, next, iterator, _END_OF_STREAM
+                )
+                if event is _END_OF_STREAM:
+                    break
+                yield event
+        finally:
+            close = getattr(event_stream, "close", None)
+            if callable(close):
+                close()
+
+    def shutdown(self, wait: bool = True):
+        self.executor.shutdown(wait=wait)
@@ -0,0 +1,133 @@
+import threading
+import weakref
+from typing import Dict, Hashable, Literal, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+
+
+DEFAULT_MAX_POOL_CONNECTIONS = 50
+DEFAULT_READ_TIMEOUT = 600
+DEFAULT_RETRIES = {"max_attempts": 3, "mode": "standard"}
+
+
+class ClientPool:
+    """Process-wide cache of boto3 sessions, clients and caller identities.
+
+    Creating a ``boto3.Session`` resolves credentials and creating a client
+    resolves endpoints and opens a fresh connection pool. Both are expensive
+    and both are safe to share between threads once built, so every
+    ``InlineAgent`` in the process reuses the same objects for the same
+    (profile, region, config) key.
+
+    Clients and account ids belong to the session object they were built
+    from, not to its profile and region: two sessions for the same profile
+    can carry different credentials. They are dropped with the session.
+    """
+
+    _lock = threading.RLock()
+    _sessions: Dict[Tuple, boto3.Session] = dict()
+    _clients: "weakref.WeakKeyDictionary[boto3.Session, Dict[Tuple, object]]" = (
+        weakref.WeakKeyDictionary()
+    )
+    _account_ids: "weakref.WeakKeyDictionary[boto3.Session, str]" = (
+        weakref.WeakKeyDictionary()
+    )
+
+    @staticmethod
+    def config_key(
+        max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+        retries: Optional[Dict] = None,
+        read_timeout: int = DEFAULT_READ_TIMEOUT,
+    ) -> Tuple[Hashable, ...]:
+        """Return a hashable key describing a client configuration."""
+        retries = retries if retries is not None else DEFAULT_RETRIES
+        return (
+            max_pool_connections,
+            tuple(sorted(retries.items())),
+            read_timeout,
+        )
+
+    @staticmethod
+    def build_config(config_key: Tuple[Hashable, ...]) -> Config:
+        max_pool_connections, retries, read_timeout = config_key
+        return Config(
+            max_pool_connections=max_pool_connections,
+            retries=dict(retries),
+            read_timeout=read_timeout,
+        )
+
+    @classmethod
+    def get_session(
+        cls, profile: Optional[str] = None, region: Optional[str] = None
+    ) -> boto3.Session:
+        """Return the shared session for ``profile``/``region``.
+
+        Raises ``botocore.exceptions.ProfileNotFound`` like ``boto3.Session``
+        when the profile does not exist.
+        """
+        key = (profile, region)
+        session = cls._sessions.get(key)
+        if session is not None:
+            return session
+
+        with cls._lock:
+            session = cls._sessions.get(key)
+            if session is None:
+                session = boto3.Session(profile_name=profile, region_name=region)
+                cls._sessions[key] = session
+        return session
+
+    @classmethod
+    def get_client(
+        cls,
+        service_name: str,
+        session: boto3.Session,
+        config_key: Optional[Tuple[Hashable, ...]] = None,
+    ):
+        """Return a shared client for ``service_name`` built from ``session``.
+
+        boto3 clients are thread safe, but creating them from a shared
+        session is not, so creation happens under the pool lock.
+        """
+        if config_key is None:
+            config_key = cls.config_key()
+
+        key = (service_name, config_key)
+        client = cls._clients.get(session, {}).get(key)
+        if client is not None:
+            return client
+
+        with cls._lock:
+            clients = cls._clients.setdefault(session, {})
+            client = clients.get(key)
+            if client is None:
+                client = session.client(
+                    service_name, config=cls.build_config(config_key)
+                )
+                clients[key] = client
+        return client
+
+    @classmethod
+    def get_account_id(cls, session: boto3.Session) -> str:
+        """Return the caller account id, calling STS once per session."""
+        account_id = cls._account_ids.get(session)
+        if account_id is not None:
+            return account_id
+
+        sts_client = cls.get_client("sts", session=session)
+        identity = sts_client.get_caller_identity()
+        with cls._lock:
+            cls._account_ids[session] = identity["Account"]
+        return identity["Account"]
+
+    @classmethod
+    def clear(cls, kind: Literal["all", "sessions", "clients", "accounts"] = "all"):
+        """Drop cached objects, e.g. after rotating credentials."""
+        with cls._lock:
+            if kind in ("all", "sessions"):
+                cls._sessions.clear()
+            if kind in ("all", "clients"):
+                cls._clients.clear()
+            if kind in ("all", "accounts"):
+                cls._account_ids.clear()
@@ -5,6 +5,9 @@ from typing import Any, Dict, Optional
 import boto3
 from pydantic import BaseModel, Field, computed_field, model_validator, validate_call
 
+from InlineAgent.client_pool import ClientPool
+from InlineAgent.name_resolver import NameResolver
+
 
 class KnowledgeBasePlugin(BaseModel):
     name: str
@@ -18,8 +21,8 @@ class KnowledgeBasePlugin(BaseModel):
     @computed_field
     @cached_property
     def session(self) -> boto3.Session:
-        """Lazy loading of AWS session"""
-        return boto3.Session(profile_name=self.profile)
+        """Lazy loading of AWS session, shared through ``ClientPool``"""
+        return ClientPool.get_session(profile=self.profile)
 
     def to_dict(self) -> dict:
         """Convert the KnowledgeBase instance to a dictionary"""
@@ -53,30 +56,10 @@ class KnowledgeBasePlugin(BaseModel):
 
         Returns:
             Optional[str]: Knowledge base ID if found, None otherwise
-        """
-        # Create a Bedrock Agent client"
-        bedrock_agent = session.client("bedrock-agent")
-
-        # Initialize variables for pagination
-        next_token = None
-
-        while True:
-            # Prepare the list request
-            kwargs = {}
-            if next_token:
-                kwargs["nextToken"] = next_token
 
-            # List knowledge bases
-            response = bedrock_agent.list_knowledge_bases(**kwargs)
-
-            # Search for the knowledge base with matching name
-            for kb in response.get("knowledgeBaseSummaries", []):
-                if kb.get("name") == knowledge_base_name:
-                    return kb.get("knowledgeBaseId")
-
-            # Check if there are more results
-            next_token = response.get("nextToken")
-            if not next_token:
-                break
-
-            raise ValueError(f"Knowledge base {knowledge_base_name} not found")
+        Ids are cached by ``NameResolver``; one paginated scan fills the ids
+        of every knowledge base in the account and region.
+        """
+        return NameResolver.resolve(
+            kind="knowledge_base", name=knowledge_base_name, session=session
+        )
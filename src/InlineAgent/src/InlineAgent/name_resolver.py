@@ -0,0 +1,188 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Literal, Optional, Tuple
+
+import boto3
+
+from InlineAgent.client_pool import ClientPool
+
+
+DEFAULT_NAME_TTL = 900
+DEFAULT_MISS_TTL = 30
+
+ResourceKind = Literal["knowledge_base", "agent"]
+
+# kind -> (paginated operation, result key, name field, id field)
+_SCANS: Dict[str, Tuple[str, str, str, str]] = {
+    "knowledge_base": (
+        "list_knowledge_bases",
+        "knowledgeBaseSummaries",
+        "name",
+        "knowledgeBaseId",
+    ),
+    "agent": ("list_agents", "agentSummaries", "agentName", "agentId"),
+}
+
+
+class NameResolver:
+    """Process-wide cache of Bedrock resource name to id lookups.
+
+    Knowledge bases and collaborator agents are configured by name, but the
+    runtime API wants ids, and the control plane can only list them. A miss
+    triggers one paginated scan that stores every name it sees, so a
+    supervisor with many collaborators pays for a single scan per account
+    and region. Entries expire after ``ttl`` seconds; names a scan did not
+    find are remembered for ``miss_ttl`` seconds so a missing resource does
+    not trigger a scan per lookup. When ``cache_file`` is set (or
+    ``INLINE_AGENT_NAME_CACHE`` is exported) entries are also kept on disk
+    and survive process restarts.
+    """
+
+    ttl: float = DEFAULT_NAME_TTL
+    miss_ttl: float = DEFAULT_MISS_TTL
+    cache_file: Optional[str] = os.environ.get("INLINE_AGENT_NAME_CACHE")
+
+    _lock = threading.RLock()
+    _scan_locks: Dict[Tuple, threading.Lock] = dict()
+    # (kind, account_id, region) -> number of finished scans
+    _scans: Dict[Tuple, int] = dict()
+    # (kind, account_id, region, name) -> (id, expires_at)
+    _ids: Dict[Tuple, Tuple[str, float]] = dict()
+    # (kind, account_id, region, name) -> expires_at
+    _misses: Dict[Tuple, float] = dict()
+    _loaded_file: Optional[str] = None
+
+    @classmethod
+    def configure(
+        cls,
+        ttl: Optional[float] = None,
+        cache_file: Optional[str] = None,
+        miss_ttl: Optional[float] = None,
+    ) -> None:
+        """Change the entry lifetimes and/or the on-disk cache location."""
+        with cls._lock:
+            if ttl is not None:
+                cls.ttl = ttl
+            if miss_ttl is not None:
+                cls.miss_ttl = miss_ttl
+            if cache_file is not None:
+                cls.cache_file = cache_file
+                cls._loaded_file = None
+
+    @classmethod
+    def resolve(
+        cls, kind: ResourceKind, name: str, session: boto3.Session
+    ) -> Optional[str]:
+        """Return the id of the ``kind`` resource called ``name``, or None."""
+        cls._load()
+        scope = cls._scope(kind, session)
+        key = (*scope, name)
+        resource_id = cls._get(key)
+        if resource_id is not None or cls._missed(key):
+            return resource_id
+
+        # One scan per scope at a time; concurrent misses wait and reuse it.
+        scans = cls._scans.get(scope, 0)
+        with cls._scan_lock(scope):
+            resource_id = cls._get(key)
+            if resource_id is None and cls._scans.get(scope, 0) == scans:
+                resource_id = cls.prefetch(kind=kind, session=session).get(name)
+            if resource_id is None:
+                with cls._lock:
+                    cls._misses[key] = time.time() + cls.miss_ttl
+        return resource_id
+
+    @classmethod
+    def prefetch(cls, kind: ResourceKind, session: boto3.Session) -> Dict[str, str]:
+        """Scan every ``kind`` resource visible to ``session`` into the cache."""
+        operation, result_key, name_field, id_field = _SCANS[kind]
+        bedrock_agent = ClientPool.get_client("bedrock-agent", session=session)
+
+        ids = dict()
+        for page in bedrock_agent.get_paginator(operation).paginate():
+            for summary in page.get(result_key, []):
+                ids[summary[name_field]] = summary[id_field]
+
+        scope = cls._scope(kind, session)
+        expires_at = time.time() + cls.ttl
+        with cls._lock:
+            for name, resource_id in ids.items():
+                cls._ids[(*scope, name)] = (resource_id, expires_at)
+                cls._misses.pop((*scope, name), None)
+            cls._scans[scope] = cls._scans.get(scope, 0) + 1
+            cls._save()
+        return ids
+
+    @classmethod
+    def clear(cls) -> None:
+        """Drop cached ids from memory, e.g. after deleting a resource."""
+        with cls._lock:
+            cls._ids.clear()
+            cls._misses.clear()
+            cls._loaded_file = None
+
+    @staticmethod
+    def _scope(kind: ResourceKind, session: boto3.Session) -> Tuple:
+        # Names are unique per account and region, whatever the profile.
+        return (kind, ClientPool.get_account_id(session), session.region_name)
+
+    @classmethod
+    def _get(cls, key: Tuple) -> Optional[str]:
+        entry = cls._ids.get(key)
+        if entry is None or entry[1] < time.time():
+            return None
+        return entry[0]
+
+    @classmethod
+    def _missed(cls, key: Tuple) -> bool:
+        return cls._misses.get(key, 0) >= time.time()
+
+    @classmethod
+    def _scan_lock(cls, scope: Tuple) -> threading.Lock:
+        with cls._lock:
+            return cls._scan_locks.setdefault(scope, threading.Lock())
+
+    @classmethod
+    def _load(cls) -> None:
+        if not cls.cache_file or cls._loaded_file == cls.cache_file:
+            return
+
+        with cls._lock:
+            if cls._loaded_file == cls.cache_file:
+                return
+            cls._loaded_file = cls.cache_file
+            try:
+                with open(cls.cache_file) as f:
+                    entries = json.load(f)
+            except (OSError, ValueError):
+                return
+
+            now = time.time()
+            for kind, account_id, region, name, resource_id, expires_at in entries:
+                if expires_at > now:
+                    cls._ids[(kind, account_id, region, name)] = (
+                        resource_id,
+                        expires_at,
+                    )
+
+    @classmethod
+    def _save(cls) -> None:
+        if not cls.cache_file:
+            return
+
+        now = time.time()
+        entries = [
+            [*key, resource_id, expires_at]
+            for key, (resource_id, expires_at) in cls._ids.items()
+            if expires_at > now
+        ]
+        directory = os.path.dirname(os.path.abspath(cls.cache_file))
+        os.makedirs(directory, exist_ok=True)
+        # Write then rename so concurrent processes never read a partial file.
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, cls.cache_file)
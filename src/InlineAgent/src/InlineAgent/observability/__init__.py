@@ -2,5 +2,28 @@ from .trace import Trace
 from .agent_instrument import observe
 from .settings_management import ObservabilityConfig
 from .trace_provider import create_tracer_provider
+from .trace_writer import TraceWriter
+from .payloads import BlobStore, PayloadBudget
+from .dispatch import MetricsTraceHandler, TraceDispatcher, TraceHandler
+from .sampling import TailRetentionSpanProcessor
+from .metrics import AgentMetrics, PrometheusMetricReader, create_meter_provider
+from .export import BoundedBatchSpanProcessor, FileSpanExporter
 
-__all__ = ["Trace", "observe", "ObservabilityConfig", "create_tracer_provider"]
+__all__ = [
+    "Trace",
+    "observe",
+    "ObservabilityConfig",
+    "create_tracer_provider",
+    "TraceWriter",
+    "TraceDispatcher",
+    "TraceHandler",
+    "MetricsTraceHandler",
+    "BlobStore",
+    "PayloadBudget",
+    "TailRetentionSpanProcessor",
+    "AgentMetrics",
+    "PrometheusMetricReader",
+    "create_meter_provider",
+    "BoundedBatchSpanProcessor",
+    "FileSpanExporter",
+]
@@ -1,7 +1,9 @@
 from datetime import datetime, timezone
 import functools
+import inspect
 import logging
 import os
+from typing import Dict
 from opentelemetry import trace as otel_trace
 from termcolor import colored
 from rich.console import Console
@@ -17,8 +19,10 @@ from openinference.semconv.trace import (
 from .utils import add_citation, get_agent_from_caller_chain
 from .semantics import SpanAttributes, SpanName
 from .process import ProcessL2Trace
+from .sampling import head_sampled, sample_ratio
 from .settings_management import ObservabilityConfig
 from .span_manager import SpanManager
+from .trace import Trace
 from .utils import json_safe
 
 
@@ -32,445 +36,540 @@ config = ObservabilityConfig()
 
 tracer = otel_trace.get_tracer(config.BEDROCK_AGENT_TRACER_NAME)
 
-guardrail_span: otel_trace.Span = None
-output_stream_guardrail_intervene: bool = False
-is_guardrail: bool = False
 
-
-def observe(show_traces: bool = True, save_traces: bool = False):
-    def decorator(func):
-        @functools.wraps(func)
-        def wrapper(
-            inputText: str,
-            sessionId: str,
-            **kwargs,
-        ):
-            global guardrail_span
-            global output_stream_guardrail_intervene
-            global is_guardrail
-            # Extract tracing parameters
-            user_id = kwargs.pop("user_id", "anonymous")
-            tags = kwargs.pop("tags", [])
-
-            agent_id = kwargs.get("agentId", "")
-            agent_alias_id = kwargs.get("agentAliasId", "")
-            agent_name = kwargs.pop("agent_name", "")
-
-            if not agent_id or not agent_alias_id:
-                # TODO: Warning
-                pass
-
-            stream_final_response = kwargs.get(
-                "streamingConfigurations", {"streamFinalResponse": False}
+class ObservedInvocation:
+    """Instrumentation state of one ``observe``-wrapped call.
+
+    Every call gets its own instance, so concurrent invocations in threads or
+    tasks never share spans or guardrail flags.
+    """
+
+    def __init__(
+        self,
+        inputText: str,
+        sessionId: str,
+        kwargs: Dict,
+        show_traces: bool,
+        save_traces: bool,
+    ):
+        self.session_id = sessionId
+        self.show_traces = show_traces
+        self.save_traces = save_traces
+
+        # Extract tracing parameters
+        user_id = kwargs.pop("user_id", "anonymous")
+        tags = kwargs.pop("tags", [])
+
+        self.agent_id = kwargs.get("agentId", "")
+        self.agent_alias_id = kwargs.get("agentAliasId", "")
+        self.agent_name = kwargs.pop("agent_name", "")
+
+        if not self.agent_id or not self.agent_alias_id:
+            # TODO: Warning
+            pass
+
+        stream_final_response = kwargs.get(
+            "streamingConfigurations", {"streamFinalResponse": False}
+        )
+        self.stream_final_response = stream_final_response["streamFinalResponse"]
+        self.span_manager = SpanManager(
+            ttl=config.SPAN_FAMILY_TTL, max_families=config.SPAN_MAX_FAMILIES
+        )
+
+        # Unsampled turns only get the root span with the turn's totals.
+        self.sampled = head_sampled(
+            session_id=sessionId,
+            ratio=sample_ratio(
+                agent_id=self.agent_id,
+                tags=tags,
+                ratio=config.TRACE_SAMPLE_RATIO,
+                ratios=config.TRACE_SAMPLE_RATIOS,
+            ),
+        )
+        self.detailed = config.PRODUCE_BEDROCK_OTEL_TRACES and self.sampled
+
+        self.time_before_call = datetime.now(timezone.utc)
+        self.time_after_call = None
+
+        self.root_agent_span: otel_trace.Span = None
+        self.guardrail_span: otel_trace.Span = None
+        self.output_stream_guardrail_intervene = False
+        self.is_guardrail = False
+        self.guardrail_intervened = False
+
+        self.agent_answer = str()
+        self.cite = None
+        self.citations = list()
+        self.total_input_tokens = 0
+        self.total_output_tokens = 0
+        self.total_llm_calls = 0
+
+        if config.PRODUCE_BEDROCK_OTEL_TRACES:
+            self.root_agent_span = self.span_manager.create_agent_span_return(
+                agent_session_id=sessionId,
+                caller_chain=[
+                    {
+                        "agentAliasArn": f"arn:aws:bedrock:agent:agent-alias/{self.agent_id}/{self.agent_alias_id}"
+                    }
+                ],
+                # start_time=int(time_before_call.timestamp() * 1e9),
+                attributes={
+                    OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.AGENT.value,
+                    OtelSpanAttributes.INPUT_VALUE: inputText,
+                    SpanAttributes.AGENT_ID.value: self.agent_id,
+                    SpanAttributes.AGENT_ALIAS_ID.value: self.agent_alias_id,
+                    OtelSpanAttributes.TAG_TAGS: tags,
+                    OtelSpanAttributes.USER_ID: user_id,
+                    OtelSpanAttributes.TOOL_PARAMETERS: json_safe(kwargs),
+                    OtelSpanAttributes.SESSION_ID: sessionId,
+                    "langfuse.tags": tags,
+                    OtelSpanAttributes.LLM_SYSTEM: "aws.bedrock",
+                    SpanAttributes.SAMPLED.value: self.sampled,
+                },
+                name=f"Agent {self.agent_id}:{self.agent_alias_id}",
             )
-            
-            stream_final_response= stream_final_response["streamFinalResponse"]
-            span_manager = SpanManager()
 
-            time_before_call = datetime.now(timezone.utc)
-            time_after_call = None
+    def handle_event(self, event: Dict) -> None:
+        if "files" in event:
+            self.handle_files(files_event=event["files"])
+
+        if "returnControl" in event:
+            self.handle_return_control(return_control=event["returnControl"])
+
+        if "trace" in event:
+            self.handle_trace(trace_data=event["trace"])
+
+        # Get Final Answer
+        if "chunk" in event:
+            self.handle_chunk(chunk=event["chunk"])
+
+    def handle_files(self, files_event: Dict) -> None:
+        files_list = files_event["files"]
+        for idx, this_file in enumerate(files_list):
+            file_bytes = this_file["bytes"]
+
+            # save bytes to file, given the name of file and the bytes
+
+            directory_path = os.path.join(os.getcwd(), "output")
+            if not os.path.exists(directory_path):
+                try:
+                    os.makedirs(directory_path, exist_ok=True)
+                except OSError as e:
+                    print(f"Error creating directory output: {e}")
+                    raise
+
+            if not os.path.exists(os.path.join(directory_path, str(self.session_id))):
+                try:
+                    os.makedirs(
+                        os.path.join(directory_path, str(self.session_id)),
+                        exist_ok=True,
+                    )
+                except OSError as e:
+                    print(f"Error creating directory output: {e}")
+                    raise
+
+            file_name = os.path.join(
+                directory_path, str(self.session_id), this_file["name"]
+            )
+            with open(file_name, "wb") as f:
+                f.write(file_bytes)
 
             if config.PRODUCE_BEDROCK_OTEL_TRACES:
-                root_agent_span = span_manager.create_agent_span_return(
-                    agent_session_id=sessionId,
-                    caller_chain=[
-                        {
-                            "agentAliasArn": f"arn:aws:bedrock:agent:agent-alias/{agent_id}/{agent_alias_id}"
-                        }
-                    ],
-                    # start_time=int(time_before_call.timestamp() * 1e9),
+                with open(file_name, "rb") as f:
+                    self.root_agent_span.set_attribute(
+                        SpanAttributes.FILES.value + str(idx + 1),
+                        f.read().decode("utf8", errors="ignore"),
+                    )
+
+        if self.show_traces:
+            console = Console()
+            print("\n\n")
+            console.print(Markdown("**Files saved in output directory**"))
+
+    def handle_return_control(self, return_control: Dict) -> None:
+        if self.detailed:
+
+            roc_span = tracer.start_span(
+                name="Return of Control",
+                kind=SpanKind.CLIENT,
+                attributes={
+                    SpanAttributes.RETURN_CONTROL.value: json_safe(return_control)
+                },
+                context=otel_trace.set_span_in_context(self.root_agent_span),
+            )
+            roc_span.set_status(Status(StatusCode.OK))
+            roc_span.end()
+
+    def handle_trace(self, trace_data: Dict) -> None:
+        if "trace" in trace_data:
+            if "guardrailTrace" in trace_data["trace"]:
+                self.handle_guardrail_trace(trace_data=trace_data)
+
+        if self.detailed or not config.PRODUCE_BEDROCK_OTEL_TRACES:
+            input_tokens, output_tokens, llm_calls = (
+                ProcessL2Trace.process_trace_event(
+                    trace_data=trace_data,
+                    span_manager=self.span_manager,
+                    save_traces=self.save_traces,
+                    session_id=self.session_id,
+                    show_traces=self.show_traces,
+                )
+            )
+        else:
+            if self.save_traces:
+                ProcessL2Trace.save_trace(
+                    trace_data=trace_data, session_id=self.session_id
+                )
+            if self.show_traces:
+                input_tokens, output_tokens, llm_calls = Trace.parse_trace(
+                    trace=trace_data["trace"]
+                )
+            else:
+                input_tokens, output_tokens, llm_calls = Trace.parse_usage(
+                    trace=trace_data["trace"]
+                )
+        self.total_input_tokens += int(input_tokens)
+        self.total_output_tokens += int(output_tokens)
+        self.total_llm_calls += int(llm_calls)
+
+    def start_guardrail_span(self, action: str, parent: otel_trace.Span):
+        return tracer.start_span(
+            name=SpanName.GUARDRAIL.value,
+            kind=SpanKind.CLIENT,
+            attributes={
+                OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.GUARDRAIL.value,
+                SpanAttributes.GUARDRAIL_ACTION.value: action,
+            },
+            context=otel_trace.set_span_in_context(parent),
+        )
+
+    def handle_guardrail_trace(self, trace_data: Dict) -> None:
+        session_id = trace_data["sessionId"]
+        caller_chain = trace_data["callerChain"]
+        guardrail_trace = trace_data["trace"]["guardrailTrace"]
+        sub_agent_id, sub_agent_alias_id = get_agent_from_caller_chain(
+            caller_chain=caller_chain, index=-1
+        )
+
+        if sub_agent_id == self.agent_id and sub_agent_alias_id == self.agent_alias_id:
+            self.is_guardrail = True
+
+        if guardrail_trace["action"] == "INTERVENED":
+            self.guardrail_intervened = True
+
+        if "inputAssessments" in guardrail_trace:
+
+            if self.detailed:
+                agent_span = self.span_manager.create_agent_span_return(
+                    agent_session_id=session_id,
+                    caller_chain=caller_chain,
+                    # start_time=int(event_time.timestamp() * 1e9),
                     attributes={
                         OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.AGENT.value,
-                        OtelSpanAttributes.INPUT_VALUE: inputText,
-                        SpanAttributes.AGENT_ID.value: agent_id,
-                        SpanAttributes.AGENT_ALIAS_ID.value: agent_alias_id,
-                        OtelSpanAttributes.TAG_TAGS: tags,
-                        OtelSpanAttributes.USER_ID: user_id,
-                        OtelSpanAttributes.TOOL_PARAMETERS: json_safe(kwargs),
-                        OtelSpanAttributes.SESSION_ID: sessionId,
-                        "langfuse.tags": tags,
+                        SpanAttributes.AGENT_ID.value: sub_agent_id,
+                        SpanAttributes.AGENT_ALIAS_ID.value: sub_agent_alias_id,
                         OtelSpanAttributes.LLM_SYSTEM: "aws.bedrock",
+                        OtelSpanAttributes.SESSION_ID: session_id,
                     },
-                    name=f"Agent {agent_id}:{agent_alias_id}",
+                    name=f"Agent {self.agent_id}:{self.agent_alias_id}",
                 )
 
-            agent_answer = str()
-            cite = None
-            citations = list()
-            total_input_tokens = 0
-            total_output_tokens = 0
-            total_llm_calls = 0
-            try:
-                response = func(
-                    inputText=inputText,
-                    sessionId=sessionId,
-                    **kwargs,
-                )
+            if guardrail_trace["action"] == "INTERVENED":
+                self.agent_answer = str()
 
-                event_stream = response["completion"]
-
-                for event in event_stream:
-                    if "files" in event:
-                        files_event = event["files"]
-
-                        files_list = files_event["files"]
-                        for idx, this_file in enumerate(files_list):
-                            file_bytes = this_file["bytes"]
-
-                            # save bytes to file, given the name of file and the bytes
-
-                            directory_path = os.path.join(os.getcwd(), "output")
-                            if not os.path.exists(directory_path):
-                                try:
-                                    os.makedirs(directory_path, exist_ok=True)
-                                except OSError as e:
-                                    print(f"Error creating directory output: {e}")
-                                    raise
-
-                            if not os.path.exists(
-                                os.path.join(directory_path, str(sessionId))
-                            ):
-                                try:
-                                    os.makedirs(
-                                        os.path.join(directory_path, str(sessionId)),
-                                        exist_ok=True,
-                                    )
-                                except OSError as e:
-                                    print(f"Error creating directory output: {e}")
-                                    raise
-
-                            file_name = os.path.join(
-                                directory_path, str(sessionId), this_file["name"]
-                            )
-                            with open(file_name, "wb") as f:
-                                f.write(file_bytes)
-
-                            if config.PRODUCE_BEDROCK_OTEL_TRACES:
-                                with open(file_name, "rb") as f:
-                                    root_agent_span.set_attribute(
-                                        SpanAttributes.FILES.value + str(idx + 1),
-                                        f.read().decode("utf8", errors="ignore"),
-                                    )
-
-                        if show_traces:
-                            console = Console()
-                            print("\n\n")
-                            console.print(
-                                Markdown("**Files saved in output directory**")
-                            )
+            if self.detailed:
+                self.guardrail_span = self.start_guardrail_span(
+                    action=guardrail_trace["action"], parent=agent_span
+                )
+                self.guardrail_span.set_attributes(
+                    {
+                        OtelSpanAttributes.INPUT_VALUE: json_safe(
+                            guardrail_trace["inputAssessments"]
+                        ),
+                        OtelSpanAttributes.INPUT_MIME_TYPE: "application/json",
+                    }
+                )
 
-                    if "returnControl" in event:
-                        if config.PRODUCE_BEDROCK_OTEL_TRACES:
-
-                            roc_span = tracer.start_span(
-                                name="Return of Control",
-                                kind=SpanKind.CLIENT,
-                                attributes={
-                                    SpanAttributes.RETURN_CONTROL.value: json_safe(
-                                        event["returnControl"]
-                                    )
-                                },
-                                context=otel_trace.set_span_in_context(root_agent_span),
-                            )
-                            roc_span.set_status(Status(StatusCode.OK))
-                            roc_span.end()
-
-                    if "trace" in event:
-
-                        trace_data = event["trace"]
-
-                        if "trace" in trace_data:
-                            if "guardrailTrace" in trace_data["trace"]:
-                                session_id = trace_data["sessionId"]
-                                caller_chain = trace_data["callerChain"]
-                                guardrail_trace = trace_data["trace"]["guardrailTrace"]
-                                sub_agent_id, sub_agent_alias_id = (
-                                    get_agent_from_caller_chain(
-                                        caller_chain=caller_chain, index=-1
-                                    )
-                                )
-
-                                if (
-                                    sub_agent_id == agent_id
-                                    and sub_agent_alias_id == agent_alias_id
-                                ):
-                                    is_guardrail = True
-
-                                if "inputAssessments" in guardrail_trace:
-
-                                    if config.PRODUCE_BEDROCK_OTEL_TRACES:
-                                        agent_span = span_manager.create_agent_span_return(
-                                            agent_session_id=session_id,
-                                            caller_chain=caller_chain,
-                                            # start_time=int(event_time.timestamp() * 1e9),
-                                            attributes={
-                                                OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.AGENT.value,
-                                                SpanAttributes.AGENT_ID.value: sub_agent_id,
-                                                SpanAttributes.AGENT_ALIAS_ID.value: sub_agent_alias_id,
-                                                OtelSpanAttributes.LLM_SYSTEM: "aws.bedrock",
-                                                OtelSpanAttributes.SESSION_ID: session_id,
-                                            },
-                                            name=f"Agent {agent_id}:{agent_alias_id}",
-                                        )
-
-                                    if guardrail_trace["action"] == "INTERVENED":
-                                        agent_answer = str()
-
-                                    if config.PRODUCE_BEDROCK_OTEL_TRACES:
-                                        guardrail_span = tracer.start_span(
-                                            name=SpanName.GUARDRAIL.value,
-                                            kind=SpanKind.CLIENT,
-                                            attributes={
-                                                OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.GUARDRAIL.value,
-                                                SpanAttributes.GUARDRAIL_ACTION.value: guardrail_trace[
-                                                    "action"
-                                                ],
-                                            },
-                                            context=otel_trace.set_span_in_context(
-                                                agent_span
-                                            ),
-                                        )
-                                        guardrail_span.set_attributes(
-                                            {
-                                                OtelSpanAttributes.INPUT_VALUE: json_safe(
-                                                    guardrail_trace["inputAssessments"]
-                                                ),
-                                                OtelSpanAttributes.INPUT_MIME_TYPE: "application/json",
-                                            }
-                                        )
-
-                                        guardrail_span.set_status(Status(StatusCode.OK))
-                                        guardrail_span.end()
-                                        guardrail_span = None
-
-                                if "outputAssessments" in guardrail_trace:
-                                    if config.PRODUCE_BEDROCK_OTEL_TRACES:
-                                        if stream_final_response is False:
-                                            if (
-                                                guardrail_trace["action"]
-                                                == "INTERVENED"
-                                            ):
-                                                agent_answer = str()
-
-                                            guardrail_span = tracer.start_span(
-                                                name=SpanName.GUARDRAIL.value,
-                                                kind=SpanKind.CLIENT,
-                                                attributes={
-                                                    OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.GUARDRAIL.value,
-                                                    SpanAttributes.GUARDRAIL_ACTION.value: guardrail_trace[
-                                                        "action"
-                                                    ],
-                                                },
-                                                context=otel_trace.set_span_in_context(
-                                                    span_manager.spans[
-                                                        session_id
-                                                    ].agent_span.span
-                                                ),
-                                            )
-                                            guardrail_span.set_attributes(
-                                                {
-                                                    OtelSpanAttributes.OUTPUT_VALUE: json_safe(
-                                                        guardrail_trace[
-                                                            "outputAssessments"
-                                                        ]
-                                                    ),
-                                                    OtelSpanAttributes.OUTPUT_MIME_TYPE: "application/json",
-                                                }
-                                            )
-                                            guardrail_span.set_status(
-                                                Status(StatusCode.OK)
-                                            )
-                                            guardrail_span.end()
-                                        else:
-                                            if (
-                                                not guardrail_span
-                                                and guardrail_trace["action"]
-                                                == "INTERVENED"
-                                            ):
-
-                                                if (
-                                                    sub_agent_id == agent_id
-                                                    and sub_agent_alias_id
-                                                    == agent_alias_id
-                                                ):
-                                                    output_stream_guardrail_intervene = (
-                                                        True
-                                                    )
-
-                                                guardrail_span = tracer.start_span(
-                                                    name=SpanName.GUARDRAIL.value,
-                                                    kind=SpanKind.CLIENT,
-                                                    attributes={
-                                                        OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.GUARDRAIL.value,
-                                                        SpanAttributes.GUARDRAIL_ACTION.value: guardrail_trace[
-                                                            "action"
-                                                        ],
-                                                    },
-                                                    context=otel_trace.set_span_in_context(
-                                                        span_manager.spans[
-                                                            session_id
-                                                        ].agent_span.span
-                                                    ),
-                                                )
-                                                guardrail_span.set_attributes(
-                                                    {
-                                                        OtelSpanAttributes.OUTPUT_VALUE: json_safe(
-                                                            guardrail_trace[
-                                                                "outputAssessments"
-                                                            ]
-                                                        ),
-                                                        OtelSpanAttributes.OUTPUT_MIME_TYPE: "application/json",
-                                                    }
-                                                )
-                                                guardrail_span.set_status(
-                                                    Status(StatusCode.OK)
-                                                )
-                                                guardrail_span.end()
-
-                        input_tokens, output_tokens, llm_calls = (
-                            ProcessL2Trace.process_trace_event(
-                                trace_data=event["trace"],
-                                span_manager=span_manager,
-                                save_traces=save_traces,
-                                session_id=sessionId,
-                                show_traces=show_traces,
-                            )
-                        )
-                        total_input_tokens += int(input_tokens)
-                        total_output_tokens += int(output_tokens)
-                        total_llm_calls += int(llm_calls)
-
-                    # Get Final Answer
-                    if "chunk" in event:
-                        if "attribution" in event["chunk"]:
-                            citations.append(event["chunk"]["attribution"]["citations"])
-                            agent_answer, cite = add_citation(
-                                citations=event["chunk"]["attribution"]["citations"],
-                                cite=1 if not cite else cite,
-                            )
-                        else:
-                            data = event["chunk"]["bytes"]
-                            if stream_final_response is True:
-                                if output_stream_guardrail_intervene is True:
-                                    agent_answer = str()
-                                    agent_answer += data.decode("utf8")
-                                    print(
-                                        colored(
-                                            "\n\n\n" + data.decode("utf-8"),
-                                            TraceColor.error,
-                                        ),
-                                        end="",
-                                    )
-                                else:
-                                    agent_answer += data.decode("utf8")
-                                    print(
-                                        colored(
-                                            data.decode("utf-8"),
-                                            TraceColor.final_output,
-                                        ),
-                                        end="",
-                                    )
-                            else:
-                                agent_answer += data.decode("utf8")
-                                print(
-                                    colored(agent_answer, TraceColor.final_output),
-                                    end="",
-                                )
-
-                time_after_call = datetime.now(timezone.utc)
-
-                if config.PRODUCE_BEDROCK_OTEL_TRACES:
-                    if sessionId not in span_manager.spans:
-                        raise RuntimeError("Root Agent span not found")
-                    if citations and output_stream_guardrail_intervene is False:
-                        root_agent_span.set_attribute(
-                            OtelSpanAttributes.RETRIEVAL_DOCUMENTS, json_safe(citations)
-                        )
+                self.guardrail_span.set_status(Status(StatusCode.OK))
+                self.guardrail_span.end()
+                self.guardrail_span = None
 
-                    if is_guardrail and not guardrail_span:
-                        guardrail_span = tracer.start_span(
-                            name=SpanName.GUARDRAIL.value,
-                            kind=SpanKind.CLIENT,
-                            attributes={
-                                OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.GUARDRAIL.value,
-                                SpanAttributes.GUARDRAIL_ACTION.value: "NONE",
-                            },
-                            context=otel_trace.set_span_in_context(root_agent_span),
+        if "outputAssessments" in guardrail_trace:
+            if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                if self.stream_final_response is False:
+                    if guardrail_trace["action"] == "INTERVENED":
+                        self.agent_answer = str()
+
+                    if self.detailed:
+                        self.guardrail_span = self.start_guardrail_span(
+                            action=guardrail_trace["action"],
+                            parent=self.span_manager.spans[session_id].agent_span.span,
                         )
-
-                        guardrail_span.set_attributes(
+                        self.guardrail_span.set_attributes(
                             {
-                                OtelSpanAttributes.OUTPUT_VALUE: json_safe([{}]),
+                                OtelSpanAttributes.OUTPUT_VALUE: json_safe(
+                                    guardrail_trace["outputAssessments"]
+                                ),
                                 OtelSpanAttributes.OUTPUT_MIME_TYPE: "application/json",
                             }
                         )
-
-                        guardrail_span.set_status(Status(StatusCode.OK))
-                        guardrail_span.end()
-                        guardrail_span = None
-                    else:
-                        guardrail_span = None
-
-                    root_agent_span.set_attribute(
-                        OtelSpanAttributes.OUTPUT_VALUE, agent_answer
+                        self.guardrail_span.set_status(Status(StatusCode.OK))
+                        self.guardrail_span.end()
+                else:
+                    if (
+                        not self.guardrail_span
+                        and guardrail_trace["action"] == "INTERVENED"
+                    ):
+
+                        if (
+                            sub_agent_id == self.agent_id
+                            and sub_agent_alias_id == self.agent_alias_id
+                        ):
+                            self.output_stream_guardrail_intervene = True
+
+                        if self.detailed:
+                            self.guardrail_span = self.start_guardrail_span(
+                                action=guardrail_trace["action"],
+                                parent=self.span_manager.spans[
+                                    session_id
+                                ].agent_span.span,
+                            )
+                            self.guardrail_span.set_attributes(
+                                {
+                                    OtelSpanAttributes.OUTPUT_VALUE: json_safe(
+                                        guardrail_trace["outputAssessments"]
+                                    ),
+                                    OtelSpanAttributes.OUTPUT_MIME_TYPE: "application/json",
+                                }
+                            )
+                            self.guardrail_span.set_status(Status(StatusCode.OK))
+                            self.guardrail_span.end()
+
+    def handle_chunk(self, chunk: Dict) -> None:
+        if "attribution" in chunk:
+            self.citations.append(chunk["attribution"]["citations"])
+            self.agent_answer, self.cite = add_citation(
+                citations=chunk["attribution"]["citations"],
+                cite=1 if not self.cite else self.cite,
+            )
+        else:
+            data = chunk["bytes"]
+            if self.stream_final_response is True:
+                if self.output_stream_guardrail_intervene is True:
+                    self.agent_answer = str()
+                    self.agent_answer += data.decode("utf8")
+                    print(
+                        colored(
+                            "\n\n\n" + data.decode("utf-8"),
+                            TraceColor.error,
+                        ),
+                        end="",
                     )
-                    root_agent_span.set_attribute(
-                        OtelSpanAttributes.OUTPUT_MIME_TYPE, "text/plain"
+                else:
+                    self.agent_answer += data.decode("utf8")
+                    print(
+                        colored(
+                            data.decode("utf-8"),
+                            TraceColor.final_output,
+                        ),
+                        end="",
                     )
-                    # End root span
+            else:
+                self.agent_answer += data.decode("utf8")
+                print(
+                    colored(self.agent_answer, TraceColor.final_output),
+                    end="",
+                )
 
-                    if output_stream_guardrail_intervene is True:
-                        span_manager.end_all_spans(status_code=StatusCode.OK)
-                    else:
-                        span_manager.spans[sessionId].agent_span.end_time = int(
-                            time_after_call.timestamp() * 1e9
-                        )
+    def finish(self) -> None:
+        self.time_after_call = datetime.now(timezone.utc)
 
-                    if len(span_manager.spans) > 0:
-                        span_manager.end_all_spans(status_code=StatusCode.OK)
+        if config.PRODUCE_BEDROCK_OTEL_TRACES:
+            if self.session_id not in self.span_manager.spans:
+                raise RuntimeError("Root Agent span not found")
+            if self.citations and self.output_stream_guardrail_intervene is False:
+                self.root_agent_span.set_attribute(
+                    OtelSpanAttributes.RETRIEVAL_DOCUMENTS, json_safe(self.citations)
+                )
 
-            except Exception as e:
-                # Handle exceptions
+            if self.detailed and self.is_guardrail and not self.guardrail_span:
+                self.guardrail_span = self.start_guardrail_span(
+                    action="NONE", parent=self.root_agent_span
+                )
 
-                if config.PRODUCE_BEDROCK_OTEL_TRACES:
-                    root_agent_span.record_exception(e)
-                    root_agent_span.set_attribute("error.message", str(e))
-                    root_agent_span.set_attribute("error.type", e.__class__.__name__)
-                    root_agent_span.set_status(Status(StatusCode.ERROR))
+                self.guardrail_span.set_attributes(
+                    {
+                        OtelSpanAttributes.OUTPUT_VALUE: json_safe([{}]),
+                        OtelSpanAttributes.OUTPUT_MIME_TYPE: "application/json",
+                    }
+                )
 
-                    agent_answer = str()
-                    agent_answer = json_safe({"error": str(e), "exception": str(e)})
+                self.guardrail_span.set_status(Status(StatusCode.OK))
+                self.guardrail_span.end()
+            self.guardrail_span = None
 
-                    root_agent_span.set_attribute(
-                        OtelSpanAttributes.OUTPUT_VALUE, json_safe(agent_answer)
-                    )
-                    root_agent_span.set_attribute(
-                        OtelSpanAttributes.OUTPUT_MIME_TYPE, "application/json"
-                    )
+            self.root_agent_span.set_attribute(
+                OtelSpanAttributes.OUTPUT_VALUE, self.agent_answer
+            )
+            self.root_agent_span.set_attribute(
+                OtelSpanAttributes.OUTPUT_MIME_TYPE, "text/plain"
+            )
+            self.root_agent_span.set_attributes(
+                {
+                    SpanAttributes.INPUT_TOKENS.value: self.total_input_tokens,
+                    SpanAttributes.OUTPUT_TOKENS.value: self.total_output_tokens,
+                    SpanAttributes.LLM_CALLS.value: self.total_llm_calls,
+                    SpanAttributes.GUARDRAIL_INTERVENED.value: (
+                        self.guardrail_intervened
+                    ),
+                }
+            )
+            # End root span
 
-                    span_manager.end_all_spans(status_code=StatusCode.ERROR)
+            if self.output_stream_guardrail_intervene is True:
+                self.span_manager.end_all_spans(status_code=StatusCode.OK)
+            else:
+                self.span_manager.spans[self.session_id].agent_span.end_time = int(
+                    self.time_after_call.timestamp() * 1e9
+                )
 
-                    raise Exception(e)
+            if len(self.span_manager.spans) > 0:
+                self.span_manager.end_all_spans(status_code=StatusCode.OK)
 
-                else:
-                    print(f"An error occurred: {str(e)}")
-                    agent_answer = str(e)
+    def fail(self, e: Exception) -> None:
+        # Handle exceptions
 
-                time_after_call = datetime.now(timezone.utc)
+        if config.PRODUCE_BEDROCK_OTEL_TRACES:
+            self.root_agent_span.record_exception(e)
+            self.root_agent_span.set_attribute("error.message", str(e))
+            self.root_agent_span.set_attribute("error.type", e.__class__.__name__)
+            self.root_agent_span.set_status(Status(StatusCode.ERROR))
 
-            duration = (time_after_call - time_before_call).total_seconds()
+            self.agent_answer = json_safe({"error": str(e), "exception": str(e)})
+
+            self.root_agent_span.set_attribute(
+                OtelSpanAttributes.OUTPUT_VALUE, json_safe(self.agent_answer)
+            )
+            self.root_agent_span.set_attribute(
+                OtelSpanAttributes.OUTPUT_MIME_TYPE, "application/json"
+            )
 
-            print(
-                colored(
-                    f"\nAgent made a total of {total_llm_calls} LLM calls, "
-                    + f"using {total_input_tokens+total_output_tokens} tokens "
-                    + f"(in: {total_input_tokens}, out: {total_output_tokens})"
-                    + f", and took {duration} total seconds",
-                    TraceColor.stats,
+            self.span_manager.end_all_spans(status_code=StatusCode.ERROR)
+
+            raise Exception(e)
+
+        else:
+            print(f"An error occurred: {str(e)}")
+            self.agent_answer = str(e)
+
+        self.time_after_call = datetime.now(timezone.utc)
+
+    def close(self) -> None:
+        """End the spans a cancelled or interrupted call left open."""
+        if self.span_manager.spans:
+            self.span_manager.end_all_spans(status_code=StatusCode.ERROR)
+
+    def result(self) -> str:
+        duration = (self.time_after_call - self.time_before_call).total_seconds()
+
+        print(
+            colored(
+                f"\nAgent made a total of {self.total_llm_calls} LLM calls, "
+                + f"using {self.total_input_tokens+self.total_output_tokens} tokens "
+                + f"(in: {self.total_input_tokens}, out: {self.total_output_tokens})"
+                + f", and took {duration} total seconds",
+                TraceColor.stats,
+            )
+        )
+
+        return self.agent_answer
+
+
+def observe(show_traces: bool = True, save_traces: bool = False):
+    """Trace every call of a function that returns an ``invoke_agent`` response.
+
+    Works on plain functions and on coroutine functions. For the latter a
+    blocking ``completion`` EventStream is read on the shared I/O pool, so
+    many traced invocations can run on one event loop.
+    """
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(
+                inputText: str,
+                sessionId: str,
+                **kwargs,
+            ):
+                invocation = ObservedInvocation(
+                    inputText=inputText,
+                    sessionId=sessionId,
+                    kwargs=kwargs,
+                    show_traces=show_traces,
+                    save_traces=save_traces,
                 )
+                try:
+                    response = await func(
+                        inputText=inputText,
+                        sessionId=sessionId,
+                        **kwargs,
+                    )
+
+                    event_stream = response["completion"]
+                    if hasattr(event_stream, "__aiter__"):
+                        async for event in event_stream:
+                            invocation.handle_event(event)
+                    else:
+                        from InlineAgent.agent.transport import AsyncTransport
+
+                        async for event in AsyncTransport.default().iterate(
+                            event_stream
+                        ):
+                            invocation.handle_event(event)
+
+                    invocation.finish()
+                except Exception as e:
+                    invocation.fail(e)
+                finally:
+                    invocation.close()
+
+                return invocation.result()
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(
+            inputText: str,
+            sessionId: str,
+            **kwargs,
+        ):
+            invocation = ObservedInvocation(
+                inputText=inputText,
+                sessionId=sessionId,
+                kwargs=kwargs,
+                show_traces=show_traces,
+                save_traces=save_traces,
             )
+            try:
+                response = func(
+                    inputText=inputText,
+                    sessionId=sessionId,
+                    **kwargs,
+                )
+
+                event_stream = response["completion"]
+
+                for event in event_stream:
+                    invocation.handle_event(event)
+
+                invocation.finish()
+            except Exception as e:
+                invocation.fail(e)
+            finally:
+                invocation.close()
 
-            return agent_answer
+            return invocation.result()
 
         return wrapper
 
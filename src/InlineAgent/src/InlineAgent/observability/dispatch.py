@@ -0,0 +1,142 @@
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .constants import L2Traces, L3OrchestrationTraces, L3RoutingClassifierTraces
+
+TraceRoute = Tuple[str, Optional[str]]
+TraceCallback = Callable[..., None]
+
+NO_USAGE = (0, 0, 0)
+
+_MODEL_STEPS = (
+    L3OrchestrationTraces.modelInvocationInput.value,
+    L3OrchestrationTraces.modelInvocationOutput.value,
+)
+
+# Trace type -> the steps of its own tagged union; an empty tuple means the
+# trace type has no steps.
+STEPS: Dict[str, Tuple[str, ...]] = {
+    L2Traces.orchestrationTrace.value: tuple(s.value for s in L3OrchestrationTraces),
+    L2Traces.routingClassifierTrace.value: tuple(
+        s.value for s in L3RoutingClassifierTraces
+    ),
+    L2Traces.preProcessingTrace.value: _MODEL_STEPS,
+    L2Traces.postProcessingTrace.value: _MODEL_STEPS,
+    L2Traces.guardrailTrace.value: (),
+    L2Traces.failureTrace.value: (),
+    L2Traces.customOrchestrationTrace.value: (),
+}
+
+ROUTES: Tuple[TraceRoute, ...] = tuple(
+    (kind, step) for kind, steps in STEPS.items() for step in steps or (None,)
+)
+
+
+def trace_route(trace: Dict) -> Optional[TraceRoute]:
+    """Return the ``(trace type, step)`` of a trace.
+
+    ``trace`` is a tagged union and so are the orchestration, routing,
+    pre- and post-processing traces inside it, so at most one key of each
+    is set. Traces without steps, such as ``guardrailTrace``, route as
+    ``(trace type, None)``; unknown members return ``None``.
+    """
+    for kind in trace:
+        steps = STEPS.get(kind)
+        if steps is None:
+            continue
+        if steps:
+            for step in trace[kind]:
+                if step in steps:
+                    return kind, step
+        return kind, None
+    return None
+
+
+def model_usage(model_invocation_output: Dict) -> Tuple[int, int, int]:
+    """Return (input_tokens, output_tokens, llm_calls) of a model invocation."""
+    usage = model_invocation_output.get("metadata", {}).get("usage", {})
+    return int(usage.get("inputTokens", 0)), int(usage.get("outputTokens", 0)), 1
+
+
+class TraceHandler:
+    """Consumer of the trace events routed by a ``TraceDispatcher``.
+
+    ``routes`` maps each ``(trace type, step)`` the handler cares about to a
+    callback. Callbacks are called as ``callback(trace_data, body, **context)``
+    where ``body`` is ``trace_data["trace"][trace type]`` and ``context`` holds
+    the keyword arguments given to ``TraceDispatcher.dispatch``.
+    """
+
+    def routes(self) -> Dict[TraceRoute, TraceCallback]:
+        return dict()
+
+
+class MetricsTraceHandler(TraceHandler):
+    """Counts trace events per route and totals the model token usage."""
+
+    def __init__(self):
+        self.events: Counter = Counter()
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.llm_calls = 0
+
+    def routes(self) -> Dict[TraceRoute, TraceCallback]:
+        model_output = L3OrchestrationTraces.modelInvocationOutput.value
+        return {
+            route: self.count_model_output if route[1] == model_output else self.count
+            for route in ROUTES
+        }
+
+    def count(self, trace_data: Dict, body: Dict, **context) -> None:
+        self.events[trace_route(trace_data["trace"])] += 1
+
+    def count_model_output(self, trace_data: Dict, body: Dict, **context) -> None:
+        self.count(trace_data, body)
+        input_tokens, output_tokens, llm_calls = model_usage(
+            body[L3OrchestrationTraces.modelInvocationOutput.value]
+        )
+        self.input_tokens += input_tokens
+        self.output_tokens += output_tokens
+        self.llm_calls += llm_calls
+
+
+class TraceDispatcher:
+    """Routes each trace event to the handlers registered for its route.
+
+    The route is found in one pass over the event's tagged unions and looked
+    up in a table built from the handlers' ``routes``, so each event reaches
+    exactly the callbacks for its own trace type and step.
+    """
+
+    def __init__(self, handlers: Iterable[TraceHandler] = ()):
+        self.handlers: List[TraceHandler] = list()
+        self._table: Dict[TraceRoute, List[TraceCallback]] = dict()
+        for handler in handlers:
+            self.add_handler(handler)
+
+    def add_handler(self, handler: TraceHandler) -> None:
+        self.handlers.append(handler)
+        for route, callback in handler.routes().items():
+            self._table.setdefault(route, list()).append(callback)
+
+    def dispatch(self, trace_data: Dict, **context) -> Tuple[int, int, int]:
+        """Run the callbacks for ``trace_data``'s route.
+
+        Returns (input_tokens, output_tokens, llm_calls) of the event, which
+        are only non-zero for a model invocation output.
+        """
+        trace = trace_data.get("trace")
+        if not trace:
+            return NO_USAGE
+        route = trace_route(trace)
+        if route is None:
+            return NO_USAGE
+
+        kind, step = route
+        body = trace[kind]
+        for callback in self._table.get(route, ()):
+            callback(trace_data, body, **context)
+
+        if step == L3OrchestrationTraces.modelInvocationOutput.value:
+            return model_usage(body[step])
+        return NO_USAGE
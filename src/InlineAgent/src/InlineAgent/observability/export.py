@@ -0,0 +1,149 @@
+import logging
+import os
+import threading
+from typing import Literal, Optional, Sequence
+
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    SpanExporter,
+    SpanExportResult,
+)
+
+from .metrics import AgentMetrics
+from .settings_management import ObservabilityConfig
+
+logger = logging.getLogger(__name__)
+
+DropPolicy = Literal["drop_oldest", "drop_newest"]
+
+
+class FileSpanExporter(SpanExporter):
+    """Appends finished spans to a local file, one JSON object per line."""
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self._lock = threading.Lock()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(span.to_json(indent=None) + "\n" for span in spans)
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as file:
+                file.write(lines)
+        except OSError:
+            logger.exception(f"Could not write spans to {self.path}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+class CountingSpanExporter(SpanExporter):
+    """Counts the spans ``exporter`` delivers and the ones it loses.
+
+    Spans of a batch that fails or raises are counted as dropped with
+    ``reason="export_failed"``.
+    """
+
+    def __init__(self, exporter: SpanExporter, name: str):
+        self.exporter = exporter
+        self.name = name
+        self.exported = 0
+        self.failed = 0
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        try:
+            result = self.exporter.export(spans)
+        except Exception:
+            logger.exception(f"Span exporter {self.name} failed")
+            result = SpanExportResult.FAILURE
+
+        metrics = AgentMetrics.default()
+        if result is SpanExportResult.SUCCESS:
+            self.exported += len(spans)
+            metrics.spans_exported.add(len(spans), {"exporter": self.name})
+        else:
+            self.failed += len(spans)
+            metrics.spans_dropped.add(
+                len(spans), {"exporter": self.name, "reason": "export_failed"}
+            )
+        return result
+
+    def shutdown(self) -> None:
+        self.exporter.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.exporter.force_flush(timeout_millis)
+
+
+class BoundedBatchSpanProcessor(BatchSpanProcessor):
+    """``BatchSpanProcessor`` that counts what it drops.
+
+    Each exporter gets its own processor, so its own queue and export
+    thread: a slow backend fills only its queue and never blocks the request
+    path or the other exporters. When the queue is full, ``drop_oldest``
+    keeps the new span (the SDK's behaviour) and ``drop_newest`` keeps the
+    queued ones. Drops are counted in ``dropped`` and in the
+    ``bedrock.agent.spans.dropped`` counter with ``reason="queue_full"``.
+    """
+
+    def __init__(
+        self,
+        span_exporter: SpanExporter,
+        name: str,
+        max_queue_size: Optional[int] = None,
+        schedule_delay_millis: Optional[float] = None,
+        max_export_batch_size: Optional[int] = None,
+        export_timeout_millis: Optional[float] = None,
+        drop_policy: DropPolicy = "drop_oldest",
+    ):
+        self.name = name
+        self.drop_policy = drop_policy
+        self.dropped = 0
+        self.counting_exporter = CountingSpanExporter(span_exporter, name=name)
+        super().__init__(
+            span_exporter=self.counting_exporter,
+            max_queue_size=max_queue_size,
+            schedule_delay_millis=schedule_delay_millis,
+            max_export_batch_size=max_export_batch_size,
+            export_timeout_millis=export_timeout_millis,
+        )
+
+    @classmethod
+    def from_config(
+        cls, span_exporter: SpanExporter, name: str, config: ObservabilityConfig
+    ) -> "BoundedBatchSpanProcessor":
+        # A batch never holds more than the queue, so a smaller queue caps it.
+        return cls(
+            span_exporter=span_exporter,
+            name=name,
+            max_queue_size=config.SPAN_EXPORT_MAX_QUEUE_SIZE,
+            schedule_delay_millis=config.SPAN_EXPORT_SCHEDULE_DELAY_MILLIS,
+            max_export_batch_size=min(
+                config.SPAN_EXPORT_MAX_BATCH_SIZE, config.SPAN_EXPORT_MAX_QUEUE_SIZE
+            ),
+            export_timeout_millis=config.SPAN_EXPORT_TIMEOUT_MILLIS,
+            drop_policy=config.SPAN_EXPORT_DROP_POLICY,
+        )
+
+    @property
+    def exported(self) -> int:
+        return self.counting_exporter.exported
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if (
+            not self.done
+            and span.context.trace_flags.sampled
+            and len(self.queue) >= self.max_queue_size
+        ):
+            self.dropped += 1
+            AgentMetrics.default().spans_dropped.add(
+                1, {"exporter": self.name, "reason": "queue_full"}
+            )
+            if self.drop_policy == "drop_newest":
+                return
+        super().on_end(span)
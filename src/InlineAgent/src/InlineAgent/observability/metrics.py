@@ -0,0 +1,384 @@
+import base64
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from opentelemetry import metrics
+from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
+from opentelemetry.metrics import CallbackOptions, Meter, Observation
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import (
+    Gauge,
+    Histogram,
+    MetricReader,
+    MetricsData,
+    PeriodicExportingMetricReader,
+    Sum,
+)
+from opentelemetry.sdk.resources import Resource
+
+from .constants import L2Traces, L3OrchestrationTraces
+from .dispatch import TraceCallback, TraceDispatcher, TraceHandler, TraceRoute
+from .settings_management import ObservabilityConfig
+from .span_manager import SpanModel
+
+logger = logging.getLogger(__name__)
+
+# Seconds; agent turns run from well under a second to minutes.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250)
+
+
+class AgentMetrics:
+    """OpenTelemetry instruments for agent turns.
+
+    Latencies are histograms in seconds and usage is counted in tokens and
+    LLM calls. Turn-level measurements are labeled by ``agent`` and
+    ``model``; steps also by ``step`` and client-side tools by ``tool`` and
+    ``outcome``; ``tool_cache`` counts cached tool lookups by ``tool`` and
+    ``result``. ``live_spans`` gauges the spans ``observe`` has open and
+    ``spans_exported``/``spans_dropped`` count span export per exporter.
+    Until a ``MeterProvider`` is set, recording is a no-op.
+    """
+
+    _default: Optional["AgentMetrics"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self, meter: Optional[Meter] = None):
+        if meter is None:
+            meter = metrics.get_meter(ObservabilityConfig().BEDROCK_AGENT_TRACER_NAME)
+        self.time_to_first_chunk = meter.create_histogram(
+            "bedrock.agent.time_to_first_chunk",
+            unit="s",
+            description="Time from invoking the agent to its first answer chunk",
+            explicit_bucket_boundaries_advisory=LATENCY_BUCKETS,
+        )
+        self.turn_duration = meter.create_histogram(
+            "bedrock.agent.turn.duration",
+            unit="s",
+            description="Duration of a turn, including return of control",
+            explicit_bucket_boundaries_advisory=LATENCY_BUCKETS,
+        )
+        self.step_duration = meter.create_histogram(
+            "bedrock.agent.step.duration",
+            unit="s",
+            description="Duration of an orchestration step, from its trace events",
+            explicit_bucket_boundaries_advisory=LATENCY_BUCKETS,
+        )
+        self.tool_duration = meter.create_histogram(
+            "bedrock.agent.tool.duration",
+            unit="s",
+            description="Duration of a tool run on the client for return of control",
+            explicit_bucket_boundaries_advisory=LATENCY_BUCKETS,
+        )
+        self.input_tokens = meter.create_counter(
+            "bedrock.agent.input_tokens", unit="{token}"
+        )
+        self.output_tokens = meter.create_counter(
+            "bedrock.agent.output_tokens", unit="{token}"
+        )
+        self.llm_calls = meter.create_counter("bedrock.agent.llm_calls", unit="{call}")
+        self.tool_cache = meter.create_counter(
+            "bedrock.agent.tool.cache",
+            unit="{call}",
+            description="Tool calls answered by a ToolCache (hit) or run (miss)",
+        )
+        self.spans_exported = meter.create_counter(
+            "bedrock.agent.spans.exported", unit="{span}"
+        )
+        self.spans_dropped = meter.create_counter(
+            "bedrock.agent.spans.dropped", unit="{span}"
+        )
+        self.live_spans = meter.create_observable_gauge(
+            "bedrock.agent.live_spans",
+            callbacks=[AgentMetrics.observe_live_spans],
+            unit="{span}",
+            description="Spans started by observe and not yet ended",
+        )
+
+    @classmethod
+    def default(cls) -> "AgentMetrics":
+        """Process-wide instruments on the global ``MeterProvider``."""
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    cls._default = cls()
+        return cls._default
+
+    @staticmethod
+    def observe_live_spans(options: CallbackOptions) -> Iterable[Observation]:
+        yield Observation(SpanModel.live())
+
+    def record_usage(
+        self, input_tokens: int, output_tokens: int, llm_calls: int, labels: Dict
+    ) -> None:
+        self.input_tokens.add(input_tokens, labels)
+        self.output_tokens.add(output_tokens, labels)
+        self.llm_calls.add(llm_calls, labels)
+
+    def record_tool(
+        self, seconds: float, tool: str, outcome: str, labels: Optional[Dict] = None
+    ) -> None:
+        self.tool_duration.record(
+            seconds, {**(labels or {}), "tool": tool, "outcome": outcome}
+        )
+
+
+class StepLatencyTraceHandler(TraceHandler):
+    """Times orchestration steps from the arrival of their trace events.
+
+    A model call runs from ``modelInvocationInput`` to
+    ``modelInvocationOutput`` and an action group, knowledge base or
+    collaborator call from ``invocationInput`` to ``observation``, matched
+    on ``traceId``. Durations go to ``AgentMetrics.step_duration`` with the
+    ``labels`` given to ``dispatch``. At most ``max_pending`` unmatched
+    starts are remembered.
+    """
+
+    def __init__(self, max_pending: int = 1024):
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        # (sessionId, step kind, traceId) -> (step label, start time)
+        self._pending: "OrderedDict[Tuple[str, ...], Tuple[str, float]]" = (
+            OrderedDict()
+        )
+
+    def routes(self) -> Dict[TraceRoute, TraceCallback]:
+        orchestration = L2Traces.orchestrationTrace.value
+        routes = {
+            (orchestration, L3OrchestrationTraces.invocationInput.value): (
+                self.start_invocation
+            ),
+            (orchestration, L3OrchestrationTraces.observation.value): (
+                self.end_invocation
+            ),
+        }
+        for kind in (
+            orchestration,
+            L2Traces.routingClassifierTrace.value,
+            L2Traces.preProcessingTrace.value,
+            L2Traces.postProcessingTrace.value,
+        ):
+            routes[(kind, L3OrchestrationTraces.modelInvocationInput.value)] = (
+                self.start_model
+            )
+            routes[(kind, L3OrchestrationTraces.modelInvocationOutput.value)] = (
+                self.end_model
+            )
+        return routes
+
+    def start(self, trace_data: Dict, key: Tuple[str, str], step: str) -> None:
+        with self._lock:
+            self._pending[(trace_data.get("sessionId", ""), *key)] = (
+                step,
+                time.perf_counter(),
+            )
+            if len(self._pending) > self.max_pending:
+                self._pending.popitem(last=False)
+
+    def end(self, trace_data: Dict, key: Tuple[str, str], labels: Dict) -> None:
+        with self._lock:
+            started = self._pending.pop((trace_data.get("sessionId", ""), *key), None)
+        if started is None:
+            return
+        step, start = started
+        AgentMetrics.default().step_duration.record(
+            time.perf_counter() - start, {**labels, "step": step}
+        )
+
+    def start_model(self, trace_data: Dict, body: Dict, **context) -> None:
+        step = body[L3OrchestrationTraces.modelInvocationInput.value]
+        self.start(trace_data, ("model", step.get("traceId", "")), "model")
+
+    def end_model(self, trace_data: Dict, body: Dict, **context) -> None:
+        step = body[L3OrchestrationTraces.modelInvocationOutput.value]
+        self.end(
+            trace_data, ("model", step.get("traceId", "")), context.get("labels", {})
+        )
+
+    def start_invocation(self, trace_data: Dict, body: Dict, **context) -> None:
+        step = body[L3OrchestrationTraces.invocationInput.value]
+        self.start(
+            trace_data,
+            ("invocation", step.get("traceId", "")),
+            step.get("invocationType", "UNKNOWN").lower(),
+        )
+
+    def end_invocation(self, trace_data: Dict, body: Dict, **context) -> None:
+        step = body[L3OrchestrationTraces.observation.value]
+        self.end(
+            trace_data,
+            ("invocation", step.get("traceId", "")),
+            context.get("labels", {}),
+        )
+
+
+# ``dispatch(trace, labels=...)`` also returns the event's model usage, so it
+# takes the place of ``Trace.parse_usage``.
+metrics_dispatcher = TraceDispatcher([StepLatencyTraceHandler()])
+
+
+class PrometheusMetricReader(MetricReader):
+    """Renders the collected metrics in the Prometheus text format.
+
+    ``render`` collects and returns the text; ``serve`` exposes it over HTTP
+    from a daemon thread, for scraping at ``/metrics``. Metric names have
+    dots replaced by underscores, ``_seconds`` appended for second units and
+    ``_total`` for counters.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._collect_lock = threading.Lock()
+        self._metrics_data: Optional[MetricsData] = None
+        self.server: Optional[ThreadingHTTPServer] = None
+
+    def _receive_metrics(
+        self, metrics_data: MetricsData, timeout_millis: float = 10_000, **kwargs
+    ) -> None:
+        self._metrics_data = metrics_data
+
+    def render(self) -> str:
+        with self._collect_lock:
+            self.collect()
+            metrics_data = self._metrics_data
+        lines: List[str] = list()
+        if metrics_data is None:
+            return ""
+        for resource_metrics in metrics_data.resource_metrics:
+            for scope_metrics in resource_metrics.scope_metrics:
+                for metric in scope_metrics.metrics:
+                    lines.extend(PrometheusMetricReader.render_metric(metric))
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def render_metric(metric) -> List[str]:
+        name = re.sub(r"[^a-zA-Z0-9_:]", "_", metric.name)
+        if metric.unit == "s":
+            name += "_seconds"
+        data = metric.data
+        if isinstance(data, Histogram):
+            kind = "histogram"
+        elif isinstance(data, Sum) and data.is_monotonic:
+            kind = "counter"
+        elif isinstance(data, (Sum, Gauge)):
+            kind = "gauge"
+        else:
+            return list()
+
+        lines = [
+            f"# HELP {name} {metric.description}",
+            f"# TYPE {name} {kind}",
+        ]
+        for point in data.data_points:
+            labels = dict(point.attributes or {})
+            if kind == "histogram":
+                cumulative = 0
+                bounds = (*point.explicit_bounds, "+Inf")
+                for bound, count in zip(bounds, point.bucket_counts):
+                    cumulative += count
+                    bucket = PrometheusMetricReader.labels({**labels, "le": bound})
+                    lines.append(f"{name}_bucket{bucket} {cumulative}")
+                rendered = PrometheusMetricReader.labels(labels)
+                lines.append(f"{name}_sum{rendered} {point.sum}")
+                lines.append(f"{name}_count{rendered} {point.count}")
+            elif kind == "counter":
+                rendered = PrometheusMetricReader.labels(labels)
+                lines.append(f"{name}_total{rendered} {point.value}")
+            else:
+                rendered = PrometheusMetricReader.labels(labels)
+                lines.append(f"{name}{rendered} {point.value}")
+        return lines
+
+    @staticmethod
+    def labels(labels: Dict) -> str:
+        if not labels:
+            return ""
+        rendered = ",".join(
+            '{}="{}"'.format(
+                re.sub(r"[^a-zA-Z0-9_]", "_", str(key)),
+                str(value)
+                .replace("\\", "\\\\")
+                .replace('"', '\\"')
+                .replace("\n", "\\n"),
+            )
+            for key, value in labels.items()
+        )
+        return "{" + rendered + "}"
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """Serve ``/metrics`` on ``host:port``; port 0 picks a free port."""
+        reader = self
+
+        class MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = reader.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+        self.server.daemon_threads = True
+        threading.Thread(
+            target=self.server.serve_forever, name="prometheus-metrics", daemon=True
+        ).start()
+        return self.server
+
+    def shutdown(self, timeout_millis: float = 30_000, **kwargs) -> None:
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+
+
+def create_meter_provider(config: ObservabilityConfig) -> MeterProvider:
+    """Create the global MeterProvider for the agent metrics.
+
+    Metrics are pushed over OTLP to ``API_URL`` when
+    ``PRODUCE_BEDROCK_OTEL_METRICS`` is set, and served for Prometheus on
+    ``METRICS_PROMETHEUS_PORT`` when it is set.
+    """
+    resource = Resource.create(
+        {
+            "service.name": config.PROJECT_NAME,
+            "deployment.environment": config.ENVIRONMENT,
+        }
+    )
+
+    readers: List[MetricReader] = list()
+    if config.API_URL and config.PRODUCE_BEDROCK_OTEL_METRICS:
+        endpoint = f"{config.API_URL}/v1/metrics"
+        headers = None
+        if config.LANGFUSE_PUBLIC_KEY and config.LANGFUSE_SECRET_KEY:
+            auth = base64.b64encode(
+                f"{config.LANGFUSE_PUBLIC_KEY}:{config.LANGFUSE_SECRET_KEY}".encode()
+            ).decode()
+            headers = {"Authorization": f"Basic {auth}"}
+        logger.info(f"Exporting metrics to: {endpoint}")
+        readers.append(
+            PeriodicExportingMetricReader(
+                OTLPMetricExporter(endpoint=endpoint, headers=headers),
+                export_interval_millis=config.METRICS_EXPORT_INTERVAL_MILLIS,
+            )
+        )
+
+    if config.METRICS_PROMETHEUS_PORT is not None:
+        prometheus_reader = PrometheusMetricReader()
+        server = prometheus_reader.serve(port=config.METRICS_PROMETHEUS_PORT)
+        logger.info(f"Serving Prometheus metrics on port {server.server_port}")
+        readers.append(prometheus_reader)
+
+    meter_provider = MeterProvider(resource=resource, metric_readers=readers)
+    metrics.set_meter_provider(meter_provider)
+    return meter_provider
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import logging
+import os
+import queue
+import tempfile
+import threading
+from typing import Any, Dict, Optional, Set
+
+from .settings_management import ObservabilityConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_QUEUE = 1000
+
+
+class BlobStore:
+    """Local content-addressed store for span payloads too large to inline.
+
+    A payload is stored once under ``<directory>/<aa>/<sha256>``, where
+    ``aa`` is the first two hex digits of its digest, so the same prompt
+    sent on every turn takes the space of one. Spans reference it by digest.
+
+    ``put`` hands the payload to a background thread, so the request path
+    never touches the disk. If the queue is full, payloads are dropped and
+    counted in ``dropped`` rather than blocking the caller.
+    """
+
+    _lock = threading.Lock()
+    _stores: Dict[str, "BlobStore"] = dict()
+
+    def __init__(self, directory: str, max_queue: int = DEFAULT_MAX_QUEUE):
+        self.directory = os.path.abspath(directory)
+        self.dropped = 0
+        self._written: Set[str] = set()
+        self._written_lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(
+            target=self._run, name="InlineAgent-blob-writer", daemon=True
+        )
+        self._thread.start()
+
+    @classmethod
+    def for_directory(cls, directory: str) -> "BlobStore":
+        """Return the process-wide store for ``directory``."""
+        directory = os.path.abspath(directory)
+        with cls._lock:
+            if directory not in cls._stores:
+                cls._stores[directory] = cls(directory)
+            return cls._stores[directory]
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def put(self, data: bytes, digest: Optional[str] = None) -> str:
+        """Queue ``data`` for storage and return its sha256 hex digest."""
+        digest = digest or hashlib.sha256(data).hexdigest()
+        with self._written_lock:
+            if digest in self._written:
+                return digest
+            self._written.add(digest)
+        try:
+            self._queue.put_nowait((digest, data))
+        except queue.Full:
+            with self._written_lock:
+                self._written.discard(digest)
+                self.dropped += 1
+                first_drop = self.dropped == 1
+            if first_drop:
+                logger.warning("Blob writer queue is full, dropping span payloads")
+        return digest
+
+    def flush(self) -> None:
+        """Block until every payload put so far is on disk."""
+        self._queue.join()
+
+    def get(self, digest: str) -> bytes:
+        self.flush()
+        with open(self.path(digest), "rb") as file:
+            return file.read()
+
+    def _run(self) -> None:
+        while True:
+            digest, data = self._queue.get()
+            try:
+                self._write(digest, data)
+            except Exception as e:
+                logger.error(f"Could not write span payload {digest}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, digest: str, data: bytes) -> None:
+        path = self.path(digest)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a reader never sees a partial blob.
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+
+
+class PayloadBudget:
+    """Size budget for payloads recorded as span attributes.
+
+    Text longer than ``max_chars`` is cut to its first ``max_chars``
+    characters followed by a marker with the original length. With a
+    ``blob_store`` the full text is saved there too, the marker carries its
+    sha256 digest, and ``BlobStore.get(digest)`` returns it. Without one,
+    ``bound_json`` stops serialising at the limit, so large payloads cost
+    no more than small ones. ``max_chars=None`` keeps payloads whole.
+    """
+
+    _default: Optional["PayloadBudget"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_chars: Optional[int] = None,
+        blob_store: Optional[BlobStore] = None,
+    ):
+        self.max_chars = max_chars
+        self.blob_store = blob_store
+
+    @classmethod
+    def default(cls) -> "PayloadBudget":
+        """Process-wide budget configured from ``ObservabilityConfig``."""
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    config = ObservabilityConfig()
+                    cls._default = cls(
+                        max_chars=config.SPAN_ATTRIBUTE_MAX_CHARS,
+                        blob_store=(
+                            BlobStore.for_directory(config.SPAN_BLOB_DIRECTORY)
+                            if config.SPAN_BLOB_DIRECTORY
+                            else None
+                        ),
+                    )
+        return cls._default
+
+    def bound(self, text: str) -> str:
+        if self.max_chars is None or len(text) <= self.max_chars:
+            return text
+        marker = f"... [truncated from {len(text)} chars]"
+        if self.blob_store is not None:
+            digest = self.blob_store.put(text.encode("utf-8"))
+            marker = f"... [truncated from {len(text)} chars; blob sha256:{digest}]"
+        return text[: self.max_chars] + marker
+
+    def bound_json(self, obj: Any) -> str:
+        """Serialise ``obj`` to JSON within the budget."""
+        if self.max_chars is None or self.blob_store is not None:
+            return self.bound(json.dumps(obj))
+
+        chunks = list()
+        size = 0
+        for chunk in json.JSONEncoder().iterencode(obj):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > self.max_chars:
+                text = "".join(chunks)[: self.max_chars]
+                return text + f"... [truncated at {self.max_chars} chars]"
+        return "".join(chunks)
@@ -1,8 +1,6 @@
-import json
 import logging
 from typing import Any, Dict, Literal
 
-import os
 from opentelemetry.trace import StatusCode
 from opentelemetry import trace as otel_trace
 from openinference.semconv.trace import (
@@ -16,14 +14,16 @@ from .utils import (
     get_agent_from_caller_chain,
     get_agent_id_aliasid,
     json_safe,
+    model_name,
 )
 from .semantics import SpanAttributes, SpanName
 from .settings_management import ObservabilityConfig
+from .dispatch import TraceDispatcher, TraceHandler
 from .span_manager import SpanManager
+from .trace_writer import TraceWriter
 from .constants import (
     L2Traces,
     L3OrchestrationTraces,
-    L3RoutingClassifierTraces,
     L4InvocationInputTraces,
     L4ObservationTraces,
 )
@@ -44,33 +44,9 @@ class ProcessL2Trace:
 
     @staticmethod
     def save_trace(trace_data: Dict, session_id: int):
+        """Queue ``trace_data`` for ``trace/<session_id>.jsonl``; see ``TraceWriter``."""
         try:
-            directory_path = os.path.join(os.getcwd(), "trace")
-            if not os.path.exists(directory_path):
-                try:
-                    os.makedirs(directory_path, exist_ok=True)
-                except OSError as e:
-                    print(f"Error creating directory output: {e}")
-                    raise
-
-            try:
-                with open(
-                    os.path.join(directory_path, str(session_id) + ".json"), "r"
-                ) as file:
-                    data = json.load(file)
-            except (FileNotFoundError, json.JSONDecodeError):
-                # If file doesn't exist or is empty, start with empty list
-                data = []
-
-            # Append the new data
-            data.append(trace_data)
-
-            # Write back to file with proper formatting
-            with open(
-                os.path.join(directory_path, str(session_id) + ".json"), "w"
-            ) as file:
-                json.dump(data, file, indent=2, default=str)
-
+            TraceWriter.default().write(session_id=session_id, trace_data=trace_data)
         except Exception as e:
             print(f"An error occurred: {str(e)}")
 
@@ -82,284 +58,12 @@ class ProcessL2Trace:
         session_id: str,
         show_traces: bool,
     ):
-        input_tokens = 0
-        output_tokens = 0
-        llm_calls = 0
-
         if save_traces:
             ProcessL2Trace.save_trace(trace_data=trace_data, session_id=session_id)
 
-        if "trace" in trace_data:
-
-            trace = trace_data["trace"]
-
-            # Determine the trace type
-            # if L2Traces.guardrailTrace.value in trace:
-            #     ProcessL3Trace.process_guardrail_trace(
-            #         trace_data=trace_data,
-            #         span_manager=span_manager,
-            #     )
-
-            if L2Traces.preProcessingTrace.value in trace:
-                pre_input_tokens, pre_output_tokens, pre_llm_calls = (
-                    ProcessL3Trace.process_pre_processing_trace(
-                        trace_data=trace_data,
-                        span_manager=span_manager,
-                        show_traces=show_traces,
-                    )
-                )
-                input_tokens += pre_input_tokens
-                output_tokens += pre_output_tokens
-                llm_calls += pre_llm_calls
-
-            if L2Traces.orchestrationTrace.value in trace:
-                orch_input_tokens, orch_output_tokens, orch_llm_calls = (
-                    ProcessL3Trace.process_orchestration_trace(
-                        trace_data=trace_data,
-                        span_manager=span_manager,
-                        show_traces=show_traces,
-                    )
-                )
-                input_tokens += orch_input_tokens
-                output_tokens += orch_output_tokens
-                llm_calls += orch_llm_calls
-
-            if L2Traces.postProcessingTrace.value in trace:
-                post_input_tokens, post_output_tokens, post_llm_calls = (
-                    ProcessL3Trace.process_post_processing_trace(
-                        trace_data=trace_data,
-                        span_manager=span_manager,
-                        show_traces=show_traces,
-                    )
-                )
-                input_tokens += post_input_tokens
-                output_tokens += post_output_tokens
-                llm_calls += post_llm_calls
-
-            if L2Traces.routingClassifierTrace.value in trace:
-                rout_input_tokens, rout_output_tokens, rout_llm_calls = (
-                    ProcessL3Trace.process_routing_trace(
-                        trace_data=trace_data,
-                        span_manager=span_manager,
-                        show_traces=show_traces,
-                    )
-                )
-                input_tokens += rout_input_tokens
-                output_tokens += rout_output_tokens
-                llm_calls += rout_llm_calls
-
-            if "failureTrace" in trace:
-                pass
-
-            if "customOrchestrationTrace" in trace:
-                pass
-
-        return input_tokens, output_tokens, llm_calls
-
-
-class ProcessL3Trace:
-
-    @staticmethod
-    def process_pre_processing_trace(
-        trace_data: Dict, span_manager: SpanManager, show_traces
-    ):
-        if "trace" in trace_data:
-
-            trace = trace_data["trace"]
-
-            if "preProcessingTrace" in trace:
-                pre_processing_trace = trace["preProcessingTrace"]
-
-                if (
-                    L3OrchestrationTraces.modelInvocationInput.value
-                    in pre_processing_trace
-                ):
-
-                    ProcessL4Trace.process_model_invocation_input(
-                        trace_data=trace_data,
-                        span_manager=span_manager,
-                        key="preProcessingTrace",
-                        key_name=SpanName.PREPROCESSING.value,
-                        show_traces=show_traces,
-                    )
-
-                if (
-                    L3OrchestrationTraces.modelInvocationOutput.value
-                    in pre_processing_trace
-                ):
-                    input_tokens, output_tokens, llm_calls = (
-                        ProcessL4Trace.process_model_invocation_output(
-                            trace_data=trace_data,
-                            span_manager=span_manager,
-                            key="preProcessingTrace",
-                            show_traces=show_traces,
-                        )
-                    )
-                    return input_tokens, output_tokens, llm_calls
-        return 0, 0, 0
-
-    @staticmethod
-    def process_post_processing_trace(
-        trace_data: Dict, span_manager: SpanManager, show_traces: bool
-    ):
-        if "trace" in trace_data:
-
-            trace = trace_data["trace"]
-
-            if "postProcessingTrace" in trace:
-                post_processing_trace = trace["postProcessingTrace"]
-
-                if (
-                    L3OrchestrationTraces.modelInvocationInput.value
-                    in post_processing_trace
-                ):
-
-                    ProcessL4Trace.process_model_invocation_input(
-                        trace_data=trace_data,
-                        span_manager=span_manager,
-                        key="postProcessingTrace",
-                        key_name=SpanName.POSTPROCESSING.value,
-                        show_traces=show_traces,
-                    )
-
-                if (
-                    L3OrchestrationTraces.modelInvocationOutput.value
-                    in post_processing_trace
-                ):
-                    input_tokens, output_tokens, llm_calls = (
-                        ProcessL4Trace.process_model_invocation_output(
-                            trace_data=trace_data,
-                            span_manager=span_manager,
-                            key="postProcessingTrace",
-                            show_traces=show_traces,
-                        )
-                    )
-                    return input_tokens, output_tokens, llm_calls
-        return 0, 0, 0
-
-    @staticmethod
-    def process_orchestration_trace(
-        trace_data: Dict, span_manager: SpanManager, show_traces: bool
-    ):
-        """Process orchestration trace with proper span hierarchy"""
-        if "trace" in trace_data:
-
-            trace = trace_data["trace"]
-
-            if "orchestrationTrace" in trace:
-                orchestration_trace = trace["orchestrationTrace"]
-
-                if L3OrchestrationTraces.invocationInput.value in orchestration_trace:
-                    ProcessL4Trace.process_invocation_input(
-                        trace_data=trace_data,
-                        span_manager=span_manager,
-                        key="orchestrationTrace",
-                        show_traces=show_traces,
-                    )
-
-                if (
-                    L3OrchestrationTraces.modelInvocationInput.value
-                    in orchestration_trace
-                ):
-
-                    ProcessL4Trace.process_model_invocation_input(
-                        trace_data=trace_data,
-                        span_manager=span_manager,
-                        key="orchestrationTrace",
-                        key_name=SpanName.ORCHESTRACTION.value,
-                        show_traces=show_traces,
-                    )
-
-                if (
-                    L3OrchestrationTraces.modelInvocationOutput.value
-                    in orchestration_trace
-                ):
-                    input_tokens, output_tokens, llm_calls = (
-                        ProcessL4Trace.process_model_invocation_output(
-                            trace_data=trace_data,
-                            span_manager=span_manager,
-                            key="orchestrationTrace",
-                            show_traces=show_traces,
-                        )
-                    )
-
-                    return input_tokens, output_tokens, llm_calls
-
-                if L3OrchestrationTraces.observation.value in orchestration_trace:
-                    ProcessL4Trace.process_observation(
-                        trace_data=trace_data,
-                        span_manager=span_manager,
-                        key="orchestrationTrace",
-                        show_traces=show_traces,
-                    )
-
-                if L3OrchestrationTraces.rationale.value in orchestration_trace:
-                    ProcessL4Trace.process_rationale(
-                        trace_data=trace_data,
-                        span_manager=span_manager,
-                        show_traces=show_traces,
-                    )
-        return 0, 0, 0
-
-    @staticmethod
-    def process_routing_trace(
-        trace_data: Dict, span_manager: SpanManager, show_traces: bool
-    ):
-        if "trace" in trace_data:
-
-            trace = trace_data["trace"]
-
-            if "routingClassifierTrace" in trace:
-                routing_classifier_trace = trace["routingClassifierTrace"]
-
-                if (
-                    L3RoutingClassifierTraces.invocationInput.value
-                    in routing_classifier_trace
-                ):
-                    ProcessL4Trace.process_invocation_input(
-                        trace_data=trace_data,
-                        span_manager=span_manager,
-                        key="routingClassifierTrace",
-                        show_traces=show_traces,
-                    )
-
-                if (
-                    L3RoutingClassifierTraces.modelInvocationInput.value
-                    in routing_classifier_trace
-                ):
-                    ProcessL4Trace.process_model_invocation_input(
-                        trace_data=trace_data,
-                        span_manager=span_manager,
-                        key="routingClassifierTrace",
-                        key_name=SpanName.ROUTING.value,
-                        show_traces=show_traces,
-                    )
-
-                if (
-                    L3RoutingClassifierTraces.modelInvocationOutput.value
-                    in routing_classifier_trace
-                ):
-                    input_tokens, output_tokens, llm_calls = (
-                        ProcessL4Trace.process_model_invocation_output(
-                            trace_data=trace_data,
-                            span_manager=span_manager,
-                            key="routingClassifierTrace",
-                            show_traces=show_traces,
-                        )
-                    )
-                    return input_tokens, output_tokens, llm_calls
-
-                if (
-                    L3RoutingClassifierTraces.observation.value
-                    in routing_classifier_trace
-                ):
-                    ProcessL4Trace.process_observation(
-                        trace_data=trace_data,
-                        span_manager=span_manager,
-                        key="routingClassifierTrace",
-                        show_traces=show_traces,
-                    )
-        return 0, 0, 0
+        return otel_dispatcher.dispatch(
+            trace_data, span_manager=span_manager, show_traces=show_traces
+        )
 
 
 class ProcessL4Trace:
@@ -414,15 +118,14 @@ class ProcessL4Trace:
                         )
 
                     if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                        prompt = json_safe(model_invocation_input["text"])
                         agent_span = span_manager.create_agent_span_return(
                             agent_session_id=session_id,
                             caller_chain=caller_chain,
                             # start_time=int(event_time.timestamp() * 1e9),
                             attributes={
                                 OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.AGENT.value,
-                                OtelSpanAttributes.INPUT_VALUE: json_safe(
-                                    model_invocation_input["text"]
-                                ),
+                                OtelSpanAttributes.INPUT_VALUE: prompt,
                                 OtelSpanAttributes.INPUT_MIME_TYPE: "application/json",
                                 SpanAttributes.AGENT_ID.value: agent_id,
                                 SpanAttributes.AGENT_ALIAS_ID.value: agent_alias_id,
@@ -448,9 +151,7 @@ class ProcessL4Trace:
                         if len(caller_chain) > 1:
                             agent_span.set_attributes(
                                 {
-                                    OtelSpanAttributes.INPUT_VALUE: json_safe(
-                                        model_invocation_input["text"]
-                                    ),
+                                    OtelSpanAttributes.INPUT_VALUE: prompt,
                                     OtelSpanAttributes.INPUT_MIME_TYPE: "application/json",
                                 }
                             )
@@ -470,9 +171,7 @@ class ProcessL4Trace:
                             },
                             l3_attributes={
                                 OtelSpanAttributes.OPENINFERENCE_SPAN_KIND: OpenInferenceSpanKindValues.LLM.value,
-                                OtelSpanAttributes.INPUT_VALUE: json_safe(
-                                    model_invocation_input["text"]
-                                ),
+                                OtelSpanAttributes.INPUT_VALUE: prompt,
                                 OtelSpanAttributes.INPUT_MIME_TYPE: "application/json",
                                 SpanAttributes.MAX_TOKENS.value: inference_configuration[
                                     "maximumLength"
@@ -543,24 +242,14 @@ class ProcessL4Trace:
                         caller_chain=caller_chain, index=-1
                     )
 
-                    try:
-                        json_model = json.loads(raw_response)
-                        model = (
-                            json.loads(raw_response)["model"]
-                            if "model" in json.loads(raw_response)
-                            else None
-                        )
-                    except Exception as e:
-                        model = None
-
                     if config.PRODUCE_BEDROCK_OTEL_TRACES:
+                        model = model_name(raw_response)
+                        raw_response = json_safe(raw_response)
                         span_manager.spans[session_id].l3_span[
                             f"{agent_id}:{agent_alias_id}"
                         ].span.set_attributes(
                             attributes={
-                                OtelSpanAttributes.OUTPUT_VALUE: json_safe(
-                                    raw_response
-                                ),
+                                OtelSpanAttributes.OUTPUT_VALUE: raw_response,
                                 OtelSpanAttributes.OUTPUT_MIME_TYPE: "application/json",
                                 OtelSpanAttributes.LLM_TOKEN_COUNT_PROMPT: input_token_count,
                                 OtelSpanAttributes.LLM_TOKEN_COUNT_COMPLETION: output_token_count,
@@ -581,9 +270,7 @@ class ProcessL4Trace:
                                         model_invocation_output["parsedResponse"]
                                     ),
                                     OtelSpanAttributes.OUTPUT_MIME_TYPE: "text/plain",
-                                    SpanAttributes.RAW_RESPONSE.value: json_safe(
-                                        raw_response
-                                    ),
+                                    SpanAttributes.RAW_RESPONSE.value: raw_response,
                                 }
                             )
 
@@ -1516,3 +1203,58 @@ class ProcessL5Obervation:
                         #         ],
                         #     },
                         # )
+
+
+class OTelTraceHandler(TraceHandler):
+    """Turns trace events into OpenTelemetry spans through ``SpanManager``.
+
+    Expects ``span_manager`` and ``show_traces`` in the dispatch context.
+    """
+
+    def routes(self):
+        def on_step(process, **kwargs):
+            def callback(trace_data, body, span_manager, show_traces, **context):
+                process(
+                    trace_data=trace_data,
+                    span_manager=span_manager,
+                    show_traces=show_traces,
+                    **kwargs,
+                )
+
+            return callback
+
+        routes = {
+            ("orchestrationTrace", L3OrchestrationTraces.rationale.value): on_step(
+                ProcessL4Trace.process_rationale
+            ),
+        }
+        for kind, span_name in (
+            (L2Traces.preProcessingTrace.value, SpanName.PREPROCESSING),
+            (L2Traces.postProcessingTrace.value, SpanName.POSTPROCESSING),
+            (L2Traces.orchestrationTrace.value, SpanName.ORCHESTRACTION),
+            (L2Traces.routingClassifierTrace.value, SpanName.ROUTING),
+        ):
+            routes[(kind, L3OrchestrationTraces.modelInvocationInput.value)] = (
+                on_step(
+                    ProcessL4Trace.process_model_invocation_input,
+                    key=kind,
+                    key_name=span_name.value,
+                )
+            )
+            routes[(kind, L3OrchestrationTraces.modelInvocationOutput.value)] = (
+                on_step(ProcessL4Trace.process_model_invocation_output, key=kind)
+            )
+        for kind in (
+            L2Traces.orchestrationTrace.value,
+            L2Traces.routingClassifierTrace.value,
+        ):
+            routes[(kind, L3OrchestrationTraces.invocationInput.value)] = on_step(
+                ProcessL4Trace.process_invocation_input, key=kind
+            )
+            routes[(kind, L3OrchestrationTraces.observation.value)] = on_step(
+                ProcessL4Trace.process_observation, key=kind
+            )
+        return routes
+
+
+otel_dispatcher = TraceDispatcher([OTelTraceHandler()])
@@ -0,0 +1,147 @@
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+from opentelemetry.trace import StatusCode
+
+from .semantics import SpanAttributes
+from .settings_management import ObservabilityConfig
+
+
+def sample_ratio(
+    agent_id: str, tags: Iterable[str], ratio: float, ratios: Dict[str, float]
+) -> float:
+    """Return the head sampling ratio of a turn.
+
+    ``ratios`` overrides ``ratio`` per agent id or tag; the agent id is
+    looked up first, then the tags in order.
+    """
+    for key in (agent_id, *tags):
+        if key in ratios:
+            return ratios[key]
+    return ratio
+
+
+def head_sampled(session_id: str, ratio: float) -> bool:
+    """Whether a turn of ``session_id`` gets the full span tree.
+
+    The decision is a hash of the session id, so every turn of a session is
+    sampled the same way.
+    """
+    if ratio >= 1.0:
+        return True
+    if ratio <= 0.0:
+        return False
+    return zlib.crc32(str(session_id).encode("utf-8")) < ratio * 2**32
+
+
+class TailRetentionSpanProcessor(SpanProcessor):
+    """Keeps the full span tree only for turns worth looking at.
+
+    Spans are held per trace until the agent span of the ``observe`` turn
+    ends. The whole tree is then passed to ``processor`` if any span failed,
+    a guardrail intervened, the turn took at least ``min_duration`` seconds
+    or used at least ``min_tokens`` tokens. Otherwise only the agent span
+    goes through, with the turn's summary attributes set by ``observe``.
+    Spans ending after the decision follow it. At most ``max_traces`` trees
+    are held; the oldest is passed on whole when more arrive, and every held
+    tree is passed on whole by ``force_flush`` and ``shutdown``.
+    """
+
+    def __init__(
+        self,
+        processor: SpanProcessor,
+        min_duration: Optional[float] = None,
+        min_tokens: Optional[int] = None,
+        max_traces: int = 1000,
+    ):
+        self.processor = processor
+        self.min_duration = min_duration
+        self.min_tokens = min_tokens
+        self.max_traces = max_traces
+        self.kept = 0
+        self.reduced = 0
+        self._lock = threading.Lock()
+        self._pending: "OrderedDict[int, List[ReadableSpan]]" = OrderedDict()
+        # Decisions of finished traces, for spans that end after their root.
+        self._decisions: "OrderedDict[int, bool]" = OrderedDict()
+
+    @classmethod
+    def from_config(
+        cls, processor: SpanProcessor, config: ObservabilityConfig
+    ) -> "TailRetentionSpanProcessor":
+        return cls(
+            processor=processor,
+            min_duration=config.TRACE_TAIL_MIN_DURATION,
+            min_tokens=config.TRACE_TAIL_MIN_TOKENS,
+            max_traces=config.TRACE_TAIL_MAX_TRACES,
+        )
+
+    def on_start(self, span: Span, parent_context: Optional[Context] = None) -> None:
+        self.processor.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        attributes = span.attributes or {}
+        forward: List[ReadableSpan] = list()
+        with self._lock:
+            if SpanAttributes.SAMPLED.value in attributes:
+                spans = self._pending.pop(trace_id, list())
+                decision = self.keep(turn=span, spans=spans)
+                self._decisions[trace_id] = decision
+                if len(self._decisions) > self.max_traces:
+                    self._decisions.popitem(last=False)
+                if decision:
+                    self.kept += 1
+                    forward.extend(spans)
+                else:
+                    self.reduced += 1
+                forward.append(span)
+            elif trace_id in self._decisions:
+                if self._decisions[trace_id]:
+                    forward.append(span)
+            elif span.parent is None:
+                # Not part of an observed turn.
+                forward.append(span)
+            else:
+                self._pending.setdefault(trace_id, list()).append(span)
+                if len(self._pending) > self.max_traces:
+                    _, forward = self._pending.popitem(last=False)
+
+        for finished in forward:
+            self.processor.on_end(finished)
+
+    def keep(self, turn: ReadableSpan, spans: List[ReadableSpan]) -> bool:
+        attributes = turn.attributes or {}
+        if attributes.get(SpanAttributes.GUARDRAIL_INTERVENED.value):
+            return True
+        if any(s.status.status_code == StatusCode.ERROR for s in (turn, *spans)):
+            return True
+        if self.min_duration is not None and turn.end_time and turn.start_time:
+            if (turn.end_time - turn.start_time) / 1e9 >= self.min_duration:
+                return True
+        if self.min_tokens is not None:
+            tokens = attributes.get(SpanAttributes.INPUT_TOKENS.value, 0)
+            tokens += attributes.get(SpanAttributes.OUTPUT_TOKENS.value, 0)
+            if tokens >= self.min_tokens:
+                return True
+        return False
+
+    def shutdown(self) -> None:
+        self._drain()
+        self.processor.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        self._drain()
+        return self.processor.force_flush(timeout_millis)
+
+    def _drain(self) -> None:
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for spans in pending:
+            for span in spans:
+                self.processor.on_end(span)
@@ -27,6 +27,13 @@ class SpanAttributes(Enum):
     RAW_RESPONSE = "bedrock.agent.raw_response"
     RESONING_CONTENT = "bedrock.agent.resoning_content"
 
+    SAMPLED = "bedrock.agent.sampled"
+    GUARDRAIL_INTERVENED = "bedrock.guardrail.intervened"
+    INPUT_TOKENS = "bedrock.agent.input_tokens"
+    OUTPUT_TOKENS = "bedrock.agent.output_tokens"
+    LLM_CALLS = "bedrock.agent.llm_calls"
+    EVICTED = "bedrock.agent.evicted"
+
 
 class SpanName(Enum):
     ORCHESTRACTION = "Orchestration"
@@ -1,6 +1,6 @@
 from pydantic import HttpUrl, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Dict, Literal, Optional
 
 
 class ObservabilityConfig(BaseSettings):
@@ -18,3 +18,28 @@ class ObservabilityConfig(BaseSettings):
     LANGFUSE_SECRET_KEY: Optional[str] = None
     BEDROCK_AGENT_TRACER_NAME: str = Field(default="bedrock-agent-tracer")
     PRODUCE_BEDROCK_OTEL_TRACES: bool = Field(default=False)
+    TRACE_DIRECTORY: str = Field(default="trace")
+    TRACE_COMPRESSION: bool = Field(default=False)
+    TRACE_MAX_BYTES: Optional[int] = None
+    SPAN_ATTRIBUTE_MAX_CHARS: Optional[int] = None
+    SPAN_BLOB_DIRECTORY: Optional[str] = None
+    TRACE_SAMPLE_RATIO: float = Field(default=1.0, ge=0.0, le=1.0)
+    TRACE_SAMPLE_RATIOS: Dict[str, float] = Field(default_factory=dict)
+    TRACE_TAIL_RETENTION: bool = Field(default=False)
+    TRACE_TAIL_MIN_DURATION: Optional[float] = None
+    TRACE_TAIL_MIN_TOKENS: Optional[int] = None
+    TRACE_TAIL_MAX_TRACES: int = Field(default=1000)
+    PRODUCE_BEDROCK_OTEL_METRICS: bool = Field(default=False)
+    METRICS_EXPORT_INTERVAL_MILLIS: int = Field(default=60000)
+    METRICS_PROMETHEUS_PORT: Optional[int] = None
+    SPAN_FAMILY_TTL: Optional[float] = Field(default=900.0)
+    SPAN_MAX_FAMILIES: Optional[int] = Field(default=256)
+    OTLP_TRACES_ENDPOINT: Optional[HttpUrl] = None
+    SPAN_EXPORT_FILE: Optional[str] = None
+    SPAN_EXPORT_MAX_QUEUE_SIZE: int = Field(default=2048, gt=0)
+    SPAN_EXPORT_MAX_BATCH_SIZE: int = Field(default=512, gt=0)
+    SPAN_EXPORT_SCHEDULE_DELAY_MILLIS: int = Field(default=5000, gt=0)
+    SPAN_EXPORT_TIMEOUT_MILLIS: int = Field(default=30000, gt=0)
+    SPAN_EXPORT_DROP_POLICY: Literal["drop_oldest", "drop_newest"] = Field(
+        default="drop_oldest"
+    )
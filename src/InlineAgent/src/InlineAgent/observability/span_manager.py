@@ -1,50 +1,57 @@
 # Class to manage spans
 
-from typing import Dict, Any, Literal, Optional
+import threading
+import time
+from typing import Dict, Any, List, Literal, Optional
 
 from opentelemetry import trace
 from opentelemetry.trace import Status, StatusCode, SpanKind, Span
 
-from pydantic import (
-    BaseModel,
-    ConfigDict,
-    ValidationInfo,
-    field_validator,
-    validate_call,
-)
-
+from .semantics import SpanAttributes
 from .utils import get_agent_from_caller_chain
 
 
-from pydantic import BaseModel
-from typing import Dict, Any
-
 tracer = trace.get_tracer("bedrock-agent-tracing")
 
 
-class SpanModel(BaseModel):
-    span: Span
-    end_time: int = 0
-    end: Optional[bool] = None
+class SpanModel:
+    """An open span; setting ``end = True`` ends it at ``end_time`` if set.
 
-    class Config:
-        arbitrary_types_allowed = True
-        extra = "forbid"
-        validate_assignment = True
+    ``SpanModel.live()`` counts the spans created and not yet ended, across
+    all span managers of the process.
+    """
 
-    @field_validator("end", mode="after")
-    @classmethod
-    def validate_end(cls, value: bool, info: ValidationInfo):
-        # Check if we're trying to set a non-zero end_time
-        if value is True:
+    __slots__ = ("span", "end_time", "_end")
 
-            SpanModel.process_end(
-                span=info.data["span"], end_time=info.data["end_time"]
-            )
-        return value
+    _live = 0
+    _live_lock = threading.Lock()
+
+    def __init__(self, span: Span, end_time: int = 0, end: Optional[bool] = None):
+        self.span = span
+        self.end_time = end_time
+        self._end = None
+        with SpanModel._live_lock:
+            SpanModel._live += 1
+        self.end = end
+
+    @staticmethod
+    def live() -> int:
+        return SpanModel._live
+
+    @property
+    def end(self) -> Optional[bool]:
+        return self._end
+
+    @end.setter
+    def end(self, value: Optional[bool]) -> None:
+        ended = self._end is True
+        self._end = value
+        if value is True and not ended:
+            with SpanModel._live_lock:
+                SpanModel._live -= 1
+            SpanModel.process_end(span=self.span, end_time=self.end_time)
 
     @staticmethod
-    @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
     def process_end(span: Span, end_time: int):
         if span.is_recording():
             if end_time:
@@ -53,31 +60,83 @@ class SpanModel(BaseModel):
                 span.end()
 
 
-class SpanFamily(BaseModel):
-    family: str
-    counter: str
-    agent_span: SpanModel
-    l2_span: Optional[SpanModel] = (
-        None  # If counter changes end l2 span, if family changes end l2 span
-    )
-    l3_span: Dict[str, SpanModel] = {}
-
-    class Config:
-        arbitrary_types_allowed = True  # Needed for the Span object
-        extra = "forbid"  # Prevents additional fields
-
+class SpanFamily:
+    """Spans of one agent session: the agent span and its open L2/L3 spans."""
 
-class SpanManager(BaseModel):
+    __slots__ = (
+        "family",
+        "counter",
+        "agent_span",
+        "l2_span",
+        "l3_span",
+        "last_active",
+    )
 
-    spans: Optional[Dict[str, SpanFamily]] = {}
-    agent_session_id_dict: Optional[Dict[str, str]] = {}
+    def __init__(
+        self,
+        family: str,
+        counter: str,
+        agent_span: SpanModel,
+        l2_span: Optional[SpanModel] = None,
+        l3_span: Optional[Dict[str, SpanModel]] = None,
+    ):
+        self.family = family
+        self.counter = counter
+        self.agent_span = agent_span
+        # If counter changes end l2 span, if family changes end l2 span
+        self.l2_span = l2_span
+        self.l3_span = l3_span if l3_span is not None else {}
+        self.last_active = time.monotonic()
+
+    def end(self, status_code: StatusCode, l3_status_code: StatusCode) -> None:
+        """End the open L3, L2 and agent spans of the family, in that order."""
+        if self.l3_span:
+            for current_l3_span in self.l3_span.values():
+                current_l3_span.span.set_status(StatusCode(l3_status_code))
+                current_l3_span.end = True
+
+        self.l3_span = None
+        if self.l2_span:
+            self.l2_span.span.set_status(StatusCode(status_code))
+            self.l2_span.end = True
+            self.l2_span = None
+
+        if self.agent_span:
+            self.agent_span.span.set_status(StatusCode(status_code))
+            self.agent_span.end = True
+            self.agent_span = None
+        self.family = ""
+        self.counter = ""
+
+
+class SpanManager:
+    """Open spans of one observed invocation, keyed by agent session id.
+
+    Called on every trace event, so it is a plain slotted class without
+    runtime validation.
+
+    Families whose spans are never closed, such as collaborators cut short by
+    a guardrail, are force-ended with an ERROR status once they have been
+    idle for ``ttl`` seconds, or, least recently active first, when more
+    than ``max_families`` are open. The check runs whenever a collaborator
+    agent span is created; the root agent span is never evicted.
+    """
+
+    __slots__ = (
+        "spans",
+        "agent_session_id_dict",
+        "ttl",
+        "max_families",
+        "root_session_id",
+    )
 
-    class Config:
-        arbitrary_types_allowed = True
-        extra = "forbid"
-        validate_assignment = True
+    def __init__(self, ttl: Optional[float] = None, max_families: Optional[int] = None):
+        self.spans: Dict[str, SpanFamily] = {}
+        self.agent_session_id_dict: Dict[str, str] = {}
+        self.ttl = ttl
+        self.max_families = max_families
+        self.root_session_id: Optional[str] = None
 
-    @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
     def create_agent_span_return(
         self,
         agent_session_id: str,
@@ -92,6 +151,9 @@ class SpanManager(BaseModel):
         if agent_session_id in self.spans:
             return self.spans[agent_session_id].agent_span.span
 
+        if not self.spans:
+            self.root_session_id = agent_session_id
+
         agent_id, agent_alias_id = get_agent_from_caller_chain(
             caller_chain=caller_chain, index=-1
         )
@@ -145,10 +207,11 @@ class SpanManager(BaseModel):
 
         self.spans[agent_session_id] = span_family
         self.agent_session_id_dict[f"{agent_id}:{agent_alias_id}"] = agent_session_id
+        if len(self.spans) > 1:
+            self.evict_stale()
 
         return span
 
-    @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
     def delete_agent_span(
         self,
         agent_session_id: str,
@@ -169,7 +232,6 @@ class SpanManager(BaseModel):
 
         del self.spans[agent_session_id]
 
-    @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
     def assign_new_l2_return(
         self,
         agent_session_id: str,
@@ -207,7 +269,7 @@ class SpanManager(BaseModel):
 
                         self.spans[agent_session_id].l3_span[
                             f"{agent_id}:{agent_alias_id}"
-                        ].span.end = True
+                        ].end = True
                         del self.spans[agent_session_id].l3_span[
                             f"{agent_id}:{agent_alias_id}"
                         ]
@@ -219,6 +281,14 @@ class SpanManager(BaseModel):
                         self.spans[agent_session_id].l2_span.end = True
                         self.spans[agent_session_id].l2_span = None
 
+        # End whatever the new spans replace, so no span is dropped unended.
+        span_family = self.spans[agent_session_id]
+        replaced_l3_span = span_family.l3_span.pop(f"{agent_id}:{agent_alias_id}", None)
+        if replaced_l3_span is not None:
+            replaced_l3_span.end = True
+        if span_family.l2_span is not None:
+            span_family.l2_span.end = True
+
         # Save new l2 span
         l2_span = tracer.start_span(
             name=l2_name,
@@ -244,10 +314,10 @@ class SpanManager(BaseModel):
 
         self.spans[agent_session_id].family = family
         self.spans[agent_session_id].counter = counter
+        self.spans[agent_session_id].last_active = time.monotonic()
 
         return l2_span
 
-    @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
     def assign_new_l3_return(
         self,
         agent_session_id: str,
@@ -291,10 +361,10 @@ class SpanManager(BaseModel):
         )
 
         self.agent_session_id_dict[collab_agent_trace_id] = agent_session_id
+        self.spans[agent_session_id].last_active = time.monotonic()
 
         return l3_span
 
-    @validate_call(config=ConfigDict(arbitrary_types_allowed=True))
     def delete_l3_span(
         self,
         agent_session_id: str,
@@ -326,29 +396,60 @@ class SpanManager(BaseModel):
         # self.spans[agent_session_id].l3_span.end_time = end_time
         self.spans[agent_session_id].l3_span[collab_agent_trace_id].end = True
         del self.spans[agent_session_id].l3_span[collab_agent_trace_id]
+        self.spans[agent_session_id].last_active = time.monotonic()
 
         # self.spans[agent_session_id].l2_span.end_time = end_time
 
-    def end_all_spans(self, status_code: Literal[StatusCode.OK, StatusCode.ERROR]):
-
-        for _, current_span in self.spans.items():
+    def evict_stale(self, now: Optional[float] = None) -> List[str]:
+        """Force-end families idle past ``ttl`` or over ``max_families``.
+
+        Returns the agent session ids of the evicted families.
+        """
+        if self.ttl is None and self.max_families is None:
+            return list()
+        now = time.monotonic() if now is None else now
+        candidates = [
+            session_id
+            for session_id in self.spans
+            if session_id != self.root_session_id
+        ]
+        evicted = list()
+        if self.ttl is not None:
+            evicted = [
+                session_id
+                for session_id in candidates
+                if now - self.spans[session_id].last_active >= self.ttl
+            ]
+        if self.max_families is not None:
+            excess = len(self.spans) - len(evicted) - self.max_families
+            if excess > 0:
+                remaining = sorted(
+                    (s for s in candidates if s not in evicted),
+                    key=lambda s: self.spans[s].last_active,
+                )
+                evicted.extend(remaining[:excess])
 
-            if current_span.l3_span:
-                for _, current_l3_span in current_span.l3_span.items():
-                    current_l3_span.span.set_status(StatusCode(StatusCode.OK))
-                    current_l3_span.end = True
+        for session_id in evicted:
+            span_family = self.spans.pop(session_id)
+            if span_family.agent_span:
+                span_family.agent_span.span.set_attribute(
+                    SpanAttributes.EVICTED.value, True
+                )
+            span_family.end(
+                status_code=StatusCode.ERROR, l3_status_code=StatusCode.ERROR
+            )
+        if evicted:
+            self.agent_session_id_dict = {
+                key: session_id
+                for key, session_id in self.agent_session_id_dict.items()
+                if session_id in self.spans
+            }
+        return evicted
 
-            current_span.l3_span = None
-            if current_span.l2_span:
-                current_span.l2_span.span.set_status(StatusCode(status_code))
-                current_span.l2_span.end = True
-                current_span.l2_span = None
+    def end_all_spans(self, status_code: Literal[StatusCode.OK, StatusCode.ERROR]):
 
-            if current_span.agent_span:
-                current_span.agent_span.span.set_status(StatusCode(status_code))
-                current_span.agent_span.end = True
-                current_span.agent_span = None
-            current_span.family = ""
-            current_span.counter = ""
+        for _, current_span in self.spans.items():
+            current_span.end(status_code=status_code, l3_status_code=StatusCode.OK)
 
         self.spans = {}
+        self.agent_session_id_dict = {}
@@ -1,12 +1,19 @@
 from enum import Enum
 from typing import Dict, List
 from InlineAgent.constants import Level, TraceColor
-from termcolor import colored
-from rich.console import Console
-from rich.markdown import Markdown
 
 import json
 
+from InlineAgent.output import CONSOLE_SINK, OutputSink
+
+from .dispatch import (
+    NO_USAGE,
+    TraceDispatcher,
+    TraceHandler,
+    model_usage,
+    trace_route,
+)
+
 
 AGENT = {}
 STEP = 1
@@ -17,63 +24,33 @@ class Trace:
     @staticmethod
     def parse_trace(
         trace: Dict,
-        agentName: str,
         truncateResponse: int = None,
+        sink: OutputSink = CONSOLE_SINK,
     ):
-        input_tokens = 0
-        output_tokens = 0
-        llm_calls = 0
-
-        if "sessionId" in trace:
-            pass
-            _ = trace["sessionId"]
-
         # This is a Tagged Union structure.
         # Only one of the following top level keys will be set: customOrchestrationTrace, failureTrace, guardrailTrace, orchestrationTrace, postProcessingTrace,
         # preProcessingTrace, routingClassifierTrace.
         # If a client receives an unknown member it will set SDK_UNKNOWN_MEMBER as the top level key, which maps to the name or tag of the unknown member.
         # The structure of SDK_UNKNOWN_MEMBER is as follows: 'SDK_UNKNOWN_MEMBER': {'name': 'UnknownMemberName'}
-
-        HighLevelTrace.parse_custom_orchestration_trace(trace=trace)
-
-        HighLevelTrace.parse_failure_trace(trace=trace)
-
-        HighLevelTrace.guardrail_trace(trace=trace)
-
-        orch_input_tokens, orch_output_tokens, orch_llm_calls = (
-            HighLevelTrace.parse_orchestration_trace(trace=trace, agentName=agentName)
-        )
-        input_tokens += orch_input_tokens
-        output_tokens += orch_output_tokens
-        llm_calls += orch_llm_calls
-
-        post_input_tokens, post_output_tokens, post_llm_calls = (
-            HighLevelTrace.parse_post_processing_trace(trace=trace)
+        # console_dispatcher sends it to the one printer for its trace type and step.
+        return console_dispatcher.dispatch(
+            {"trace": trace},
+            truncateResponse=truncateResponse,
+            sink=sink,
         )
-        input_tokens += post_input_tokens
-        output_tokens += post_output_tokens
-        llm_calls += post_llm_calls
 
-        pre_input_tokens, pre_output_tokens, pre_llm_calls = (
-            HighLevelTrace.parse_preprocessing_trace(trace=trace)
-        )
-        input_tokens += pre_input_tokens
-        output_tokens += pre_output_tokens
-        llm_calls += pre_llm_calls
-
-        rout_input_tokens, rout_output_tokens, rout_llm_calls = (
-            HighLevelTrace.parse_routing_classifier_trace(
-                trace=trace, agentName=agentName
-            )
-        )
-        input_tokens += rout_input_tokens
-        output_tokens += rout_output_tokens
-        llm_calls += rout_llm_calls
-
-        return int(input_tokens), int(output_tokens), int(llm_calls)
+    @staticmethod
+    def parse_usage(trace: Dict):
+        """Return (input_tokens, output_tokens, llm_calls) without printing."""
+        route = trace_route(trace)
+        if route is None or route[1] != "modelInvocationOutput":
+            return NO_USAGE
+        return model_usage(trace[route[0]]["modelInvocationOutput"])
 
     @staticmethod
-    def add_citation(citations: List, cite=1) -> str:
+    def add_citation(
+        citations: List, cite=1, sink: OutputSink = CONSOLE_SINK
+    ) -> str:
 
         agent_answer = str()
 
@@ -118,17 +95,17 @@ class Trace:
             )
 
             agent_answer += text
-            print(colored(text, TraceColor.final_output), end="")
+            sink.write(text, TraceColor.final_output, end="")
             if citation["retrievedReferences"]:
-                print(colored(f" [{cite}]", TraceColor.error), end="")
+                sink.write(f" [{cite}]", TraceColor.error, end="")
 
             cite += 1
 
-        print("\n\n")
+        sink.write("\n\n")
         for output in cite_output:
             if len(output[1]):
-                print(colored(output[0], TraceColor.cite))
-                print(colored(output[1] + "\n", TraceColor.retrieved_references))
+                sink.write(output[0], TraceColor.cite)
+                sink.write(output[1] + "\n", TraceColor.retrieved_references)
 
         return agent_answer, cite
 
@@ -136,97 +113,46 @@ class Trace:
 class HighLevelTrace:
 
     @staticmethod
-    def parse_custom_orchestration_trace(trace: Dict):
+    def parse_custom_orchestration_trace(
+        trace: Dict, sink: OutputSink = CONSOLE_SINK
+    ):
         if "customOrchestrationTrace" in trace:
-            print(
-                colored(
-                    f"Agent error: {trace['customOrchestrationTrace']['event']['text']}",
-                    TraceColor.custom_orchestraction_trace,
-                )
+            sink.write(
+                f"Agent error: {trace['customOrchestrationTrace']['event']['text']}",
+                TraceColor.custom_orchestraction_trace,
             )
 
     @staticmethod
-    def parse_failure_trace(trace: Dict):
+    def parse_failure_trace(trace: Dict, sink: OutputSink = CONSOLE_SINK):
         if "failureTrace" in trace:
-            print(
-                colored(
-                    f"Agent error: {trace['failureTrace']['failureReason']}",
-                    TraceColor.error,
-                )
+            sink.write(
+                f"Agent error: {trace['failureTrace']['failureReason']}",
+                TraceColor.error,
             )
 
     @staticmethod
-    def guardrail_trace(trace: Dict):
+    def guardrail_trace(trace: Dict, sink: OutputSink = CONSOLE_SINK):
         if "guardrailTrace" in trace:
             if trace["guardrailTrace"]["action"] == "INTERVENED":
-                print(
-                    colored(
-                        "<--- Guardrail Intervened --->", TraceColor.guardrail_trace
-                    )
-                )
+                sink.write("<--- Guardrail Intervened --->", TraceColor.guardrail_trace)
             if "inputAssessments" in trace["guardrailTrace"]:
                 for inputAssessment in trace["guardrailTrace"]["inputAssessments"]:
-                    print(colored("Input Guardrail", TraceColor.guardrail_trace))
-                    print(
-                        colored(
-                            json.dumps(inputAssessment, indent=2, default=str),
-                            TraceColor.guardrail_trace,
-                        )
+                    sink.write("Input Guardrail", TraceColor.guardrail_trace)
+                    sink.write(
+                        json.dumps(inputAssessment, indent=2, default=str),
+                        TraceColor.guardrail_trace,
                     )
 
             if "outputAssessments" in trace["guardrailTrace"]:
                 for outputAssessment in trace["guardrailTrace"]["outputAssessments"]:
-                    print(colored("Output Guardrail", TraceColor.guardrail_trace))
-                    print(
-                        colored(
-                            json.dumps(outputAssessment, indent=2, default=str),
-                            TraceColor.guardrail_trace,
-                        )
+                    sink.write("Output Guardrail", TraceColor.guardrail_trace)
+                    sink.write(
+                        json.dumps(outputAssessment, indent=2, default=str),
+                        TraceColor.guardrail_trace,
                     )
 
     @staticmethod
-    def parse_orchestration_trace(trace: Dict, agentName: str):
-        # This is a Tagged Union structure. Only one of the following top level keys will be set: invocationInput, modelInvocationInput, modelInvocationOutput, observation, rationale. If a client receives an unknown member it will set SDK_UNKNOWN_MEMBER as the top level key, which maps to the name or tag of the unknown member. The structure of SDK_UNKNOWN_MEMBER is as follows:'SDK_UNKNOWN_MEMBER': {'name': 'UnknownMemberName'}
-
-        if "orchestrationTrace" in trace:
-
-            RoutingAndOrchestrationTrace.parse_invocation_input(
-                trace=trace["orchestrationTrace"]
-            )
-
-            RoutingAndOrchestrationTrace.parse_model_invocation_input(
-                trace=trace["orchestrationTrace"]
-            )
-
-            input_tokens, output_tokens, llm_calls = (
-                RoutingAndOrchestrationTrace.parse_model_invocation_output(
-                    trace=trace["orchestrationTrace"]
-                )
-            )
-
-            RoutingAndOrchestrationTrace.parse_observation(
-                trace=trace["orchestrationTrace"]
-            )
-
-            if "rationale" in trace["orchestrationTrace"]:
-
-                # if SUPERVISOR in AGENT:
-                #     # Sub agent
-                # else:
-                #     # Main agent
-                #     print(colored("Supervisor Agent Invoked", TraceColor.rationale))
-                print(
-                    colored(
-                        f"Thought: {trace['orchestrationTrace']['rationale']['text']}",
-                        TraceColor.rationale,
-                    )
-                )
-
-            return input_tokens, output_tokens, llm_calls
-        return 0, 0, 0
-
-    @staticmethod
-    def parse_preprocessing_trace(trace: Dict):
+    def parse_preprocessing_trace(trace: Dict, sink: OutputSink = CONSOLE_SINK):
 
         if "preProcessingTrace" in trace:
             if "modelInvocationOutput" in trace["preProcessingTrace"]:
@@ -244,24 +170,20 @@ class HighLevelTrace:
 
                 llm_calls = 1
 
-                print(
-                    colored(
-                        "Pre-processing trace, agent came up with an initial plan.",
-                        TraceColor.pre_processing,
-                    )
+                sink.write(
+                    "Pre-processing trace, agent came up with an initial plan.",
+                    TraceColor.pre_processing,
                 )
-                print(
-                    colored(
-                        f"Input Tokens: {input_tokens} Output Tokens: {output_tokens}",
-                        TraceColor.stats,
-                    )
+                sink.write(
+                    f"Input Tokens: {input_tokens} Output Tokens: {output_tokens}",
+                    TraceColor.stats,
                 )
 
                 return input_tokens, output_tokens, llm_calls
         return 0, 0, 0
 
     @staticmethod
-    def parse_post_processing_trace(trace: Dict):
+    def parse_post_processing_trace(trace: Dict, sink: OutputSink = CONSOLE_SINK):
 
         if "postProcessingTrace" in trace:
             if "modelInvocationOutput" in trace["postProcessingTrace"]:
@@ -278,52 +200,22 @@ class HighLevelTrace:
                 )
 
                 llm_calls = 1
-                print(
-                    colored(
-                        "Agent post-processing complete.", TraceColor.post_processing
-                    )
+                sink.write(
+                    "Agent post-processing complete.", TraceColor.post_processing
                 )
-                print(
-                    colored(
-                        f"Input Tokens: {input_tokens} Output Tokens: {output_tokens}",
-                        TraceColor.stats,
-                    )
+                sink.write(
+                    f"Input Tokens: {input_tokens} Output Tokens: {output_tokens}",
+                    TraceColor.stats,
                 )
 
                 return input_tokens, output_tokens, llm_calls
         return 0, 0, 0
 
-    @staticmethod
-    def parse_routing_classifier_trace(trace: Dict, agentName: str):
-        # This is a Tagged Union structure. Only one of the following top level keys will be set: invocationInput, modelInvocationInput, modelInvocationOutput, observation. If a client receives an unknown member it will set SDK_UNKNOWN_MEMBER as the top level key, which maps to the name or tag of the unknown member. The structure of SDK_UNKNOWN_MEMBER is as follows: 'SDK_UNKNOWN_MEMBER': {'name': 'UnknownMemberName'}
-
-        if "routingClassifierTrace" in trace:
-            RoutingAndOrchestrationTrace.parse_invocation_input(
-                trace=trace["routingClassifierTrace"]
-            )
-
-            RoutingAndOrchestrationTrace.parse_model_invocation_input(
-                trace=trace["routingClassifierTrace"]
-            )
-
-            input_tokens, output_tokens, llm_calls = (
-                RoutingAndOrchestrationTrace.parse_model_invocation_output(
-                    trace=trace["routingClassifierTrace"]
-                )
-            )
-
-            RoutingAndOrchestrationTrace.parse_observation(
-                trace=trace["routingClassifierTrace"]
-            )
-
-            return input_tokens, output_tokens, llm_calls
-        return 0, 0, 0
-
 
 class RoutingAndOrchestrationTrace:
 
     @staticmethod
-    def parse_invocation_input(trace):
+    def parse_invocation_input(trace, sink: OutputSink = CONSOLE_SINK):
         if "invocationInput" in trace:
             # NOTE: when agent determines invocations should happen in parallel
             # the trace objects for invocation input still come back one at a time.
@@ -350,11 +242,9 @@ class RoutingAndOrchestrationTrace:
                     param_str = f"{parameter['name']}[{parameter['value']}] ({parameter['type']})"
                     params_info.append(param_str)
 
-                print(
-                    colored(
-                        f"Tool use: {tool} with these inputs: {' '.join(params_info)}",
-                        TraceColor.invocation_input,
-                    )
+                sink.write(
+                    f"Tool use: {tool} with these inputs: {' '.join(params_info)}",
+                    TraceColor.invocation_input,
                 )
 
             if "agentCollaboratorInvocationInput" in trace["invocationInput"]:
@@ -380,11 +270,9 @@ class RoutingAndOrchestrationTrace:
                                 text += f"{returnControlInvocationResult['functionResult']['actionGroup']} :: {returnControlInvocationResult['functionResult']['function']} ({returnControlInvocationResult['functionResult']['responseBody']['string']['body']})"
 
                     if text:
-                        print(
-                            colored(
-                                f"Agent collaborator: {trace['invocationInput']['agentCollaboratorInvocationInput']['agentCollaboratorName']} invoked with {text}",
-                                TraceColor.invocation_input,
-                            )
+                        sink.write(
+                            f"Agent collaborator: {trace['invocationInput']['agentCollaboratorInvocationInput']['agentCollaboratorName']} invoked with {text}",
+                            TraceColor.invocation_input,
                         )
                     if (
                         "text"
@@ -395,57 +283,45 @@ class RoutingAndOrchestrationTrace:
                         text = trace["invocationInput"][
                             "agentCollaboratorInvocationInput"
                         ]["input"]["text"]
-                        print(
-                            colored(
-                                f"Agent collaborator: {trace['invocationInput']['agentCollaboratorInvocationInput']['agentCollaboratorName']} invoked with {text}",
-                                TraceColor.invocation_input,
-                            )
+                        sink.write(
+                            f"Agent collaborator: {trace['invocationInput']['agentCollaboratorInvocationInput']['agentCollaboratorName']} invoked with {text}",
+                            TraceColor.invocation_input,
                         )
                     else:
                         text = str()
 
             if "codeInterpreterInvocationInput" in trace["invocationInput"]:
                 if "code" in trace["invocationInput"]["codeInterpreterInvocationInput"]:
-                    print(colored(f"Code interpreter:", TraceColor.invocation_input))
-                    console = Console()
-                    console.print(
-                        Markdown(
-                            f"**Generated code**\n```python\n{trace['invocationInput']['codeInterpreterInvocationInput']['code']}\n```"
-                        )
+                    sink.write(f"Code interpreter:", TraceColor.invocation_input)
+                    sink.markdown(
+                        f"**Generated code**\n```python\n{trace['invocationInput']['codeInterpreterInvocationInput']['code']}\n```"
                     )
 
                 if (
                     "files"
                     in trace["invocationInput"]["codeInterpreterInvocationInput"]
                 ):
-                    print(
-                        colored(
-                            "Code Interpreter invoked with uploaded files",
-                            TraceColor.invocation_input,
-                        )
+                    sink.write(
+                        "Code Interpreter invoked with uploaded files",
+                        TraceColor.invocation_input,
                     )
 
             if "knowledgeBaseLookupInput" in trace["invocationInput"]:
-                print(
-                    colored(
-                        f"Knowledgebase retrieval: Knowledgebase Id ({trace['invocationInput']['knowledgeBaseLookupInput']['knowledgeBaseId']}) query ({trace['invocationInput']['knowledgeBaseLookupInput']['text']})",
-                        TraceColor.invocation_input,
-                    )
+                sink.write(
+                    f"Knowledgebase retrieval: Knowledgebase Id ({trace['invocationInput']['knowledgeBaseLookupInput']['knowledgeBaseId']}) query ({trace['invocationInput']['knowledgeBaseLookupInput']['text']})",
+                    TraceColor.invocation_input,
                 )
 
     @staticmethod
-    def parse_model_invocation_input(trace):
+    def parse_model_invocation_input(trace, sink: OutputSink = CONSOLE_SINK):
         if "modelInvocationInput" in trace:
             if trace["modelInvocationInput"]["type"] == "ROUTING_CLASSIFIER":
-                print(
-                    colored(
-                        f"Routing the request to collaborators",
-                        TraceColor.rationale,
-                    )
+                sink.write(
+                    f"Routing the request to collaborators", TraceColor.rationale
                 )
 
     @staticmethod
-    def parse_model_invocation_output(trace):
+    def parse_model_invocation_output(trace, sink: OutputSink = CONSOLE_SINK):
 
         if "modelInvocationOutput" in trace:
             if "inputTokens" in trace["modelInvocationOutput"]["metadata"]["usage"]:
@@ -461,26 +337,33 @@ class RoutingAndOrchestrationTrace:
             else:
                 output_tokens = 0
             llm_calls = 1
-            print(
-                colored(
-                    f"Input Tokens: {input_tokens} Output Tokens: {output_tokens}",
-                    TraceColor.stats,
-                )
+            sink.write(
+                f"Input Tokens: {input_tokens} Output Tokens: {output_tokens}",
+                TraceColor.stats,
             )
             return input_tokens, output_tokens, llm_calls
         return 0, 0, 0
 
     @staticmethod
-    def parse_observation(trace):
+    def parse_rationale(trace, sink: OutputSink = CONSOLE_SINK):
+        if "rationale" in trace:
+
+            # if SUPERVISOR in AGENT:
+            #     # Sub agent
+            # else:
+            #     # Main agent
+            #     print(colored("Supervisor Agent Invoked", TraceColor.rationale))
+            sink.write(f"Thought: {trace['rationale']['text']}", TraceColor.rationale)
+
+    @staticmethod
+    def parse_observation(trace, sink: OutputSink = CONSOLE_SINK):
 
         if "observation" in trace:
 
             if "actionGroupInvocationOutput" in trace["observation"]:
-                print(
-                    colored(
-                        f"Tool use output: {trace['observation']['actionGroupInvocationOutput']['text']}",
-                        TraceColor.invocation_output,
-                    )
+                sink.write(
+                    f"Tool use output: {trace['observation']['actionGroupInvocationOutput']['text']}",
+                    TraceColor.invocation_output,
                 )
 
             if "agentCollaboratorInvocationOutput" in trace["observation"]:
@@ -503,11 +386,9 @@ class RoutingAndOrchestrationTrace:
                             elif "functionInvocationInput" in invocationInput:
                                 text += f"{invocationInput['functionInvocationInput']['actionGroup']} :: {invocationInput['functionInvocationInput']['function']}"
 
-                        print(
-                            colored(
-                                f"Collaborator output: Invoke ({text})",
-                                TraceColor.invocation_input,
-                            )
+                        sink.write(
+                            f"Collaborator output: Invoke ({text})",
+                            TraceColor.invocation_input,
                         )
                     elif (
                         "text"
@@ -518,11 +399,8 @@ class RoutingAndOrchestrationTrace:
                         text = trace["observation"][
                             "agentCollaboratorInvocationOutput"
                         ]["output"]["text"]
-                        print(
-                            colored(
-                                f"Collaborator output: {text}",
-                                TraceColor.invocation_input,
-                            )
+                        sink.write(
+                            f"Collaborator output: {text}", TraceColor.invocation_input
                         )
                     else:
                         text = str()
@@ -532,22 +410,18 @@ class RoutingAndOrchestrationTrace:
                     "executionOutput"
                     in trace["observation"]["codeInterpreterInvocationOutput"]
                 ):
-                    print(
-                        colored(
-                            f"Code interpreter output: {trace['observation']['codeInterpreterInvocationOutput']['executionOutput']}",
-                            TraceColor.invocation_output,
-                        )
+                    sink.write(
+                        f"Code interpreter output: {trace['observation']['codeInterpreterInvocationOutput']['executionOutput']}",
+                        TraceColor.invocation_output,
                     )
 
                 if (
                     "executionError"
                     in trace["observation"]["codeInterpreterInvocationOutput"]
                 ):
-                    print(
-                        colored(
-                            f"Code interpreter output error: {trace['observation']['codeInterpreterInvocationOutput']['executionError']}",
-                            TraceColor.error,
-                        )
+                    sink.write(
+                        f"Code interpreter output error: {trace['observation']['codeInterpreterInvocationOutput']['executionError']}",
+                        TraceColor.error,
                     )
 
                 if (
@@ -557,19 +431,15 @@ class RoutingAndOrchestrationTrace:
                     if trace["observation"]["codeInterpreterInvocationOutput"][
                         "executionTimeout"
                     ]:
-                        print(
-                            colored(
-                                f"Code interpreter output error: Execution timeout",
-                                TraceColor.error,
-                            )
+                        sink.write(
+                            f"Code interpreter output error: Execution timeout",
+                            TraceColor.error,
                         )
 
                 if "files" in trace["observation"]["codeInterpreterInvocationOutput"]:
-                    print(
-                        colored(
-                            "Code Interpreter created new files",
-                            TraceColor.invocation_input,
-                        )
+                    sink.write(
+                        "Code Interpreter created new files",
+                        TraceColor.invocation_input,
                     )
 
             if "finalResponse" in trace["observation"]:
@@ -586,11 +456,9 @@ class RoutingAndOrchestrationTrace:
                         if "content" in retrievedReference:
                             # TODO: ["content"]["type"] does not exist
                             # if retrievedReference["content"]["type"] == "TEXT":
-                            print(
-                                colored(
-                                    retrievedReference["content"]["text"],
-                                    TraceColor.invocation_output,
-                                )
+                            sink.write(
+                                retrievedReference["content"]["text"],
+                                TraceColor.invocation_output,
                             )
                             # elif retrievedReference["content"]["type"] == "IMAGE":
                             #     print(
@@ -615,17 +483,64 @@ class RoutingAndOrchestrationTrace:
                             #     )
 
                         if "location" in retrievedReference:
-                            print(
-                                colored(
-                                    f"Location: {json.dumps(retrievedReference['location'], indent=2, default=str)}",
-                                    TraceColor.invocation_output,
-                                )
+                            sink.write(
+                                f"Location: {json.dumps(retrievedReference['location'], indent=2, default=str)}",
+                                TraceColor.invocation_output,
                             )
 
             if "repromptResponse" in trace["observation"]:
-                print(
-                    colored(
-                        f"Reprompting {trace['observation']['repromptResponse']['source']} with query {trace['orchestrationTrace']['observation']['repromptResponse']['text']}",
-                        TraceColor.invocation_output,
-                    )
+                sink.write(
+                    f"Reprompting {trace['observation']['repromptResponse']['source']} with query {trace['orchestrationTrace']['observation']['repromptResponse']['text']}",
+                    TraceColor.invocation_output,
                 )
+
+
+class ConsoleTraceHandler(TraceHandler):
+    """Prints trace events as ``InlineAgent.invoke`` shows them."""
+
+    def routes(self):
+        def on_trace(parse):
+            def callback(trace_data, body, sink=CONSOLE_SINK, **context):
+                parse(trace=trace_data["trace"], sink=sink)
+
+            return callback
+
+        def on_step(parse):
+            def callback(trace_data, body, sink=CONSOLE_SINK, **context):
+                parse(trace=body, sink=sink)
+
+            return callback
+
+        routes = {
+            ("customOrchestrationTrace", None): on_trace(
+                HighLevelTrace.parse_custom_orchestration_trace
+            ),
+            ("failureTrace", None): on_trace(HighLevelTrace.parse_failure_trace),
+            ("guardrailTrace", None): on_trace(HighLevelTrace.guardrail_trace),
+            ("preProcessingTrace", "modelInvocationOutput"): on_trace(
+                HighLevelTrace.parse_preprocessing_trace
+            ),
+            ("postProcessingTrace", "modelInvocationOutput"): on_trace(
+                HighLevelTrace.parse_post_processing_trace
+            ),
+            ("orchestrationTrace", "rationale"): on_step(
+                RoutingAndOrchestrationTrace.parse_rationale
+            ),
+        }
+        for kind in ("orchestrationTrace", "routingClassifierTrace"):
+            routes[(kind, "invocationInput")] = on_step(
+                RoutingAndOrchestrationTrace.parse_invocation_input
+            )
+            routes[(kind, "modelInvocationInput")] = on_step(
+                RoutingAndOrchestrationTrace.parse_model_invocation_input
+            )
+            routes[(kind, "modelInvocationOutput")] = on_step(
+                RoutingAndOrchestrationTrace.parse_model_invocation_output
+            )
+            routes[(kind, "observation")] = on_step(
+                RoutingAndOrchestrationTrace.parse_observation
+            )
+        return routes
+
+
+console_dispatcher = TraceDispatcher([ConsoleTraceHandler()])
@@ -2,19 +2,26 @@
 
 import base64
 import logging
+from typing import Dict, List, Optional
 
 from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace import (
+    SpanProcessor,
+    SynchronousMultiSpanProcessor,
+    TracerProvider,
+)
 from opentelemetry.sdk.resources import Resource
 from openinference.semconv.resource import ResourceAttributes
 from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
 from opentelemetry.sdk.trace.export import (
-    BatchSpanProcessor,
     ConsoleSpanExporter,
     SimpleSpanProcessor,
+    SpanExporter,
 )
 from opentelemetry.sdk.resources import Resource
 
+from .export import BoundedBatchSpanProcessor, FileSpanExporter
+from .sampling import TailRetentionSpanProcessor
 from .settings_management import ObservabilityConfig
 
 logging.basicConfig(
@@ -24,8 +31,19 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
-def create_tracer_provider(config: ObservabilityConfig, timeout: int = 300):
-    """Create an OpenTelemetry TracerProvider configured for Langfuse."""
+def create_tracer_provider(
+    config: ObservabilityConfig, timeout: Optional[float] = None
+) -> TracerProvider:
+    """Create an OpenTelemetry TracerProvider configured for Langfuse.
+
+    Spans fan out to every configured exporter (Langfuse or OTLP at
+    ``API_URL``, OTLP at ``OTLP_TRACES_ENDPOINT`` and ``SPAN_EXPORT_FILE``),
+    each through its own ``BoundedBatchSpanProcessor`` sized from the
+    ``SPAN_EXPORT_*`` settings. ``timeout`` is the OTLP request timeout in
+    seconds and defaults to ``SPAN_EXPORT_TIMEOUT_MILLIS``.
+    """
+    if timeout is None:
+        timeout = config.SPAN_EXPORT_TIMEOUT_MILLIS / 1000
 
     # Create resource attributes
     resource = Resource.create(
@@ -38,6 +56,7 @@ def create_tracer_provider(config: ObservabilityConfig, timeout: int = 300):
 
     # Create tracer provider with resource
     tracer_provider = TracerProvider(resource=resource)
+    exporters: Dict[str, SpanExporter] = dict()
 
     if config.API_URL and config.PRODUCE_BEDROCK_OTEL_TRACES:
         endpoint = f"{config.API_URL}/v1/traces"
@@ -52,28 +71,48 @@ def create_tracer_provider(config: ObservabilityConfig, timeout: int = 300):
             # Configure OTLP exporter for Langfuse - match the original implementation
             logger.info(f"Using Langfuse endpoint: {endpoint}")
 
-            langfuse_exporter = OTLPSpanExporter(
+            exporters["langfuse"] = OTLPSpanExporter(
                 endpoint=endpoint,
                 headers={"Authorization": f"Basic {langfuse_auth}"},
                 timeout=timeout,
             )
 
-            # Add Langfuse exporter to tracer provider
-            # Use default settings for simplicity
             logger.info(
                 f"Langfuse exporter configured for project: {config.PROJECT_NAME}"
             )
-            tracer_provider.add_span_processor(BatchSpanProcessor(langfuse_exporter))
         else:
-            span_exporter = OTLPSpanExporter(
+            exporters["otlp"] = OTLPSpanExporter(
                 endpoint=endpoint,
                 timeout=timeout,
             )
-            tracer_provider.add_span_processor(
-                BatchSpanProcessor(span_exporter=span_exporter)
+
+    if config.PRODUCE_BEDROCK_OTEL_TRACES:
+        if config.OTLP_TRACES_ENDPOINT:
+            exporters["otlp_endpoint"] = OTLPSpanExporter(
+                endpoint=str(config.OTLP_TRACES_ENDPOINT), timeout=timeout
             )
+        if config.SPAN_EXPORT_FILE:
+            exporters["file"] = FileSpanExporter(config.SPAN_EXPORT_FILE)
 
-    else:
+    processors: List[SpanProcessor] = [
+        BoundedBatchSpanProcessor.from_config(
+            span_exporter=exporter, name=name, config=config
+        )
+        for name, exporter in exporters.items()
+    ]
+    if processors and config.TRACE_TAIL_RETENTION:
+        # One retention decision per turn, shared by all exporters.
+        fan_out = SynchronousMultiSpanProcessor()
+        for processor in processors:
+            fan_out.add_span_processor(processor)
+        processors = [
+            TailRetentionSpanProcessor.from_config(processor=fan_out, config=config)
+        ]
+
+    for processor in processors:
+        tracer_provider.add_span_processor(processor)
+
+    if not processors:
         # tracer_provider.add_span_processor(SimpleSpanProcessor(ConsoleSpanExporter()))
         logger.warning(
             "Credentials not provided, telemetry will not be created or exported"
@@ -81,3 +120,4 @@ def create_tracer_provider(config: ObservabilityConfig, timeout: int = 300):
 
     # Set as global tracer provider
     trace.set_tracer_provider(tracer_provider)
+    return tracer_provider
@@ -0,0 +1,177 @@
+import atexit
+import glob
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from .settings_management import ObservabilityConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_QUEUE = 10000
+DEFAULT_BATCH_SIZE = 512
+
+_STOP = object()
+
+
+class TraceWriter:
+    """Append-only JSON Lines sink for raw agent traces.
+
+    ``write`` serialises the event and hands the line to a background thread,
+    so the event loop never touches the disk. The thread appends in batches
+    to ``<directory>/<session_id>.jsonl`` (``.jsonl.gz`` with compression,
+    one gzip member per batch). When ``max_bytes`` is set a full file is
+    renamed to ``<session_id>.<n>.jsonl`` and a new one is started.
+    ``read_session`` stitches the segments back together in order.
+
+    If the queue is full, events are dropped and counted in ``dropped``
+    rather than blocking the caller.
+    """
+
+    _default: Optional["TraceWriter"] = None
+    _default_lock = threading.Lock()
+
+    def __init__(
+        self,
+        directory: str = "trace",
+        compress: bool = False,
+        max_bytes: Optional[int] = None,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+    ):
+        self.directory = os.path.abspath(directory)
+        self.compress = compress
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(
+            target=self._run, name="InlineAgent-trace-writer", daemon=True
+        )
+        self._thread.start()
+
+    @classmethod
+    def default(cls) -> "TraceWriter":
+        """Process-wide writer configured from ``ObservabilityConfig``."""
+        if cls._default is None:
+            with cls._default_lock:
+                if cls._default is None:
+                    config = ObservabilityConfig()
+                    cls._default = cls(
+                        directory=config.TRACE_DIRECTORY,
+                        compress=config.TRACE_COMPRESSION,
+                        max_bytes=config.TRACE_MAX_BYTES,
+                    )
+                    atexit.register(cls._default.close)
+        return cls._default
+
+    @property
+    def suffix(self) -> str:
+        return ".jsonl.gz" if self.compress else ".jsonl"
+
+    def write(self, session_id: str, trace_data: Dict) -> None:
+        line = json.dumps(trace_data, default=str) + "\n"
+        try:
+            self._queue.put_nowait((str(session_id), line))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                first_drop = self.dropped == 1
+            if first_drop:
+                logger.warning("Trace writer queue is full, dropping trace events")
+
+    def flush(self) -> None:
+        """Block until every event written so far is on disk."""
+        self._queue.join()
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < DEFAULT_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(item is _STOP for item in batch)
+            try:
+                self._write_batch([item for item in batch if item is not _STOP])
+            except Exception as e:
+                logger.error(f"Could not write traces: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if stop:
+                return
+
+    def _write_batch(self, batch: List[Tuple[str, str]]) -> None:
+        if not batch:
+            return
+
+        lines_by_session: Dict[str, List[str]] = defaultdict(list)
+        for session_id, line in batch:
+            lines_by_session[session_id].append(line)
+
+        os.makedirs(self.directory, exist_ok=True)
+        for session_id, lines in lines_by_session.items():
+            path = os.path.join(self.directory, session_id + self.suffix)
+            if self.max_bytes and os.path.exists(path):
+                if os.path.getsize(path) >= self.max_bytes:
+                    self._rotate(session_id=session_id, path=path)
+
+            data = "".join(lines).encode("utf-8")
+            if self.compress:
+                data = gzip.compress(data)
+            with open(path, "ab") as file:
+                file.write(data)
+
+    def _rotate(self, session_id: str, path: str) -> None:
+        segments = TraceWriter._segments(
+            directory=self.directory, session_id=session_id
+        )
+        next_index = max((index for index, _ in segments), default=0) + 1
+        os.replace(
+            path,
+            os.path.join(self.directory, f"{session_id}.{next_index}{self.suffix}"),
+        )
+
+    @staticmethod
+    def _segments(directory: str, session_id: str) -> List[Tuple[int, str]]:
+        pattern = re.compile(re.escape(session_id) + r"\.(\d+)\.jsonl(\.gz)?$")
+        segments = list()
+        for path in glob.glob(
+            os.path.join(glob.escape(directory), glob.escape(session_id) + ".*")
+        ):
+            match = pattern.match(os.path.basename(path))
+            if match:
+                segments.append((int(match.group(1)), path))
+        return sorted(segments)
+
+    @staticmethod
+    def read_session(session_id: str, directory: str = "trace") -> List[Dict]:
+        """Return every trace event saved for ``session_id``, oldest first."""
+        directory = os.path.abspath(directory)
+        paths = [
+            path for _, path in TraceWriter._segments(directory, str(session_id))
+        ]
+        for suffix in (".jsonl", ".jsonl.gz"):
+            path = os.path.join(directory, str(session_id) + suffix)
+            if os.path.exists(path):
+                paths.append(path)
+
+        events = list()
+        for path in paths:
+            opener = gzip.open if path.endswith(".gz") else open
+            with opener(path, "rt", encoding="utf-8") as file:
+                events.extend(json.loads(line) for line in file if line.strip())
+        return events
@@ -1,19 +1,34 @@
+import functools
 import json
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
-from pydantic import validate_call
 from InlineAgent.constants import TraceColor
 from termcolor import colored
 
+from .payloads import PayloadBudget
+
 
 def json_safe(obj):
-    """Convert object to JSON-safe format, handling complex types."""
+    """Convert object to JSON-safe format, handling complex types.
+
+    Text is bounded by ``PayloadBudget.default()``.
+    """
     if isinstance(obj, dict) or isinstance(obj, list):
-        return json.dumps(obj)
+        return PayloadBudget.default().bound_json(obj)
+    if isinstance(obj, str):
+        return PayloadBudget.default().bound(obj)
     return obj
 
 
-@validate_call
+def model_name(raw_response: str) -> Optional[str]:
+    """Return the ``model`` field of a model's raw JSON response, if any."""
+    try:
+        response = json.loads(raw_response)
+    except (TypeError, ValueError):
+        return None
+    return response.get("model") if isinstance(response, dict) else None
+
+
 def get_agent_from_caller_chain(caller_chain: list, index: int) -> Tuple[str, str]:
 
     alias_id = caller_chain[index]["agentAliasArn"]
@@ -21,6 +36,7 @@ def get_agent_from_caller_chain(caller_chain: list, index: int) -> Tuple[str, st
     return get_agent_id_aliasid(alias_id)
 
 
+@functools.lru_cache(maxsize=1024)
 def get_agent_id_aliasid(arn: str):
     trace_id = arn.split("agent-alias/")[1].replace("/", ":")
     agent_id, agent_alias_id = trace_id.split(":")
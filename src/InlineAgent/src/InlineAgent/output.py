@@ -0,0 +1,85 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from rich.console import Console
+from rich.markdown import Markdown
+from termcolor import colored
+
+
+class OutputSink(ABC):
+    """Where ``InlineAgent.invoke`` writes what it shows the user.
+
+    ``write`` takes plain text and an optional ``TraceColor``; colouring and
+    rendering are left to the sink. Callers check ``enabled`` before doing
+    any formatting work, so a disabled sink costs nothing per event.
+    """
+
+    enabled = True
+
+    @abstractmethod
+    def write(self, text: str, color: Optional[str] = None, end: str = "\n") -> None:
+        """Show ``text``, followed by ``end``."""
+
+    def markdown(self, text: str) -> None:
+        self.write(text)
+
+
+class NullSink(OutputSink):
+    """Discards all output, for servers and batch jobs."""
+
+    enabled = False
+
+    def write(self, text: str, color: Optional[str] = None, end: str = "\n") -> None:
+        pass
+
+    def markdown(self, text: str) -> None:
+        pass
+
+
+class ConsoleSink(OutputSink):
+    """Coloured text on stdout, the output ``invoke`` has always printed."""
+
+    def write(self, text: str, color: Optional[str] = None, end: str = "\n") -> None:
+        print(colored(text, color) if color else text, end=end)
+
+    def markdown(self, text: str) -> None:
+        Console().print(Markdown(text))
+
+
+class LoggingSink(OutputSink):
+    """Plain text log records, one per non-blank write."""
+
+    def __init__(
+        self, logger: Optional[logging.Logger] = None, level: int = logging.INFO
+    ):
+        self.logger = logger or logging.getLogger("InlineAgent.output")
+        self.level = level
+
+    def write(self, text: str, color: Optional[str] = None, end: str = "\n") -> None:
+        text = text.strip()
+        if text:
+            self.logger.log(self.level, text)
+
+
+class QueueSink(OutputSink):
+    """Puts each write on an ``asyncio.Queue`` for another task to consume.
+
+    Writes never block: when a bounded queue is full the text is dropped and
+    counted in ``dropped``.
+    """
+
+    def __init__(self, maxsize: int = 0):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+
+    def write(self, text: str, color: Optional[str] = None, end: str = "\n") -> None:
+        try:
+            self.queue.put_nowait(text + end)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+
+CONSOLE_SINK = ConsoleSink()
+NULL_SINK = NullSink()
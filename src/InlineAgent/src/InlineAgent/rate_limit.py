@@ -0,0 +1,299 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from botocore.exceptions import ClientError, ConnectionError, HTTPClientError
+
+# Lower-cased, since the EventStream spells them in camel case.
+THROTTLING_ERROR_CODES = frozenset(
+    {"throttlingexception", "toomanyrequestsexception", "throttling"}
+)
+TRANSIENT_ERROR_CODES = frozenset(
+    {
+        "internalserverexception",
+        "serviceunavailableexception",
+        "serviceunavailable",
+        "badgatewayexception",
+        "dependencyfailedexception",
+        "requesttimeout",
+        "requesttimeoutexception",
+    }
+)
+
+# botocore retry settings for clients whose calls go through call_with_retry,
+# which then is their only retry layer: botocore retrying throttles as well
+# would multiply the attempts and hide them from the limiter.
+BOTOCORE_RETRIES = {"total_max_attempts": 1, "mode": "standard"}
+
+
+class RateLimitExceeded(RuntimeError):
+    """Raised instead of queueing when too many calls already wait for an
+    ``AdaptiveRateLimiter`` token."""
+
+
+def error_code(error: BaseException) -> str:
+    if not isinstance(error, ClientError):
+        return ""
+    return error.response.get("Error", {}).get("Code", "").lower()
+
+
+def is_throttling(error: BaseException) -> bool:
+    return error_code(error) in THROTTLING_ERROR_CODES
+
+
+def is_transient(error: BaseException) -> bool:
+    """Server and connection errors that botocore's standard mode retries."""
+    if isinstance(error, (ConnectionError, HTTPClientError)):
+        return True
+    return error_code(error) in TRANSIENT_ERROR_CODES
+
+
+class AdaptiveRateLimiter:
+    """Token bucket for calls to one model, with a rate that follows
+    throttling (additive increase, multiplicative decrease).
+
+    With ``rate`` None calls are not paced until the service throttles one;
+    the rate then starts at ``decrease`` times the rate calls were made at.
+    Tokens refill at ``rate`` per second up to ``burst`` (twice the rate
+    when None). A call takes a token, or reserves the next one and sleeps
+    until it is due; at most ``max_queue`` calls may wait, further ones
+    raise ``RateLimitExceeded``. Each successful call adds ``increase`` to
+    the rate and a throttled one multiplies it by ``decrease``, down to
+    ``min_rate``. Past ``max_rate`` the limiter stops pacing again.
+    Throttles within ``decrease_interval`` seconds of the last decrease are
+    one signal, so a burst of concurrent failures cuts the rate once.
+    Thread-safe; use ``acquire`` from threads and ``acquire_async`` from
+    coroutines.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        min_rate: float = 0.5,
+        max_rate: float = 100.0,
+        increase: float = 0.1,
+        decrease: float = 0.5,
+        decrease_interval: float = 1.0,
+        max_queue: int = 256,
+    ):
+        if not 0 < min_rate <= max_rate:
+            raise ValueError("rates must satisfy 0 < min_rate <= max_rate")
+        if rate is not None and not min_rate <= rate <= max_rate:
+            raise ValueError("rate must be between min_rate and max_rate")
+        if not 0 < decrease < 1:
+            raise ValueError("decrease must be between 0 and 1")
+        self.rate = rate
+        self.fixed_burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.decrease_interval = decrease_interval
+        self.max_queue = max_queue
+        self.throttles = 0
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._last_decrease = float("-inf")
+        # Calls per second, measured over whole seconds while not pacing.
+        self._window_start = self._updated
+        self._window_calls = 0
+        self._observed_rate = 0.0
+
+    @property
+    def burst(self) -> float:
+        if self.fixed_burst is not None:
+            return self.fixed_burst
+        return 2 * self.rate if self.rate is not None else 0.0
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+        self._updated = now
+
+    def _count(self, now: float) -> None:
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self._observed_rate = self._window_calls / elapsed
+            self._window_start = now
+            self._window_calls = 0
+        self._window_calls += 1
+
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            if self.rate is None:
+                self._count(now)
+                return 0.0
+            self._refill(now)
+            if self._tokens < 1 and 1 - self._tokens > self.max_queue:
+                raise RateLimitExceeded(
+                    f"{self.max_queue} calls are already waiting for the rate limit"
+                )
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self) -> None:
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def acquire_async(self) -> None:
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def on_success(self) -> None:
+        with self._lock:
+            if self.rate is None:
+                return
+            self.rate += self.increase
+            if self.rate > self.max_rate:
+                self.rate = None
+                self._window_start = time.monotonic()
+                self._window_calls = 0
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            self.throttles += 1
+            now = time.monotonic()
+            if now - self._last_decrease < self.decrease_interval:
+                return
+            self._last_decrease = now
+            if self.rate is None:
+                current = self._window_calls / max(1.0, now - self._window_start)
+                rate = max(self._observed_rate, current)
+            else:
+                self._refill(now)
+                rate = self.rate
+            self.rate = min(self.max_rate, max(self.min_rate, rate * self.decrease))
+            self._updated = now
+            # Stop the bucket's saved-up burst from hitting the service again.
+            self._tokens = min(self._tokens, 0.0)
+
+    def on_response(self, response: Any) -> None:
+        """Record a successful call. Retries botocore made on its own mean the
+        service pushed back, so they count as a throttle."""
+        metadata = dict()
+        if isinstance(response, dict):
+            metadata = response.get("ResponseMetadata", {})
+        if metadata.get("RetryAttempts"):
+            self.on_throttle()
+        else:
+            self.on_success()
+
+
+class RetryPolicy:
+    """Retries for throttled and failed calls, with full-jitter exponential backoff:
+    attempt ``n`` sleeps a random time up to ``base_delay * 2**n`` seconds,
+    capped at ``max_delay``."""
+
+    def __init__(
+        self, max_attempts: int = 5, base_delay: float = 0.5, max_delay: float = 20.0
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+class RateLimiters:
+    """Process-wide ``AdaptiveRateLimiter``s, one per model or inference
+    profile, shared by every agent and helper in the process.
+
+    Limiters are created on first use with the keyword arguments given to
+    ``configure``; ``set`` installs a specific limiter for one key.
+    """
+
+    _lock = threading.Lock()
+    _limiters: Dict[str, AdaptiveRateLimiter] = dict()
+    _defaults: Dict[str, Any] = dict()
+
+    @staticmethod
+    def get(key: str) -> AdaptiveRateLimiter:
+        with RateLimiters._lock:
+            limiter = RateLimiters._limiters.get(key)
+            if limiter is None:
+                limiter = AdaptiveRateLimiter(**RateLimiters._defaults)
+                RateLimiters._limiters[key] = limiter
+            return limiter
+
+    @staticmethod
+    def set(key: str, limiter: AdaptiveRateLimiter) -> None:
+        with RateLimiters._lock:
+            RateLimiters._limiters[key] = limiter
+
+    @staticmethod
+    def configure(**kwargs) -> None:
+        """Set the ``AdaptiveRateLimiter`` arguments of limiters created from
+        now on."""
+        with RateLimiters._lock:
+            RateLimiters._defaults = dict(kwargs)
+
+    @staticmethod
+    def clear() -> None:
+        with RateLimiters._lock:
+            RateLimiters._limiters.clear()
+            RateLimiters._defaults = dict()
+
+
+def call_with_retry(
+    limiter: AdaptiveRateLimiter,
+    func: Callable,
+    /,
+    *args,
+    retry: RetryPolicy = DEFAULT_RETRY_POLICY,
+    **kwargs,
+) -> Any:
+    """Call ``func`` once ``limiter`` allows it, retrying throttled calls and
+    transient errors. Build the client with ``BOTOCORE_RETRIES``."""
+    for attempt in range(retry.max_attempts):
+        limiter.acquire()
+        try:
+            response = func(*args, **kwargs)
+        except Exception as e:
+            if is_throttling(e):
+                limiter.on_throttle()
+            elif not is_transient(e):
+                raise
+            if attempt + 1 == retry.max_attempts:
+                raise
+            time.sleep(retry.delay(attempt))
+        else:
+            limiter.on_response(response)
+            return response
+
+
+async def call_with_retry_async(
+    limiter: AdaptiveRateLimiter,
+    call: Callable[[], Awaitable],
+    retry: RetryPolicy = DEFAULT_RETRY_POLICY,
+) -> Any:
+    """Await ``call()`` once ``limiter`` allows it, retrying throttled calls
+    and transient errors. Build the client with ``BOTOCORE_RETRIES``."""
+    for attempt in range(retry.max_attempts):
+        await limiter.acquire_async()
+        try:
+            response = await call()
+        except Exception as e:
+            if is_throttling(e):
+                limiter.on_throttle()
+            elif not is_transient(e):
+                raise
+            if attempt + 1 == retry.max_attempts:
+                raise
+            await asyncio.sleep(retry.delay(attempt))
+        else:
+            limiter.on_response(response)
+            return response
@@ -0,0 +1,262 @@
+import atexit
+import base64
+import gzip
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterator, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+RECORD_ENV = "INLINE_AGENT_RECORD"
+DEFAULT_BATCH_SIZE = 512
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        return {"__b64__": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, datetime):
+        return {"__dt__": value.isoformat()}
+    return str(value)
+
+
+def _decode(value: Dict) -> Any:
+    if len(value) == 1:
+        if "__b64__" in value:
+            return base64.b64decode(value["__b64__"])
+        if "__dt__" in value:
+            return datetime.fromisoformat(value["__dt__"])
+    return value
+
+
+class SessionRecorder:
+    """Append-only JSON Lines file of recorded runtime calls.
+
+    A call is written as it happens: one line with the operation, its request
+    params and the time to the response, one line per EventStream event with
+    its offset from the start of the call, and one line when the stream ends
+    with the duration and any error. ``read`` joins them back into one record
+    per call. Bytes and datetimes round-trip, so a replayed event is the same
+    dict the SDK saw. Paths ending in ``.gz`` are gzip compressed.
+
+    ``write`` serialises the line and hands it to a background thread, so
+    the caller never touches the disk.
+    """
+
+    _lock = threading.Lock()
+    _recorders: Dict[str, "SessionRecorder"] = dict()
+
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="InlineAgent-session-recorder", daemon=True
+        )
+        self._thread.start()
+
+    @classmethod
+    def for_path(cls, path: str) -> "SessionRecorder":
+        """Return the process-wide recorder for ``path``."""
+        path = os.path.abspath(path)
+        with cls._lock:
+            if path not in cls._recorders:
+                cls._recorders[path] = cls(path)
+                atexit.register(cls._recorders[path].flush)
+            return cls._recorders[path]
+
+    def write(self, record: Dict) -> None:
+        line = json.dumps(record, default=_encode, separators=(",", ":")) + "\n"
+        self._queue.put(line)
+
+    def flush(self) -> None:
+        """Block until every line written so far is on disk."""
+        self._queue.join()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < DEFAULT_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                self._append("".join(batch).encode("utf-8"))
+            except Exception as e:
+                logger.error(f"Could not write recording: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _append(self, data: bytes) -> None:
+        if self.path.endswith(".gz"):
+            data = gzip.compress(data)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "ab") as file:
+            file.write(data)
+
+    @staticmethod
+    def read(path: str) -> List[Dict]:
+        """Return every call recorded in ``path``, oldest first."""
+        recorder = SessionRecorder._recorders.get(os.path.abspath(path))
+        if recorder is not None:
+            recorder.flush()
+
+        opener = gzip.open if path.endswith(".gz") else open
+        records: Dict[str, Dict] = dict()
+        with opener(path, "rt", encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                entry = json.loads(line, object_hook=_decode)
+                call_id = entry.pop("call")
+                if call_id not in records:
+                    records[call_id] = {**entry, "events": list()}
+                elif "event" in entry:
+                    records[call_id]["events"].append(entry["event"])
+                else:
+                    records[call_id].update(entry)
+        return list(records.values())
+
+
+class RecordingRuntimeClient:
+    """Wraps a ``bedrock-agent-runtime`` client and records every invocation.
+
+    ``invoke_inline_agent`` and ``invoke_agent`` behave as on the wrapped
+    client. Their request params are written to a ``SessionRecorder`` when
+    the call returns, and EventStream events as they are read, so a stream
+    that is never read is still recorded. Every other attribute is passed
+    through.
+    """
+
+    def __init__(self, client: Any, path: str):
+        self.client = client
+        self.recorder = SessionRecorder.for_path(path)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def invoke_inline_agent(self, **kwargs) -> Dict:
+        return self._record("invoke_inline_agent", kwargs)
+
+    def invoke_agent(self, **kwargs) -> Dict:
+        return self._record("invoke_agent", kwargs)
+
+    def _record(self, operation: str, params: Dict) -> Dict:
+        call_id = uuid.uuid4().hex
+        started_at = time.time()
+        start = time.perf_counter()
+        response = getattr(self.client, operation)(**params)
+        self.recorder.write(
+            {
+                "call": call_id,
+                "operation": operation,
+                "started_at": started_at,
+                "params": params,
+                "response_metadata": {
+                    key: response["ResponseMetadata"].get(key)
+                    for key in ("RequestId", "RetryAttempts", "HTTPStatusCode")
+                },
+                "first_byte": time.perf_counter() - start,
+            }
+        )
+        return {
+            **response,
+            "completion": self._tee(response["completion"], call_id, start),
+        }
+
+    def _tee(self, event_stream, call_id: str, start: float) -> Iterator[Dict]:
+        end = {"call": call_id}
+        try:
+            for event in event_stream:
+                self.recorder.write(
+                    {"call": call_id, "event": [time.perf_counter() - start, event]}
+                )
+                yield event
+        except Exception as e:
+            end["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            close = getattr(event_stream, "close", None)
+            if callable(close):
+                close()
+            end["duration"] = time.perf_counter() - start
+            self.recorder.write(end)
+
+
+class ReplayRuntimeClient:
+    """Runtime client that plays back calls recorded by ``SessionRecorder``.
+
+    Calls are served in recorded order, per operation. Delays are replayed
+    divided by ``speed``: ``1.0`` reproduces the original timing, ``10.0``
+    runs ten times faster and ``None`` drops them. Trace events are stamped
+    with the request's session id, and a recorded stream error is raised
+    again at the point it happened. With ``repeat`` the recording loops.
+    """
+
+    def __init__(
+        self,
+        recording: Union[str, List[Dict]],
+        speed: Optional[float] = 1.0,
+        repeat: bool = False,
+    ):
+        if isinstance(recording, str):
+            recording = SessionRecorder.read(recording)
+        self.recording = recording
+        self.speed = speed
+        self.repeat = repeat
+        self.requests: List[Dict] = list()
+        self._lock = threading.Lock()
+        self._calls: Dict[str, List[Dict]] = defaultdict(list)
+        for record in recording:
+            self._calls[record["operation"]].append(record)
+        self._pending: Dict[str, Deque[Dict]] = {
+            operation: deque(records) for operation, records in self._calls.items()
+        }
+
+    def invoke_inline_agent(self, **kwargs) -> Dict:
+        return self._replay("invoke_inline_agent", kwargs)
+
+    def invoke_agent(self, **kwargs) -> Dict:
+        return self._replay("invoke_agent", kwargs)
+
+    def _next_record(self, operation: str) -> Dict:
+        with self._lock:
+            pending = self._pending.get(operation)
+            if not pending and self.repeat and self._calls.get(operation):
+                pending = self._pending[operation] = deque(self._calls[operation])
+            if not pending:
+                raise RuntimeError(f"No recorded {operation} call left to replay")
+            return pending.popleft()
+
+    def _sleep(self, seconds: float) -> None:
+        if self.speed and seconds > 0:
+            time.sleep(seconds / self.speed)
+
+    def _replay(self, operation: str, params: Dict) -> Dict:
+        self.requests.append(params)
+        record = self._next_record(operation)
+        self._sleep(record["first_byte"])
+        return {
+            "completion": self._events(record, session_id=params.get("sessionId")),
+            "ResponseMetadata": dict(record["response_metadata"]),
+        }
+
+    def _events(self, record: Dict, session_id: Optional[str]) -> Iterator[Dict]:
+        start = time.perf_counter()
+        offset = record["first_byte"]
+        for at, event in record["events"]:
+            # Sleep to the recorded offset, not by gaps, so drift does not add up.
+            self._sleep(at - offset - (time.perf_counter() - start) * (self.speed or 0))
+            if session_id and "trace" in event:
+                event = {"trace": {**event["trace"], "sessionId": session_id}}
+            yield event
+        if "error" in record:
+            raise RuntimeError(f"Replayed stream error: {record['error']}")
@@ -0,0 +1,16 @@
+from .admission import (
+    AdmissionController,
+    AdmissionRejected,
+    QueueFull,
+    TenantLimitExceeded,
+)
+from .server import AgentServer, serve
+
+__all__ = [
+    "AdmissionController",
+    "AdmissionRejected",
+    "QueueFull",
+    "TenantLimitExceeded",
+    "AgentServer",
+    "serve",
+]
@@ -0,0 +1,86 @@
+import asyncio
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+
+
+class AdmissionRejected(Exception):
+    """Request turned away before reaching the agent."""
+
+    status: int = 503
+
+    def __init__(self, message: str, retry_after: Optional[int] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class QueueFull(AdmissionRejected):
+    status = 503
+
+
+class TenantLimitExceeded(AdmissionRejected):
+    status = 429
+
+
+class AdmissionController:
+    """Bounded in-flight work with a bounded wait queue and per-tenant caps.
+
+    At most ``max_in_flight`` requests run at once and at most ``max_queue``
+    wait for a slot; anything beyond that is rejected immediately instead of
+    piling up. Each tenant may hold at most ``max_per_tenant`` slots,
+    running or waiting, so one noisy tenant cannot starve the others.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 64,
+        max_queue: int = 256,
+        max_per_tenant: Optional[int] = None,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_per_tenant = max_per_tenant
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._tenants: Dict[str, int] = defaultdict(int)
+
+    @asynccontextmanager
+    async def admit(self, tenant: str = "default") -> AsyncIterator[None]:
+        if self.max_per_tenant and self._tenants[tenant] >= self.max_per_tenant:
+            self.rejected += 1
+            raise TenantLimitExceeded(
+                f"Tenant {tenant} has {self.max_per_tenant} requests in flight",
+                retry_after=1,
+            )
+        if self._slots.locked() and self.queued >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull("Server is at capacity", retry_after=1)
+
+        self._tenants[tenant] += 1
+        self.queued += 1
+        try:
+            try:
+                await self._slots.acquire()
+            finally:
+                self.queued -= 1
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+                self._slots.release()
+        finally:
+            self._tenants[tenant] -= 1
+            if not self._tenants[tenant]:
+                del self._tenants[tenant]
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+        }
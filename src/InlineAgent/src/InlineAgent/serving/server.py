@@ -0,0 +1,343 @@
+import asyncio
+import json
+import logging
+import uuid
+from contextlib import aclosing
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from InlineAgent.agent import InlineAgent
+from InlineAgent.types import (
+    CitationEvent,
+    FilesEvent,
+    ReturnControlEvent,
+    StreamEvent,
+    TextChunkEvent,
+    TraceEvent,
+    UsageEvent,
+)
+
+from .admission import AdmissionController, AdmissionRejected
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REQUEST_TIMEOUT = 120
+DEFAULT_TENANT_HEADER = "x-tenant-id"
+
+_SSE_EVENT_NAMES = {
+    TextChunkEvent: "chunk",
+    CitationEvent: "citation",
+    TraceEvent: "trace",
+    ReturnControlEvent: "return_control",
+    FilesEvent: "files",
+    UsageEvent: "usage",
+}
+
+
+class AgentServer:
+    """ASGI app serving one shared ``InlineAgent``.
+
+    All requests run on the server's event loop and share the agent's pooled
+    clients. Routes:
+
+    - ``POST /invoke``: plain text body returns the answer as text; a JSON
+      body ``{"input_text": ..., "session_id": ...}`` returns JSON with the
+      answer and token usage.
+    - ``POST /stream``: same body, answers with Server-Sent Events, one per
+      ``StreamEvent`` (``chunk``, ``citation``, ``usage`` ...).
+    - ``GET /health``: admission counters.
+
+    Requests are admitted by an ``AdmissionController`` (503 when the queue
+    is full, 429 over the per-tenant cap) and cut off after
+    ``request_timeout`` seconds (504). The tenant is read from the
+    ``tenant_header`` request header. ``enable_trace`` is needed for token
+    usage; trace events are only sent to the client when listed in
+    ``stream_events``.
+    """
+
+    def __init__(
+        self,
+        agent: InlineAgent,
+        max_in_flight: int = 64,
+        max_queue: int = 256,
+        max_per_tenant: Optional[int] = None,
+        request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+        tenant_header: str = DEFAULT_TENANT_HEADER,
+        enable_trace: bool = True,
+        stream_events: Tuple[type, ...] = (TextChunkEvent, CitationEvent, UsageEvent),
+    ):
+        self.agent = agent
+        self.admission = AdmissionController(
+            max_in_flight=max_in_flight,
+            max_queue=max_queue,
+            max_per_tenant=max_per_tenant,
+        )
+        self.request_timeout = request_timeout
+        self.tenant_header = tenant_header.lower().encode("latin-1")
+        self.enable_trace = enable_trace
+        self.stream_events = stream_events
+        self._routes: Dict[Tuple[str, str], Callable] = {
+            ("GET", "/"): self.root,
+            ("GET", "/health"): self.health,
+            ("POST", "/invoke"): self.invoke,
+            ("POST", "/stream"): self.stream,
+        }
+
+    async def __call__(self, scope: Dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive=receive, send=send)
+            return
+        if scope["type"] != "http":
+            return
+
+        route = self._routes.get((scope["method"], scope["path"]))
+        if route is None:
+            await self.send_json(send, 404, {"error": "Not found"})
+            return
+        await route(scope=scope, receive=receive, send=send)
+
+    async def lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    # Build the pooled runtime client before the first request.
+                    await asyncio.to_thread(lambda: self.agent.bedrock_agent_runtime)
+                except Exception as e:
+                    logger.warning(f"Could not warm up the runtime client: {e}")
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def root(self, scope: Dict, receive: Callable, send: Callable) -> None:
+        await self.send_json(
+            send,
+            200,
+            {
+                "agent": self.agent.agent_name,
+                "endpoints": {
+                    "POST /invoke": "Invoke the agent and return the answer",
+                    "POST /stream": "Invoke the agent and stream Server-Sent Events",
+                    "GET /health": "Health check",
+                },
+            },
+        )
+
+    async def health(self, scope: Dict, receive: Callable, send: Callable) -> None:
+        await self.send_json(
+            send, 200, {"status": "healthy", **self.admission.snapshot()}
+        )
+
+    async def invoke(self, scope: Dict, receive: Callable, send: Callable) -> None:
+        request = await self.read_request(scope=scope, receive=receive, send=send)
+        if request is None:
+            return
+        input_text, session_id, as_json = request
+
+        chunks: List[str] = list()
+        usage: Optional[UsageEvent] = None
+        try:
+            # The timeout covers time spent waiting for a slot too.
+            async with asyncio.timeout(self.request_timeout):
+                async with self.admission.admit(tenant=self.tenant(scope)):
+                    async for event in self.events(input_text, session_id):
+                        if isinstance(event, TextChunkEvent):
+                            chunks.append(event.text)
+                        elif isinstance(event, UsageEvent):
+                            usage = event
+        except AdmissionRejected as e:
+            await self.send_rejection(send, e)
+            return
+        except TimeoutError:
+            await self.send_json(send, 504, {"error": "Agent invocation timed out"})
+            return
+        except Exception as e:
+            logger.exception("Agent invocation failed")
+            await self.send_json(
+                send, 500, {"error": f"Agent invocation failed: {e}", "status": "error"}
+            )
+            return
+
+        answer = "".join(chunks)
+        if not as_json:
+            await self.send_body(
+                send, 200, answer.encode("utf-8"), b"text/plain; charset=utf-8"
+            )
+            return
+        await self.send_json(
+            send,
+            200,
+            {
+                "answer": answer,
+                "session_id": session_id,
+                "usage": asdict(usage) if usage else None,
+            },
+        )
+
+    async def stream(self, scope: Dict, receive: Callable, send: Callable) -> None:
+        request = await self.read_request(scope=scope, receive=receive, send=send)
+        if request is None:
+            return
+        input_text, session_id, _ = request
+
+        started = False
+        try:
+            async with asyncio.timeout(self.request_timeout):
+                async with self.admission.admit(tenant=self.tenant(scope)):
+                    await send(
+                        {
+                            "type": "http.response.start",
+                            "status": 200,
+                            "headers": [
+                                (b"content-type", b"text/event-stream"),
+                                (b"cache-control", b"no-cache"),
+                                (b"x-session-id", session_id.encode("latin-1")),
+                            ],
+                        }
+                    )
+                    started = True
+                    async for event in self.events(input_text, session_id):
+                        if isinstance(event, self.stream_events):
+                            await self.send_event(send, event)
+        except AdmissionRejected as e:
+            await self.send_rejection(send, e)
+            return
+        except TimeoutError:
+            if not started:
+                await self.send_json(send, 504, {"error": "Agent invocation timed out"})
+                return
+            await self.send_sse(send, "error", {"error": "Agent invocation timed out"})
+        except Exception as e:
+            logger.exception("Agent invocation failed")
+            error = {"error": f"Agent invocation failed: {e}"}
+            if not started:
+                await self.send_json(send, 500, error)
+                return
+            await self.send_sse(send, "error", error)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def events(self, input_text: str, session_id: str):
+        async with aclosing(
+            self.agent.stream(
+                input_text=input_text,
+                session_id=session_id,
+                enable_trace=self.enable_trace,
+            )
+        ) as events:
+            async for event in events:
+                yield event
+
+    async def read_request(
+        self, scope: Dict, receive: Callable, send: Callable
+    ) -> Optional[Tuple[str, str, bool]]:
+        """Return (input_text, session_id, is_json) or answer 400 and None."""
+        body = b""
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            body += message.get("body", b"")
+            if not message.get("more_body", False):
+                break
+
+        as_json = self.header(scope, b"content-type").startswith("application/json")
+        session_id = None
+        if as_json:
+            try:
+                payload = json.loads(body)
+                input_text = payload.get("input_text", "")
+                session_id = payload.get("session_id")
+            except (ValueError, AttributeError):
+                await self.send_json(send, 400, {"error": "Invalid JSON body"})
+                return None
+            if not isinstance(input_text, str):
+                await self.send_json(
+                    send, 400, {"error": "input_text must be a string"}
+                )
+                return None
+            if session_id is not None and not isinstance(session_id, str):
+                await self.send_json(
+                    send, 400, {"error": "session_id must be a string"}
+                )
+                return None
+        else:
+            input_text = body.decode("utf-8", errors="replace")
+
+        if not input_text or not input_text.strip():
+            await self.send_json(
+                send, 400, {"error": "Missing input text in request body"}
+            )
+            return None
+        return input_text, session_id or str(uuid.uuid4()), as_json
+
+    def tenant(self, scope: Dict) -> str:
+        return self.header(scope, self.tenant_header) or "default"
+
+    @staticmethod
+    def header(scope: Dict, name: bytes) -> str:
+        for key, value in scope.get("headers", []):
+            if key.lower() == name:
+                return value.decode("latin-1")
+        return ""
+
+    @staticmethod
+    async def send_body(
+        send: Callable, status: int, body: bytes, content_type: bytes, headers=()
+    ) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    (b"content-type", content_type),
+                    (b"content-length", str(len(body)).encode("latin-1")),
+                    *headers,
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    @staticmethod
+    async def send_json(send: Callable, status: int, payload: Any, headers=()) -> None:
+        await AgentServer.send_body(
+            send,
+            status,
+            json.dumps(payload, default=str).encode("utf-8"),
+            b"application/json",
+            headers,
+        )
+
+    @staticmethod
+    async def send_rejection(send: Callable, e: AdmissionRejected) -> None:
+        headers = []
+        if e.retry_after is not None:
+            headers.append((b"retry-after", str(e.retry_after).encode("latin-1")))
+        await AgentServer.send_json(send, e.status, {"error": str(e)}, headers)
+
+    @staticmethod
+    async def send_sse(send: Callable, name: str, payload: Any) -> None:
+        data = json.dumps(payload, default=str)
+        await send(
+            {
+                "type": "http.response.body",
+                "body": f"event: {name}\ndata: {data}\n\n".encode("utf-8"),
+                "more_body": True,
+            }
+        )
+
+    @staticmethod
+    async def send_event(send: Callable, event: StreamEvent) -> None:
+        await AgentServer.send_sse(send, _SSE_EVENT_NAMES[type(event)], asdict(event))
+
+
+def serve(app: AgentServer, host: str = "127.0.0.1", port: int = 8000, **kwargs):
+    """Run ``app`` with uvicorn on a single event loop."""
+    try:
+        import uvicorn
+    except ImportError as e:
+        raise ImportError(
+            "uvicorn is required to serve an AgentServer: pip install uvicorn"
+        ) from e
+
+    uvicorn.run(app, host=host, port=port, **kwargs)
@@ -0,0 +1,31 @@
+"""
+Offline helpers for testing and benchmarking agents without Amazon Bedrock.
+"""
+
+from .fake_runtime import (
+    FakeRuntimeClient,
+    action_group_invocation,
+    answer_turn,
+    chunk,
+    citation,
+    files,
+    function_parameter,
+    model_invocation,
+    orchestration_trace,
+    return_control,
+    tool_turn,
+)
+
+__all__ = [
+    "FakeRuntimeClient",
+    "action_group_invocation",
+    "answer_turn",
+    "chunk",
+    "citation",
+    "files",
+    "function_parameter",
+    "model_invocation",
+    "orchestration_trace",
+    "return_control",
+    "tool_turn",
+]
@@ -0,0 +1,365 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+FAKE_AGENT_ID = "FAKEAGENT"
+FAKE_AGENT_ALIAS_ID = "FAKEALIAS"
+FAKE_SESSION_ID = "FAKESESSION"
+FAKE_FOUNDATION_MODEL = "fake.foundation-model"
+
+Turn = List[Dict]
+Script = Union[Sequence[Turn], Callable[[Dict], Turn]]
+
+_PARAMETER_TYPES = {bool: "boolean", int: "integer", float: "number"}
+
+
+class FakeRuntimeClient:
+    """Offline stand-in for the ``bedrock-agent-runtime`` client.
+
+    Pass it as ``runtime_client`` to ``InlineAgent`` (or call its
+    ``invoke_agent`` from an ``observe``-wrapped function) to run the SDK
+    without AWS. Every call replays the next scripted turn as the
+    ``completion`` EventStream; ``script`` is either a list of turns, each a
+    list of events built with the helpers in this module, or a callable that
+    gets the request kwargs and returns the turn.
+
+    ``latency`` is slept before the response is returned and
+    ``event_latency`` before each event, blocking the calling thread the way
+    boto3 blocks on the network. Trace events are stamped with the request's
+    session id so observability spans line up. An exception placed in a
+    turn is raised when the stream reaches it. Requests are recorded in
+    ``requests``, keeping the last ``history`` when it is set.
+    """
+
+    def __init__(
+        self,
+        script: Script = (),
+        latency: float = 0.0,
+        event_latency: float = 0.0,
+        repeat: bool = False,
+        history: Optional[int] = None,
+    ):
+        self.script = script
+        self.latency = latency
+        self.event_latency = event_latency
+        self.repeat = repeat
+        self.requests: Deque[Dict] = deque(maxlen=history)
+        self._turn = 0
+        self._lock = threading.Lock()
+
+    def next_turn(self, request: Dict) -> Turn:
+        if callable(self.script):
+            return self.script(request)
+
+        with self._lock:
+            if self._turn >= len(self.script) and not self.repeat:
+                raise RuntimeError(
+                    f"FakeRuntimeClient ran out of scripted turns after {self._turn}"
+                )
+            turn = self.script[self._turn % len(self.script)]
+            self._turn += 1
+        return turn
+
+    def invoke_inline_agent(self, **kwargs) -> Dict:
+        self.requests.append(kwargs)
+        turn = self.next_turn(kwargs)
+        if self.latency:
+            time.sleep(self.latency)
+        return {
+            "completion": self.completion(
+                turn, session_id=kwargs.get("sessionId", FAKE_SESSION_ID)
+            ),
+            "ResponseMetadata": {"RequestId": "FAKEREQUEST", "RetryAttempts": 0},
+        }
+
+    invoke_agent = invoke_inline_agent
+
+    def completion(self, turn: Turn, session_id: str) -> Iterator[Dict]:
+        for event in turn:
+            if self.event_latency:
+                time.sleep(self.event_latency)
+            if isinstance(event, BaseException):
+                raise event.with_traceback(None)
+            if "trace" in event:
+                event = {"trace": {**event["trace"], "sessionId": session_id}}
+            yield event
+
+
+def chunk(text: str, citations: Optional[List[Dict]] = None) -> Dict:
+    """A ``chunk`` event carrying ``text`` and, optionally, its citations."""
+    event = {"chunk": {"bytes": text.encode("utf-8")}}
+    if citations is not None:
+        event["chunk"]["attribution"] = {"citations": citations}
+    return event
+
+
+def citation(
+    text: str,
+    source_text: str,
+    uri: str = "s3://fake-bucket/doc.txt",
+    data_source_id: str = "FAKEDATASOURCE",
+):
+    """A ``chunk`` event whose ``text`` is attributed to one knowledge base hit."""
+    return chunk(
+        text,
+        citations=[
+            {
+                "generatedResponsePart": {
+                    "textResponsePart": {
+                        "text": text,
+                        "span": {"start": 0, "end": len(text)},
+                    }
+                },
+                "retrievedReferences": [
+                    {
+                        "content": {"type": "TEXT", "text": source_text},
+                        "location": {"type": "S3", "s3Location": {"uri": uri}},
+                        "metadata": {
+                            "x-amz-bedrock-kb-source-uri": uri,
+                            "x-amz-bedrock-kb-data-source-id": data_source_id,
+                        },
+                    }
+                ],
+            }
+        ],
+    )
+
+
+def files(*named_files: Tuple[str, bytes], file_type: str = "text/plain") -> Dict:
+    """A ``files`` event returning each (name, bytes) pair."""
+    return {
+        "files": {
+            "files": [
+                {"name": name, "type": file_type, "bytes": data}
+                for name, data in named_files
+            ]
+        }
+    }
+
+
+def return_control(
+    *calls: Tuple[str, str, Dict[str, Any]], invocation_id: str = "FAKEINVOCATION"
+) -> Dict:
+    """A ``returnControl`` event asking for each (action group, function, args)."""
+    return {
+        "returnControl": {
+            "invocationId": invocation_id,
+            "invocationInputs": [
+                {
+                    "functionInvocationInput": {
+                        "actionGroup": action_group,
+                        "actionInvocationType": "RESULT",
+                        "agentId": "INLINE_AGENT",
+                        "function": function,
+                        "parameters": [
+                            function_parameter(name, value)
+                            for name, value in arguments.items()
+                        ],
+                    }
+                }
+                for action_group, function, arguments in calls
+            ],
+        }
+    }
+
+
+def function_parameter(name: str, value: Any) -> Dict:
+    """A parameter as the service sends it: typed, with the value as a string."""
+    if isinstance(value, bool):
+        text = str(value).lower()
+    else:
+        text = str(value)
+    return {
+        "name": name,
+        "type": _PARAMETER_TYPES.get(type(value), "string"),
+        "value": text,
+    }
+
+
+def orchestration_trace(
+    step: Dict,
+    agent_id: str = FAKE_AGENT_ID,
+    agent_alias_id: str = FAKE_AGENT_ALIAS_ID,
+    session_id: str = FAKE_SESSION_ID,
+) -> Dict:
+    """A ``trace`` event wrapping one orchestration step."""
+    return {
+        "trace": {
+            "agentId": agent_id,
+            "agentAliasId": agent_alias_id,
+            "agentVersion": "DRAFT",
+            "sessionId": session_id,
+            "eventTime": datetime.now(timezone.utc),
+            "callerChain": [
+                {
+                    "agentAliasArn": "arn:aws:bedrock:us-east-1:123456789012:"
+                    f"agent-alias/{agent_id}/{agent_alias_id}"
+                }
+            ],
+            "trace": {"orchestrationTrace": step},
+        }
+    }
+
+
+def model_invocation(
+    trace_id: str,
+    prompt: str,
+    completion: str,
+    input_tokens: int,
+    output_tokens: int,
+) -> List[Dict]:
+    """The ``modelInvocationInput`` and ``modelInvocationOutput`` trace events."""
+    return [
+        orchestration_trace(
+            {
+                "modelInvocationInput": {
+                    "traceId": trace_id,
+                    "type": "ORCHESTRATION",
+                    "text": prompt,
+                    "foundationModel": FAKE_FOUNDATION_MODEL,
+                    "inferenceConfiguration": {
+                        "maximumLength": 2048,
+                        "temperature": 0.0,
+                        "topP": 1.0,
+                        "topK": 250,
+                        "stopSequences": ["</answer>"],
+                    },
+                }
+            }
+        ),
+        orchestration_trace(
+            {
+                "modelInvocationOutput": {
+                    "traceId": trace_id,
+                    "rawResponse": {"content": completion},
+                    "metadata": {
+                        "usage": {
+                            "inputTokens": input_tokens,
+                            "outputTokens": output_tokens,
+                        }
+                    },
+                }
+            }
+        ),
+    ]
+
+
+def action_group_invocation(
+    trace_id: str,
+    action_group: str,
+    function: str,
+    arguments: Dict[str, Any],
+    output: Optional[str] = None,
+) -> List[Dict]:
+    """The ``invocationInput`` trace event of one action group call.
+
+    With ``output`` the call is executed by the service (a Lambda action
+    group) and its ``observation`` trace event follows; without it the call
+    is returned to the client.
+    """
+    events = [
+        orchestration_trace(
+            {
+                "invocationInput": {
+                    "traceId": trace_id,
+                    "invocationType": "ACTION_GROUP",
+                    "actionGroupInvocationInput": {
+                        "actionGroupName": action_group,
+                        "function": function,
+                        "executionType": (
+                            "RETURN_CONTROL" if output is None else "LAMBDA"
+                        ),
+                        "parameters": [
+                            function_parameter(name, value)
+                            for name, value in arguments.items()
+                        ],
+                    },
+                }
+            }
+        )
+    ]
+    if output is not None:
+        events.append(
+            orchestration_trace(
+                {
+                    "observation": {
+                        "traceId": trace_id,
+                        "type": "ACTION_GROUP",
+                        "actionGroupInvocationOutput": {"text": output},
+                    }
+                }
+            )
+        )
+    return events
+
+
+def answer_turn(
+    text: str,
+    chunks: int = 1,
+    input_tokens: int = 100,
+    output_tokens: int = 20,
+    trace_id: str = "FAKETRACE-0",
+    prompt: str = "You are a helpful assistant.",
+) -> Turn:
+    """A turn that ends with a final answer streamed in ``chunks`` pieces.
+
+    The traces are the ones the service sends for a single model call:
+    model input and output, the rationale and the final response.
+    """
+    size = -(-len(text) // chunks) or 1
+    return [
+        *model_invocation(trace_id, prompt, text, input_tokens, output_tokens),
+        orchestration_trace(
+            {"rationale": {"traceId": trace_id, "text": "I can answer directly."}}
+        ),
+        orchestration_trace(
+            {
+                "observation": {
+                    "traceId": trace_id,
+                    "type": "FINISH",
+                    "finalResponse": {"text": text},
+                }
+            }
+        ),
+        *[chunk(text[start : start + size]) for start in range(0, len(text), size)],
+    ]
+
+
+def tool_turn(
+    *calls: Tuple[str, str, Dict[str, Any]],
+    input_tokens: int = 100,
+    output_tokens: int = 20,
+    trace_id: str = "FAKETRACE-0",
+    prompt: str = "You are a helpful assistant.",
+    invocation_id: str = "FAKEINVOCATION",
+) -> Turn:
+    """A turn in which the model returns control for each (group, function, args)."""
+    return [
+        *model_invocation(
+            trace_id, prompt, "Calling tools.", input_tokens, output_tokens
+        ),
+        orchestration_trace(
+            {"rationale": {"traceId": trace_id, "text": "I need to call tools."}}
+        ),
+        *[
+            event
+            for action_group, function, arguments in calls
+            for event in action_group_invocation(
+                trace_id, action_group, function, arguments
+            )
+        ],
+        return_control(*calls, invocation_id=invocation_id),
+    ]
@@ -1,3 +1,3 @@
-from .mcp import MCPStdio, MCPServer, MCPHttp
+from .mcp import MCPStdio, MCPServer, MCPHttp, MCPPool, MCPStats
 
-__all__ = ["MCPStdio", "MCPServer", "MCPHttp"]
+__all__ = ["MCPStdio", "MCPServer", "MCPHttp", "MCPPool", "MCPStats"]
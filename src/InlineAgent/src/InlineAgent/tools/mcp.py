@@ -1,34 +1,227 @@
+import asyncio
+import logging
+import statistics
+import time
+import weakref
 from abc import ABC, abstractmethod
+from collections import deque
 from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
 
+import anyio
 from termcolor import colored
 
 from pydantic import validate_call
-from mcp import ClientSession, ListToolsResult, StdioServerParameters
+from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 from mcp.client.sse import sse_client
-from typing import Any, Callable, Dict, List
+from mcp.types import Tool
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
 
 from InlineAgent.types.action_group import FunctionDefination
 from InlineAgent.constants import TraceColor
 
+logger = logging.getLogger(__name__)
+
+# Raised by a session whose server process or connection has gone away.
+_CONNECTION_ERRORS = (
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+    ConnectionError,
+)
+
+
+@dataclass
+class MCPStats:
+    """Startup time and tool call latencies of one MCP server connection."""
+
+    startup_seconds: float = 0.0
+    calls: int = 0
+    errors: int = 0
+    reconnects: int = 0
+    call_seconds: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+
+    def latency(self, percentile: float) -> float:
+        """Latency in seconds of recent calls at ``percentile`` (0-100)."""
+        if not self.call_seconds:
+            return 0.0
+        if len(self.call_seconds) == 1:
+            return self.call_seconds[0]
+        return statistics.quantiles(self.call_seconds, n=100, method="inclusive")[
+            min(max(int(percentile), 1), 99) - 1
+        ]
+
+    def __str__(self) -> str:
+        return (
+            f"startup {self.startup_seconds:.2f}s, {self.calls} calls, "
+            f"{self.errors} errors, {self.reconnects} reconnects, "
+            f"p50 {self.latency(50) * 1000:.1f}ms, p99 {self.latency(99) * 1000:.1f}ms"
+        )
+
 
 class MCPServer(ABC):
+    """Connection to one MCP server shared by every agent that uses it.
+
+    The session lives in a background task that owns the transport, so it
+    can be closed or replaced from any task. Concurrent ``call_tool``
+    requests are multiplexed over the one session. When the server process
+    or connection dies, the next call reconnects once and retries.
+    """
+
+    @abstractmethod
+    async def open_transport(self, exit_stack: AsyncExitStack) -> Tuple[Any, Any]:
+        """Enter the transport context and return its read and write streams."""
+
+    def init_state(self) -> None:
+        self.session = None
+        self.function_schema = dict()
+        self.callable_tools = dict()
+        self.stats = MCPStats()
+        self._connection: Optional[asyncio.Task] = None
+        self._closing: Optional[asyncio.Event] = None
+        self._reconnect_lock = asyncio.Lock()
+        # Set by MCPPool, which counts the holders of a pooled server.
+        self._pool_key: Optional[Tuple] = None
+        self._holders = 0
+
+    async def connect(self) -> None:
+        ready = asyncio.get_running_loop().create_future()
+        self._closing = asyncio.Event()
+        self._connection = asyncio.create_task(
+            self._hold_connection(ready=ready, closing=self._closing)
+        )
+        self.session = await ready
+
+    async def _hold_connection(
+        self, ready: asyncio.Future, closing: asyncio.Event
+    ) -> None:
+        # anyio cancel scopes must be exited by the task that entered them.
+        try:
+            async with AsyncExitStack() as exit_stack:
+                read, write = await self.open_transport(exit_stack)
+                session = await exit_stack.enter_async_context(
+                    ClientSession(read, write)
+                )
+                await session.initialize()
+                ready.set_result(session)
+                await closing.wait()
+        except asyncio.CancelledError:
+            if not ready.done():
+                ready.cancel()
+            raise
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                # A dead server fails again while its transport is torn down.
+                logger.debug(f"MCP connection closed with error: {e!r}")
+
+    async def start(self, tools_to_use: set, max_parameters: int) -> None:
+        """Connect, list tools once and build the schema and callables."""
+        start = time.perf_counter()
+        await self.connect()
+        try:
+            # List available tools
+            response = await self.session.list_tools()
+            tools = response.tools
+            self.stats.startup_seconds = time.perf_counter() - start
+            print(
+                colored(
+                    f"\nConnected to server with tools:{[tool.name for tool in tools]}"
+                    f" in {self.stats.startup_seconds:.2f}s",
+                    TraceColor.invocation_output,
+                )
+            )
+
+            await self.set_available_tools(
+                tools_to_use=tools_to_use, max_parameters=max_parameters, tools=tools
+            )
+            await self.set_callable_tool(tools_to_use=tools_to_use, tools=tools)
+        except BaseException:
+            await self.close()
+            raise
+
+    async def reconnect(self, failed_session: Optional[ClientSession]) -> None:
+        async with self._reconnect_lock:
+            # Another caller already replaced the session.
+            if self.session is not failed_session:
+                return
+            await self._disconnect()
+            self.stats.reconnects += 1
+            await self.connect()
+
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]):
+        start = time.perf_counter()
+        session = self.session
+        try:
+            try:
+                # A closed server has no session; a dead one a finished task.
+                if session is None or (
+                    self._connection is not None and self._connection.done()
+                ):
+                    raise anyio.ClosedResourceError()
+                response = await session.call_tool(tool_name, arguments=arguments)
+            except _CONNECTION_ERRORS:
+                await self.reconnect(failed_session=session)
+                response = await self.session.call_tool(
+                    tool_name, arguments=arguments
+                )
+        except Exception:
+            self.stats.errors += 1
+            raise
+        finally:
+            self.stats.calls += 1
+            self.stats.call_seconds.append(time.perf_counter() - start)
+        return response
+
+    async def ping(self) -> bool:
+        """Return True when the server answers a ping."""
+        try:
+            await self.session.send_ping()
+            return True
+        except Exception:
+            return False
+
+    async def close(self) -> None:
+        """Close the connection. A pooled server is only released, and closed
+        and taken out of its pool once every holder has released it."""
+        if self._pool_key is not None and self._holders > 0:
+            self._holders -= 1
+            if self._holders > 0:
+                return
+        MCPPool._evict(self)
+        await self._disconnect()
+
+    async def _disconnect(self) -> None:
+        if self._connection is None:
+            return
+        self._closing.set()
+        await asyncio.gather(self._connection, return_exceptions=True)
+        self._connection = None
+        self.session = None
 
     @validate_call
-    async def set_available_tools(self, tools_to_use: set, max_parameters: int = 5) -> List[FunctionDefination]:
+    async def set_available_tools(
+        self,
+        tools_to_use: set,
+        max_parameters: int = 5,
+        tools: Optional[List[Tool]] = None,
+    ) -> List[FunctionDefination]:
         """
         Retrieve a list of available tools from the MCP server.
         
         Args:
             tools_to_use: Set of tool names to use. If empty, all tools are used.
             max_parameters: Maximum number of parameters allowed per tool (default: 5)
+            tools: Tools already listed by the caller. Listed again if None.
         """
         if not self.session:
             raise RuntimeError("Not connected to MCP server")
 
-        tools: ListToolsResult = await self.session.list_tools()
-        tools_list = tools.tools
+        if tools is None:
+            tools = (await self.session.list_tools()).tools
+        tools_list = tools
 
         function = {}
         for tool in tools_list:
@@ -97,22 +290,23 @@ class MCPServer(ABC):
                 self.function_schema["functions"].append(function)
 
     @validate_call
-    async def set_callable_tool(self, tools_to_use: set) -> Dict[str, Callable]:
+    async def set_callable_tool(
+        self, tools_to_use: set, tools: Optional[List[Tool]] = None
+    ) -> Dict[str, Callable]:
         """
         Get callable function
         """
         if not self.session:
             raise RuntimeError("Not connected to MCP server")
 
-        tools = await self.session.list_tools()
-        tools_list = tools.tools
+        if tools is None:
+            tools = (await self.session.list_tools()).tools
+        tools_list = tools
 
         # Helper factory function to create a callable with the correct tool name
         def create_callable(tool_name):
             async def callable(*args, **kwargs):
-                response = await self.session.call_tool(
-                    tool_name, arguments=kwargs
-                )
+                response = await self.call_tool(tool_name, arguments=kwargs)
                 return response.content[0].text
             return callable
 
@@ -124,8 +318,8 @@ class MCPServer(ABC):
                 self.callable_tools[tool.name] = create_callable(tool.name)
 
     async def cleanup(self):
-        """Clean up resources"""
-        await self.exit_stack.aclose()
+        """Clean up resources, like ``close()``."""
+        await self.close()
 
 
 class MCPStdio(MCPServer):
@@ -140,36 +334,16 @@ class MCPStdio(MCPServer):
     ):
         # Initialize session and client objects
         self = cls()
-        self.session = None
-        self.exit_stack = AsyncExitStack()
-        self.function_schema = dict()
-        self.callable_tools = dict()
+        self.init_state()
+        self.server_params = server_params
 
-        stdio_transport = await self.exit_stack.enter_async_context(
-            stdio_client(server_params)
-        )
-        self.stdio, self.write = stdio_transport
-        self.session = await self.exit_stack.enter_async_context(
-            ClientSession(self.stdio, self.write)
-        )
-
-        await self.session.initialize()
-
-        # List available tools
-        response = await self.session.list_tools()
-        tools = response.tools
-        print(
-            colored(
-                f"\nConnected to server with tools:{[tool.name for tool in tools]}",
-                TraceColor.invocation_output,
-            )
-        )
-
-        await self.set_available_tools(tools_to_use=tools_to_use, max_parameters=max_parameters)
-        await self.set_callable_tool(tools_to_use=tools_to_use)
+        await self.start(tools_to_use=tools_to_use, max_parameters=max_parameters)
 
         return self
 
+    async def open_transport(self, exit_stack: AsyncExitStack) -> Tuple[Any, Any]:
+        return await exit_stack.enter_async_context(stdio_client(self.server_params))
+
 
 class MCPHttp(MCPServer):
     @classmethod
@@ -186,37 +360,141 @@ class MCPHttp(MCPServer):
 
         # Initialize session and client objects
         self = cls()
-        self.session = None
-        self.exit_stack = AsyncExitStack()
-        self.function_schema = dict()
-        self.callable_tools = dict()
+        self.init_state()
+        self.url = url
+        self.headers = headers
+        self.timeout = timeout
+        self.sse_read_timeout = sse_read_timeout
+
+        await self.start(tools_to_use=tools_to_use, max_parameters=max_parameters)
+
+        return self
 
-        stdio_transport = await self.exit_stack.enter_async_context(
+    async def open_transport(self, exit_stack: AsyncExitStack) -> Tuple[Any, Any]:
+        return await exit_stack.enter_async_context(
             sse_client(
-                url=url,
-                headers=headers,
-                timeout=timeout,
-                sse_read_timeout=sse_read_timeout,
+                url=self.url,
+                headers=self.headers,
+                timeout=self.timeout,
+                sse_read_timeout=self.sse_read_timeout,
             )
         )
-        self.stdio, self.write = stdio_transport
-        self.session = await self.exit_stack.enter_async_context(
-            ClientSession(self.stdio, self.write)
-        )
 
-        await self.session.initialize()
 
-        # List available tools
-        response = await self.session.list_tools()
-        tools = response.tools
-        print(
-            colored(
-                f"\nConnected to server with tools:{[tool.name for tool in tools]}",
-                TraceColor.invocation_output,
-            )
+class MCPPool:
+    """Per event loop pool of MCP server connections.
+
+    Agents that ask for the same server, tool selection and parameter limit
+    get the same ``MCPServer``, so the server is spawned (or the SSE stream
+    opened) and its tools listed only once per event loop. Servers hold
+    tasks and streams bound to the loop that started them, so each loop,
+    e.g. each ``asyncio.run``, gets its own pool. Every caller holds the
+    server until it calls ``cleanup()``; the last one to release it closes
+    it and takes it out of the pool.
+    """
+
+    _servers: "weakref.WeakKeyDictionary[Any, Dict[Tuple, MCPServer]]" = (
+        weakref.WeakKeyDictionary()
+    )
+    _locks: "weakref.WeakKeyDictionary[Any, Dict[Tuple, asyncio.Lock]]" = (
+        weakref.WeakKeyDictionary()
+    )
+
+    @classmethod
+    def _loop_servers(cls) -> Dict[Tuple, MCPServer]:
+        # Servers reference their loop, so closed loops are dropped here.
+        for loop in [loop for loop in cls._servers if loop.is_closed()]:
+            del cls._servers[loop]
+            cls._locks.pop(loop, None)
+        return cls._servers.setdefault(asyncio.get_running_loop(), dict())
+
+    @classmethod
+    async def _get(cls, key: Tuple, factory: Callable) -> MCPServer:
+        servers = cls._loop_servers()
+        server = servers.get(key)
+        if server is None:
+            locks = cls._locks.setdefault(asyncio.get_running_loop(), dict())
+            async with locks.setdefault(key, asyncio.Lock()):
+                server = servers.get(key)
+                if server is None:
+                    server = await factory()
+                    server._pool_key = key
+                    servers[key] = server
+        # Each caller holds the server until its cleanup().
+        server._holders += 1
+        return server
+
+    @classmethod
+    def _evict(cls, server: MCPServer) -> None:
+        servers = cls._servers.get(asyncio.get_running_loop(), {})
+        if servers.get(server._pool_key) is server:
+            del servers[server._pool_key]
+
+    @classmethod
+    async def stdio(
+        cls,
+        server_params: StdioServerParameters,
+        tools_to_use: set = set(),
+        max_parameters: int = 5,
+    ) -> MCPStdio:
+        key = (
+            "stdio",
+            server_params.model_dump_json(),
+            frozenset(tools_to_use),
+            max_parameters,
+        )
+        return await cls._get(
+            key,
+            lambda: MCPStdio.create(
+                server_params=server_params,
+                tools_to_use=tools_to_use,
+                max_parameters=max_parameters,
+            ),
         )
 
-        await self.set_available_tools(tools_to_use=tools_to_use, max_parameters=max_parameters)
-        await self.set_callable_tool(tools_to_use=tools_to_use)
+    @classmethod
+    async def http(
+        cls,
+        url: str,
+        headers: Dict[str, Any] = None,
+        timeout: float = 5,
+        sse_read_timeout: float = 60 * 5,
+        tools_to_use: set = set(),
+        max_parameters: int = 5,
+    ) -> MCPHttp:
+        key = (
+            "http",
+            url,
+            tuple(sorted((headers or {}).items())),
+            timeout,
+            sse_read_timeout,
+            frozenset(tools_to_use),
+            max_parameters,
+        )
+        return await cls._get(
+            key,
+            lambda: MCPHttp.create(
+                url=url,
+                headers=headers,
+                timeout=timeout,
+                sse_read_timeout=sse_read_timeout,
+                tools_to_use=tools_to_use,
+                max_parameters=max_parameters,
+            ),
+        )
 
-        return self
+    @classmethod
+    def stats(cls) -> Dict[Tuple, MCPStats]:
+        """Return the stats of every server pooled on the running loop."""
+        servers = cls._servers.get(asyncio.get_running_loop(), {})
+        return {key: server.stats for key, server in servers.items()}
+
+    @classmethod
+    async def close_all(cls) -> None:
+        """Close every server pooled on the running loop, held or not."""
+        loop = asyncio.get_running_loop()
+        servers = list(cls._servers.pop(loop, {}).values())
+        cls._locks.pop(loop, None)
+        for server in servers:
+            server._holders = 0
+        await asyncio.gather(*[server._disconnect() for server in servers])
@@ -4,6 +4,15 @@ from .inline_agent import (
     InlineCollaboratorConfigurations,
 )
 from .mcp import MCPConfig
+from .stream import (
+    CitationEvent,
+    FilesEvent,
+    ReturnControlEvent,
+    StreamEvent,
+    TextChunkEvent,
+    TraceEvent,
+    UsageEvent,
+)
 
 __all__ = [
     "Executor",
@@ -14,4 +23,11 @@ __all__ = [
     "InlineCollaboratorConfigurations",
     "MCPConfig",
     "S3",
+    "CitationEvent",
+    "FilesEvent",
+    "ReturnControlEvent",
+    "StreamEvent",
+    "TextChunkEvent",
+    "TraceEvent",
+    "UsageEvent",
 ]
@@ -0,0 +1,61 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Union
+
+
+@dataclass(slots=True)
+class TextChunkEvent:
+    """A piece of the final answer, decoded from ``chunk.bytes``."""
+
+    text: str
+
+
+@dataclass(slots=True)
+class CitationEvent:
+    """Knowledge base citations attached to the chunk that follows."""
+
+    citations: List[Dict]
+
+
+@dataclass(slots=True)
+class TraceEvent:
+    """One orchestration trace step with the token usage it reported."""
+
+    trace: Dict
+    input_tokens: int = 0
+    output_tokens: int = 0
+    llm_calls: int = 0
+
+
+@dataclass(slots=True)
+class ReturnControlEvent:
+    """The agent asked the client to run tools; results are sent back by the SDK."""
+
+    payload: Dict
+
+
+@dataclass(slots=True)
+class FilesEvent:
+    """Files produced by the agent, e.g. by code interpreter."""
+
+    files: List[Dict] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class UsageEvent:
+    """Totals for the whole turn, emitted once after the last chunk."""
+
+    session_id: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    llm_calls: int = 0
+    duration: float = 0.0
+
+
+StreamEvent = Union[
+    TextChunkEvent,
+    CitationEvent,
+    TraceEvent,
+    ReturnControlEvent,
+    FilesEvent,
+    UsageEvent,
+]
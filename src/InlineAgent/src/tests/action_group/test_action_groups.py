@@ -274,6 +274,25 @@ class TestActionGroup(unittest.TestCase):
             action_group_1_one_tool,
         )
 
+    def test_roc_cached(self):
+
+        action_group = ActionGroup(
+            name="Weather Action Group",
+            tools=[get_current_weather],
+            argument_key="Args:",
+            test=True,
+        )
+
+        action_groups = ActionGroups(action_groups=[action_group])
+
+        self.assertIs(action_groups.actionGroups, action_groups.actionGroups)
+        self.assertIs(action_groups.tool_map, action_groups.tool_map)
+
+        action_groups.action_groups = []
+
+        self.assertEqual(action_groups.actionGroups, [])
+        self.assertEqual(action_groups.tool_map, {})
+
     def test_roc_one_tool_user_input(self):
         user_action_group = ActionGroup(
             name=USER_INPUT_ACTION_GROUP_NAME,
@@ -0,0 +1,206 @@
+import unittest
+from typing import Dict, List, Optional
+from unittest import mock
+
+from InlineAgent.action_group import (
+    ActionGroup,
+    ActionGroups,
+    FunctionDecoder,
+    ParameterDecodeError,
+)
+from InlineAgent.agent import ProcessROC
+
+
+def book_table(
+    guests: int,
+    budget: float,
+    outdoor: bool,
+    dishes: List[str],
+    extras: Optional[Dict] = None,
+    note=None,
+) -> str:
+    """Book a table.
+
+    Args:
+        guests: Number of guests
+        budget: Budget per guest
+        outdoor: Whether to sit outside
+        dishes: Dishes to pre-order
+        extras: Extra requests
+        note: Free text note
+    """
+    return f"{guests} {budget} {outdoor} {dishes} {extras} {note}"
+
+
+def parameters(**values):
+    return [
+        {"name": name, "type": type_, "value": value}
+        for name, (type_, value) in values.items()
+    ]
+
+
+class TestFunctionDecoder(unittest.TestCase):
+
+    def test_from_callable(self):
+        decoder = FunctionDecoder.from_callable(book_table)
+
+        self.assertEqual(
+            decoder(
+                parameters(
+                    guests=("integer", "4"),
+                    budget=("number", "25"),
+                    outdoor=("boolean", "false"),
+                    dishes=("array", '["soup", "salad"]'),
+                    extras=("string", '{"cake": true}'),
+                    note=("string", "window seat"),
+                )
+            ),
+            {
+                "guests": 4,
+                "budget": 25.0,
+                "outdoor": False,
+                "dishes": ["soup", "salad"],
+                "extras": {"cake": True},
+                "note": "window seat",
+            },
+        )
+
+    def test_from_schema(self):
+        decoder = FunctionDecoder.from_schema(
+            {
+                "name": "search",
+                "parameters": {
+                    "limit": {"type": "number", "required": True},
+                    "exact": {"type": "boolean", "required": False},
+                    "filters": {"type": "object", "required": False},
+                },
+            }
+        )
+
+        self.assertEqual(
+            decoder(
+                parameters(
+                    limit=("string", "10"),
+                    exact=("string", "TRUE"),
+                    filters=("string", '{"lang": "en"}'),
+                )
+            ),
+            {"limit": 10, "exact": True, "filters": {"lang": "en"}},
+        )
+        self.assertEqual(decoder(parameters(limit=("number", "2.5"))), {"limit": 2.5})
+
+    def test_reported_types(self):
+        decoder = FunctionDecoder("unknown")
+
+        self.assertEqual(
+            decoder(
+                parameters(
+                    a=("integer", "3.0"),
+                    b=("boolean", "0"),
+                    c=("array", "[{name=Rome, country=Italy}]"),
+                    d=("custom", "kept"),
+                )
+            ),
+            {
+                "a": 3,
+                "b": False,
+                "c": [{"name": "Rome", "country": "Italy"}],
+                "d": "kept",
+            },
+        )
+
+    def test_errors(self):
+        decoder = FunctionDecoder.from_callable(book_table)
+
+        for name, value in [
+            ("guests", "four"),
+            ("guests", "2.5"),
+            ("budget", "cheap"),
+            ("outdoor", "maybe"),
+            ("dishes", '{"soup": 1}'),
+            ("extras", "[1]"),
+        ]:
+            with self.subTest(name=name, value=value):
+                with self.assertRaises(ParameterDecodeError) as context:
+                    decoder(parameters(**{name: ("string", value)}))
+                self.assertIn(f"'{name}' of book_table", str(context.exception))
+
+
+class TestActionGroupsDecoders(unittest.TestCase):
+
+    def test_decoders_by_function_name(self):
+        action_groups = ActionGroups(
+            action_groups=[
+                ActionGroup(name="Booking", tools=[book_table], argument_key="Args:")
+            ]
+        )
+
+        decoders = action_groups.decoders
+        self.assertEqual(list(decoders), ["book_table"])
+        self.assertIs(action_groups.decoders, decoders)
+
+        action_groups.action_groups = []
+        self.assertEqual(action_groups.decoders, {})
+
+
+class TestProcessROCDecoding(unittest.IsolatedAsyncioTestCase):
+
+    async def run_roc(self, values):
+        roc_event = {
+            "invocationId": "MOCKID",
+            "invocationInputs": [
+                {
+                    "functionInvocationInput": {
+                        "actionGroup": "Booking",
+                        "actionInvocationType": "RESULT",
+                        "agentId": "INLINE_AGENT",
+                        "function": "book_table",
+                        "parameters": parameters(**values),
+                    }
+                }
+            ],
+        }
+        with mock.patch("builtins.print"):
+            session_state = await ProcessROC.process_roc(
+                inlineSessionState=dict(),
+                roc_event=roc_event,
+                tool_map={"book_table": book_table},
+                decoders={"book_table": FunctionDecoder.from_callable(book_table)},
+            )
+        return session_state["returnControlInvocationResults"][0]["functionResult"]
+
+    async def test_decoded_arguments(self):
+        result = await self.run_roc(
+            {
+                "guests": ("integer", "2"),
+                "budget": ("number", "19.5"),
+                "outdoor": ("boolean", "false"),
+                "dishes": ("array", '["soup"]'),
+            }
+        )
+
+        self.assertEqual(
+            result["responseBody"]["TEXT"]["body"], "2 19.5 False ['soup'] None None"
+        )
+        self.assertNotIn("responseState", result)
+
+    async def test_invalid_argument_is_a_failure(self):
+        result = await self.run_roc(
+            {
+                "guests": ("integer", "a few"),
+                "budget": ("number", "19.5"),
+                "outdoor": ("boolean", "false"),
+                "dishes": ("array", '["soup"]'),
+            }
+        )
+
+        self.assertEqual(result["responseState"], "FAILURE")
+        self.assertEqual(
+            result["responseBody"]["TEXT"]["body"],
+            "Invalid value for parameter 'guests' of book_table: "
+            "expected an integer, got 'a few'",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
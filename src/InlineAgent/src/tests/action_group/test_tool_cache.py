@@ -0,0 +1,210 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from InlineAgent.action_group import ActionGroup, ActionGroups, ToolCache, cache_result
+from InlineAgent.agent import ProcessROC
+
+calls = []
+
+
+@cache_result
+def get_price(symbol: str) -> str:
+    """Get the price of a stock.
+
+    Args:
+        symbol: Ticker symbol
+    """
+    calls.append(symbol)
+    return f"{symbol} is 100"
+
+
+async def get_rate(currency: str) -> str:
+    """Get an exchange rate.
+
+    Args:
+        currency: Currency code
+    """
+    calls.append(currency)
+    await asyncio.sleep(0.05)
+    return f"{currency} is 1.1"
+
+
+def roc_event(function, values):
+    return {
+        "invocationId": "MOCKID",
+        "invocationInputs": [
+            {
+                "functionInvocationInput": {
+                    "actionGroup": "Market",
+                    "actionInvocationType": "RESULT",
+                    "agentId": "INLINE_AGENT",
+                    "function": function,
+                    "parameters": [
+                        {"name": name, "type": "string", "value": value}
+                        for name, value in parameters.items()
+                    ],
+                }
+            }
+            for parameters in values
+        ],
+    }
+
+
+class TestToolCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.runs = 0
+
+    async def tool_call(self, value="result", delay=0):
+        async def call():
+            self.runs += 1
+            await asyncio.sleep(delay)
+            return value
+
+        return call
+
+    async def test_hit_after_miss(self):
+        cache = ToolCache()
+
+        first = await cache.call("f", {"a": 1, "b": 2}, "S1", await self.tool_call())
+        second = await cache.call("f", {"b": 2, "a": 1}, "S1", await self.tool_call())
+
+        self.assertEqual(first, ("result", False))
+        self.assertEqual(second, ("result", True))
+        self.assertEqual((cache.hits, cache.misses, self.runs), (1, 1, 1))
+
+    async def test_scope(self):
+        session, shared = ToolCache(), ToolCache(scope="global")
+
+        for cache in (session, shared):
+            await cache.call("f", {}, "S1", await self.tool_call())
+            await cache.call("f", {}, "S2", await self.tool_call())
+
+        self.assertEqual(session.misses, 2)
+        self.assertEqual(shared.misses, 1)
+        self.assertEqual(shared.hits, 1)
+
+    async def test_ttl(self):
+        cache = ToolCache(ttl=0.05)
+
+        await cache.call("f", {}, None, await self.tool_call())
+        await asyncio.sleep(0.1)
+        _, cached = await cache.call("f", {}, None, await self.tool_call())
+
+        self.assertFalse(cached)
+        self.assertEqual(self.runs, 2)
+
+    async def test_lru_eviction(self):
+        cache = ToolCache(maxsize=2)
+
+        for value in ("a", "b", "a", "c"):
+            await cache.call("f", {"v": value}, None, await self.tool_call())
+        _, cached = await cache.call("f", {"v": "b"}, None, await self.tool_call())
+
+        self.assertEqual(len(cache), 2)
+        self.assertFalse(cached)
+
+    async def test_concurrent_calls_are_coalesced(self):
+        cache = ToolCache()
+
+        results = await asyncio.gather(
+            *[
+                cache.call("f", {}, None, await self.tool_call(delay=0.05))
+                for _ in range(5)
+            ]
+        )
+
+        self.assertEqual(self.runs, 1)
+        self.assertEqual([cached for _, cached in results].count(False), 1)
+        self.assertEqual((cache.hits, cache.misses), (4, 1))
+
+    async def test_failures_are_not_stored(self):
+        cache = ToolCache()
+
+        async def fail():
+            raise RuntimeError("unavailable")
+
+        with self.assertRaises(RuntimeError):
+            await cache.call("f", {}, None, fail)
+        self.assertEqual(len(cache), 0)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            ToolCache(maxsize=0)
+        with self.assertRaises(ValueError):
+            ToolCache(scope="process")
+
+
+class TestProcessROCCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        calls.clear()
+        get_price.__tool_cache__.clear()
+
+    async def run_roc(self, function, values, session_id="S1", **kwargs):
+        with mock.patch("builtins.print"):
+            session_state = await ProcessROC.process_roc(
+                inlineSessionState=dict(),
+                roc_event=roc_event(function, values),
+                tool_map={"get_price": get_price, "get_rate": get_rate},
+                session_id=session_id,
+                **kwargs,
+            )
+        return [
+            result["functionResult"]["responseBody"]["TEXT"]["body"]
+            for result in session_state["returnControlInvocationResults"]
+        ]
+
+    async def test_decorated_tool(self):
+        cache = get_price.__tool_cache__
+        hits = cache.hits
+
+        await self.run_roc("get_price", [{"symbol": "AMZN"}])
+        bodies = await self.run_roc(
+            "get_price", [{"symbol": "AMZN"}, {"symbol": "AAPL"}]
+        )
+        await self.run_roc("get_price", [{"symbol": "AMZN"}], session_id="S2")
+
+        self.assertEqual(bodies, ["AMZN is 100", "AAPL is 100"])
+        self.assertEqual(calls, ["AMZN", "AAPL", "AMZN"])
+        self.assertEqual(cache.hits - hits, 1)
+
+    async def test_action_group_cache(self):
+        cache = ToolCache(scope="global")
+        action_groups = ActionGroups(
+            action_groups=[
+                ActionGroup(
+                    name="Market",
+                    tools=[get_price, get_rate],
+                    argument_key="Args:",
+                    cache=cache,
+                )
+            ]
+        )
+        self.assertIs(action_groups.tool_caches["get_rate"], cache)
+        self.assertIs(
+            action_groups.tool_caches["get_price"], get_price.__tool_cache__
+        )
+
+        bodies = await self.run_roc(
+            "get_rate",
+            [{"currency": "EUR"}] * 3,
+            caches=action_groups.tool_caches,
+        )
+
+        self.assertEqual(bodies, ["EUR is 1.1"] * 3)
+        self.assertEqual(calls, ["EUR"])
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_cache_needs_client_side_tools(self):
+        with self.assertRaises(ValueError):
+            ActionGroup(
+                name="Market",
+                builtin_tools={"parentActionGroupSignature": "AMAZON.CodeInterpreter"},
+                cache=ToolCache(),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,197 @@
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+from InlineAgent.action_group import (
+    ActionGroup,
+    ActionGroups,
+    ToolExecution,
+    ToolPools,
+    execute_in,
+)
+from InlineAgent.agent import ProcessROC
+
+pools = ToolPools(max_thread_workers=4, max_process_workers=2)
+
+
+@execute_in("process", pools=pools)
+def optimize(size: int) -> str:
+    """Run a CPU-bound optimization.
+
+    Args:
+        size: Problem size
+    """
+    total = sum(i * i for i in range(int(size)))
+    return f"{os.getpid()} {total}"
+
+
+def thread_name(label: str) -> str:
+    """Name the thread the tool runs on.
+
+    Args:
+        label: Any label
+    """
+    return threading.current_thread().name
+
+
+running = []
+peak = []
+
+
+def busy(label: str) -> str:
+    """Keep a worker busy for a moment.
+
+    Args:
+        label: Any label
+    """
+    running.append(label)
+    peak.append(len(running))
+    time.sleep(0.05)
+    running.remove(label)
+    return label
+
+
+async def lookup(label: str) -> str:
+    """Look something up.
+
+    Args:
+        label: Any label
+    """
+    return label
+
+
+def roc_event(function, labels):
+    return {
+        "invocationId": "MOCKID",
+        "invocationInputs": [
+            {
+                "functionInvocationInput": {
+                    "actionGroup": "Compute",
+                    "actionInvocationType": "RESULT",
+                    "agentId": "INLINE_AGENT",
+                    "function": function,
+                    "parameters": [
+                        {"name": name, "type": "string", "value": value}
+                        for name, value in parameters.items()
+                    ],
+                }
+            }
+            for parameters in labels
+        ],
+    }
+
+
+class TestToolExecution(unittest.IsolatedAsyncioTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        pools.warm(process=True, thread=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        pools.shutdown()
+
+    def setUp(self):
+        running.clear()
+        peak.clear()
+
+    async def run_roc(self, function, labels, **kwargs):
+        tool_map = {
+            "optimize": optimize,
+            "thread_name": thread_name,
+            "busy": busy,
+            "lookup": lookup,
+        }
+        with mock.patch("builtins.print"):
+            session_state = await ProcessROC.process_roc(
+                inlineSessionState=dict(),
+                roc_event=roc_event(function, labels),
+                tool_map=tool_map,
+                **kwargs,
+            )
+        return [
+            result["functionResult"]["responseBody"]["TEXT"]["body"]
+            for result in session_state["returnControlInvocationResults"]
+        ]
+
+    async def test_process_mode(self):
+        bodies = await self.run_roc("optimize", [{"size": "1000"}] * 2)
+
+        for body in bodies:
+            pid, total = body.split()
+            self.assertNotEqual(int(pid), os.getpid())
+            self.assertEqual(int(total), sum(i * i for i in range(1000)))
+
+    async def test_modes(self):
+        for mode, expected in [
+            ("inline", threading.current_thread().name),
+            ("thread", "inline-agent-tool"),
+        ]:
+            with self.subTest(mode=mode):
+                bodies = await self.run_roc(
+                    "thread_name",
+                    [{"label": "x"}],
+                    executions={"thread_name": ToolExecution(mode, pools=pools)},
+                )
+                self.assertTrue(bodies[0].startswith(expected))
+
+    async def test_max_concurrency(self):
+        execution = ToolExecution("thread", max_concurrency=2, pools=pools)
+
+        bodies = await self.run_roc(
+            "busy",
+            [{"label": str(i)} for i in range(6)],
+            executions={"busy": execution},
+        )
+
+        self.assertEqual(bodies, [str(i) for i in range(6)])
+        self.assertEqual(max(peak), 2)
+
+    def test_action_group_executions(self):
+        execution = ToolExecution("thread", max_concurrency=4)
+        action_groups = ActionGroups(
+            action_groups=[
+                ActionGroup(
+                    name="Compute",
+                    tools=[optimize, busy],
+                    argument_key="Args:",
+                    execution=execution,
+                )
+            ]
+        )
+
+        self.assertIs(action_groups.tool_executions["busy"], execution)
+        self.assertIs(
+            action_groups.tool_executions["optimize"], optimize.__tool_execution__
+        )
+
+    def test_check(self):
+        with self.assertRaisesRegex(ValueError, "coroutine"):
+            ToolExecution("thread").check(lookup)
+        with self.assertRaisesRegex(ValueError, "pickle"):
+            ToolExecution("process").check(lambda label: label)
+        ToolExecution("inline").check(lookup)
+
+        with self.assertRaises(ValueError):
+            ActionGroups(
+                action_groups=[
+                    ActionGroup(
+                        name="Compute",
+                        tools=[lookup],
+                        argument_key="Args:",
+                        execution=ToolExecution("process"),
+                    )
+                ]
+            ).tool_executions
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            ToolExecution("fiber")
+        with self.assertRaises(ValueError):
+            ToolExecution(max_concurrency=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
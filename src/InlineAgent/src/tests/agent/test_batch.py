@@ -0,0 +1,190 @@
+import asyncio
+import importlib.util
+import json
+import os
+import tempfile
+import time
+import unittest
+
+from InlineAgent.agent import InlineAgent
+from InlineAgent.agent.batch import ParquetResultWriter
+from InlineAgent.output import NullSink
+from InlineAgent.testing import FakeRuntimeClient, answer_turn
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+def echo(request):
+    if request["inputText"].startswith("fail"):
+        return [RuntimeError("service unavailable")]
+    return answer_turn(f"Echo: {request['inputText']}")
+
+
+class TestInvokeMany(unittest.IsolatedAsyncioTestCase):
+
+    def agent(self, script=echo, latency=0.0):
+        self.client = FakeRuntimeClient(script=script, latency=latency)
+        return InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You are a friendly assistant.",
+            agent_name="MockAgent",
+            runtime_client=self.client,
+            sink=NullSink(),
+        )
+
+    async def collect(self, agent, inputs, **kwargs):
+        return [result async for result in agent.invoke_many(inputs, **kwargs)]
+
+    async def test_results_and_stats(self):
+        results = await self.collect(
+            self.agent(),
+            ["hi", {"id": "greeting", "input_text": "hello", "session_id": "S1"}],
+        )
+
+        by_id = {result.id: result for result in results}
+        self.assertEqual(set(by_id), {"0", "greeting"})
+        self.assertEqual(by_id["0"].output, "Echo: hi")
+        self.assertEqual(by_id["greeting"].session_id, "S1")
+        self.assertEqual(
+            (by_id["0"].input_tokens, by_id["0"].output_tokens), (100, 20)
+        )
+        self.assertEqual(by_id["0"].llm_calls, 1)
+        self.assertGreater(by_id["0"].latency, 0)
+        self.assertIsNone(by_id["0"].error)
+
+    async def test_bounded_concurrency(self):
+        agent = self.agent(latency=0.1)
+
+        start = time.perf_counter()
+        results = await self.collect(agent, ["x"] * 8, max_concurrency=4)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(results), 8)
+        self.assertGreaterEqual(elapsed, 0.2)
+        self.assertLess(elapsed, 0.6)
+
+    async def test_rate(self):
+        start = time.perf_counter()
+        await self.collect(self.agent(), ["x"] * 5, rate=20)
+
+        self.assertGreaterEqual(time.perf_counter() - start, 0.19)
+
+    async def test_failures_do_not_stop_the_batch(self):
+        results = await self.collect(self.agent(), ["hi", "fail now", "bye"])
+
+        errors = {result.id: result.error for result in results}
+        self.assertEqual(errors["1"], "RuntimeError: service unavailable")
+        self.assertIsNone(errors["0"])
+        self.assertIsNone(errors["2"])
+
+    async def test_jsonl_output_and_resume(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.jsonl")
+            inputs = ["one", "fail two", "three"]
+
+            await self.collect(self.agent(), inputs, output=path)
+            with open(path) as file:
+                rows = [json.loads(line) for line in file]
+            self.assertEqual(sorted(row["id"] for row in rows), ["0", "1", "2"])
+
+            agent = self.agent(script=lambda request: answer_turn("retried"))
+            results = await self.collect(agent, inputs, output=path, resume=True)
+
+            self.assertEqual([result.id for result in results], ["1"])
+            self.assertEqual(len(self.client.requests), 1)
+            with open(path) as file:
+                rows = [json.loads(line) for line in file]
+            self.assertEqual(len(rows), 4)
+            self.assertEqual(rows[-1]["output"], "retried")
+
+            await self.collect(self.agent(), ["four"], output=path)
+            with open(path) as file:
+                self.assertEqual(len(file.readlines()), 1)
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+    async def test_parquet_output_and_resume(self):
+        import pyarrow.parquet as pq
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.parquet")
+
+            await self.collect(self.agent(), ["one", "fail two"], output=path)
+            await self.collect(
+                self.agent(script=lambda request: answer_turn("retried")),
+                ["one", "fail two"],
+                output=path,
+                resume=True,
+            )
+
+            rows = pq.read_table(path).to_pylist()
+            self.assertEqual(sorted(row["id"] for row in rows), ["0", "1", "1"])
+            self.assertEqual(rows[-1]["output"], "retried")
+
+    @unittest.skipIf(HAS_PYARROW, "pyarrow is installed")
+    def test_parquet_needs_pyarrow(self):
+        with self.assertRaisesRegex(ImportError, "pip install pyarrow"):
+            ParquetResultWriter("results.parquet")
+
+    async def test_invalid_prompts_are_rejected_before_dispatch(self):
+        agent = self.agent()
+
+        with self.assertRaisesRegex(ValueError, "prompt 1"):
+            await self.collect(agent, ["hi", {"id": "no-text"}])
+        self.assertEqual(len(self.client.requests), 0)
+
+    async def test_single_string_is_rejected(self):
+        agent = self.agent()
+
+        for inputs in ("hello", b"hello"):
+            with self.subTest(inputs=inputs):
+                with self.assertRaisesRegex(ValueError, "not a single"):
+                    await self.collect(agent, inputs)
+        self.assertEqual(len(self.client.requests), 0)
+
+    async def test_closing_early_stops_workers_before_the_writer(self):
+        agent = self.agent(latency=0.2)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.jsonl")
+            results = agent.invoke_many(
+                [f"prompt {n}" for n in range(10)], max_concurrency=2, output=path
+            )
+            await anext(results)
+            await results.aclose()
+
+            self.assertEqual(asyncio.all_tasks() - {asyncio.current_task()}, set())
+            with open(path) as file:
+                self.assertEqual(len(file.readlines()), 1)
+
+    async def test_invalid_lazy_prompt_cancels_workers(self):
+        def prompts():
+            yield "one"
+            yield "two"
+            yield {"id": "no-text"}
+
+        agent = self.agent(latency=0.3)
+        results = []
+
+        start = time.perf_counter()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "results.jsonl")
+            with self.assertRaisesRegex(ValueError, "prompt 2"):
+                async for result in agent.invoke_many(
+                    prompts(), max_concurrency=3, output=path
+                ):
+                    results.append(result)
+            self.assertFalse(os.path.exists(path))
+
+        self.assertLess(time.perf_counter() - start, 0.25)
+        self.assertEqual(results, [])
+        self.assertEqual(asyncio.all_tasks() - {asyncio.current_task()}, set())
+
+    async def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            await self.collect(self.agent(), ["x"], max_concurrency=0)
+        with self.assertRaises(ValueError):
+            await self.collect(self.agent(), ["x"], rate=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
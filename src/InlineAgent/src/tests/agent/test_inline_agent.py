@@ -584,6 +584,42 @@ class TestInlineAgent(unittest.TestCase):
 
         self.assertEqual(agent.action_groups, data_test___init___8)
 
+    def test_get_invoke_params_cached(self):
+        collaborator = InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You are a weather assistant.",
+            agent_name="WeatherAgent",
+        )
+        agent = InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You are a supervisor.",
+            agent_name="MockAgent",
+            agent_collaboration="SUPERVISOR",
+            collaborators=[collaborator],
+        )
+
+        invoke_params = agent.get_invoke_params()
+        self.assertIs(agent.get_invoke_params(), invoke_params)
+        with self.assertRaises(TypeError):
+            invoke_params["instruction"] = "Changed"
+
+        agent.instruction = "You are a new supervisor."
+        self.assertEqual(
+            agent.get_invoke_params()["instruction"], "You are a new supervisor."
+        )
+
+        collaborator.instruction = "You are a new weather assistant."
+        self.assertEqual(
+            agent.get_invoke_params()["collaborators"][0]["instruction"],
+            "You are a new weather assistant.",
+        )
+
+        invoke_params = agent.get_invoke_params()
+        agent.guardrail_configuration["guardrailIdentifier"] = "MOCK_GUARDRAIL"
+        agent.invalidate_invoke_params()
+        self.assertIsNot(agent.get_invoke_params(), invoke_params)
+        self.assertIn("guardrailConfiguration", agent.get_invoke_params())
+
 
 if __name__ == "__main__":
     unittest.main()
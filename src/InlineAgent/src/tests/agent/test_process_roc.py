@@ -3,6 +3,7 @@ import json
 import unittest
 from unittest import mock
 import asyncio
+import time
 from InlineAgent.agent import ProcessROC
 from InlineAgent.agent.confirmation import require_confirmation
 
@@ -470,5 +471,84 @@ class TestProcessROC(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(functionResult, output_invoke_roc_function_without_confirm)
 
 
+async def slow_lookup(delay: str):
+    await asyncio.sleep(float(delay))
+    return f"slept {delay}"
+
+
+def blocking_lookup(delay: str):
+    time.sleep(float(delay))
+    return f"slept {delay}"
+
+
+def roc_event_for(function: str, delays):
+    return {
+        "invocationId": "MOCKID",
+        "invocationInputs": [
+            {
+                "functionInvocationInput": {
+                    "actionGroup": "LookupActionGroup",
+                    "actionInvocationType": "RESULT",
+                    "agentId": "INLINE_AGENT",
+                    "function": function,
+                    "parameters": [
+                        {"name": "delay", "type": "string", "value": delay}
+                    ],
+                }
+            }
+            for delay in delays
+        ],
+    }
+
+
+class TestProcessROCConcurrency(unittest.IsolatedAsyncioTestCase):
+
+    async def run_roc(self, function, delays, **kwargs):
+        tool_map = {"slow_lookup": slow_lookup, "blocking_lookup": blocking_lookup}
+        start = time.perf_counter()
+        with mock.patch("builtins.print"):
+            session_state = await ProcessROC.process_roc(
+                inlineSessionState=dict(),
+                roc_event=roc_event_for(function, delays),
+                tool_map=tool_map,
+                **kwargs,
+            )
+        return session_state["returnControlInvocationResults"], (
+            time.perf_counter() - start
+        )
+
+    async def test_async_tools_run_concurrently_in_order(self):
+        results, elapsed = await self.run_roc("slow_lookup", ["0.3", "0.1", "0.2"])
+
+        self.assertLess(elapsed, 0.5)
+        self.assertEqual(
+            [
+                result["functionResult"]["responseBody"]["TEXT"]["body"]
+                for result in results
+            ],
+            ["slept 0.3", "slept 0.1", "slept 0.2"],
+        )
+
+    async def test_sync_tools_run_on_executor(self):
+        results, elapsed = await self.run_roc("blocking_lookup", ["0.2"] * 4)
+
+        self.assertLess(elapsed, 0.6)
+        self.assertEqual(len(results), 4)
+
+    async def test_max_concurrency(self):
+        _, elapsed = await self.run_roc("slow_lookup", ["0.1"] * 4, max_concurrency=2)
+
+        self.assertGreaterEqual(elapsed, 0.2)
+
+    async def test_tool_timeout(self):
+        results, elapsed = await self.run_roc(
+            "slow_lookup", ["5", "0"], tool_timeout=0.1
+        )
+
+        self.assertLess(elapsed, 1)
+        self.assertEqual(results[0]["functionResult"]["responseState"], "FAILURE")
+        self.assertNotIn("responseState", results[1]["functionResult"])
+
+
 if __name__ == "__main__":
     unittest.main()
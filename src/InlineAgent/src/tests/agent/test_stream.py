@@ -0,0 +1,164 @@
+import unittest
+from unittest import mock
+
+from InlineAgent.action_group import ActionGroup
+from InlineAgent.agent import InlineAgent
+from InlineAgent.types import (
+    CitationEvent,
+    ReturnControlEvent,
+    TextChunkEvent,
+    TraceEvent,
+    UsageEvent,
+)
+
+
+def get_current_weather(location: str) -> str:
+    """Get the current weather in a given location.
+
+    Args:
+        location: The city, e.g., San Francisco
+    """
+    return f"Weather in {location} is 70fahrenheit and clear skies."
+
+
+trace_event = {
+    "trace": {
+        "sessionId": "MOCKSESSION",
+        "trace": {
+            "orchestrationTrace": {
+                "modelInvocationOutput": {
+                    "traceId": "MOCKTRACE",
+                    "metadata": {"usage": {"inputTokens": 100, "outputTokens": 20}},
+                }
+            }
+        },
+    }
+}
+
+roc_event = {
+    "returnControl": {
+        "invocationId": "MOCKID",
+        "invocationInputs": [
+            {
+                "functionInvocationInput": {
+                    "actionGroup": "WeatherActionGroup",
+                    "actionInvocationType": "RESULT",
+                    "agentId": "INLINE_AGENT",
+                    "function": "get_current_weather",
+                    "parameters": [
+                        {"name": "location", "type": "string", "value": "Seattle"}
+                    ],
+                }
+            }
+        ],
+    }
+}
+
+citation_event = {
+    "chunk": {
+        "bytes": b"Seattle is sunny.",
+        "attribution": {"citations": [{"generatedResponsePart": {}}]},
+    }
+}
+
+
+class ScriptedRuntimeClient:
+    def __init__(self, turns):
+        self.turns = list(turns)
+        self.requests = []
+
+    def invoke_inline_agent(self, **kwargs):
+        self.requests.append(kwargs)
+        return {
+            "completion": iter(self.turns.pop(0)),
+            "ResponseMetadata": {"RequestId": "MOCKID", "RetryAttempts": 0},
+        }
+
+
+class TestInlineAgentStream(unittest.IsolatedAsyncioTestCase):
+
+    def create_agent(self, runtime_client):
+        return InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You are a friendly assistant.",
+            agent_name="MockAgent",
+            action_groups=[
+                ActionGroup(
+                    name="WeatherActionGroup",
+                    tools=[get_current_weather],
+                    argument_key="Args:",
+                    test=True,
+                )
+            ],
+            runtime_client=runtime_client,
+        )
+
+    async def test_stream_events(self):
+        runtime_client = ScriptedRuntimeClient(
+            turns=[
+                [trace_event, roc_event],
+                [
+                    trace_event,
+                    {"chunk": {"bytes": b"Seattle "}},
+                    {"chunk": {"bytes": b"is sunny."}},
+                ],
+            ]
+        )
+        agent = self.create_agent(runtime_client)
+
+        with mock.patch("builtins.print"):
+            events = [
+                event
+                async for event in agent.stream(input_text="Weather?", session_id="S1")
+            ]
+
+        self.assertEqual(
+            [type(event) for event in events],
+            [
+                TraceEvent,
+                ReturnControlEvent,
+                TraceEvent,
+                TextChunkEvent,
+                TextChunkEvent,
+                UsageEvent,
+            ],
+        )
+        self.assertEqual(
+            "".join(
+                event.text for event in events if isinstance(event, TextChunkEvent)
+            ),
+            "Seattle is sunny.",
+        )
+        self.assertEqual(events[-1].input_tokens, 200)
+        self.assertEqual(events[-1].output_tokens, 40)
+        self.assertEqual(events[-1].llm_calls, 2)
+        self.assertEqual(events[-1].session_id, "S1")
+
+        self.assertEqual(len(runtime_client.requests), 2)
+        self.assertNotIn("inlineSessionState", runtime_client.requests[0])
+        self.assertEqual(
+            runtime_client.requests[1]["inlineSessionState"]["invocationId"],
+            "MOCKID",
+        )
+
+    async def test_stream_citation(self):
+        agent = self.create_agent(ScriptedRuntimeClient(turns=[[citation_event]]))
+
+        events = [event async for event in agent.stream(input_text="Weather?")]
+
+        self.assertIsInstance(events[0], CitationEvent)
+        self.assertEqual(events[1], TextChunkEvent(text="Seattle is sunny."))
+
+    async def test_invoke_returns_answer(self):
+        agent = self.create_agent(
+            ScriptedRuntimeClient(turns=[[{"chunk": {"bytes": b"Hello"}}]])
+        )
+
+        with mock.patch("builtins.print"):
+            answer = await agent.invoke(input_text="Hi")
+
+        self.assertEqual(answer, "Hello")
+
+
+if __name__ == "__main__":
+    unittest.main()
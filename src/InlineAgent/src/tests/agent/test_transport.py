@@ -0,0 +1,75 @@
+import asyncio
+import time
+import unittest
+from contextlib import aclosing
+from unittest import mock
+
+from InlineAgent.agent import InlineAgent
+from InlineAgent.agent.transport import AsyncTransport
+
+
+class BlockingRuntimeClient:
+    """Stand-in for bedrock-agent-runtime that blocks like boto3 does."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def invoke_inline_agent(self, **kwargs):
+        time.sleep(self.latency)
+
+        def completion():
+            time.sleep(self.latency)
+            yield {"chunk": {"bytes": b"Hello"}}
+
+        return {
+            "completion": completion(),
+            "ResponseMetadata": {"RequestId": "MOCKID", "RetryAttempts": 0},
+        }
+
+
+class TestAsyncTransport(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.transport = AsyncTransport(max_workers=32)
+
+    async def asyncTearDown(self):
+        self.transport.shutdown()
+
+    async def test_iterate(self):
+        events = [event async for event in self.transport.iterate([1, 2, 3])]
+        self.assertEqual(events, [1, 2, 3])
+
+    async def test_iterate_closes_stream(self):
+        event_stream = mock.MagicMock()
+        event_stream.__iter__.return_value = iter([1, 2, 3])
+
+        async with aclosing(self.transport.iterate(event_stream)) as events:
+            async for _ in events:
+                break
+
+        event_stream.close.assert_called_once()
+
+    async def test_invoke_does_not_block_loop(self):
+        latency = 0.2
+        agent = InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You are a friendly assistant.",
+            agent_name="MockAgent",
+            runtime_client=BlockingRuntimeClient(latency=latency),
+            transport=self.transport,
+        )
+
+        start = time.perf_counter()
+        with mock.patch("builtins.print"):
+            answers = await asyncio.gather(
+                *[agent.invoke(input_text="Hi") for _ in range(16)]
+            )
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(answers, ["Hello"] * 16)
+        # Sequential execution would take 16 * 2 * latency.
+        self.assertLess(elapsed, 4 * latency)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from InlineAgent.observability import observe
+from InlineAgent.observability.agent_instrument import ObservedInvocation
+
+guardrail_event = {
+    "trace": {
+        "sessionId": "S1",
+        "callerChain": [
+            {"agentAliasArn": "arn:aws:bedrock:agent:agent-alias/AGENT/ALIAS"}
+        ],
+        "trace": {
+            "guardrailTrace": {
+                "action": "NONE",
+                "inputAssessments": [{}],
+            }
+        },
+    }
+}
+
+
+def completion(latency: float = 0.0, guardrail: bool = False):
+    if guardrail:
+        yield guardrail_event
+    time.sleep(latency)
+    yield {"chunk": {"bytes": b"Hello"}}
+
+
+class TestObserve(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.invocations = []
+        original_finish = ObservedInvocation.finish
+
+        def record(invocation):
+            self.invocations.append(invocation)
+            return original_finish(invocation)
+
+        patcher = mock.patch.object(
+            ObservedInvocation, "finish", autospec=True, side_effect=record
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        print_patcher = mock.patch("builtins.print")
+        print_patcher.start()
+        self.addCleanup(print_patcher.stop)
+
+    def test_sync_state_is_per_invocation(self):
+        @observe(show_traces=False)
+        def invoke(inputText: str, sessionId: str, **kwargs):
+            return {"completion": completion(guardrail=kwargs["guardrail"])}
+
+        self.assertEqual(
+            invoke(
+                inputText="Hi",
+                sessionId="S1",
+                agentId="AGENT",
+                agentAliasId="ALIAS",
+                guardrail=True,
+            ),
+            "Hello",
+        )
+        invoke(
+            inputText="Hi",
+            sessionId="S2",
+            agentId="AGENT",
+            agentAliasId="ALIAS",
+            guardrail=False,
+        )
+
+        self.assertTrue(self.invocations[0].is_guardrail)
+        self.assertFalse(self.invocations[1].is_guardrail)
+
+    async def test_async_invocations_run_concurrently(self):
+        @observe(show_traces=False)
+        async def invoke(inputText: str, sessionId: str, **kwargs):
+            return {"completion": completion(latency=0.2)}
+
+        start = time.perf_counter()
+        answers = await asyncio.gather(
+            *[invoke(inputText="Hi", sessionId=f"S{n}") for n in range(10)]
+        )
+
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(answers, ["Hello"] * 10)
+        self.assertEqual(len({id(invocation) for invocation in self.invocations}), 10)
+
+    async def test_async_event_stream(self):
+        async def events():
+            yield {"chunk": {"bytes": b"Hello"}}
+
+        @observe(show_traces=False)
+        async def invoke(inputText: str, sessionId: str, **kwargs):
+            return {"completion": events()}
+
+        self.assertEqual(await invoke(inputText="Hi", sessionId="S1"), "Hello")
+
+
+if __name__ == "__main__":
+    unittest.main()
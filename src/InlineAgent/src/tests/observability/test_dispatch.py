@@ -0,0 +1,96 @@
+import unittest
+from unittest import mock
+
+from InlineAgent.observability import MetricsTraceHandler, Trace, TraceDispatcher
+from InlineAgent.observability.dispatch import TraceHandler, trace_route
+from InlineAgent.testing import action_group_invocation, model_invocation
+
+
+class RecordingHandler(TraceHandler):
+    def __init__(self, *routes):
+        self.calls = []
+        self._routes = routes
+
+    def routes(self):
+        return {route: self.record for route in self._routes}
+
+    def record(self, trace_data, body, **context):
+        self.calls.append((trace_route(trace_data["trace"]), body, context))
+
+
+class TestTraceDispatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.events = [
+            event["trace"]
+            for event in model_invocation("T-0", "prompt", "Calling a tool.", 100, 20)
+            + action_group_invocation(
+                "T-0", "Weather", "get_forecast", {"city": "Seattle"}, output="Sunny."
+            )
+        ]
+
+    def test_trace_route(self):
+        self.assertEqual(
+            [trace_route(event["trace"]) for event in self.events],
+            [
+                ("orchestrationTrace", "modelInvocationInput"),
+                ("orchestrationTrace", "modelInvocationOutput"),
+                ("orchestrationTrace", "invocationInput"),
+                ("orchestrationTrace", "observation"),
+            ],
+        )
+        self.assertEqual(
+            trace_route({"guardrailTrace": {"action": "NONE"}}),
+            ("guardrailTrace", None),
+        )
+        self.assertIsNone(trace_route({"SDK_UNKNOWN_MEMBER": {"name": "New"}}))
+
+    def test_dispatch_calls_only_the_matching_route(self):
+        handler = RecordingHandler(
+            ("orchestrationTrace", "observation"), ("failureTrace", None)
+        )
+        dispatcher = TraceDispatcher([handler])
+
+        usages = [
+            dispatcher.dispatch(event, span_manager="SM") for event in self.events
+        ]
+
+        self.assertEqual(usages, [(0, 0, 0), (100, 20, 1), (0, 0, 0), (0, 0, 0)])
+        self.assertEqual(len(handler.calls), 1)
+        route, body, context = handler.calls[0]
+        self.assertEqual(route, ("orchestrationTrace", "observation"))
+        self.assertIn("observation", body)
+        self.assertEqual(context, {"span_manager": "SM"})
+
+    def test_metrics_handler(self):
+        metrics = MetricsTraceHandler()
+        dispatcher = TraceDispatcher([RecordingHandler()])
+        dispatcher.add_handler(metrics)
+
+        for event in self.events + self.events:
+            dispatcher.dispatch(event)
+
+        self.assertEqual(
+            (metrics.input_tokens, metrics.output_tokens, metrics.llm_calls),
+            (200, 40, 2),
+        )
+        self.assertEqual(metrics.events[("orchestrationTrace", "invocationInput")], 2)
+        self.assertEqual(sum(metrics.events.values()), 8)
+
+    def test_parse_trace_prints_each_step_once(self):
+        with mock.patch("builtins.print") as printed:
+            usages = [
+                Trace.parse_trace(trace=event["trace"])
+                for event in self.events
+            ]
+
+        self.assertEqual(usages, [Trace.parse_usage(e["trace"]) for e in self.events])
+        lines = [str(call.args[0]) for call in printed.call_args_list]
+        self.assertEqual(len(lines), 3)
+        self.assertIn("Input Tokens: 100 Output Tokens: 20", lines[0])
+        self.assertIn("Tool use: get_forecast", lines[1])
+        self.assertIn("Tool use output: Sunny.", lines[2])
+
+
+if __name__ == "__main__":
+    unittest.main()
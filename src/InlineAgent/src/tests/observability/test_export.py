@@ -0,0 +1,122 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+from InlineAgent.observability import ObservabilityConfig, create_tracer_provider
+from InlineAgent.observability.export import BoundedBatchSpanProcessor
+from InlineAgent.observability.metrics import AgentMetrics, PrometheusMetricReader
+from InlineAgent.observability.sampling import TailRetentionSpanProcessor
+
+
+class BlockingExporter(SpanExporter):
+    """Holds its first export until ``release`` is set."""
+
+    def __init__(self):
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        self.names = list()
+
+    def export(self, spans):
+        self.entered.set()
+        self.release.wait(timeout=5)
+        self.names.extend(span.name for span in spans)
+        return SpanExportResult.SUCCESS
+
+
+class TestSpanExport(unittest.TestCase):
+
+    def setUp(self):
+        self.reader = PrometheusMetricReader()
+        meter_provider = MeterProvider(metric_readers=[self.reader])
+        self.addCleanup(meter_provider.shutdown)
+        patcher = mock.patch.object(
+            AgentMetrics,
+            "_default",
+            AgentMetrics(meter=meter_provider.get_meter("test")),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_burst(self, drop_policy):
+        exporter = BlockingExporter()
+        processor = BoundedBatchSpanProcessor(
+            exporter,
+            name="slow",
+            max_queue_size=2,
+            max_export_batch_size=2,
+            schedule_delay_millis=60000,
+            drop_policy=drop_policy,
+        )
+        provider = TracerProvider()
+        provider.add_span_processor(processor)
+        tracer = provider.get_tracer("test")
+
+        for name in ("a", "b"):
+            tracer.start_span(name).end()
+        self.assertTrue(exporter.entered.wait(timeout=5))
+        for name in ("c", "d", "e"):
+            tracer.start_span(name).end()
+
+        exporter.release.set()
+        provider.shutdown()
+        return exporter, processor
+
+    def test_drop_policies(self):
+        exporter, processor = self.run_burst("drop_newest")
+        self.assertEqual(sorted(exporter.names), ["a", "b", "c", "d"])
+        self.assertEqual((processor.exported, processor.dropped), (4, 1))
+
+        exporter, processor = self.run_burst("drop_oldest")
+        self.assertEqual(sorted(exporter.names), ["a", "b", "d", "e"])
+
+        text = self.reader.render()
+        self.assertIn(
+            'bedrock_agent_spans_dropped_total{exporter="slow",reason="queue_full"} 2',
+            text,
+        )
+        self.assertIn('bedrock_agent_spans_exported_total{exporter="slow"} 8', text)
+
+    def test_batch_size_follows_a_smaller_queue(self):
+        config = ObservabilityConfig(SPAN_EXPORT_MAX_QUEUE_SIZE=100)
+
+        processor = BoundedBatchSpanProcessor.from_config(
+            BlockingExporter(), name="small", config=config
+        )
+        self.addCleanup(processor.shutdown)
+
+        self.assertEqual(processor.max_queue_size, 100)
+        self.assertEqual(processor.max_export_batch_size, 100)
+
+    def test_tracer_provider_fans_out_to_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "spans", "spans.jsonl")
+            config = ObservabilityConfig(
+                PRODUCE_BEDROCK_OTEL_TRACES=True,
+                SPAN_EXPORT_FILE=path,
+                SPAN_EXPORT_SCHEDULE_DELAY_MILLIS=10,
+                TRACE_TAIL_RETENTION=True,
+            )
+            with mock.patch("opentelemetry.trace.set_tracer_provider"):
+                provider = create_tracer_provider(config)
+
+            processors = provider._active_span_processor._span_processors
+            self.assertEqual(len(processors), 1)
+            self.assertIsInstance(processors[0], TailRetentionSpanProcessor)
+
+            provider.get_tracer("test").start_span("Agent").end()
+            provider.shutdown()
+
+            with open(path) as file:
+                spans = [json.loads(line) for line in file]
+        self.assertEqual([span["name"] for span in spans], ["Agent"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+import urllib.request
+from unittest import mock
+
+from opentelemetry.sdk.metrics import MeterProvider
+
+from InlineAgent.action_group import ActionGroup, ToolCache
+from InlineAgent.agent import InlineAgent
+from InlineAgent.observability.metrics import AgentMetrics, PrometheusMetricReader
+from InlineAgent.output import NullSink
+from InlineAgent.testing import FakeRuntimeClient, answer_turn, tool_turn
+
+
+def get_forecast(city: str) -> str:
+    """Get the weather forecast for a city.
+
+    Args:
+        city: The city, e.g., Seattle
+    """
+    return f"{city} is sunny."
+
+
+class TestAgentMetrics(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.reader = PrometheusMetricReader()
+        provider = MeterProvider(metric_readers=[self.reader])
+        self.addCleanup(provider.shutdown)
+        patcher = mock.patch.object(
+            AgentMetrics, "_default", AgentMetrics(meter=provider.get_meter("test"))
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def invoke(self, cache=None):
+        agent = InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You are a friendly assistant.",
+            agent_name="MockAgent",
+            action_groups=[
+                ActionGroup(
+                    name="WeatherActionGroup",
+                    tools=[get_forecast],
+                    argument_key="Args:",
+                    cache=cache,
+                )
+            ],
+            runtime_client=FakeRuntimeClient(
+                script=[
+                    tool_turn(("WeatherActionGroup", "get_forecast", {"city": "Rome"})),
+                    answer_turn("Rome is sunny today.", trace_id="T-1"),
+                ]
+            ),
+            sink=NullSink(),
+        )
+        return await agent.invoke(input_text="Hi")
+
+    async def test_turn_metrics(self):
+        await self.invoke()
+        text = self.reader.render()
+        labels = 'agent="MockAgent",model="MOCK_ID"'
+
+        self.assertIn("# TYPE bedrock_agent_turn_duration_seconds histogram", text)
+        self.assertIn(
+            f'bedrock_agent_turn_duration_seconds_bucket{{{labels},le="+Inf"}} 1',
+            text,
+        )
+        self.assertIn(
+            f"bedrock_agent_time_to_first_chunk_seconds_count{{{labels}}} 1", text
+        )
+        self.assertIn(f"bedrock_agent_input_tokens_total{{{labels}}} 200", text)
+        self.assertIn(f"bedrock_agent_output_tokens_total{{{labels}}} 40", text)
+        self.assertIn(f"bedrock_agent_llm_calls_total{{{labels}}} 2", text)
+        self.assertIn(
+            f'bedrock_agent_step_duration_seconds_count{{{labels},step="model"}} 2',
+            text,
+        )
+        self.assertIn(
+            f"bedrock_agent_tool_duration_seconds_count{{{labels},"
+            'tool="get_forecast",outcome="success"} 1',
+            text,
+        )
+
+    async def test_tool_cache_metrics(self):
+        await self.invoke(cache=ToolCache())
+
+        self.assertIn(
+            'bedrock_agent_tool_cache_total{agent="MockAgent",model="MOCK_ID",'
+            'tool="get_forecast",result="miss"} 1',
+            self.reader.render(),
+        )
+
+    async def test_prometheus_endpoint(self):
+        await self.invoke()
+        server = self.reader.serve(port=0, host="127.0.0.1")
+        self.addCleanup(self.reader.shutdown)
+        url = f"http://127.0.0.1:{server.server_port}"
+
+        with urllib.request.urlopen(f"{url}/metrics") as response:
+            self.assertTrue(response.headers["Content-Type"].startswith("text/plain"))
+            body = response.read().decode("utf-8")
+        self.assertIn("bedrock_agent_llm_calls_total", body)
+
+        with self.assertRaises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"{url}/other")
+
+    def test_label_escaping(self):
+        self.assertEqual(PrometheusMetricReader.labels({}), "")
+        self.assertEqual(
+            PrometheusMetricReader.labels({"a.b": 'say "hi"\n'}),
+            '{a_b="say \\"hi\\"\\n"}',
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
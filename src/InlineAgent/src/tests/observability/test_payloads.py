@@ -0,0 +1,172 @@
+import json
+import queue
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from openinference.semconv.trace import SpanAttributes as OtelSpanAttributes
+
+from InlineAgent.observability import agent_instrument, observe, process
+from InlineAgent.observability import span_manager as span_manager_module
+from InlineAgent.observability.payloads import BlobStore, PayloadBudget
+from InlineAgent.observability.utils import json_safe, model_name
+from InlineAgent.testing import FakeRuntimeClient, answer_turn, model_invocation
+
+
+class LazyList(list):
+    """A list whose items come from an iterator, to see how far it is read."""
+
+    def __init__(self, items):
+        super().__init__([None])
+        self.items = items
+
+    def __iter__(self):
+        return self.items
+
+
+class TestPayloadBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def test_blob_store_is_content_addressed(self):
+        store = BlobStore(self.directory.name)
+
+        digest = store.put(b"payload")
+
+        self.assertEqual(store.put(b"payload"), digest)
+        self.assertEqual(store.get(digest), b"payload")
+        self.assertTrue(store.path(digest).endswith(f"{digest[:2]}/{digest}"))
+
+    def test_blob_store_writes_in_background(self):
+        store = BlobStore(self.directory.name)
+        writers = []
+        write = store._write
+
+        def record_thread(digest, data):
+            writers.append(threading.current_thread().name)
+            write(digest, data)
+
+        with mock.patch.object(store, "_write", record_thread):
+            digest = store.put(b"payload")
+            store.put(b"payload")
+            store.flush()
+
+        self.assertEqual(writers, ["InlineAgent-blob-writer"])
+        self.assertEqual(store.get(digest), b"payload")
+
+    def test_blob_store_drops_when_full(self):
+        store = BlobStore(self.directory.name)
+        with mock.patch.object(store._queue, "put_nowait", side_effect=queue.Full):
+            store.put(b"payload")
+
+        self.assertEqual(store.dropped, 1)
+        self.assertEqual(store._written, set())
+
+    def test_bound(self):
+        text = "x" * 100
+        self.assertEqual(PayloadBudget().bound(text), text)
+        self.assertEqual(PayloadBudget(max_chars=100).bound(text), text)
+
+        store = BlobStore(self.directory.name)
+        bounded = PayloadBudget(max_chars=10, blob_store=store).bound(text)
+
+        self.assertEqual(
+            PayloadBudget(max_chars=10).bound(text),
+            "x" * 10 + "... [truncated from 100 chars]",
+        )
+        self.assertTrue(bounded.startswith("x" * 10 + "... [truncated from 100"))
+        digest = bounded.rsplit("sha256:", 1)[1].rstrip("]")
+        self.assertEqual(store.get(digest), text.encode())
+
+    def test_bound_json_stops_at_the_limit(self):
+        budget = PayloadBudget(max_chars=20)
+        items = iter(range(10**6))
+
+        bounded = budget.bound_json({"items": LazyList(items)})
+
+        self.assertEqual(bounded, '{"items": [0, 1, 2, ... [truncated at 20 chars]')
+        self.assertLess(next(items), 100)
+
+        self.assertEqual(budget.bound_json({"a": 1}), '{"a": 1}')
+        self.assertEqual(PayloadBudget().bound_json([1, 2]), "[1, 2]")
+
+    def test_bound_json_with_blob_store(self):
+        store = BlobStore(self.directory.name)
+        budget = PayloadBudget(max_chars=5, blob_store=store)
+
+        bounded = budget.bound_json({"a": "bcdef"})
+
+        self.assertIn("truncated from 14 chars; blob sha256:", bounded)
+        digest = bounded.rsplit("sha256:", 1)[1].rstrip("]")
+        self.assertEqual(json.loads(store.get(digest)), {"a": "bcdef"})
+
+    def test_json_safe_uses_default_budget(self):
+        with mock.patch.object(PayloadBudget, "_default", PayloadBudget(max_chars=5)):
+            self.assertEqual(
+                json_safe({"a": "bcdef"}), '{"a":... [truncated at 5 chars]'
+            )
+            self.assertEqual(json_safe("abcdefgh"), "abcde... [truncated from 8 chars]")
+            self.assertEqual(json_safe(12345678), 12345678)
+
+    def test_model_name(self):
+        self.assertEqual(model_name('{"model": "claude", "content": []}'), "claude")
+        self.assertIsNone(model_name("Calling a tool."))
+        self.assertIsNone(model_name("[1, 2]"))
+
+
+class TestObservedPayloads(unittest.TestCase):
+
+    def setUp(self):
+        self.exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(self.exporter))
+        tracer = provider.get_tracer("test")
+        for patcher in (
+            mock.patch.object(span_manager_module, "tracer", tracer),
+            mock.patch.object(agent_instrument, "tracer", tracer),
+            mock.patch.object(process.config, "PRODUCE_BEDROCK_OTEL_TRACES", True),
+            mock.patch.object(
+                agent_instrument.config, "PRODUCE_BEDROCK_OTEL_TRACES", True
+            ),
+            mock.patch.object(PayloadBudget, "_default", PayloadBudget(max_chars=64)),
+            mock.patch("builtins.print"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_large_llm_payloads_are_bounded(self):
+        raw_response = json.dumps({"model": "claude", "content": "y" * 1000})
+        client = FakeRuntimeClient(
+            script=[
+                model_invocation("T-0", "p" * 1000, raw_response, 10, 5)
+                + answer_turn("Hi", trace_id="T-1")
+            ]
+        )
+
+        @observe(show_traces=False)
+        def invoke_agent(inputText: str, sessionId: str, **kwargs):
+            return client.invoke_agent(
+                inputText=inputText, sessionId=sessionId, **kwargs
+            )
+
+        invoke_agent(
+            inputText="Hi", sessionId="S1", agentId="AGENT", agentAliasId="ALIAS"
+        )
+
+        llm = [s for s in self.exporter.get_finished_spans() if s.name == "LLM"][0]
+        self.assertEqual(llm.attributes[OtelSpanAttributes.LLM_MODEL_NAME], "claude")
+        for key in (OtelSpanAttributes.INPUT_VALUE, OtelSpanAttributes.OUTPUT_VALUE):
+            self.assertLess(len(llm.attributes[key]), 200)
+            self.assertIn("[truncated from", llm.attributes[key])
+
+
+if __name__ == "__main__":
+    unittest.main()
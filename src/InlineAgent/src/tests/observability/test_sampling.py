@@ -0,0 +1,183 @@
+import unittest
+from unittest import mock
+
+from opentelemetry import trace as otel_trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import Status, StatusCode
+
+from InlineAgent.observability import agent_instrument, observe, process
+from InlineAgent.observability import span_manager as span_manager_module
+from InlineAgent.observability.sampling import (
+    TailRetentionSpanProcessor,
+    head_sampled,
+    sample_ratio,
+)
+from InlineAgent.observability.semantics import SpanAttributes
+from InlineAgent.testing import FakeRuntimeClient, answer_turn, model_invocation
+
+
+class TestHeadSampling(unittest.TestCase):
+
+    def test_sample_ratio(self):
+        ratios = {"AGENT": 0.5, "batch": 0.0}
+        self.assertEqual(sample_ratio("AGENT", ["batch"], 1.0, ratios), 0.5)
+        self.assertEqual(sample_ratio("OTHER", ["x", "batch"], 1.0, ratios), 0.0)
+        self.assertEqual(sample_ratio("OTHER", [], 0.25, ratios), 0.25)
+
+    def test_head_sampled_is_stable_per_session(self):
+        sessions = [f"session-{i}" for i in range(1000)]
+        sampled = [head_sampled(s, 0.3) for s in sessions]
+
+        self.assertEqual(sampled, [head_sampled(s, 0.3) for s in sessions])
+        self.assertTrue(200 < sum(sampled) < 400)
+        self.assertTrue(all(head_sampled(s, 1.0) for s in sessions))
+        self.assertFalse(any(head_sampled(s, 0.0) for s in sessions))
+
+
+class TestObservedSampling(unittest.TestCase):
+
+    def setUp(self):
+        self.exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(self.exporter))
+        tracer = provider.get_tracer("test")
+        for patcher in (
+            mock.patch.object(span_manager_module, "tracer", tracer),
+            mock.patch.object(agent_instrument, "tracer", tracer),
+            mock.patch.object(process.config, "PRODUCE_BEDROCK_OTEL_TRACES", True),
+            mock.patch.object(
+                agent_instrument.config, "PRODUCE_BEDROCK_OTEL_TRACES", True
+            ),
+            mock.patch("builtins.print"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def invoke(self):
+        client = FakeRuntimeClient(
+            script=[
+                model_invocation("T-0", "prompt", "Calling a tool.", 10, 5)
+                + answer_turn("Hi", trace_id="T-1")
+            ]
+        )
+
+        @observe(show_traces=False)
+        def invoke_agent(inputText: str, sessionId: str, **kwargs):
+            return client.invoke_agent(
+                inputText=inputText, sessionId=sessionId, **kwargs
+            )
+
+        return invoke_agent(
+            inputText="Hi", sessionId="S1", agentId="AGENT", agentAliasId="ALIAS"
+        )
+
+    def test_unsampled_turn_keeps_only_summary_span(self):
+        with mock.patch.object(agent_instrument.config, "TRACE_SAMPLE_RATIO", 0.0):
+            self.assertEqual(self.invoke(), "Hi")
+
+        spans = self.exporter.get_finished_spans()
+        self.assertEqual(len(spans), 1)
+        attributes = spans[0].attributes
+        self.assertFalse(attributes[SpanAttributes.SAMPLED.value])
+        self.assertEqual(attributes[SpanAttributes.INPUT_TOKENS.value], 110)
+        self.assertEqual(attributes[SpanAttributes.OUTPUT_TOKENS.value], 25)
+        self.assertEqual(attributes[SpanAttributes.LLM_CALLS.value], 2)
+        self.assertFalse(attributes[SpanAttributes.GUARDRAIL_INTERVENED.value])
+
+    def test_agent_ratio_overrides_default(self):
+        with mock.patch.object(
+            agent_instrument.config, "TRACE_SAMPLE_RATIO", 0.0
+        ), mock.patch.object(
+            agent_instrument.config, "TRACE_SAMPLE_RATIOS", {"AGENT": 1.0}
+        ):
+            self.invoke()
+
+        spans = self.exporter.get_finished_spans()
+        self.assertIn("LLM", [span.name for span in spans])
+        root = [s for s in spans if SpanAttributes.SAMPLED.value in s.attributes][0]
+        self.assertTrue(root.attributes[SpanAttributes.SAMPLED.value])
+
+
+class TestTailRetention(unittest.TestCase):
+
+    def setUp(self):
+        self.exporter = InMemorySpanExporter()
+        self.processor = TailRetentionSpanProcessor(
+            SimpleSpanProcessor(self.exporter), min_tokens=100
+        )
+        provider = TracerProvider()
+        provider.add_span_processor(self.processor)
+        self.tracer = provider.get_tracer("test")
+
+    def turn(self, tokens=0, intervened=False, status=StatusCode.OK):
+        root = self.tracer.start_span(
+            "Agent", attributes={SpanAttributes.SAMPLED.value: True}
+        )
+        context = otel_trace.set_span_in_context(root)
+        with self.tracer.start_as_current_span("Orchestration", context=context):
+            step = self.tracer.start_span("LLM")
+            step.set_status(Status(status))
+            step.end()
+        root.set_attributes(
+            {
+                SpanAttributes.INPUT_TOKENS.value: tokens,
+                SpanAttributes.OUTPUT_TOKENS.value: 0,
+                SpanAttributes.GUARDRAIL_INTERVENED.value: intervened,
+            }
+        )
+        root.end()
+        names = [span.name for span in self.exporter.get_finished_spans()]
+        self.exporter.clear()
+        return names
+
+    def test_cheap_turn_keeps_only_root(self):
+        self.assertEqual(self.turn(tokens=10), ["Agent"])
+        self.assertEqual(self.processor.reduced, 1)
+
+    def test_interesting_turns_keep_full_tree(self):
+        full = ["LLM", "Orchestration", "Agent"]
+        self.assertEqual(self.turn(tokens=100), full)
+        self.assertEqual(self.turn(intervened=True), full)
+        self.assertEqual(self.turn(status=StatusCode.ERROR), full)
+        self.assertEqual(self.processor.kept, 3)
+
+    def test_slow_turn_and_late_spans(self):
+        self.processor.min_duration = 0.0
+        root = self.tracer.start_span(
+            "Agent", attributes={SpanAttributes.SAMPLED.value: True}
+        )
+        late = self.tracer.start_span(
+            "Sub agent", context=otel_trace.set_span_in_context(root)
+        )
+        root.end()
+        late.end()
+        self.tracer.start_span("Unrelated").end()
+
+        names = [span.name for span in self.exporter.get_finished_spans()]
+        self.assertEqual(names, ["Agent", "Sub agent", "Unrelated"])
+
+    def test_flush_and_shutdown_pass_held_spans_on(self):
+        for drain in (self.processor.force_flush, self.processor.shutdown):
+            with self.subTest(drain=drain.__name__):
+                root = self.tracer.start_span(
+                    "Agent", attributes={SpanAttributes.SAMPLED.value: True}
+                )
+                self.tracer.start_span(
+                    "LLM", context=otel_trace.set_span_in_context(root)
+                ).end()
+                self.assertEqual(self.exporter.get_finished_spans(), ())
+
+                drain()
+
+                names = [span.name for span in self.exporter.get_finished_spans()]
+                self.assertEqual(names, ["LLM"])
+                self.assertEqual(len(self.processor._pending), 0)
+                self.exporter.clear()
+
+
+if __name__ == "__main__":
+    unittest.main()
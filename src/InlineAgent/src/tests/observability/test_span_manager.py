@@ -0,0 +1,242 @@
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import (
+    InMemorySpanExporter,
+)
+from opentelemetry.trace import StatusCode
+
+from InlineAgent.observability import agent_instrument, observe, process
+from InlineAgent.observability import span_manager as span_manager_module
+from InlineAgent.observability.semantics import SpanAttributes
+from InlineAgent.observability.span_manager import SpanManager, SpanModel
+from InlineAgent.testing import FakeRuntimeClient, model_invocation
+
+CALLER_CHAIN = [{"agentAliasArn": "arn:aws:bedrock:agent:agent-alias/AGENT/ALIAS"}]
+FAMILY = "00000000-0000-0000-0000-000000000000"
+
+
+class TestSpanManager(unittest.TestCase):
+
+    def setUp(self):
+        self.exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(self.exporter))
+        patcher = mock.patch.object(
+            span_manager_module, "tracer", provider.get_tracer("test")
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.span_manager = SpanManager()
+        self.agent_span = self.span_manager.create_agent_span_return(
+            agent_session_id="S1",
+            caller_chain=CALLER_CHAIN,
+            attributes={},
+            name="Agent",
+        )
+
+    def assign_l2(self, counter: int):
+        return self.span_manager.assign_new_l2_return(
+            agent_session_id="S1",
+            caller_chain=CALLER_CHAIN,
+            trace_id=f"{FAMILY}-{counter}",
+            l2_attributes={},
+            l3_attributes={},
+            l2_name="Orchestration",
+            l3_name="LLM",
+        )
+
+    def finished(self):
+        return {span.name: span for span in self.exporter.get_finished_spans()}
+
+    def test_span_hierarchy(self):
+        l2_span = self.assign_l2(counter=0)
+        self.span_manager.delete_l3_span(
+            agent_session_id="S1",
+            collab_agent_trace_id="AGENT:ALIAS",
+            trace_id=f"{FAMILY}-0",
+        )
+        self.span_manager.assign_new_l3_return(
+            agent_session_id="S1",
+            collab_agent_trace_id="AGENT:ALIAS",
+            trace_id=f"{FAMILY}-0",
+            attributes={},
+            name="Tool",
+        )
+        self.span_manager.end_all_spans(status_code=StatusCode.OK)
+
+        spans = self.finished()
+        self.assertEqual(set(spans), {"Agent", "Orchestration", "LLM", "Tool"})
+        self.assertEqual(
+            spans["Orchestration"].parent.span_id,
+            self.agent_span.get_span_context().span_id,
+        )
+        self.assertEqual(
+            spans["Tool"].parent.span_id, l2_span.get_span_context().span_id
+        )
+        self.assertEqual(self.span_manager.spans, {})
+
+    def test_same_counter_reuses_l2_and_new_counter_ends_it(self):
+        first = self.assign_l2(counter=0)
+        self.assertIs(self.assign_l2(counter=0), first)
+
+        second = self.assign_l2(counter=1)
+
+        self.assertIsNot(second, first)
+        self.assertEqual(set(self.finished()), {"Orchestration", "LLM"})
+
+    def test_invalid_transitions_raise(self):
+        with self.assertRaisesRegex(RuntimeError, "Agent span not found"):
+            self.span_manager.delete_l3_span(
+                agent_session_id="S2", collab_agent_trace_id="A", trace_id=FAMILY
+            )
+
+        self.assign_l2(counter=0)
+        with self.assertRaisesRegex(RuntimeError, "L3 span already exists"):
+            self.span_manager.assign_new_l3_return(
+                agent_session_id="S1",
+                collab_agent_trace_id="AGENT:ALIAS",
+                trace_id=f"{FAMILY}-0",
+                attributes={},
+                name="Tool",
+            )
+
+    def test_span_model_end_uses_end_time(self):
+        span = mock.MagicMock()
+        span.is_recording.return_value = True
+        model = SpanModel(span=span)
+
+        model.end_time = 42
+        span.end.assert_not_called()
+        model.end = True
+
+        span.end.assert_called_once_with(end_time=42)
+        with self.assertRaises(AttributeError):
+            model.unknown = 1
+
+    def create_family(self, session_id: str):
+        return self.span_manager.create_agent_span_return(
+            agent_session_id=session_id,
+            caller_chain=[
+                {
+                    "agentAliasArn": "arn:aws:bedrock:agent:agent-alias/"
+                    f"AGENT{session_id}/ALIAS"
+                }
+            ],
+            attributes={},
+            name=f"Agent {session_id}",
+        )
+
+    def test_stale_families_are_evicted(self):
+        live = SpanModel.live()
+        self.span_manager.max_families = 3
+        self.span_manager.ttl = 60
+        for session_id in ("S2", "S3", "S4"):
+            self.create_family(session_id)
+
+        self.assertEqual(list(self.span_manager.spans), ["S1", "S3", "S4"])
+        evicted = self.finished()["Agent S2"]
+        self.assertEqual(evicted.status.status_code, StatusCode.ERROR)
+        self.assertTrue(evicted.attributes[SpanAttributes.EVICTED.value])
+        self.assertNotIn("AGENTS2:ALIAS", self.span_manager.agent_session_id_dict)
+        self.assertEqual(SpanModel.live(), live + 2)
+
+        evicted = self.span_manager.evict_stale(now=time.monotonic() + 60)
+        self.assertEqual(evicted, ["S3", "S4"])
+        self.assertEqual(list(self.span_manager.spans), ["S1"])
+        self.assertEqual(SpanModel.live(), live)
+
+        self.span_manager.end_all_spans(status_code=StatusCode.OK)
+        self.assertEqual(self.span_manager.agent_session_id_dict, {})
+        self.assertEqual(SpanModel.live(), live - 1)
+
+    def test_active_families_are_not_evicted(self):
+        self.span_manager.ttl = 60
+        monotonic = "InlineAgent.observability.span_manager.time.monotonic"
+        with mock.patch(monotonic, return_value=1000):
+            self.create_family("S2")
+            self.create_family("S3")
+        with mock.patch(monotonic, return_value=1050):
+            self.span_manager.assign_new_l2_return(
+                agent_session_id="S2",
+                caller_chain=[
+                    {"agentAliasArn": "arn:aws:bedrock:agent:agent-alias/AGENTS2/ALIAS"}
+                ],
+                trace_id=f"{FAMILY}-0",
+                l2_attributes={},
+                l3_attributes={},
+                l2_name="Orchestration",
+                l3_name="LLM",
+            )
+
+        self.assertEqual(self.span_manager.evict_stale(now=1070), ["S3"])
+        self.assertEqual(self.span_manager.evict_stale(now=1110), ["S2"])
+
+    def test_least_recently_active_family_is_evicted_first(self):
+        self.span_manager.max_families = 3
+        monotonic = "InlineAgent.observability.span_manager.time.monotonic"
+        with mock.patch(monotonic, return_value=1000):
+            self.create_family("S2")
+        with mock.patch(monotonic, return_value=1010):
+            self.create_family("S3")
+        self.span_manager.spans["S2"].last_active = 1020
+
+        self.create_family("S4")
+
+        self.assertEqual(list(self.span_manager.spans), ["S1", "S2", "S4"])
+
+
+class TestObservedSpanCleanup(unittest.TestCase):
+
+    def setUp(self):
+        self.exporter = InMemorySpanExporter()
+        provider = TracerProvider()
+        provider.add_span_processor(SimpleSpanProcessor(self.exporter))
+        tracer = provider.get_tracer("test")
+        for patcher in (
+            mock.patch.object(span_manager_module, "tracer", tracer),
+            mock.patch.object(agent_instrument, "tracer", tracer),
+            mock.patch.object(process.config, "PRODUCE_BEDROCK_OTEL_TRACES", True),
+            mock.patch.object(
+                agent_instrument.config, "PRODUCE_BEDROCK_OTEL_TRACES", True
+            ),
+            mock.patch("builtins.print"),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_interrupted_invocations_end_their_spans(self):
+        live = SpanModel.live()
+        turn = model_invocation("T-0", "prompt", "Thinking.", 10, 5)
+        client = FakeRuntimeClient(
+            script=[
+                turn + [RuntimeError("stream broke")],
+                turn[:1] + [asyncio.CancelledError()],
+            ]
+        )
+
+        @observe(show_traces=False)
+        def invoke_agent(inputText: str, sessionId: str, **kwargs):
+            return client.invoke_agent(
+                inputText=inputText, sessionId=sessionId, **kwargs
+            )
+
+        with self.assertRaisesRegex(Exception, "stream broke"):
+            invoke_agent(inputText="Hi", sessionId="S1", agentId="A", agentAliasId="B")
+        with self.assertRaises(asyncio.CancelledError):
+            invoke_agent(inputText="Hi", sessionId="S2", agentId="A", agentAliasId="B")
+
+        self.assertEqual(SpanModel.live(), live)
+        roots = [s for s in self.exporter.get_finished_spans() if s.parent is None]
+        self.assertEqual(len(roots), 2)
+        for root in roots:
+            self.assertEqual(root.status.status_code, StatusCode.ERROR)
+
+
+if __name__ == "__main__":
+    unittest.main()
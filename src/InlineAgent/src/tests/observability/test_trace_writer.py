@@ -0,0 +1,113 @@
+import json
+import os
+import queue
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from InlineAgent.observability import TraceWriter
+from InlineAgent.observability.process import ProcessL2Trace
+
+
+def trace_event(index: int):
+    return {"trace": {"sessionId": "S1", "trace": {"index": index}}}
+
+
+class TestTraceWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def create_writer(self, **kwargs):
+        writer = TraceWriter(directory=self.directory.name, **kwargs)
+        self.addCleanup(writer.close)
+        return writer
+
+    def read(self, session_id="S1"):
+        return TraceWriter.read_session(session_id, directory=self.directory.name)
+
+    def test_write_and_read_session(self):
+        writer = self.create_writer()
+        for index in range(100):
+            writer.write(session_id="S1", trace_data=trace_event(index))
+        writer.write(session_id="S2", trace_data=trace_event(0))
+        writer.flush()
+
+        self.assertEqual(self.read(), [trace_event(index) for index in range(100)])
+        self.assertEqual(self.read("S2"), [trace_event(0)])
+        with open(os.path.join(self.directory.name, "S1.jsonl")) as file:
+            self.assertEqual(json.loads(file.readline()), trace_event(0))
+
+    def test_compression_and_rotation(self):
+        writer = self.create_writer(compress=True, max_bytes=64)
+        for index in range(20):
+            writer.write(session_id="S1", trace_data=trace_event(index))
+            writer.flush()
+
+        self.assertTrue(
+            os.path.exists(os.path.join(self.directory.name, "S1.1.jsonl.gz"))
+        )
+        self.assertEqual(self.read(), [trace_event(index) for index in range(20)])
+
+    def test_concurrent_writers(self):
+        writer = self.create_writer()
+
+        def write(offset):
+            for index in range(200):
+                writer.write(session_id="S1", trace_data=trace_event(offset + index))
+
+        threads = [threading.Thread(target=write, args=(n * 1000,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        writer.flush()
+
+        self.assertEqual(len(self.read()), 800)
+
+    def test_session_id_with_glob_characters(self):
+        writer = self.create_writer(max_bytes=64)
+        for index in range(5):
+            writer.write(session_id="S[1]", trace_data=trace_event(index))
+            writer.flush()
+
+        self.assertEqual(
+            self.read("S[1]"), [trace_event(index) for index in range(5)]
+        )
+
+    def test_concurrent_drops_are_counted(self):
+        writer = self.create_writer()
+
+        def write():
+            for index in range(500):
+                writer.write(session_id="S1", trace_data=trace_event(index))
+
+        threads = [threading.Thread(target=write) for _ in range(4)]
+        with mock.patch.object(writer._queue, "put_nowait", side_effect=queue.Full):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(writer.dropped, 2000)
+
+    def test_full_queue_drops(self):
+        writer = self.create_writer()
+        with mock.patch.object(writer._queue, "put_nowait", side_effect=queue.Full):
+            writer.write(session_id="S1", trace_data=trace_event(0))
+
+        self.assertEqual(writer.dropped, 1)
+
+    def test_save_trace_uses_default_writer(self):
+        writer = self.create_writer()
+        with mock.patch.object(TraceWriter, "default", return_value=writer):
+            ProcessL2Trace.save_trace(trace_data=trace_event(0), session_id="S1")
+        writer.flush()
+
+        self.assertEqual(self.read(), [trace_event(0)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import time
+import unittest
+
+from InlineAgent.agent import InlineAgent
+from InlineAgent.serving import AgentServer
+
+trace_event = {
+    "trace": {
+        "sessionId": "MOCKSESSION",
+        "trace": {
+            "orchestrationTrace": {
+                "modelInvocationOutput": {
+                    "traceId": "MOCKTRACE",
+                    "metadata": {"usage": {"inputTokens": 100, "outputTokens": 20}},
+                }
+            }
+        },
+    }
+}
+
+
+class SlowRuntimeClient:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+
+    def invoke_inline_agent(self, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        return {
+            "completion": iter(
+                [
+                    trace_event,
+                    {"chunk": {"bytes": b"Hello "}},
+                    {"chunk": {"bytes": b"world"}},
+                ]
+            ),
+            "ResponseMetadata": {"RequestId": "MOCKID", "RetryAttempts": 0},
+        }
+
+
+async def request(app, method, path, body=b"", headers=()):
+    """Drive ``app`` with one ASGI HTTP request and return (status, headers, body)."""
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": [(key.encode(), value.encode()) for key, value in headers],
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    response = {"status": None, "headers": {}, "body": b""}
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.sleep(3600)
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {
+                key.decode(): value.decode() for key, value in message["headers"]
+            }
+        else:
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], response["body"]
+
+
+class TestAgentServer(unittest.IsolatedAsyncioTestCase):
+
+    def create_app(self, latency: float = 0.0, **kwargs):
+        agent = InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You are a friendly assistant.",
+            agent_name="MockAgent",
+            runtime_client=SlowRuntimeClient(latency=latency),
+        )
+        return AgentServer(agent=agent, **kwargs)
+
+    async def test_invoke_text(self):
+        status, headers, body = await request(
+            self.create_app(), "POST", "/invoke", body=b"Hi"
+        )
+
+        self.assertEqual(status, 200)
+        self.assertTrue(headers["content-type"].startswith("text/plain"))
+        self.assertEqual(body, b"Hello world")
+
+    async def test_invoke_json(self):
+        status, _, body = await request(
+            self.create_app(),
+            "POST",
+            "/invoke",
+            body=json.dumps({"input_text": "Hi", "session_id": "S1"}).encode(),
+            headers=[("content-type", "application/json")],
+        )
+        payload = json.loads(body)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["answer"], "Hello world")
+        self.assertEqual(payload["session_id"], "S1")
+        self.assertEqual(payload["usage"]["input_tokens"], 100)
+
+    async def test_invoke_missing_input(self):
+        status, _, _ = await request(self.create_app(), "POST", "/invoke", body=b" ")
+
+        self.assertEqual(status, 400)
+
+    async def test_invoke_non_string_input(self):
+        app = self.create_app()
+        for payload in (
+            {"input_text": ["Hi"]},
+            {"input_text": 42},
+            {"input_text": "Hi", "session_id": 7},
+        ):
+            with self.subTest(payload=payload):
+                status, _, body = await request(
+                    app,
+                    "POST",
+                    "/invoke",
+                    body=json.dumps(payload).encode(),
+                    headers=[("content-type", "application/json")],
+                )
+
+                self.assertEqual(status, 400)
+                self.assertIn("must be a string", json.loads(body)["error"])
+        self.assertEqual(app.agent.runtime_client.calls, 0)
+
+    async def test_stream(self):
+        status, headers, body = await request(
+            self.create_app(), "POST", "/stream", body=b"Hi"
+        )
+        events = [block.split("\n") for block in body.decode().strip().split("\n\n")]
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers["content-type"], "text/event-stream")
+        self.assertEqual(
+            [lines[0] for lines in events],
+            ["event: chunk", "event: chunk", "event: usage"],
+        )
+        self.assertEqual(json.loads(events[0][1][len("data: ") :]), {"text": "Hello "})
+
+    async def test_queue_full(self):
+        app = self.create_app(latency=0.3, max_in_flight=1, max_queue=0)
+
+        responses = await asyncio.gather(
+            request(app, "POST", "/invoke", body=b"Hi"),
+            request(app, "POST", "/invoke", body=b"Hi"),
+        )
+
+        self.assertEqual(sorted(status for status, _, _ in responses), [200, 503])
+        self.assertEqual(app.admission.rejected, 1)
+
+    async def test_tenant_limit(self):
+        app = self.create_app(latency=0.3, max_per_tenant=1)
+        tenant, other = [("x-tenant-id", "A")], [("x-tenant-id", "B")]
+
+        responses = await asyncio.gather(
+            request(app, "POST", "/invoke", body=b"Hi", headers=tenant),
+            request(app, "POST", "/invoke", body=b"Hi", headers=tenant),
+            request(app, "POST", "/invoke", body=b"Hi", headers=other),
+        )
+
+        self.assertEqual(sorted(status for status, _, _ in responses), [200, 200, 429])
+
+    async def test_timeout(self):
+        app = self.create_app(latency=1, request_timeout=0.1)
+
+        status, _, _ = await request(app, "POST", "/invoke", body=b"Hi")
+
+        self.assertEqual(status, 504)
+
+    async def test_health(self):
+        status, _, body = await request(self.create_app(), "GET", "/health")
+
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import gc
+import threading
+import unittest
+from unittest import mock
+
+import boto3
+
+from InlineAgent.client_pool import ClientPool
+
+
+class TestClientPool(unittest.TestCase):
+
+    def setUp(self):
+        ClientPool.clear()
+
+    def tearDown(self):
+        ClientPool.clear()
+
+    def test_session_is_shared(self):
+        session_1 = ClientPool.get_session(region="us-east-1")
+        session_2 = ClientPool.get_session(region="us-east-1")
+        session_3 = ClientPool.get_session(region="us-west-2")
+
+        self.assertIs(session_1, session_2)
+        self.assertIsNot(session_1, session_3)
+
+    def test_client_is_shared_per_config(self):
+        session = ClientPool.get_session(region="us-east-1")
+
+        client_1 = ClientPool.get_client("bedrock-agent-runtime", session=session)
+        client_2 = ClientPool.get_client("bedrock-agent-runtime", session=session)
+        client_3 = ClientPool.get_client(
+            "bedrock-agent-runtime",
+            session=session,
+            config_key=ClientPool.config_key(max_pool_connections=5),
+        )
+
+        self.assertIs(client_1, client_2)
+        self.assertIsNot(client_1, client_3)
+        self.assertEqual(client_3.meta.config.max_pool_connections, 5)
+
+    def test_client_creation_is_thread_safe(self):
+        session = ClientPool.get_session(region="us-east-1")
+        clients = []
+
+        def get_client():
+            clients.append(ClientPool.get_client("sts", session=session))
+
+        threads = [threading.Thread(target=get_client) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({id(client) for client in clients}), 1)
+
+    def test_account_id_calls_sts_once(self):
+        session = ClientPool.get_session(region="us-east-1")
+        sts_client = mock.Mock()
+        sts_client.get_caller_identity.return_value = {"Account": "123456789012"}
+
+        with mock.patch.object(ClientPool, "get_client", return_value=sts_client):
+            self.assertEqual(ClientPool.get_account_id(session), "123456789012")
+            self.assertEqual(ClientPool.get_account_id(session), "123456789012")
+
+        sts_client.get_caller_identity.assert_called_once()
+
+    def test_sessions_with_same_profile_do_not_share(self):
+        session_1 = boto3.Session(
+            region_name="us-east-1",
+            aws_access_key_id="KEY_1",
+            aws_secret_access_key="SECRET",
+        )
+        session_2 = boto3.Session(
+            region_name="us-east-1",
+            aws_access_key_id="KEY_2",
+            aws_secret_access_key="SECRET",
+        )
+        sts_clients = [mock.Mock(), mock.Mock()]
+        sts_clients[0].get_caller_identity.return_value = {"Account": "111111111111"}
+        sts_clients[1].get_caller_identity.return_value = {"Account": "222222222222"}
+
+        client_1 = ClientPool.get_client("sts", session=session_1)
+        client_2 = ClientPool.get_client("sts", session=session_2)
+        with mock.patch.object(ClientPool, "get_client", side_effect=sts_clients):
+            account_ids = [
+                ClientPool.get_account_id(session_1),
+                ClientPool.get_account_id(session_2),
+            ]
+
+        self.assertIsNot(client_1, client_2)
+        self.assertEqual(account_ids, ["111111111111", "222222222222"])
+
+    def test_clients_are_dropped_with_their_session(self):
+        session = boto3.Session(region_name="us-east-1")
+        ClientPool.get_client("sts", session=session)
+        self.assertEqual(len(ClientPool._clients), 1)
+
+        del session
+        gc.collect()
+
+        self.assertEqual(len(ClientPool._clients), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,136 @@
+import time
+import unittest
+from unittest import mock
+
+from InlineAgent.action_group import ActionGroup
+from InlineAgent.agent import InlineAgent
+from InlineAgent.testing import (
+    FakeRuntimeClient,
+    answer_turn,
+    chunk,
+    citation,
+    function_parameter,
+    tool_turn,
+)
+from InlineAgent.types import CitationEvent, ReturnControlEvent, UsageEvent
+
+
+def get_forecast(city: str, days: int) -> str:
+    """Get the weather forecast for a city.
+
+    Args:
+        city: The city, e.g., Seattle
+        days: Number of days to forecast
+    """
+    return f"{city} is sunny for {days} days."
+
+
+class TestFakeRuntimeClient(unittest.IsolatedAsyncioTestCase):
+
+    def create_agent(self, runtime_client):
+        return InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You are a friendly assistant.",
+            agent_name="MockAgent",
+            action_groups=[
+                ActionGroup(
+                    name="WeatherActionGroup",
+                    tools=[get_forecast],
+                    argument_key="Args:",
+                )
+            ],
+            runtime_client=runtime_client,
+        )
+
+    async def test_scripted_turns(self):
+        forecast = {"city": "Seattle", "days": 3}
+        runtime_client = FakeRuntimeClient(
+            script=[
+                tool_turn(("WeatherActionGroup", "get_forecast", forecast)),
+                answer_turn("Seattle is sunny.", chunks=3, input_tokens=50),
+            ]
+        )
+        agent = self.create_agent(runtime_client)
+
+        events = [event async for event in agent.stream(input_text="Weather?")]
+
+        self.assertIsInstance(events[4], ReturnControlEvent)
+        self.assertEqual(events[-1].input_tokens, 150)
+        self.assertEqual(events[-1].llm_calls, 2)
+        self.assertEqual(len(runtime_client.requests), 2)
+        self.assertEqual(
+            runtime_client.requests[1]["inlineSessionState"][
+                "returnControlInvocationResults"
+            ][0]["functionResult"]["responseBody"]["TEXT"]["body"],
+            "Seattle is sunny for 3 days.",
+        )
+
+        with self.assertRaisesRegex(RuntimeError, "ran out of scripted turns"):
+            runtime_client.invoke_inline_agent(inputText="Weather?")
+
+    async def test_repeat_and_session_stamp(self):
+        runtime_client = FakeRuntimeClient(script=[answer_turn("Hi")], repeat=True)
+        agent = self.create_agent(runtime_client)
+
+        with mock.patch("builtins.print"):
+            self.assertEqual(await agent.invoke(input_text="Hi"), "Hi")
+            self.assertEqual(await agent.invoke(input_text="Hi"), "Hi")
+
+        response = runtime_client.invoke_agent(inputText="Hi", sessionId="S2")
+        traces = [event for event in response["completion"] if "trace" in event]
+        self.assertEqual({trace["trace"]["sessionId"] for trace in traces}, {"S2"})
+
+    async def test_script_callable_and_latency(self):
+        def script(request):
+            return [chunk(request["inputText"].upper())]
+
+        runtime_client = FakeRuntimeClient(
+            script=script, latency=0.05, event_latency=0.05
+        )
+        agent = self.create_agent(runtime_client)
+
+        start = time.perf_counter()
+        events = [event async for event in agent.stream(input_text="hello")]
+
+        self.assertGreaterEqual(time.perf_counter() - start, 0.1)
+        self.assertEqual(events[0].text, "HELLO")
+        self.assertIsInstance(events[-1], UsageEvent)
+
+    async def test_citation(self):
+        agent = self.create_agent(
+            FakeRuntimeClient(script=[[citation("Sunny.", source_text="Forecast")]])
+        )
+
+        events = [event async for event in agent.stream(input_text="Weather?")]
+
+        self.assertIsInstance(events[0], CitationEvent)
+        self.assertEqual(
+            events[0].citations[0]["retrievedReferences"][0]["content"]["text"],
+            "Forecast",
+        )
+
+    async def test_citation_replays_through_invoke(self):
+        agent = self.create_agent(
+            FakeRuntimeClient(script=[[citation("Sunny.", source_text="Forecast")]])
+        )
+
+        with mock.patch("builtins.print") as printed:
+            output = await agent.invoke(input_text="Weather?", add_citation=True)
+
+        self.assertIn("Sunny.", output)
+        printed_text = " ".join(str(call.args) for call in printed.call_args_list)
+        self.assertIn("FAKEDATASOURCE", printed_text)
+        self.assertIn("Forecast", printed_text)
+
+    def test_function_parameter(self):
+        self.assertEqual(
+            function_parameter("flag", True),
+            {"name": "flag", "type": "boolean", "value": "true"},
+        )
+        self.assertEqual(function_parameter("days", 3)["type"], "integer")
+        self.assertEqual(function_parameter("ratio", 0.5)["type"], "number")
+        self.assertEqual(function_parameter("city", "Seattle")["type"], "string")
+
+
+if __name__ == "__main__":
+    unittest.main()
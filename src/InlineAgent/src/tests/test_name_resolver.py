@@ -0,0 +1,167 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from InlineAgent.client_pool import ClientPool
+from InlineAgent.knowledge_base import KnowledgeBasePlugin
+from InlineAgent.name_resolver import DEFAULT_NAME_TTL, NameResolver
+
+
+class PagedBedrockAgent:
+    def __init__(self, pages):
+        self.pages = pages
+        self.scans = 0
+
+    def get_paginator(self, operation):
+        self.operation = operation
+        self.scans += 1
+        return mock.Mock(paginate=mock.Mock(return_value=iter(self.pages)))
+
+
+class TestNameResolver(unittest.TestCase):
+
+    def setUp(self):
+        NameResolver.clear()
+        NameResolver.configure(ttl=DEFAULT_NAME_TTL)
+        NameResolver.cache_file = None
+        self.session = ClientPool.get_session(region="us-east-1")
+        self.account_id = mock.patch.object(
+            ClientPool, "get_account_id", return_value="123456789012"
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def tearDown(self):
+        NameResolver.clear()
+        NameResolver.cache_file = None
+
+    def patch_client(self, pages):
+        bedrock_agent = PagedBedrockAgent(pages)
+        patcher = mock.patch.object(
+            ClientPool, "get_client", return_value=bedrock_agent
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return bedrock_agent
+
+    def test_one_scan_resolves_every_name(self):
+        bedrock_agent = self.patch_client(
+            [
+                {"agentSummaries": [{"agentName": "A", "agentId": "ID_A"}]},
+                {"agentSummaries": [{"agentName": "B", "agentId": "ID_B"}]},
+            ]
+        )
+
+        self.assertEqual(NameResolver.resolve("agent", "B", self.session), "ID_B")
+        self.assertEqual(NameResolver.resolve("agent", "A", self.session), "ID_A")
+        self.assertEqual(bedrock_agent.scans, 1)
+        self.assertEqual(bedrock_agent.operation, "list_agents")
+
+    def test_knowledge_base_on_second_page(self):
+        bedrock_agent = self.patch_client(
+            [
+                {"knowledgeBaseSummaries": [{"name": "KB1", "knowledgeBaseId": "1"}]},
+                {"knowledgeBaseSummaries": [{"name": "KB2", "knowledgeBaseId": "2"}]},
+            ]
+        )
+
+        self.assertEqual(
+            KnowledgeBasePlugin.get_knowledge_base_id_by_name("KB2", self.session),
+            "2",
+        )
+        self.assertIsNone(
+            KnowledgeBasePlugin.get_knowledge_base_id_by_name("KB3", self.session)
+        )
+        self.assertEqual(bedrock_agent.operation, "list_knowledge_bases")
+
+    def test_expired_entry_is_rescanned(self):
+        bedrock_agent = self.patch_client(
+            [{"agentSummaries": [{"agentName": "A", "agentId": "ID_A"}]}]
+        )
+        NameResolver.configure(ttl=60)
+
+        with mock.patch("InlineAgent.name_resolver.time.time", return_value=1000):
+            NameResolver.resolve("agent", "A", self.session)
+        with mock.patch("InlineAgent.name_resolver.time.time", return_value=1030):
+            NameResolver.resolve("agent", "A", self.session)
+        self.assertEqual(bedrock_agent.scans, 1)
+
+        with mock.patch("InlineAgent.name_resolver.time.time", return_value=1061):
+            NameResolver.resolve("agent", "A", self.session)
+        self.assertEqual(bedrock_agent.scans, 2)
+
+    def test_miss_is_cached_briefly(self):
+        bedrock_agent = self.patch_client(
+            [{"agentSummaries": [{"agentName": "A", "agentId": "ID_A"}]}]
+        )
+        NameResolver.configure(miss_ttl=10)
+
+        with mock.patch("InlineAgent.name_resolver.time.time", return_value=1000):
+            self.assertIsNone(NameResolver.resolve("agent", "B", self.session))
+            self.assertIsNone(NameResolver.resolve("agent", "B", self.session))
+        self.assertEqual(bedrock_agent.scans, 1)
+
+        with mock.patch("InlineAgent.name_resolver.time.time", return_value=1011):
+            self.assertIsNone(NameResolver.resolve("agent", "B", self.session))
+        self.assertEqual(bedrock_agent.scans, 2)
+
+    def test_waiters_reuse_the_finished_scan(self):
+        bedrock_agent = self.patch_client([])
+        paginate = bedrock_agent.get_paginator
+
+        def slow_paginator(operation):
+            time.sleep(0.2)
+            return paginate(operation)
+
+        bedrock_agent.get_paginator = slow_paginator
+        results = []
+
+        def resolve(name):
+            results.append(NameResolver.resolve("agent", name, self.session))
+
+        threads = [
+            threading.Thread(target=resolve, args=(f"missing-{n}",))
+            for n in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, [None] * 4)
+        self.assertEqual(bedrock_agent.scans, 1)
+
+    def test_accounts_do_not_share_ids(self):
+        bedrock_agent = self.patch_client(
+            [{"agentSummaries": [{"agentName": "A", "agentId": "ID_A"}]}]
+        )
+        NameResolver.resolve("agent", "A", self.session)
+
+        self.account_id.return_value = "210987654321"
+        bedrock_agent.pages = [
+            {"agentSummaries": [{"agentName": "A", "agentId": "OTHER_A"}]}
+        ]
+
+        self.assertEqual(NameResolver.resolve("agent", "A", self.session), "OTHER_A")
+        self.assertEqual(bedrock_agent.scans, 2)
+
+    def test_cache_file_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache_file = os.path.join(directory, "names.json")
+            NameResolver.configure(cache_file=cache_file)
+            self.patch_client(
+                [{"agentSummaries": [{"agentName": "A", "agentId": "ID_A"}]}]
+            )
+            NameResolver.resolve("agent", "A", self.session)
+            self.assertTrue(os.path.exists(cache_file))
+
+            NameResolver.clear()
+            bedrock_agent = self.patch_client([])
+            self.assertEqual(NameResolver.resolve("agent", "A", self.session), "ID_A")
+            self.assertEqual(bedrock_agent.scans, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import logging
+import unittest
+from unittest import mock
+
+from InlineAgent.action_group import ActionGroup
+from InlineAgent.agent import InlineAgent
+from InlineAgent.output import LoggingSink, NullSink, OutputSink, QueueSink
+from InlineAgent.testing import FakeRuntimeClient, answer_turn, tool_turn
+
+
+def get_forecast(city: str) -> str:
+    """Get the weather forecast for a city.
+
+    Args:
+        city: The city, e.g., Seattle
+    """
+    return f"{city} is sunny."
+
+
+class TestOutputSinks(unittest.IsolatedAsyncioTestCase):
+
+    def create_agent(self, sink=None):
+        return InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You are a friendly assistant.",
+            agent_name="MockAgent",
+            action_groups=[
+                ActionGroup(
+                    name="WeatherActionGroup",
+                    tools=[get_forecast],
+                    argument_key="Args:",
+                )
+            ],
+            runtime_client=FakeRuntimeClient(
+                script=[
+                    tool_turn(("WeatherActionGroup", "get_forecast", {"city": "Rome"})),
+                    answer_turn("Rome is sunny today.", chunks=4),
+                ],
+                repeat=True,
+            ),
+            sink=sink,
+        )
+
+    def drain(self, sink: QueueSink) -> str:
+        lines = []
+        while not sink.queue.empty():
+            lines.append(sink.queue.get_nowait())
+        return "".join(lines)
+
+    async def test_answer_is_written_once(self):
+        sink = QueueSink()
+
+        with mock.patch("builtins.print") as printed:
+            answer = await self.create_agent().invoke(input_text="Hi", sink=sink)
+
+        printed.assert_not_called()
+        self.assertEqual(answer, "Rome is sunny today.")
+        output = self.drain(sink)
+        self.assertEqual(output.count("Rome is sunny today."), 1)
+        self.assertIn("Tool output: Rome is sunny.", output)
+        self.assertIn("Agent made a total of 2 LLM calls", output)
+
+    async def test_null_sink_writes_nothing(self):
+        agent = self.create_agent(sink=NullSink())
+
+        with mock.patch("builtins.print") as printed, mock.patch(
+            "InlineAgent.agent.inline_agent.Trace.parse_trace"
+        ) as parse_trace:
+            answer = await agent.invoke(input_text="Hi")
+            events = [event async for event in agent.stream(input_text="Hi")]
+
+        self.assertEqual(answer, "Rome is sunny today.")
+        self.assertTrue(events)
+        printed.assert_not_called()
+        parse_trace.assert_not_called()
+
+    async def test_logging_sink_and_bounded_queue(self):
+        with self.assertLogs("InlineAgent.output", level=logging.INFO) as logs:
+            await self.create_agent(sink=LoggingSink()).invoke(input_text="Hi")
+        self.assertIn(
+            "INFO:InlineAgent.output:Tool output: Rome is sunny.", logs.output
+        )
+
+        sink = QueueSink(maxsize=1)
+        sink.write("first")
+        sink.write("second")
+        self.assertEqual(self.drain(sink), "first\n")
+        self.assertEqual(sink.dropped, 1)
+
+    def test_sink_without_write_fails_at_construction(self):
+        class MarkdownOnlySink(OutputSink):
+            def markdown(self, text: str) -> None:
+                pass
+
+        with self.assertRaises(TypeError):
+            MarkdownOnlySink()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,275 @@
+import time
+import unittest
+from unittest import mock
+
+import boto3
+from botocore.awsrequest import AWSResponse
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from InlineAgent.agent import InlineAgent
+from InlineAgent.client_pool import ClientPool
+from InlineAgent.output import NullSink
+from InlineAgent.rate_limit import (
+    DEFAULT_RETRY_POLICY,
+    AdaptiveRateLimiter,
+    RateLimiters,
+    RateLimitExceeded,
+    RetryPolicy,
+    call_with_retry,
+    is_throttling,
+)
+from InlineAgent.testing import FakeRuntimeClient, answer_turn
+
+NO_DELAY = RetryPolicy(max_attempts=3, base_delay=0.0)
+
+
+def fast_limiter():
+    # Throttles leave it at 1000 calls a second, so retries hardly wait.
+    return AdaptiveRateLimiter(min_rate=1000, max_rate=1000)
+
+
+def throttling_error(code="ThrottlingException"):
+    return ClientError(
+        {"Error": {"Code": code, "Message": "Rate exceeded"}}, "InvokeInlineAgent"
+    )
+
+
+def response(retries=0):
+    return {"ResponseMetadata": {"RetryAttempts": retries}}
+
+
+class ThrottledBody:
+    def stream(self, **kwargs):
+        yield b'{"message": "Rate exceeded"}'
+
+
+def throttle_every_send(sends):
+    """A ``before-send`` handler answering every HTTP request with a 429."""
+
+    def send(request, **kwargs):
+        sends.append(request)
+        return AWSResponse(
+            request.url,
+            429,
+            {
+                "x-amzn-ErrorType": "ThrottlingException",
+                "Content-Type": "application/json",
+            },
+            ThrottledBody(),
+        )
+
+    return send
+
+
+class TestAdaptiveRateLimiter(unittest.TestCase):
+
+    def test_unpaced_until_throttled(self):
+        limiter = AdaptiveRateLimiter()
+
+        self.assertEqual([limiter.reserve() for _ in range(100)], [0.0] * 100)
+        self.assertIsNone(limiter.rate)
+
+        limiter.on_throttle()
+        self.assertEqual(limiter.rate, 50.0)
+        self.assertGreater(limiter.reserve(), 0)
+
+    def test_starts_from_observed_rate(self):
+        limiter = AdaptiveRateLimiter()
+        with mock.patch("InlineAgent.rate_limit.time.monotonic") as monotonic:
+            monotonic.return_value = limiter._window_start + 0.5
+            for _ in range(40):
+                limiter.reserve()
+            monotonic.return_value += 1.5
+            limiter.on_throttle()
+
+        self.assertEqual(limiter.rate, 10.0)
+
+    def test_token_bucket(self):
+        limiter = AdaptiveRateLimiter(rate=10, burst=2)
+
+        delays = [limiter.reserve() for _ in range(4)]
+
+        self.assertEqual(delays[:2], [0.0, 0.0])
+        self.assertAlmostEqual(delays[2], 0.1, places=2)
+        self.assertAlmostEqual(delays[3], 0.2, places=2)
+
+    def test_acquire_waits(self):
+        limiter = AdaptiveRateLimiter(rate=20, burst=1)
+
+        start = time.perf_counter()
+        for _ in range(3):
+            limiter.acquire()
+
+        self.assertGreaterEqual(time.perf_counter() - start, 0.09)
+
+    def test_bounded_queue(self):
+        limiter = AdaptiveRateLimiter(rate=1, burst=1, max_queue=2)
+
+        for _ in range(3):
+            limiter.reserve()
+        with self.assertRaises(RateLimitExceeded):
+            limiter.reserve()
+
+    def test_aimd(self):
+        limiter = AdaptiveRateLimiter(rate=10, increase=1.0, decrease_interval=60)
+
+        limiter.on_success()
+        self.assertEqual(limiter.rate, 11.0)
+
+        limiter.on_throttle()
+        limiter.on_throttle()
+        self.assertEqual(limiter.rate, 5.5)
+        self.assertEqual(limiter.throttles, 2)
+
+        limiter.on_response(response(retries=1))
+        self.assertEqual(limiter.rate, 5.5)
+        limiter.on_response(response())
+        self.assertEqual(limiter.rate, 6.5)
+
+    def test_rate_bounds(self):
+        limiter = AdaptiveRateLimiter(
+            rate=1, min_rate=1, max_rate=2, increase=1.0, decrease_interval=0
+        )
+
+        limiter.on_throttle()
+        self.assertEqual(limiter.rate, 1)
+
+        limiter.on_success()
+        limiter.on_success()
+        self.assertIsNone(limiter.rate)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            AdaptiveRateLimiter(rate=1, min_rate=2)
+        with self.assertRaises(ValueError):
+            AdaptiveRateLimiter(decrease=1)
+
+
+class TestRetry(unittest.TestCase):
+
+    def test_is_throttling(self):
+        self.assertTrue(is_throttling(throttling_error()))
+        self.assertTrue(is_throttling(throttling_error("throttlingException")))
+        self.assertFalse(is_throttling(throttling_error("ValidationException")))
+        self.assertFalse(is_throttling(RuntimeError("Throttling")))
+
+    def test_retries_throttled_calls(self):
+        limiter = fast_limiter()
+        func = mock.Mock(side_effect=[throttling_error(), response()])
+
+        result = call_with_retry(limiter, func, x=1, retry=NO_DELAY)
+
+        self.assertEqual(result, response())
+        self.assertEqual(func.call_count, 2)
+        func.assert_called_with(x=1)
+        self.assertEqual(limiter.throttles, 1)
+
+    def test_gives_up(self):
+        func = mock.Mock(side_effect=throttling_error())
+
+        with self.assertRaises(ClientError):
+            call_with_retry(fast_limiter(), func, retry=NO_DELAY)
+        self.assertEqual(func.call_count, 3)
+
+    def test_transient_errors_are_retried(self):
+        limiter = fast_limiter()
+        func = mock.Mock(
+            side_effect=[
+                EndpointConnectionError(endpoint_url="https://bedrock"),
+                throttling_error("ServiceUnavailableException"),
+                response(),
+            ]
+        )
+
+        self.assertEqual(call_with_retry(limiter, func, retry=NO_DELAY), response())
+        self.assertEqual(limiter.throttles, 0)
+
+    def test_other_errors_are_not_retried(self):
+        func = mock.Mock(side_effect=throttling_error("ValidationException"))
+
+        with self.assertRaises(ClientError):
+            call_with_retry(fast_limiter(), func, retry=NO_DELAY)
+        self.assertEqual(func.call_count, 1)
+
+    def test_shared_limiters(self):
+        self.addCleanup(RateLimiters.clear)
+        RateLimiters.configure(rate=5)
+
+        limiter = RateLimiters.get("model-a")
+
+        self.assertIs(RateLimiters.get("model-a"), limiter)
+        self.assertIsNot(RateLimiters.get("model-b"), limiter)
+        self.assertEqual(limiter.rate, 5)
+
+
+class TestInlineAgentRateLimit(unittest.IsolatedAsyncioTestCase):
+
+    async def test_throttled_invoke_is_retried(self):
+        errors = [throttling_error()]
+
+        def script(request):
+            if errors:
+                raise errors.pop()
+            return answer_turn("Hello")
+
+        limiter = fast_limiter()
+        client = FakeRuntimeClient(script=script)
+        agent = InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You are a friendly assistant.",
+            agent_name="MockAgent",
+            runtime_client=client,
+            sink=NullSink(),
+            rate_limiter=limiter,
+        )
+
+        with mock.patch("InlineAgent.rate_limit.random.uniform", return_value=0):
+            output = await agent.invoke(input_text="Hi")
+
+        self.assertEqual(output, "Hello")
+        self.assertEqual(len(client.requests), 2)
+        self.assertEqual(limiter.throttles, 1)
+
+    async def test_throttled_invoke_is_sent_once_per_attempt(self):
+        sends = []
+        session = boto3.Session(
+            region_name="us-east-1",
+            aws_access_key_id="FAKE",
+            aws_secret_access_key="FAKE",
+        )
+        agent = InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You are a friendly assistant who answers in one line.",
+            agent_name="MockAgent",
+            rate_limiter=fast_limiter(),
+        )
+        agent._session = session
+
+        with mock.patch.dict(ClientPool._clients, clear=True):
+            client = agent.bedrock_agent_runtime
+            client.meta.events.register("before-send", throttle_every_send(sends))
+            with mock.patch("InlineAgent.rate_limit.random.uniform", return_value=0):
+                with self.assertRaises(ClientError):
+                    [event async for event in agent.stream(input_text="Hi")]
+
+        # botocore does not retry on top of the rate limiter.
+        self.assertEqual(len(sends), DEFAULT_RETRY_POLICY.max_attempts)
+
+    def test_agents_share_the_model_limiter(self):
+        self.addCleanup(RateLimiters.clear)
+        agents = [
+            InlineAgent(
+                foundation_model="MOCK_ID",
+                instruction="You are a friendly assistant.",
+                agent_name=f"MockAgent{i}",
+                runtime_client=FakeRuntimeClient(),
+            )
+            for i in range(2)
+        ]
+
+        self.assertIs(agents[0].limiter, agents[1].limiter)
+        self.assertIs(agents[0].limiter, RateLimiters.get("MOCK_ID"))
+
+
+if __name__ == "__main__":
+    unittest.main()
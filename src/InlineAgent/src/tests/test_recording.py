@@ -0,0 +1,162 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+from unittest import mock
+
+from InlineAgent.agent import InlineAgent
+from InlineAgent.recording import (
+    RecordingRuntimeClient,
+    ReplayRuntimeClient,
+    SessionRecorder,
+)
+from InlineAgent.testing import FakeRuntimeClient, answer_turn, files
+from InlineAgent.types import FilesEvent, TextChunkEvent, TraceEvent
+
+
+class BrokenStreamClient:
+    def invoke_agent(self, **kwargs):
+        def completion():
+            yield {"chunk": {"bytes": b"Hel"}}
+            raise ConnectionError("stream reset")
+
+        return {
+            "completion": completion(),
+            "ResponseMetadata": {"RequestId": "MOCKID", "RetryAttempts": 0},
+        }
+
+
+class TestRecording(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "sessions.jsonl")
+
+    def create_agent(self, runtime_client, record_path=None):
+        return InlineAgent(
+            foundation_model="MOCK_ID",
+            instruction="You are a friendly assistant.",
+            agent_name="MockAgent",
+            runtime_client=runtime_client,
+            record_path=record_path,
+        )
+
+    async def stream(self, agent, session_id="S1"):
+        return [
+            event
+            async for event in agent.stream(input_text="Hi", session_id=session_id)
+        ]
+
+    async def test_record_and_replay(self):
+        script = [answer_turn("Hello world", chunks=2) + [files(("a.txt", b"\x00a"))]]
+        recorded_agent = self.create_agent(
+            FakeRuntimeClient(script=script, latency=0.1), record_path=self.path
+        )
+        recorded = await self.stream(recorded_agent)
+
+        records = SessionRecorder.read(self.path)
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["operation"], "invoke_inline_agent")
+        self.assertEqual(records[0]["params"]["inputText"], "Hi")
+        self.assertEqual(records[0]["params"]["foundationModel"], "MOCK_ID")
+        self.assertGreaterEqual(records[0]["first_byte"], 0.1)
+        trace = records[0]["events"][0][1]["trace"]
+        self.assertIsInstance(trace["eventTime"], datetime)
+
+        replay = ReplayRuntimeClient(self.path)
+        start = time.perf_counter()
+        replayed = await self.stream(self.create_agent(replay), session_id="S2")
+
+        self.assertGreaterEqual(time.perf_counter() - start, 0.1)
+        self.assertEqual(
+            [type(event) for event in replayed], [type(event) for event in recorded]
+        )
+        self.assertEqual(
+            "".join(e.text for e in replayed if isinstance(e, TextChunkEvent)),
+            "Hello world",
+        )
+        self.assertEqual(
+            [e for e in replayed if isinstance(e, FilesEvent)][0].files[0]["bytes"],
+            b"\x00a",
+        )
+        self.assertEqual(
+            [e for e in replayed if isinstance(e, TraceEvent)][0].trace["sessionId"],
+            "S2",
+        )
+
+    async def test_replay_speed_and_repeat(self):
+        recorded_agent = self.create_agent(
+            FakeRuntimeClient(script=[answer_turn("Hi")], latency=0.2),
+            record_path=self.path,
+        )
+        await self.stream(recorded_agent)
+
+        replay = ReplayRuntimeClient(self.path, speed=None, repeat=True)
+        agent = self.create_agent(replay)
+        start = time.perf_counter()
+        for _ in range(3):
+            await self.stream(agent)
+
+        self.assertLess(time.perf_counter() - start, 0.2)
+        self.assertEqual(len(replay.requests), 3)
+
+        with self.assertRaisesRegex(RuntimeError, "No recorded invoke_agent"):
+            replay.invoke_agent(inputText="Hi", sessionId="S1")
+
+    def test_stream_error_is_recorded(self):
+        path = self.path + ".gz"
+        client = RecordingRuntimeClient(BrokenStreamClient(), path=path)
+
+        with self.assertRaises(ConnectionError):
+            list(client.invoke_agent(inputText="Hi", sessionId="S1")["completion"])
+
+        records = SessionRecorder.read(path)
+        self.assertEqual(records[0]["error"], "ConnectionError: stream reset")
+
+        replay = ReplayRuntimeClient(records, speed=None)
+        events = replay.invoke_agent(inputText="Hi", sessionId="S1")["completion"]
+        self.assertEqual(next(events), {"chunk": {"bytes": b"Hel"}})
+        with self.assertRaisesRegex(RuntimeError, "stream reset"):
+            next(events)
+
+    def test_unread_stream_is_recorded(self):
+        client = RecordingRuntimeClient(
+            FakeRuntimeClient(script=[answer_turn("Hi")]), path=self.path
+        )
+
+        response = client.invoke_inline_agent(inputText="Hi", sessionId="S1")
+
+        records = SessionRecorder.read(self.path)
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["params"]["inputText"], "Hi")
+        self.assertEqual(records[0]["events"], [])
+        self.assertNotIn("duration", records[0])
+
+        list(response["completion"])
+        records = SessionRecorder.read(self.path)
+        self.assertEqual(len(records[0]["events"]), len(answer_turn("Hi")))
+        self.assertIn("duration", records[0])
+
+    def test_events_are_written_off_the_calling_thread(self):
+        client = RecordingRuntimeClient(
+            FakeRuntimeClient(script=[answer_turn("Hi")]), path=self.path
+        )
+        writers = set()
+        append = SessionRecorder._append
+
+        def record_thread(recorder, data):
+            writers.add(threading.current_thread().name)
+            append(recorder, data)
+
+        with mock.patch.object(SessionRecorder, "_append", record_thread):
+            list(client.invoke_inline_agent(inputText="Hi")["completion"])
+            client.recorder.flush()
+
+        self.assertEqual(writers, {"InlineAgent-session-recorder"})
+
+
+if __name__ == "__main__":
+    unittest.main()
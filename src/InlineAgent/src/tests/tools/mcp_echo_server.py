@@ -0,0 +1,23 @@
+import asyncio
+import os
+
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("Echo", log_level="WARNING")
+
+
+@mcp.tool()
+async def echo(text: str) -> str:
+    """Echo the text back after a short delay."""
+    await asyncio.sleep(0.2)
+    return text
+
+
+@mcp.tool()
+def pid() -> str:
+    """Process id of the server."""
+    return str(os.getpid())
+
+
+if __name__ == "__main__":
+    mcp.run()
@@ -0,0 +1,144 @@
+import asyncio
+import os
+import signal
+import sys
+import time
+import unittest
+from unittest import mock
+
+from mcp import ClientSession, StdioServerParameters
+
+from InlineAgent.tools import MCPPool, MCPStdio
+
+server_params = StdioServerParameters(
+    command=sys.executable,
+    args=[os.path.join(os.path.dirname(__file__), "mcp_echo_server.py")],
+)
+
+
+class TestMCPStdio(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.list_tools = mock.patch.object(
+            ClientSession,
+            "list_tools",
+            autospec=True,
+            side_effect=ClientSession.list_tools,
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+        with mock.patch("builtins.print"):
+            self.client = await MCPStdio.create(server_params=server_params)
+
+    async def asyncTearDown(self):
+        await self.client.cleanup()
+        await MCPPool.close_all()
+
+    async def test_create_lists_tools_once(self):
+        self.assertEqual(self.list_tools.call_count, 1)
+        self.assertEqual(set(self.client.callable_tools), {"echo", "pid"})
+        self.assertEqual(
+            [
+                function["name"]
+                for function in self.client.function_schema["functions"]
+            ],
+            ["echo", "pid"],
+        )
+        self.assertGreater(self.client.stats.startup_seconds, 0)
+
+    async def test_concurrent_calls_share_session(self):
+        echo = self.client.callable_tools["echo"]
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*[echo(text=str(n)) for n in range(10)])
+
+        self.assertLess(time.perf_counter() - start, 1.5)
+        self.assertEqual(results, [str(n) for n in range(10)])
+        self.assertEqual(self.client.stats.calls, 10)
+        self.assertGreater(self.client.stats.latency(99), 0.2)
+
+    async def test_reconnects_dead_server(self):
+        pid = int(await self.client.callable_tools["pid"]())
+        os.kill(pid, signal.SIGKILL)
+        await asyncio.sleep(0.2)
+
+        self.assertEqual(await self.client.callable_tools["echo"](text="back"), "back")
+        self.assertEqual(self.client.stats.reconnects, 1)
+        self.assertNotEqual(int(await self.client.callable_tools["pid"]()), pid)
+        self.assertTrue(await self.client.ping())
+
+    async def test_pool_shares_server(self):
+        with mock.patch("builtins.print"):
+            servers = await asyncio.gather(
+                MCPPool.stdio(server_params=server_params),
+                MCPPool.stdio(server_params=server_params),
+            )
+            other = await MCPPool.stdio(
+                server_params=server_params, tools_to_use={"echo"}
+            )
+
+        self.assertIs(servers[0], servers[1])
+        self.assertIsNot(servers[0], other)
+        self.assertEqual(set(other.callable_tools), {"echo"})
+
+    async def test_pool_counts_holders(self):
+        with mock.patch("builtins.print"):
+            first = await MCPPool.stdio(server_params=server_params)
+            second = await MCPPool.stdio(server_params=server_params)
+
+        await first.cleanup()
+        self.assertEqual(await second.callable_tools["echo"](text="still"), "still")
+
+        await second.cleanup()
+        self.assertIsNone(second.session)
+        with mock.patch("builtins.print"):
+            third = await MCPPool.stdio(server_params=server_params)
+
+        self.assertIsNot(third, second)
+        self.assertEqual(await third.callable_tools["echo"](text="new"), "new")
+        await third.cleanup()
+
+    async def test_close_respects_other_holders(self):
+        with mock.patch("builtins.print"):
+            first = await MCPPool.stdio(server_params=server_params)
+            second = await MCPPool.stdio(server_params=server_params)
+
+        await first.close()
+        self.assertEqual(await second.callable_tools["echo"](text="still"), "still")
+        self.assertEqual(second.stats.reconnects, 0)
+
+        await second.close()
+        self.assertIsNone(second.session)
+        self.assertEqual(MCPPool.stats(), {})
+
+    async def test_call_after_close_reconnects(self):
+        await self.client.close()
+
+        self.assertEqual(await self.client.callable_tools["echo"](text="back"), "back")
+        self.assertEqual(self.client.stats.reconnects, 1)
+
+
+class TestMCPPoolLoops(unittest.TestCase):
+
+    def test_each_event_loop_gets_its_own_server(self):
+        async def echo():
+            with mock.patch("builtins.print"):
+                server = await MCPPool.stdio(server_params=server_params)
+            # The server is not released, so it outlives its loop.
+            return server, await server.callable_tools["echo"](text="hi")
+
+        async def echo_and_close():
+            try:
+                return await echo()
+            finally:
+                await MCPPool.close_all()
+
+        first, first_text = asyncio.run(echo())
+        second, second_text = asyncio.run(echo_and_close())
+
+        self.assertIsNot(first, second)
+        self.assertEqual([first_text, second_text], ["hi", "hi"])
+        self.assertEqual(len(MCPPool._servers), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -135,18 +135,45 @@ DEFAULT_AGENT_IAM_POLICY = {
 class AgentsForAmazonBedrock:
     """Provides an easy to use wrapper for Agents for Amazon Bedrock."""
 
-    def __init__(self):
-        """Constructs an instance."""
+    def __init__(self, record_path: str = None):
+        """Constructs an instance.
+
+        Args:
+            record_path (str, optional): Record every invoke_agent and invoke_inline_agent
+                call to this file for later replay. Defaults to the INLINE_AGENT_RECORD
+                environment variable; nothing is recorded when neither is set.
+        """
         self._boto_session = Session()
         self._region = self._boto_session.region_name
         self._account_id = boto3.client("sts").get_caller_identity()["Account"]
 
         self._bedrock_agent_client = boto3.client("bedrock-agent")
 
-        long_invoke_time_config = Config(read_timeout=600)
+        # With the InlineAgent package installed, runtime calls go through its
+        # shared rate limiter, which is then their only retry layer.
+        try:
+            from InlineAgent import rate_limit
+        except ImportError:
+            rate_limit = None
+        self._rate_limit = rate_limit
+        long_invoke_time_config = Config(
+            read_timeout=600,
+            retries=dict(rate_limit.BOTOCORE_RETRIES) if rate_limit else None,
+        )
         self._bedrock_agent_runtime_client = boto3.client(
             "bedrock-agent-runtime", config=long_invoke_time_config
         )
+        record_path = record_path or os.environ.get("INLINE_AGENT_RECORD")
+        if record_path:
+            try:
+                from InlineAgent.recording import RecordingRuntimeClient
+            except ImportError as e:
+                raise ImportError(
+                    "Recording needs the InlineAgent package: pip install -e src/InlineAgent"
+                ) from e
+            self._bedrock_agent_runtime_client = RecordingRuntimeClient(
+                self._bedrock_agent_runtime_client, path=record_path
+            )
 
         self._sts_client = boto3.client("sts")
         self._iam_client = boto3.client("iam")
@@ -161,6 +188,32 @@ class AgentsForAmazonBedrock:
         """Returns the region for this instance."""
         return self._region
 
+    def _call_runtime(self, operation: str, limiter_key: str, **request_params):
+        """Calls a bedrock-agent-runtime operation through the process-wide rate
+        limiter of limiter_key (a model, inference profile or agent ID), shared
+        with every InlineAgent in the process. Throttled and failed calls are
+        retried with jittered backoff. Without the InlineAgent package the call
+        is made directly, with botocore's own retries.
+
+        Args:
+            operation (str): Name of the runtime client method, e.g. "invoke_agent"
+            limiter_key (str): Key of the rate limiter to use
+
+        Returns:
+            dict: The response of the operation
+        """
+        if not limiter_key:
+            # Calls without a key would all share one limiter.
+            raise ValueError(
+                f"{operation} needs a model, inference profile or agent ID"
+            )
+        call = getattr(self._bedrock_agent_runtime_client, operation)
+        if self._rate_limit is None:
+            return call(**request_params)
+        return self._rate_limit.call_with_retry(
+            self._rate_limit.RateLimiters.get(limiter_key), call, **request_params
+        )
+
     def _create_lambda_iam_role(
         self,
         agent_name: str,
@@ -1430,8 +1483,11 @@ class AgentsForAmazonBedrock:
 
         _time_before_call = datetime.datetime.now()
 
-        _agent_resp = self._bedrock_agent_runtime_client.invoke_inline_agent(
-            **request_params
+        # foundationModel holds the model or inference profile ID.
+        _agent_resp = self._call_runtime(
+            "invoke_inline_agent",
+            request_params.get("foundationModel"),
+            **request_params,
         )
 
         if _agent_resp["ResponseMetadata"]["RetryAttempts"] > 0:
@@ -2033,7 +2089,9 @@ class AgentsForAmazonBedrock:
 
         _time_before_call = datetime.datetime.now()
 
-        _agent_resp = self._bedrock_agent_runtime_client.invoke_agent(
+        _agent_resp = self._call_runtime(
+            "invoke_agent",
+            agent_id,
             inputText=input_text,
             agentId=agent_id,
             agentAliasId=agent_alias_id,
@@ -2624,7 +2682,9 @@ class AgentsForAmazonBedrock:
             str: The answer from the agent.
         """
         if function_call is not None:
-            _agent_resp = self._bedrock_agent_runtime_client.invoke_agent(
+            _agent_resp = self._call_runtime(
+                "invoke_agent",
+                agent_id,
                 inputText=input_text,
                 agentId=agent_id,
                 agentAliasId=agent_alias_id,
@@ -2651,7 +2711,9 @@ class AgentsForAmazonBedrock:
                 endSession=end_session,
             )
         else:
-            _agent_resp = self._bedrock_agent_runtime_client.invoke_agent(
+            _agent_resp = self._call_runtime(
+                "invoke_agent",
+                agent_id,
                 inputText=input_text,
                 agentId=agent_id,
                 agentAliasId=agent_alias_id,